@@ -0,0 +1,433 @@
+"""
+Anvil region file (.mca) analysis and pruning.
+
+A region file starts with an 8 KiB header: 1024 big-endian location entries
+(3-byte sector offset + 1-byte sector count) followed by 1024 timestamps.
+Chunk payloads live in 4 KiB sectors after the header, each prefixed with a
+4-byte length and a 1-byte compression type.
+"""
+import gzip
+import math
+import mmap
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional, List
+
+import slp
+
+SECTOR_SIZE = 4096
+HEADER_SIZE = 2 * SECTOR_SIZE
+CHUNKS_PER_REGION = 1024
+
+# 20 ticks per second; chunks inhabited for less than a minute are "rarely visited" by default
+TICKS_PER_SECOND = 20
+DEFAULT_RARE_THRESHOLD_TICKS = 60 * TICKS_PER_SECOND
+
+# Sibling folders that share the region file layout and must be pruned together
+COMPANION_FOLDERS = ("entities", "poi")
+
+# Why prune_blocker() refuses a world
+WORLD_LOCKED = "locked"
+SERVER_ONLINE = "online"
+
+_COMPRESSION_GZIP = 1
+_COMPRESSION_ZLIB = 2
+_COMPRESSION_NONE = 3
+_EXTERNAL_FLAG = 0x80
+
+# NBT tag ids
+_TAG_END, _TAG_BYTE, _TAG_SHORT, _TAG_INT, _TAG_LONG = 0, 1, 2, 3, 4
+_TAG_FLOAT, _TAG_DOUBLE, _TAG_BYTE_ARRAY, _TAG_STRING, _TAG_LIST = 5, 6, 7, 8, 9
+_TAG_COMPOUND, _TAG_INT_ARRAY, _TAG_LONG_ARRAY = 10, 11, 12
+_FIXED_SIZES = {_TAG_BYTE: 1, _TAG_SHORT: 2, _TAG_INT: 4, _TAG_LONG: 8, _TAG_FLOAT: 4, _TAG_DOUBLE: 8}
+
+
+@dataclass
+class RegionStats:
+    path: str
+    chunks: int = 0
+    used_sectors: int = 0
+    file_sectors: int = 0
+    file_size: int = 0
+    rarely_visited: int = 0
+    unreadable: int = 0
+
+    @property
+    def free_sectors(self) -> int:
+        return max(0, self.file_sectors - self.used_sectors)
+
+    @property
+    def fragmentation(self) -> float:
+        return self.free_sectors / self.file_sectors if self.file_sectors else 0.0
+
+
+@dataclass
+class DimensionReport:
+    name: str
+    region_dir: str
+    files: List[RegionStats] = field(default_factory=list)
+
+    def total(self, attr: str) -> int:
+        return sum(getattr(f, attr) for f in self.files)
+
+    @property
+    def fragmentation(self) -> float:
+        file_sectors = self.total("file_sectors")
+        return self.total("free_sectors") / file_sectors if file_sectors else 0.0
+
+
+def parse_region_coords(filename: str) -> Optional[tuple[int, int]]:
+    """Returns (rx, rz) for a name like 'r.-1.2.mca', or None."""
+    parts = filename.split(".")
+    if len(parts) != 4 or parts[0] != "r" or parts[3] != "mca":
+        return None
+    try:
+        return int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+def read_header(buf) -> list[tuple[int, int, int]]:
+    """Returns (offset_sectors, sector_count, timestamp) for each of the 1024 chunk slots."""
+    entries = []
+    for i in range(CHUNKS_PER_REGION):
+        loc = buf[i * 4:i * 4 + 4]
+        offset = (loc[0] << 16) | (loc[1] << 8) | loc[2]
+        timestamp = struct.unpack_from(">I", buf, SECTOR_SIZE + i * 4)[0]
+        entries.append((offset, loc[3], timestamp))
+    return entries
+
+
+def _skip_payload(data: bytes, pos: int, tag: int) -> int:
+    if tag in _FIXED_SIZES:
+        return pos + _FIXED_SIZES[tag]
+    if tag == _TAG_BYTE_ARRAY:
+        return pos + 4 + struct.unpack_from(">i", data, pos)[0]
+    if tag == _TAG_STRING:
+        return pos + 2 + struct.unpack_from(">H", data, pos)[0]
+    if tag == _TAG_INT_ARRAY:
+        return pos + 4 + 4 * struct.unpack_from(">i", data, pos)[0]
+    if tag == _TAG_LONG_ARRAY:
+        return pos + 4 + 8 * struct.unpack_from(">i", data, pos)[0]
+    if tag == _TAG_LIST:
+        item_tag = data[pos]
+        count = struct.unpack_from(">i", data, pos + 1)[0]
+        pos += 5
+        if item_tag in _FIXED_SIZES:
+            return pos + _FIXED_SIZES[item_tag] * max(count, 0)
+        for _ in range(count):
+            pos = _skip_payload(data, pos, item_tag)
+        return pos
+    if tag == _TAG_COMPOUND:
+        while True:
+            child = data[pos]
+            pos += 1
+            if child == _TAG_END:
+                return pos
+            pos += 2 + struct.unpack_from(">H", data, pos)[0]
+            pos = _skip_payload(data, pos, child)
+    raise ValueError(f"Unknown NBT tag {tag}")
+
+
+def _find_inhabited_time(data: bytes, pos: int, depth: int = 0) -> Optional[int]:
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        if tag == _TAG_END:
+            return None
+        name_len = struct.unpack_from(">H", data, pos)[0]
+        name = data[pos + 2:pos + 2 + name_len]
+        pos += 2 + name_len
+        if tag == _TAG_LONG and name == b"InhabitedTime":
+            return struct.unpack_from(">q", data, pos)[0]
+        if tag == _TAG_COMPOUND and name == b"Level" and depth == 0:
+            # Pre-1.18 chunks nest everything under "Level"
+            return _find_inhabited_time(data, pos, depth + 1)
+        pos = _skip_payload(data, pos, tag)
+    return None
+
+
+def read_inhabited_time(nbt: bytes) -> Optional[int]:
+    """Extracts InhabitedTime (in ticks) from an uncompressed chunk NBT blob."""
+    if not nbt or nbt[0] != _TAG_COMPOUND:
+        return None
+    name_len = struct.unpack_from(">H", nbt, 1)[0]
+    try:
+        return _find_inhabited_time(nbt, 3 + name_len)
+    except (struct.error, IndexError, ValueError):
+        return None
+
+
+def _decompress(compression: int, payload: bytes) -> Optional[bytes]:
+    if compression == _COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == _COMPRESSION_GZIP:
+        return gzip.decompress(payload)
+    if compression == _COMPRESSION_NONE:
+        return payload
+    return None  # LZ4 (1.20.5+) and custom codecs are not supported
+
+
+def _chunk_nbt(buf, region_path: str, index: int, offset: int) -> Optional[bytes]:
+    start = offset * SECTOR_SIZE
+    length = struct.unpack_from(">I", buf, start)[0]
+    compression = buf[start + 4]
+    if compression & _EXTERNAL_FLAG:
+        external = _external_chunk_path(region_path, index)
+        if not external or not os.path.exists(external):
+            return None
+        with open(external, "rb") as f:
+            payload = f.read()
+        compression &= ~_EXTERNAL_FLAG
+    else:
+        payload = bytes(buf[start + 5:start + 4 + length])
+    return _decompress(compression, payload)
+
+
+def _external_chunk_path(region_path: str, index: int) -> Optional[str]:
+    coords = parse_region_coords(os.path.basename(region_path))
+    if not coords:
+        return None
+    cx, cz = coords[0] * 32 + index % 32, coords[1] * 32 + index // 32
+    return os.path.join(os.path.dirname(region_path), f"c.{cx}.{cz}.mcc")
+
+
+def chunk_inhabited_times(region_path: str) -> dict[int, Optional[int]]:
+    """Maps each present chunk slot to its InhabitedTime (None if it can't be decoded)."""
+    result: dict[int, Optional[int]] = {}
+    size = os.path.getsize(region_path)
+    if size < HEADER_SIZE:
+        return result
+    with open(region_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        for index, (offset, count, _) in enumerate(read_header(buf)):
+            if offset == 0 or count == 0:
+                continue
+            if (offset + count) * SECTOR_SIZE > size:
+                result[index] = None
+                continue
+            try:
+                result[index] = read_inhabited_time(_chunk_nbt(buf, region_path, index, offset) or b"")
+            except (zlib.error, OSError, EOFError, struct.error):
+                result[index] = None
+    return result
+
+
+def analyze_region_file(region_path: str, rare_threshold: Optional[int] = DEFAULT_RARE_THRESHOLD_TICKS) -> RegionStats:
+    """Reads the header of one region file (and, if a threshold is given, each chunk's InhabitedTime)."""
+    stats = RegionStats(path=region_path)
+    stats.file_size = os.path.getsize(region_path)
+    stats.file_sectors = math.ceil(stats.file_size / SECTOR_SIZE)
+    if stats.file_size < HEADER_SIZE:
+        return stats
+    with open(region_path, "rb") as f, mmap.mmap(f.fileno(), HEADER_SIZE, access=mmap.ACCESS_READ) as buf:
+        header = read_header(buf)
+    stats.used_sectors = 2  # header
+    for offset, count, _ in header:
+        if offset and count:
+            stats.chunks += 1
+            stats.used_sectors += count
+    if rare_threshold is not None and stats.chunks:
+        for inhabited in chunk_inhabited_times(region_path).values():
+            if inhabited is None:
+                stats.unreadable += 1
+            elif inhabited < rare_threshold:
+                stats.rarely_visited += 1
+    return stats
+
+
+def find_world_dirs(server_dir: str) -> list[str]:
+    """Every world folder (level.dat holder) directly inside a server directory."""
+    try:
+        entries = sorted(os.listdir(server_dir))
+    except OSError:
+        return []
+    return [os.path.join(server_dir, entry) for entry in entries
+            if os.path.isfile(os.path.join(server_dir, entry, "level.dat"))]
+
+
+def find_dimension_region_dirs(server_dir: str) -> dict[str, str]:
+    """Finds every 'region' folder of every world (level.dat holder) inside a server directory."""
+    found = {}
+    for world_dir in find_world_dirs(server_dir):
+        for root, dirs, _ in os.walk(world_dir):
+            if "region" in dirs:
+                region_dir = os.path.join(root, "region")
+                found[os.path.relpath(root, server_dir).replace(os.sep, "/")] = region_dir
+            # Never descend into chunk storage folders themselves
+            dirs[:] = [d for d in dirs if d not in ("region",) + COMPANION_FOLDERS]
+    return found
+
+
+def _region_files(region_dir: str) -> list[str]:
+    try:
+        return sorted(os.path.join(region_dir, f) for f in os.listdir(region_dir) if parse_region_coords(f))
+    except OSError:
+        return []
+
+
+def analyze_world(server_dir: str, rare_threshold: Optional[int] = DEFAULT_RARE_THRESHOLD_TICKS,
+                  max_workers: Optional[int] = None) -> List[DimensionReport]:
+    """Analyzes the region files of every dimension in parallel."""
+    reports = [DimensionReport(name, region_dir) for name, region_dir in find_dimension_region_dirs(server_dir).items()]
+    jobs = [(report, path) for report in reports for path in _region_files(report.region_dir)]
+    with ThreadPoolExecutor(max_workers=max_workers or min(8, (os.cpu_count() or 2))) as pool:
+        results = pool.map(lambda job: analyze_region_file(job[1], rare_threshold), jobs)
+        for (report, _), stats in zip(jobs, results):
+            report.files.append(stats)
+    return reports
+
+
+def rewrite_region_file(region_path: str, keep: Callable[[int], bool], dry_run: bool = False) -> tuple[int, int]:
+    """
+    Rewrites a region file compactly, keeping only the chunk slots for which keep(index) is true.
+    Returns (chunks_removed, bytes_saved). The file is replaced atomically, or deleted if empty.
+    With dry_run nothing is written and the result is what a real run would report.
+    """
+    old_size = os.path.getsize(region_path)
+    if old_size < HEADER_SIZE:
+        return 0, 0
+    removed = 0
+    kept_chunks: list[tuple[int, int, bytes]] = []
+    kept_bytes = 0
+    with open(region_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        for index, (offset, count, timestamp) in enumerate(read_header(buf)):
+            if offset == 0 or count == 0 or (offset + count) * SECTOR_SIZE > old_size:
+                continue
+            if not keep(index):
+                removed += 1
+                if not dry_run and buf[offset * SECTOR_SIZE + 4] & _EXTERNAL_FLAG:
+                    external = _external_chunk_path(region_path, index)
+                    if external and os.path.exists(external):
+                        os.remove(external)
+                continue
+            start = offset * SECTOR_SIZE
+            length = struct.unpack_from(">I", buf, start)[0]
+            kept_bytes += math.ceil((4 + length) / SECTOR_SIZE) * SECTOR_SIZE
+            if not dry_run:
+                kept_chunks.append((index, timestamp, bytes(buf[start:start + 4 + length])))
+
+    if removed == 0:
+        return 0, 0
+    if dry_run:
+        return removed, old_size - HEADER_SIZE - kept_bytes if kept_bytes else old_size
+    if not kept_chunks:
+        os.remove(region_path)
+        return removed, old_size
+
+    header = bytearray(HEADER_SIZE)
+    body = bytearray()
+    next_sector = 2
+    for index, timestamp, blob in kept_chunks:
+        sectors = math.ceil(len(blob) / SECTOR_SIZE)
+        header[index * 4:index * 4 + 4] = bytes([(next_sector >> 16) & 0xFF, (next_sector >> 8) & 0xFF, next_sector & 0xFF, sectors])
+        struct.pack_into(">I", header, SECTOR_SIZE + index * 4, timestamp)
+        body += blob + bytes(sectors * SECTOR_SIZE - len(blob))
+        next_sector += sectors
+
+    tmp_path = region_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, region_path)
+    return removed, old_size - len(header) - len(body)
+
+
+def _session_lock_held(path: str) -> bool:
+    try:
+        f = open(path, "r+b")
+    except PermissionError:
+        return True  # Windows refuses to open a file another process has locked
+    except OSError:
+        return False
+    with f:
+        try:
+            # The server keeps session.lock locked (FileChannel.tryLock) for as long as the world is loaded
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.lockf(f, fcntl.LOCK_UN)
+        except OSError:
+            return True
+    return False
+
+
+def world_in_use(server_dir: str) -> bool:
+    """True if a server process (started by the panel or not) holds any world's session.lock."""
+    return any(_session_lock_held(os.path.join(world_dir, "session.lock")) for world_dir in find_world_dirs(server_dir))
+
+
+def prune_blocker(server_dir: str, servers_root: str, timeout: float = 1.0) -> Optional[str]:
+    """
+    WORLD_LOCKED if a process holds a world's session.lock, SERVER_ONLINE if the instance
+    still answers a status ping on its server-port, else None (safe to prune).
+    """
+    if world_in_use(server_dir):
+        return WORLD_LOCKED
+    status = slp.probe_instance(servers_root, os.path.relpath(server_dir, servers_root), timeout=timeout)
+    if status is not None and status.online:
+        return SERVER_ONLINE
+    return None
+
+
+def _chunk_center_blocks(region_path: str, index: int) -> Optional[tuple[int, int]]:
+    coords = parse_region_coords(os.path.basename(region_path))
+    if not coords:
+        return None
+    cx, cz = coords[0] * 32 + index % 32, coords[1] * 32 + index // 32
+    return cx * 16 + 8, cz * 16 + 8
+
+
+def prune_world(server_dir: str, min_inhabited: Optional[int] = None, radius: Optional[int] = None,
+                center: tuple[int, int] = (0, 0), progress: Optional[Callable[[int, int], None]] = None,
+                dry_run: bool = False) -> dict[str, int]:
+    """
+    Drops chunks whose InhabitedTime is below min_inhabited ticks, or whose center lies more than
+    radius blocks from center. Chunks with an undecodable InhabitedTime are kept. Matching
+    entities/ and poi/ chunks are removed alongside. Must only be called while the server is stopped.
+    With dry_run the same summary is computed without changing any file.
+    """
+    if min_inhabited is None and radius is None:
+        raise ValueError("Nothing to prune: give min_inhabited and/or radius")
+    summary = {"files": 0, "chunks_removed": 0, "bytes_saved": 0}
+    jobs = [path for region_dir in find_dimension_region_dirs(server_dir).values() for path in _region_files(region_dir)]
+
+    def prune_one(region_path: str) -> tuple[int, int]:
+        inhabited = chunk_inhabited_times(region_path) if min_inhabited is not None else {}
+
+        def keep(index: int) -> bool:
+            if radius is not None:
+                pos = _chunk_center_blocks(region_path, index)
+                if pos and (pos[0] - center[0]) ** 2 + (pos[1] - center[1]) ** 2 > radius * radius:
+                    return False
+            if min_inhabited is not None:
+                value = inhabited.get(index)
+                if value is not None and value < min_inhabited:
+                    return False
+            return True
+
+        removed, saved = rewrite_region_file(region_path, keep, dry_run)
+        if removed:
+            dimension_dir = os.path.dirname(os.path.dirname(region_path))
+            for folder in COMPANION_FOLDERS:
+                companion = os.path.join(dimension_dir, folder, os.path.basename(region_path))
+                if os.path.exists(companion):
+                    saved += rewrite_region_file(companion, keep, dry_run)[1]
+        return removed, saved
+
+    with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 2))) as pool:
+        for done, (removed, saved) in enumerate(pool.map(prune_one, jobs), start=1):
+            summary["files"] += 1
+            summary["chunks_removed"] += removed
+            summary["bytes_saved"] += saved
+            if progress:
+                progress(done, len(jobs))
+    return summary
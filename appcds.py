@@ -0,0 +1,134 @@
+"""
+AppCDS "fast start" for server instances.
+
+A training boot runs the server with -XX:ArchiveClassesAtExit, which makes the
+JVM dump every class it loaded into a dynamic CDS archive when it exits
+cleanly. Later boots map that archive with -XX:SharedArchiveFile and skip most
+class loading and verification.
+
+The archive is only valid for the exact server jar, Java runtime, plugin/mod
+set and GC it was built with, so a fingerprint of those is stored next to it.
+Any difference invalidates the archive and the next boot trains again. (A
+mismatched archive is merely ignored by the JVM, so a stale one would silently
+waste the feature rather than break the server.)
+
+Dynamic archives need Java 13+.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Any
+
+ARCHIVE_DIR = ".cds"
+ARCHIVE_FILE = "server.jsa"
+FINGERPRINT_FILE = "fingerprint.json"
+MIN_JAVA = 13
+PLUGIN_DIRS = ("plugins", "mods")
+
+USE = "use"
+TRAIN = "train"
+UNSUPPORTED = "unsupported"
+
+
+@dataclass
+class CdsPlan:
+    mode: str  # USE | TRAIN | UNSUPPORTED
+    args: list[str] = field(default_factory=list)
+    reason: str = ""
+    fingerprint: dict[str, Any] = field(default_factory=dict)
+
+
+def archive_paths(server_dir: str) -> tuple[str, str]:
+    base = os.path.abspath(os.path.join(server_dir, ARCHIVE_DIR))
+    return os.path.join(base, ARCHIVE_FILE), os.path.join(base, FINGERPRINT_FILE)
+
+
+def _file_signature(path: str) -> Optional[list[Any]]:
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    except OSError:
+        return None
+
+
+def fingerprint(server_dir: str, jar: str, java_path: str, java_version: str, jvm_args: list[str]) -> dict[str, Any]:
+    """Everything the archive depends on: jar, JVM binary, plugin/mod jars and GC selection."""
+    plugins = {}
+    for folder in PLUGIN_DIRS:
+        directory = os.path.join(server_dir, folder)
+        try:
+            names = sorted(n for n in os.listdir(directory) if n.endswith(".jar"))
+        except OSError:
+            continue
+        for name in names:
+            plugins[f"{folder}/{name}"] = _file_signature(os.path.join(directory, name))
+    return {
+        # Absolute path: the JVM also checks the classpath, so a copied instance needs its own archive
+        "jar": [os.path.abspath(os.path.join(server_dir, jar)), _file_signature(os.path.join(server_dir, jar))],
+        "java": [os.path.realpath(java_path), java_version, _file_signature(os.path.realpath(java_path))],
+        "plugins": plugins,
+        "gc": sorted(a for a in jvm_args if a.startswith("-XX:+Use") and a.endswith("GC")),
+    }
+
+
+def _diff(old: dict[str, Any], new: dict[str, Any]) -> str:
+    if old.get("jar") != new["jar"]:
+        return "服务器核心已更改"
+    if old.get("java") != new["java"]:
+        return "Java 运行时已更改"
+    if old.get("plugins") != new["plugins"]:
+        return "插件/模组已更改"
+    if old.get("gc") != new["gc"]:
+        return "GC 设置已更改"
+    return ""
+
+
+def invalidate(server_dir: str) -> None:
+    for path in archive_paths(server_dir):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def plan(server_dir: str, jar: str, java_path: str, java_version: Optional[str], java_major: Optional[int],
+         jvm_args: list[str]) -> CdsPlan:
+    """Decides whether this boot uses the archive or trains a new one, and returns the JVM arguments for it."""
+    if not java_major or java_major < MIN_JAVA:
+        return CdsPlan(UNSUPPORTED, reason=f"需要 Java {MIN_JAVA}+ (当前: {java_major or '未知'})")
+    if any(a.startswith(("-XX:SharedArchiveFile", "-XX:ArchiveClassesAtExit", "-Xshare:off")) for a in jvm_args):
+        return CdsPlan(UNSUPPORTED, reason="JVM 参数中已手动配置了 CDS")
+    archive, fingerprint_path = archive_paths(server_dir)
+    current = fingerprint(server_dir, jar, java_path, java_version or "", jvm_args)
+    reason = "尚未生成归档"
+    if os.path.isfile(archive) and os.path.getsize(archive) > 0:
+        try:
+            with open(fingerprint_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            reason = _diff(stored, current)
+            if not reason:
+                return CdsPlan(USE, [f"-XX:SharedArchiveFile={archive}"], "使用已有归档", current)
+        except (OSError, ValueError):
+            reason = "归档指纹缺失"
+    invalidate(server_dir)
+    os.makedirs(os.path.dirname(archive), exist_ok=True)
+    return CdsPlan(TRAIN, [f"-XX:ArchiveClassesAtExit={archive}"], reason, current)
+
+
+def finish_training(server_dir: str, training: CdsPlan) -> bool:
+    """Called after a training boot exited cleanly: keeps the archive if the JVM wrote one."""
+    archive, fingerprint_path = archive_paths(server_dir)
+    if not os.path.isfile(archive) or os.path.getsize(archive) == 0:
+        return False
+    tmp_path = fingerprint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(training.fingerprint, f, indent=2)
+    os.replace(tmp_path, fingerprint_path)
+    return True
+
+
+def describe(server_dir: str) -> str:
+    archive, fingerprint_path = archive_paths(server_dir)
+    if os.path.isfile(archive) and os.path.isfile(fingerprint_path):
+        return f"已有归档 ({os.path.getsize(archive) / (1024 * 1024):.1f} MB)，更改核心/Java/插件后将自动重新训练。"
+    return "尚无归档: 下次正常启动并停止服务器后生成。"
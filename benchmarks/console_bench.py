@@ -0,0 +1,187 @@
+"""
+Console throughput benchmark: how fast the panel's console path takes in server output.
+
+    python benchmarks/console_bench.py [--log paper] [--rates 1000,5000,0] [--lines 20000] [--json results.json]
+
+Each run starts benchmarks/fake_server.py the way start_server() starts a real
+server (same pipes and text decoding) and reads it with the panel's own
+per-line step, console_pipeline.handle_line(), as update_console_output()
+does: every line goes through ConsoleProcessor with the real command
+dispatcher, hang detector, boot profiler, lag monitor and player tracking
+attached, while `list` is polled in the background. Shown lines are turned
+into console controls (flet Text when flet is installed, else plain strings)
+and tagged and indexed in the console's scrollback buffer, and every
+page.update() handle_line() asks for is counted.
+
+Reported per rate: lines/sec, end-to-end latency from the fake server's write
+to the end of processing (p50/p90/p99/max), UI update count, and memory
+growth (tracemalloc peak and RSS). --json writes the same numbers for
+tracking regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+import psutil  # noqa: E402
+
+import boot_timeline  # noqa: E402
+import command_dispatcher  # noqa: E402
+import console_index  # noqa: E402
+import console_pipeline  # noqa: E402
+import lag_monitor  # noqa: E402
+import server_watchdog  # noqa: E402
+from fake_server import REPLAY_COMPLETE  # noqa: E402
+from timeseries import percentile  # noqa: E402
+
+try:
+    import flet as ft
+except ImportError:
+    ft = None
+
+LIST_RESPONSE = r"players online"
+
+
+def make_control(line: str):
+    return ft.Text(line, font_family="Roboto Mono") if ft else line
+
+
+def run_once(log: str, rate: float, lines: int, list_interval: float, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory(prefix="msl-console-") as scratch:
+        timestamps_path = os.path.join(scratch, "sent.txt")
+        command = [sys.executable, os.path.join(BENCH_DIR, "fake_server.py"),
+                   "--log", log, "--rate", str(rate), "--lines", str(lines), "--timestamps", timestamps_path]
+        me = psutil.Process()
+        rss_before = me.memory_info().rss
+        tracemalloc.start()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE,
+                                   text=True, encoding="utf-8", cwd=scratch)
+
+        dispatcher = command_dispatcher.CommandDispatcher.for_stdin(process.stdin)
+        hang_detector = server_watchdog.HangDetector(process.pid)
+        recorder = boot_timeline.BootRecorder()
+        lag = lag_monitor.LagMonitor()
+        processor = console_pipeline.ConsoleProcessor(
+            taps=[dispatcher.feed_line, hang_detector.feed_line, recorder.feed_line],
+            filters=[lambda line: lag.sampling and lag_monitor.is_sample_reply(line)],
+            observers=[lag.feed_line],
+        )
+        console_buffer = console_index.ConsoleBuffer()
+        received: list[int] = []
+        counters = {"ui_updates": 0, "hidden": 0, "joins": 0, "leaves": 0, "list_polls": 0}
+
+        def show(text: str):
+            console_buffer.append(text, make_control(text))
+
+        def count(key: str):
+            def bump(*_):
+                counters[key] += 1
+            return bump
+
+        def poll_players():
+            poll = None
+            while process.poll() is None:
+                if poll is None or poll.done():
+                    poll = dispatcher.submit("list", command_dispatcher.PRIORITY_POLL, expect=LIST_RESPONSE)
+                    counters["list_polls"] += 1
+                time.sleep(list_interval)
+
+        threading.Thread(target=poll_players, daemon=True).start()
+        killer = threading.Timer(timeout, process.kill)
+        killer.start()
+        started = time.perf_counter()
+        try:
+            for line in process.stdout:
+                result = console_pipeline.handle_line(processor, line, show, count("ui_updates"),
+                                                      on_join=count("joins"), on_leave=count("leaves"))
+                counters["hidden"] += result.hidden
+                received.append(time.monotonic_ns())
+                if result.line == REPLAY_COMPLETE:
+                    dispatcher.submit("stop", command_dispatcher.PRIORITY_STOP, wait_response=False)
+        finally:
+            elapsed = time.perf_counter() - started
+            killer.cancel()
+            dispatcher.close()
+            returncode = process.wait()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rss_after = me.memory_info().rss
+
+        try:
+            with open(timestamps_path, "r", encoding="utf-8") as f:
+                sent = [int(value) for value in f.read().split()]
+        except (OSError, ValueError):
+            sent = []
+
+    latencies = [(r - s) / 1e6 for s, r in zip(sent, received)]
+    first, last = (received[0], received[-1]) if received else (0, 0)
+    span = (last - first) / 1e9
+    return {
+        "log": log,
+        "rate": rate,
+        "ok": returncode == 0 and len(sent) == len(received),
+        "lines_received": len(received),
+        "lines_sent": len(sent),
+        "duration_s": elapsed,
+        "lines_per_s": len(received) / span if span > 0 else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+        **counters,
+        "controls": len(console_buffer),
+        "players_online_at_end": processor.online,
+        "boot_done_s": recorder.timeline.total_s,
+        "tracemalloc_peak_mb": peak / (1024 * 1024),
+        "rss_growth_mb": (rss_after - rss_before) / (1024 * 1024),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", default="paper", help="log to replay: a path, or paper / vanilla")
+    parser.add_argument("--rates", default="1000,5000,0", help="comma-separated lines/sec, 0 = unthrottled")
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--list-interval", type=float, default=1.0, help="seconds between `list` polls")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per run")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here")
+    args = parser.parse_args()
+
+    runs = []
+    print(f"== Console throughput ({args.log}, {args.lines} lines, UI controls: {'flet' if ft else 'strings'}) ==")
+    print(f"  {'rate':>8} {'lines/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'updates':>8} {'peak MB':>8} {'RSS +MB':>8}")
+    for rate in (float(r) for r in args.rates.split(",")):
+        run = run_once(args.log, rate, args.lines, args.list_interval, args.timeout)
+        runs.append(run)
+        latency = run["latency_ms"]
+        fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+        print(f"  {'max' if rate == 0 else int(rate):>8} {fmt(run['lines_per_s'], '10.0f')} {fmt(latency['p50'], '8.2f')} "
+              f"{fmt(latency['p99'], '8.2f')} {fmt(latency['max'], '8.2f')} {run['ui_updates']:>8} "
+              f"{run['tracemalloc_peak_mb']:8.1f} {run['rss_growth_mb']:8.1f}" + ("" if run["ok"] else "  (incomplete)"))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "ui_controls": "flet" if ft else "strings",
+                "lines": args.lines,
+                "runs": runs,
+            }, f, indent=2)
+    return 0 if all(run["ok"] for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
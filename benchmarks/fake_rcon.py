@@ -0,0 +1,197 @@
+"""
+Local stand-in for a Minecraft server's RCON listener.
+
+    python benchmarks/fake_rcon.py [--port 25575] [--password secret] [--write-chunk 7]
+
+Speaks the Source RCON protocol the way vanilla does: a wrong password is
+answered with request id -1, a command's reply is split into packets of at
+most reply_chunk bytes (4096 on vanilla), and a packet of an unknown type gets
+"Unknown request <type in hex>". With strict=True (the default) the connection
+is dropped when the next packet has already arrived while a reply is being
+written, like vanilla's single RCON thread does with pipelined requests.
+write_chunk > 0 sends every reply in pieces of that many bytes, so the client
+sees packets split across reads.
+
+Commands: "echo <text>" replies <text>, "repeat <n>" replies n characters
+(for multi-packet replies), "list" replies a vanilla-style player list; other
+replies come from FakeRcon.replies or are "Unknown or incomplete command".
+"""
+import argparse
+import select
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_AUTH = 3
+REPLY_CHUNK = 4096
+
+
+class FakeRcon:
+    """The stand-in server; start()/stop() run it in-process for tests."""
+
+    def __init__(self, password: str = "secret", host: str = "127.0.0.1", port: int = 0,
+                 reply_chunk: int = REPLY_CHUNK, write_chunk: int = 0, strict: bool = True,
+                 reply_delay: float = 0.0):
+        self.password = password
+        self.reply_chunk = reply_chunk
+        self.write_chunk = write_chunk
+        self.strict = strict
+        self.reply_delay = reply_delay  # seconds spent "running" each command
+        self.replies: dict[str, str] = {}
+        self.stats: Counter = Counter()
+        self.commands: list[str] = []
+        self._lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"rcon": self})
+        self.server = socketserver.ThreadingTCPServer((host, port), handler, bind_and_activate=False)
+        self.server.allow_reuse_address = True
+        self.server.daemon_threads = True
+        self.server.server_bind()
+        self.server.server_activate()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self) -> "FakeRcon":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def reply(self, command: str) -> str:
+        with self._lock:
+            self.commands.append(command)
+        name, _, argument = command.partition(" ")
+        if command in self.replies:
+            return self.replies[command]
+        if name == "echo":
+            return argument
+        if name == "repeat":
+            return "x" * int(argument)
+        if name == "list":
+            return "There are 0 of a max of 20 players online: "
+        return "Unknown or incomplete command, see below for error"
+
+
+def encode(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    rcon: FakeRcon
+
+    def setup(self) -> None:
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.buffer = b""
+        self.authenticated = False
+        self.rcon.count("connections")
+
+    def read_exact(self, n: int) -> Optional[bytes]:
+        while len(self.buffer) < n:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return None
+            self.buffer += chunk
+        data, self.buffer = self.buffer[:n], self.buffer[n:]
+        return data
+
+    def read_packet(self) -> Optional[tuple[int, int, str]]:
+        header = self.read_exact(4)
+        if header is None:
+            return None
+        (length,) = struct.unpack("<i", header)
+        data = self.read_exact(length)
+        if data is None:
+            return None
+        request_id, packet_type = struct.unpack_from("<ii", data)
+        return request_id, packet_type, data[8:-2].decode("utf-8", errors="replace")
+
+    def pipelined(self) -> bool:
+        if self.buffer:
+            return True
+        readable, _, _ = select.select([self.request], [], [], 0)
+        return bool(readable)
+
+    def send(self, data: bytes) -> None:
+        step = self.rcon.write_chunk
+        if step <= 0:
+            self.request.sendall(data)
+            return
+        for offset in range(0, len(data), step):
+            self.request.sendall(data[offset:offset + step])
+            time.sleep(0.001)  # separate TCP segments, so the client reads them separately
+
+    def handle(self) -> None:
+        rcon = self.rcon
+        while True:
+            packet = self.read_packet()
+            if packet is None:
+                return
+            request_id, packet_type, body = packet
+            if packet_type == TYPE_AUTH:
+                self.authenticated = body == rcon.password
+                if not self.authenticated:
+                    rcon.count("auth_failures")
+                self.send(encode(request_id if self.authenticated else -1, TYPE_COMMAND, ""))
+                continue
+            if not self.authenticated:
+                rcon.count("auth_failures")
+                self.send(encode(-1, TYPE_COMMAND, ""))
+                continue
+            if packet_type == TYPE_COMMAND:
+                rcon.count("commands")
+                if rcon.reply_delay:
+                    time.sleep(rcon.reply_delay)
+                text = rcon.reply(body).encode("utf-8")
+                chunks = [text[i:i + rcon.reply_chunk] for i in range(0, len(text), rcon.reply_chunk)] or [b""]
+                out = b"".join(encode(request_id, TYPE_RESPONSE, chunk.decode("utf-8", errors="replace"))
+                               for chunk in chunks)
+            else:
+                rcon.count("markers")
+                out = encode(request_id, TYPE_RESPONSE, f"Unknown request {packet_type:x}")
+            if rcon.strict and self.pipelined():
+                rcon.count("dropped_pipelined")
+                return
+            self.send(out)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=25575)
+    parser.add_argument("--password", default="secret")
+    parser.add_argument("--reply-chunk", type=int, default=REPLY_CHUNK, help="max bytes per reply packet")
+    parser.add_argument("--write-chunk", type=int, default=0, help="send replies in pieces of this many bytes")
+    parser.add_argument("--lenient", action="store_true", help="answer pipelined requests instead of disconnecting")
+    args = parser.parse_args()
+
+    rcon = FakeRcon(args.password, args.host, args.port, args.reply_chunk, args.write_chunk, not args.lenient)
+    host, port = rcon.address
+    print(f"Fake RCON on {host}:{port} (enable-rcon=true, rcon.port={port}, rcon.password={args.password})")
+    try:
+        rcon.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rcon.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
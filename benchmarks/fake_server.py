@@ -0,0 +1,126 @@
+"""
+Fake Minecraft server for benchmarks: replays a recorded console log.
+
+    python benchmarks/fake_server.py --log paper --rate 5000 --lines 20000 [--timestamps sent.txt]
+
+Lines of the log (a path, or the name of one in benchmarks/logs/) are written
+to stdout at --rate lines per second (0 = as fast as the pipe takes them),
+looping until --lines have been written. Players joining and leaving in the
+replay are tracked, so `list` on stdin gets a realistic reply in the log's own
+format; `stop` exits like a server would, anything else is an unknown command.
+
+After the replay "[fake-server] replay complete" is printed and the process
+keeps answering commands until `stop` or end of stdin. With --timestamps, the
+time.monotonic_ns() at which every stdout line was written is saved there
+(one per line, in order) so the reader can compute end-to-end latency.
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from console_pipeline import parse_join, parse_leave  # noqa: E402
+
+LOG_DIR = os.path.join(BENCH_DIR, "logs")
+REPLAY_COMPLETE = "[fake-server] replay complete"
+VANILLA_PREFIX = re.compile(r"^\[\d\d:\d\d:\d\d\] \[[^\]]+/\w+\]: ")
+
+
+class FakeServer:
+    def __init__(self, lines: list[str], timestamps_path: str = ""):
+        self.lines = lines
+        self.vanilla = bool(lines and VANILLA_PREFIX.match(lines[0]))
+        self.timestamps_path = timestamps_path
+        self.sent: list[int] = []
+        self.players: list[str] = []
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def prefix(self, level: str = "INFO") -> str:
+        now = time.strftime("%H:%M:%S")
+        return f"[{now}] [Server thread/{level}]: " if self.vanilla else f"[{now} {level}]: "
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            sys.stdout.write(text + "\n")
+            sys.stdout.flush()
+            if self.timestamps_path:
+                self.sent.append(time.monotonic_ns())
+
+    def track(self, line: str) -> None:
+        joined = parse_join(line)
+        if joined and joined not in self.players:
+            self.players.append(joined)
+        left = parse_leave(line)
+        if left in self.players:
+            self.players.remove(left)
+
+    def replay(self, total: int, rate: float) -> None:
+        started = time.perf_counter()
+        for i in range(total):
+            if self.stopped.is_set():
+                return
+            if rate > 0:
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            line = self.lines[i % len(self.lines)]
+            self.track(line)
+            self.write(line)
+        self.write(REPLAY_COMPLETE)
+
+    def answer(self, command: str) -> None:
+        command = command.strip().lstrip("/")
+        if command == "list":
+            names = ", ".join(self.players)
+            self.write(f"{self.prefix()}There are {len(self.players)} of a max of 20 players online: {names}")
+        elif command == "stop":
+            self.write(f"{self.prefix()}Stopping the server")
+            self.write(f"{self.prefix()}Saving players")
+            self.write(f"{self.prefix()}ThreadedAnvilChunkStorage: All dimensions are saved")
+            self.stopped.set()
+        elif command:
+            self.write(f"{self.prefix()}Unknown or incomplete command, see below for error")
+
+    def read_commands(self) -> None:
+        for command in sys.stdin:
+            self.answer(command)
+            if self.stopped.is_set():
+                return
+        self.stopped.set()
+
+    def save_timestamps(self) -> None:
+        if self.timestamps_path:
+            with open(self.timestamps_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(map(str, self.sent)))
+
+
+def load_log(name: str) -> list[str]:
+    path = name if os.path.exists(name) else os.path.join(LOG_DIR, f"{name}.log")
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\r\n") for line in f if line.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", default="paper", help="log file, or a name in benchmarks/logs (paper, vanilla)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="lines per second, 0 = unthrottled")
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--timestamps", default="", help="write per-line send times (monotonic ns) here")
+    args = parser.parse_args()
+
+    server = FakeServer(load_log(args.log), args.timestamps)
+    threading.Thread(target=server.read_commands, daemon=True).start()
+    server.replay(args.lines, args.rate)
+    server.stopped.wait()
+    server.save_timestamps()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,504 @@
+"""
+Local stand-in for every upstream API the panel talks to.
+
+    python benchmarks/mock_upstream.py [--port 8765] [--latency 50] [--bandwidth 2048] [--error-rate 0.05] [--jar-size 48]
+
+Each service that get_api_base_url() knows is served under its own prefix,
+with the same paths the panel requests:
+
+    /mojang_meta/mc/game/version_manifest.json      /mojang_api/users/profiles/minecraft/<name>
+    /paper/v3/projects/paper[/versions/<v>]          /mojang_api/profiles/minecraft (POST)
+    /purpur/v2/purpur[/<v>[/<build>/download]]       /modrinth/v2/search, /modrinth/v2/project/<id>/version
+    /hangar/projects[/<owner>/<slug>/versions]       /getbukkit_page/download/spigot, /getbukkit_cdn/spigot/spigot-<v>.jar
+
+Point the panel at it with the api_base_override setting, or by starting it
+with MSL_API_BASE=http://127.0.0.1:8765 in the environment.
+
+Downloads are generated jars (a real zip with a Paper-style manifest, padded
+with deterministic bytes to --jar-size MB). They honour single Range requests
+(206 / 416). Every response can be slowed down (--latency/--jitter, and
+--bandwidth in KB/s per connection) or fail (--error-rate returns 500/503/429,
+--truncate-rate cuts downloads off halfway). GET /_mock/stats returns request
+counters and POST /_mock/config changes the injection settings at runtime;
+fail_next answers the next N requests with 429 (Retry-After: retry_after) and
+unknown_players lists names the Mojang profile lookups don't find, which tests
+use for deterministic failures.
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Any
+from urllib.parse import urlsplit, parse_qs, unquote
+
+MC_VERSIONS = ["1.19.4", "1.20.1", "1.20.2", "1.20.4", "1.20.6", "1.21", "1.21.1", "1.21.3", "1.21.4"]
+BUILDS = list(range(100, 140))
+_WORDS = ["Essentials", "Luck", "World", "Edit", "Guard", "Vault", "Core", "Chest", "Shop", "Economy", "Chat",
+          "Skin", "Auth", "Holo", "Graphic", "Citizens", "Mythic", "Mobs", "Dynmap", "Via", "Version", "Backwards",
+          "Grief", "Prevention", "Tab", "Scoreboard", "Anti", "Cheat", "Protocol", "Lib", "Place", "Holder", "API"]
+CHUNK = 64 * 1024
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    bandwidth_kbps: float = 0.0  # per connection, 0 = unlimited
+    error_rate: float = 0.0
+    truncate_rate: float = 0.0
+    jar_size_mb: float = 8.0
+    seed: int = 1
+    fail_next: int = 0  # answer the next N service requests with 429
+    retry_after: int = 1  # seconds, sent with injected 429/503
+    unknown_players: tuple = ()  # names (any case) the profile lookups don't know
+
+
+def _plugin_catalog(count: int = 400) -> list[dict[str, Any]]:
+    rng = random.Random(42)
+    seen = set()
+    projects = []
+    while len(projects) < count:
+        name = "".join(rng.sample(_WORDS, rng.choice((1, 2, 2, 3))))
+        if name in seen:
+            continue
+        seen.add(name)
+        projects.append({
+            "name": name,
+            "slug": name.lower(),
+            "id": hashlib.sha1(name.encode()).hexdigest()[:8],
+            "owner": rng.choice(["PaperMC", "EssentialsX", "sk89q", "lucko", "MilkBowl", "Citizens"]) + str(rng.randint(1, 9)),
+            "description": f"{name} adds {rng.choice(['commands', 'permissions', 'shops', 'protection', 'maps'])} to your server.",
+            "downloads": rng.randint(100, 5_000_000),
+            "stars": rng.randint(0, 5000),
+        })
+    return projects
+
+
+class JarCache:
+    """Generated jars, keyed by what they pretend to be; only the most recent few are kept in memory."""
+
+    def __init__(self, maxsize: int = 4):
+        self.maxsize = maxsize
+        self._jars: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, version: str, build: str, size_mb: float) -> bytes:
+        key = (kind, version, build, size_mb)
+        with self._lock:
+            if key in self._jars:
+                self._jars.move_to_end(key)
+                return self._jars[key]
+        data = make_jar(kind, version, build, int(size_mb * 1024 * 1024))
+        with self._lock:
+            self._jars[key] = data
+            while len(self._jars) > self.maxsize:
+                self._jars.popitem(last=False)
+        return data
+
+
+def make_jar(kind: str, version: str, build: str, size: int) -> bytes:
+    """A valid jar whose manifest looks like the real server's, padded (uncompressed) to about `size` bytes."""
+    manifest = (
+        "Manifest-Version: 1.0\r\n"
+        f"Main-Class: io.papermc.paperclip.Main\r\n"
+        f"Implementation-Title: {kind}\r\n"
+        f"Implementation-Version: git-{kind}-{build} (MC: {version})\r\n\r\n"
+    )
+    seed = int(hashlib.sha1(f"{kind}/{version}/{build}".encode()).hexdigest()[:8], 16)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as jar:
+        jar.writestr("META-INF/MANIFEST.MF", manifest)
+        jar.writestr("version.json", json.dumps({"id": version, "name": version, "build": build}))
+        jar.writestr("data/padding.bin", random.Random(seed).randbytes(max(0, size - 1024)))
+    return buffer.getvalue()
+
+
+class MockUpstream:
+    """The mock server; usable in-process (start()/stop()) by benchmarks."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.stats: Counter = Counter()
+        self.jars = JarCache()
+        self.plugins = _plugin_catalog()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"mock": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockUpstream":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def chance(self, probability: float) -> bool:
+        with self._rng_lock:
+            return probability > 0 and self._rng.random() < probability
+
+    def pick(self, options: tuple) -> Any:
+        with self._rng_lock:
+            return self._rng.choice(options)
+
+    def take_failure(self) -> bool:
+        with self._rng_lock:
+            if self.config.fail_next > 0:
+                self.config.fail_next -= 1
+                return True
+            return False
+
+    def known_player(self, name: str) -> bool:
+        return name.lower() not in {unknown.lower() for unknown in self.config.unknown_players}
+
+    def delay(self) -> float:
+        with self._rng_lock:
+            jitter = self._rng.uniform(-self.config.jitter_ms, self.config.jitter_ms) if self.config.jitter_ms else 0.0
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    mock: MockUpstream
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    # --- plumbing ---
+
+    def _send_json(self, data: Any, status: int = 200) -> None:
+        self._send_bytes(json.dumps(data).encode(), "application/json", status)
+
+    def _send_bytes(self, body: bytes, content_type: str, status: int = 200, blob: bool = False) -> None:
+        headers = {"Content-Type": content_type}
+        start, end = 0, len(body) - 1
+        if blob:
+            headers["Accept-Ranges"] = "bytes"
+            headers["ETag"] = '"%s"' % hashlib.sha1(body[:4096] + str(len(body)).encode()).hexdigest()
+            byte_range = self.headers.get("Range")
+            # Multiple ranges are answered with the whole body, which RFC 9110 allows
+            if byte_range and "," not in byte_range:
+                parsed = _parse_range(byte_range, len(body))
+                if parsed is None:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(body)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    self.mock.stats["status_416"] += 1
+                    return
+                start, end = parsed
+                status = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.mock.stats[f"status_{status}"] += 1
+        if self.command == "HEAD":
+            return
+        view = memoryview(body)[start:end + 1]
+        if blob and self.mock.chance(self.mock.config.truncate_rate):
+            view = view[:len(view) // 2]
+            self.mock.stats["truncated"] += 1
+            self.close_connection = True
+        self._write_throttled(view)
+
+    def _write_throttled(self, view: memoryview) -> None:
+        rate = self.mock.config.bandwidth_kbps * 1024
+        started = time.perf_counter()
+        sent = 0
+        try:
+            for offset in range(0, len(view), CHUNK):
+                chunk = view[offset:offset + CHUNK]
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if rate > 0:
+                    ahead = sent / rate - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        self.mock.stats["bytes_sent"] += sent
+
+    def _not_found(self) -> None:
+        self._send_json({"error": "not_found", "path": self.path}, 404)
+
+    def _inject(self) -> bool:
+        """Latency and error injection; returns True if the request was answered with an error."""
+        delay = self.mock.delay()
+        if delay:
+            time.sleep(delay)
+        if self.mock.take_failure():
+            status = 429
+        elif self.mock.chance(self.mock.config.error_rate):
+            status = self.mock.pick((500, 503, 429))
+        else:
+            return False
+        body = json.dumps({"error": "injected", "status": status}).encode()
+        self.send_response(status)
+        if status in (429, 503):
+            self.send_header("Retry-After", str(self.mock.config.retry_after))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        self.mock.stats[f"injected_{status}"] += 1
+        return True
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    # --- verbs ---
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        self._dispatch()
+
+    def do_POST(self) -> None:
+        self._dispatch(self._read_body())
+
+    def _dispatch(self, body: bytes = b"") -> None:
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.mock.stats["requests"] += 1
+        if path.startswith("/_mock/"):
+            return self._admin(path, body)
+        service, _, rest = path.lstrip("/").partition("/")
+        route = getattr(self, f"_svc_{service}", None)
+        if route is None:
+            return self._not_found()
+        self.mock.stats[f"svc_{service}"] += 1
+        if self._inject():
+            return
+        route("/" + rest, query, body)
+
+    def _admin(self, path: str, body: bytes) -> None:
+        if path == "/_mock/stats":
+            return self._send_json(dict(self.mock.stats))
+        if path == "/_mock/config":
+            if self.command == "POST":
+                for key, value in json.loads(body or b"{}").items():
+                    if hasattr(self.mock.config, key):
+                        setattr(self.mock.config, key, type(getattr(self.mock.config, key))(value))
+            return self._send_json(asdict(self.mock.config))
+        self._not_found()
+
+    def _jar(self, kind: str, version: str, build: str) -> None:
+        data = self.mock.jars.get(kind, version, build, self.mock.config.jar_size_mb)
+        self._send_bytes(data, "application/java-archive", blob=True)
+
+    def _base(self, service: str) -> str:
+        return f"http://{self.headers.get('Host') or '127.0.0.1'}/{service}"
+
+    # --- services ---
+
+    def _svc_mojang_api(self, path: str, query: dict, body: bytes) -> None:
+        match = re.fullmatch(r"/users/profiles/minecraft/(\w{1,16})", path)
+        if match:
+            if not self.mock.known_player(match.group(1)):
+                return self._send_bytes(b"", "application/json", 204)
+            return self._send_json(_profile(match.group(1)))
+        if path == "/profiles/minecraft" and self.command == "POST":
+            names = json.loads(body or b"[]")
+            if len(names) > 10:
+                return self._send_json({"error": "too many names"}, 400)
+            self.mock.stats[f"profile_batch_{len(names)}"] += 1
+            return self._send_json([_profile(name) for name in names
+                                    if re.fullmatch(r"\w{1,16}", name) and self.mock.known_player(name)])
+        self._not_found()
+
+    def _svc_mojang_meta(self, path: str, query: dict, body: bytes) -> None:
+        base = self._base("mojang_meta")
+        if path == "/mc/game/version_manifest.json":
+            versions = [{"id": v, "type": "release", "url": f"{base}/v1/packages/{v}.json",
+                         "releaseTime": "2024-01-01T00:00:00+00:00"} for v in reversed(MC_VERSIONS)]
+            return self._send_json({"latest": {"release": MC_VERSIONS[-1], "snapshot": MC_VERSIONS[-1]}, "versions": versions})
+        match = re.fullmatch(r"/v1/packages/([\w.]+)\.json", path)
+        if match and match.group(1) in MC_VERSIONS:
+            version = match.group(1)
+            size = len(self.mock.jars.get("Vanilla", version, "0", self.mock.config.jar_size_mb))
+            return self._send_json({"id": version, "downloads": {"server": {"url": f"{base}/data/{version}/server.jar", "size": size}}})
+        match = re.fullmatch(r"/data/([\w.]+)/server\.jar", path)
+        if match and match.group(1) in MC_VERSIONS:
+            return self._jar("Vanilla", match.group(1), "0")
+        self._not_found()
+
+    def _svc_paper(self, path: str, query: dict, body: bytes) -> None:
+        if path == "/v3/projects/paper":
+            return self._send_json({"project": {"id": "paper", "name": "Paper"}, "versions": MC_VERSIONS})
+        match = re.fullmatch(r"/v3/projects/paper/versions/([\w.]+)(?:/builds/(\d+))?", path)
+        if match and match.group(1) in MC_VERSIONS:
+            version, build = match.groups()
+            if build is None:
+                return self._send_json({"version": {"id": version}, "builds": BUILDS})
+            name = f"paper-{version}-{build}.jar"
+            return self._send_json({"id": int(build), "channel": "STABLE", "downloads": {"server:default": {
+                "name": name, "url": f"{self._base('paper')}/v1/objects/{version}/{build}/{name}"}}})
+        match = re.fullmatch(r"/v1/objects/([\w.]+)/(\d+)/[\w.-]+\.jar", path)
+        if match and match.group(1) in MC_VERSIONS:
+            return self._jar("Paper", match.group(1), match.group(2))
+        self._not_found()
+
+    def _svc_purpur(self, path: str, query: dict, body: bytes) -> None:
+        if path == "/v2/purpur":
+            return self._send_json({"project": "purpur", "versions": MC_VERSIONS})
+        match = re.fullmatch(r"/v2/purpur/([\w.]+)(?:/(\d+|latest)(/download)?)?", path)
+        if match and match.group(1) in MC_VERSIONS:
+            version, build, download = match.groups()
+            if build is None:
+                return self._send_json({"project": "purpur", "version": version,
+                                        "builds": {"latest": str(BUILDS[-1]), "all": [str(b) for b in BUILDS]}})
+            build = str(BUILDS[-1]) if build == "latest" else build
+            if download:
+                return self._jar("Purpur", version, build)
+            return self._send_json({"project": "purpur", "version": version, "build": build, "result": "SUCCESS"})
+        self._not_found()
+
+    def _svc_getbukkit_page(self, path: str, query: dict, body: bytes) -> None:
+        if path == "/download/spigot":
+            cdn = self._base("getbukkit_cdn")
+            rows = "".join(
+                f'<div class="download-pane"><h2><a href="{cdn}/spigot/spigot-{v}.jar">Spigot {v}</a></h2>'
+                f'<a href="{cdn}/spigot/spigot-{v}.jar">Download</a></div>'
+                for v in reversed(MC_VERSIONS)
+            )
+            return self._send_bytes(f"<html><body>{rows}</body></html>".encode(), "text/html; charset=utf-8")
+        self._not_found()
+
+    def _svc_getbukkit_cdn(self, path: str, query: dict, body: bytes) -> None:
+        match = re.fullmatch(r"/spigot/spigot-([\w.]+)\.jar", path)
+        if match and match.group(1) in MC_VERSIONS:
+            return self._jar("Spigot", match.group(1), "0")
+        self._not_found()
+
+    def _search(self, text: str) -> list[dict[str, Any]]:
+        text = text.lower()
+        hits = [p for p in self.mock.plugins if text in p["name"].lower() or text in p["description"].lower()]
+        return sorted(hits, key=lambda p: p["downloads"], reverse=True)
+
+    def _svc_modrinth(self, path: str, query: dict, body: bytes) -> None:
+        if path == "/v2/search":
+            limit, offset = int(query.get("limit", 10)), int(query.get("offset", 0))
+            hits = self._search(query.get("query", ""))
+            return self._send_json({
+                "hits": [{"project_id": p["id"], "slug": p["slug"], "title": p["name"], "author": p["owner"],
+                          "description": p["description"], "downloads": p["downloads"], "follows": p["stars"],
+                          "project_type": "plugin", "icon_url": ""} for p in hits[offset:offset + limit]],
+                "offset": offset, "limit": limit, "total_hits": len(hits),
+            })
+        match = re.fullmatch(r"/v2/project/(\w+)/version", path)
+        if match:
+            project = next((p for p in self.mock.plugins if p["id"] == match.group(1)), None)
+            if project is None:
+                return self._not_found()
+            base = self._base("modrinth")
+            versions = []
+            for i, version in enumerate(reversed(MC_VERSIONS[-4:])):
+                number = f"{len(MC_VERSIONS) - i}.0.0"
+                filename = f"{project['name']}-{number}.jar"
+                versions.append({
+                    "id": f"{project['id']}{i}", "project_id": project["id"], "name": f"{project['name']} {number}",
+                    "version_number": number, "game_versions": [version], "loaders": ["paper", "spigot", "bukkit"],
+                    "files": [{"url": f"{base}/data/{project['id']}/versions/{number}/{filename}", "filename": filename,
+                               "primary": True}],
+                })
+            return self._send_json(versions)
+        match = re.fullmatch(r"/data/(\w+)/versions/([\w.]+)/[\w.-]+\.jar", path)
+        if match:
+            return self._jar("Plugin", match.group(1), match.group(2))
+        self._not_found()
+
+    def _svc_hangar(self, path: str, query: dict, body: bytes) -> None:
+        if path == "/projects":
+            limit, offset = int(query.get("limit", 25)), int(query.get("offset", 0))
+            hits = self._search(query.get("q", ""))
+            if query.get("sort") == "-stars":
+                hits.sort(key=lambda p: p["stars"], reverse=True)
+            return self._send_json({
+                "pagination": {"limit": limit, "offset": offset, "count": len(hits)},
+                "result": [{"name": p["name"], "namespace": {"owner": p["owner"], "slug": p["name"]},
+                            "description": p["description"], "avatarUrl": "", "stats": {"stars": p["stars"], "downloads": p["downloads"]}}
+                           for p in hits[offset:offset + limit]],
+            })
+        match = re.fullmatch(r"/projects/([\w-]+)/([\w-]+)/versions(?:/([\w.]+)/PAPER/download)?", path)
+        if match:
+            owner, slug, version = match.groups()
+            if version:
+                return self._jar("Plugin", slug, version)
+            result = [{"name": f"{len(MC_VERSIONS) - i}.0.0", "platformDependencies": {"PAPER": [v]},
+                       "downloads": {"PAPER": {"name": f"{slug}-{len(MC_VERSIONS) - i}.0.0.jar", "fileInfo": {}}}}
+                      for i, v in enumerate(reversed(MC_VERSIONS[-4:]))]
+            return self._send_json({"pagination": {"count": len(result)}, "result": result})
+        self._not_found()
+
+
+def _profile(name: str) -> dict[str, str]:
+    return {"name": name, "id": uuid.uuid3(uuid.NAMESPACE_DNS, name.lower()).hex}
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """(start, end) for a single "bytes=" range, or None if it is malformed or unsatisfiable."""
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        return (max(0, size - length), size - 1) if length else None
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    return (start, end) if start <= end and start < size else None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="ms added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± ms of random latency")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="KB/s per connection, 0 = unlimited")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500/503/429")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fraction of downloads cut off halfway")
+    parser.add_argument("--jar-size", type=float, default=8.0, help="size of generated jars in MB")
+    args = parser.parse_args()
+
+    config = MockConfig(latency_ms=args.latency, jitter_ms=args.jitter, bandwidth_kbps=args.bandwidth,
+                        error_rate=args.error_rate, truncate_rate=args.truncate_rate, jar_size_mb=args.jar_size)
+    mock = MockUpstream(args.host, args.port, config)
+    print(f"Mock upstream on {mock.url} (set MSL_API_BASE={mock.url} or api_base_override in settings.json)")
+    try:
+        mock.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
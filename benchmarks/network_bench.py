@@ -0,0 +1,180 @@
+"""
+Download throughput and search latency against the local mock upstream.
+
+    python benchmarks/network_bench.py [--jar-size 32] [--latency 30] [--bandwidth 0] [--error-rate 0] [--json results.json]
+
+Starts benchmarks/mock_upstream.py in-process and uses requests the way the
+panel does (same URL paths under each service, plain requests.get per call,
+stream + iter_content for downloads):
+
+- download: a Paper core jar resolved through the v3 builds endpoint, streamed
+  with the panel's 8 KB chunks and with larger ones; plus an interrupted
+  download resumed with a Range request and checked against the full file.
+- search: Modrinth and Hangar plugin searches issued with some concurrency;
+  latency percentiles and error counts.
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import requests  # noqa: E402
+
+from mock_upstream import MockConfig, MockUpstream, MC_VERSIONS, _WORDS  # noqa: E402
+from timeseries import percentile  # noqa: E402
+
+CHUNK_SIZES = (8192, 64 * 1024, 1024 * 1024)  # 8 KB is what the panel's download threads use
+TIMEOUT = 300
+
+
+def resolve_paper_jar(base: str, version: str, build: int) -> str:
+    r = requests.get(f"{base}/paper/v3/projects/paper/versions/{version}/builds/{build}", timeout=TIMEOUT)
+    r.raise_for_status()
+    return r.json()["downloads"]["server:default"]["url"]
+
+
+def timed_download(url: str, chunk_size: int, headers: dict = None) -> dict:
+    digest = hashlib.sha256()
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    with requests.get(url, stream=True, timeout=TIMEOUT, headers=headers or {}) as r:
+        r.raise_for_status()
+        for chunk in r.iter_content(chunk_size=chunk_size):
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            digest.update(chunk)
+            size += len(chunk)
+        status = r.status_code
+    elapsed = time.perf_counter() - started
+    return {"status": status, "bytes": size, "seconds": elapsed, "ttfb_ms": (first_byte or elapsed) * 1000,
+            "mb_per_s": size / (1024 * 1024) / elapsed if elapsed else None, "sha256": digest.hexdigest()}
+
+
+def bench_downloads(base: str, runs: int) -> dict:
+    url = resolve_paper_jar(base, MC_VERSIONS[-1], 139)
+    requests.get(url, timeout=TIMEOUT).raise_for_status()  # warm the mock's jar cache so generation isn't timed
+    results = {}
+    full_hash = None
+    for chunk_size in CHUNK_SIZES:
+        samples = []
+        for _ in range(runs):
+            try:
+                samples.append(timed_download(url, chunk_size))
+            except requests.RequestException as e:
+                samples.append({"error": f"{type(e).__name__}: {e}"})
+        ok = [s for s in samples if "error" not in s]
+        full_hash = full_hash or (ok[0]["sha256"] if ok else None)
+        results[str(chunk_size)] = {
+            "runs": len(samples),
+            "errors": len(samples) - len(ok),
+            "median_mb_per_s": statistics.median(s["mb_per_s"] for s in ok) if ok else None,
+            "median_ttfb_ms": statistics.median(s["ttfb_ms"] for s in ok) if ok else None,
+        }
+
+    # Resume: fetch the first half, then the rest with Range, and compare with the whole file
+    resume = {"ok": False}
+    try:
+        head = requests.head(url, timeout=TIMEOUT)
+        total = int(head.headers["Content-Length"])
+        half = total // 2
+        first = requests.get(url, headers={"Range": f"bytes=0-{half - 1}"}, timeout=TIMEOUT)
+        rest = requests.get(url, headers={"Range": f"bytes={half}-"}, timeout=TIMEOUT)
+        combined = first.content + rest.content
+        resume = {
+            "ok": first.status_code == 206 and rest.status_code == 206 and hashlib.sha256(combined).hexdigest() == full_hash,
+            "statuses": [first.status_code, rest.status_code],
+            "content_range": rest.headers.get("Content-Range"),
+        }
+    except (requests.RequestException, KeyError, ValueError) as e:
+        resume["error"] = f"{type(e).__name__}: {e}"
+    return {"url": url, "by_chunk_size": results, "range_resume": resume}
+
+
+def bench_search(base: str, queries: int, concurrency: int) -> dict:
+    def modrinth(query: str):
+        return requests.get(f"{base}/modrinth/v2/search", timeout=TIMEOUT,
+                            params={"query": query, "facets": '[["project_type:plugin"]]', "limit": 20})
+
+    def hangar(query: str):
+        return requests.get(f"{base}/hangar/projects", params={"q": query, "limit": 20, "sort": "-stars"}, timeout=TIMEOUT)
+
+    results = {}
+    for name, search in (("modrinth", modrinth), ("hangar", hangar)):
+        def one(i: int):
+            query = _WORDS[i % len(_WORDS)][:4].lower()
+            started = time.perf_counter()
+            try:
+                r = search(query)
+                r.raise_for_status()
+                r.json()
+                return (time.perf_counter() - started) * 1000, None
+            except (requests.RequestException, ValueError) as e:
+                return None, type(e).__name__
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(one, range(queries)))
+        wall = time.perf_counter() - started
+        latencies = [ms for ms, error in outcomes if ms is not None]
+        results[name] = {
+            "queries": queries,
+            "errors": sum(1 for _, error in outcomes if error),
+            "qps": queries / wall if wall else None,
+            "latency_ms": {"p50": percentile(latencies, 50), "p90": percentile(latencies, 90),
+                           "p99": percentile(latencies, 99), "max": max(latencies) if latencies else None},
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jar-size", type=float, default=32.0, help="MB")
+    parser.add_argument("--latency", type=float, default=0.0, help="ms per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± ms")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="KB/s per connection, 0 = unlimited")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=3, help="downloads per chunk size")
+    parser.add_argument("--queries", type=int, default=200, help="searches per service")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here")
+    args = parser.parse_args()
+
+    config = MockConfig(latency_ms=args.latency, jitter_ms=args.jitter, bandwidth_kbps=args.bandwidth,
+                        error_rate=args.error_rate, jar_size_mb=args.jar_size)
+    mock = MockUpstream(config=config).start()
+    try:
+        downloads = bench_downloads(mock.url, args.runs)
+        search = bench_search(mock.url, args.queries, args.concurrency)
+        stats = dict(mock.stats)
+    finally:
+        mock.stop()
+
+    fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+    print(f"== Download ({args.jar_size:g} MB jar, latency {args.latency:g} ms, bandwidth {args.bandwidth or 'unlimited'} KB/s) ==")
+    for chunk_size, result in downloads["by_chunk_size"].items():
+        print(f"  chunk {int(chunk_size) // 1024:>5} KB: {fmt(result['median_mb_per_s'], '8.1f')} MB/s, "
+              f"TTFB {fmt(result['median_ttfb_ms'], '.1f')} ms, errors {result['errors']}/{result['runs']}")
+    resume = downloads["range_resume"]
+    print(f"  range resume: {'ok' if resume['ok'] else 'FAILED'} {resume.get('content_range') or resume.get('error', '')}")
+    print(f"== Search ({args.queries} queries per service, concurrency {args.concurrency}) ==")
+    for name, result in search.items():
+        latency = result["latency_ms"]
+        print(f"  {name:>8}: p50 {fmt(latency['p50'], '.1f')} ms, p90 {fmt(latency['p90'], '.1f')} ms, "
+              f"p99 {fmt(latency['p99'], '.1f')} ms, {fmt(result['qps'], '.0f')} q/s, errors {result['errors']}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "downloads": downloads, "search": search, "mock_stats": stats}, f, indent=2)
+    return 0 if resume["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Startup benchmark: time-to-first-frame and import cost per module.
+
+    python benchmarks/startup_bench.py [--runs 5] [--workdir DIR] [--json results.json]
+
+Import cost comes from `python -X importtime -c "import main"`, attributed to
+each module main.py imports directly (cumulative, so it includes everything a
+module pulls in). Lazily imported modules show up as nearly free.
+
+Time-to-first-frame launches the panel with MSL_STARTUP_BENCH=1: main() then
+prints its startup phases as soon as the first view is on screen and exits.
+The panel runs in a scratch working directory unless --workdir is given (use
+one with many servers to measure a realistic servers/ folder).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from startup import BENCH_ENV, BENCH_PREFIX  # noqa: E402
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure_imports(module: str = "main") -> dict:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            entries.append((len(match.group(3)) // 2, match.group(4), int(match.group(1)), int(match.group(2))))
+    total_us = next((cumulative for depth, name, _, cumulative in entries if depth == 0 and name == module), None)
+    # Direct imports of `module` are at depth 1, printed before the module itself
+    direct = sorted(
+        ({"module": name, "cumulative_ms": cumulative / 1000, "self_ms": self_us / 1000}
+         for depth, name, self_us, cumulative in entries if depth == 1),
+        key=lambda item: item["cumulative_ms"], reverse=True,
+    )
+    return {
+        "ok": result.returncode == 0,
+        "error": result.stderr.strip().splitlines()[-1] if result.returncode != 0 and result.stderr.strip() else "",
+        "total_ms": total_us / 1000 if total_us is not None else None,
+        "modules": direct,
+    }
+
+
+def measure_first_frame(workdir: str, timeout: float) -> dict:
+    env = {**os.environ, BENCH_ENV: "1"}
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "main.py")], cwd=workdir, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            line = proc.stdout.readline()
+            if not line:
+                break
+            if line.startswith(BENCH_PREFIX):
+                wall = time.perf_counter() - started
+                marks = json.loads(line[len(BENCH_PREFIX):])["marks"]
+                return {"ok": True, "wall_s": wall, "marks": {label: t for label, t in marks}}
+        return {"ok": False, "error": "panel exited or timed out before the first frame (no display?)"}
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workdir", help="working directory for the panel (default: a scratch directory)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here")
+    args = parser.parse_args()
+
+    imports = measure_imports()
+    print("== Import cost (python -X importtime -c 'import main') ==")
+    if not imports["ok"]:
+        print(f"  import failed: {imports['error']}")
+    else:
+        print(f"  total: {imports['total_ms']:.1f} ms")
+        for item in imports["modules"][:20]:
+            print(f"  {item['cumulative_ms']:8.1f} ms  {item['module']}")
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="msl-startup-") as scratch:
+        workdir = args.workdir or scratch
+        for _ in range(args.runs):
+            run = measure_first_frame(workdir, args.timeout)
+            runs.append(run)
+            if not run["ok"]:
+                break
+
+    print("== Time to first frame ==")
+    ok_runs = [r for r in runs if r["ok"]]
+    summary = {}
+    if ok_runs:
+        walls = [r["wall_s"] for r in ok_runs]
+        summary = {"runs": len(ok_runs), "min_s": min(walls), "median_s": statistics.median(walls), "max_s": max(walls)}
+        print(f"  {len(ok_runs)} runs: min {summary['min_s']:.3f} s, median {summary['median_s']:.3f} s, max {summary['max_s']:.3f} s")
+        for label in ok_runs[0]["marks"]:
+            values = [r["marks"][label] for r in ok_runs if label in r["marks"]]
+            print(f"  {label:>12}: median {statistics.median(values):.3f} s (from the start of main.py's imports)")
+    else:
+        print(f"  {runs[0]['error'] if runs else 'no runs'}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"imports": imports, "first_frame": {"summary": summary, "runs": runs}}, f, indent=2)
+    return 0 if ok_runs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Startup timeline profiler.
+
+BootRecorder timestamps every console line relative to process spawn and
+reconstructs the boot phases from well-known Vanilla/Bukkit/Paper log lines:
+
+    spawn -> JVM up (first output) -> libraries loaded ("Starting minecraft
+    server version") -> plugins loading -> "Preparing level" -> spawn area ->
+    plugins enabling -> "Done (x.xxxs)!"
+
+Bukkit-style plugins log "[Name] Loading Name vX" and "[Name] Enabling Name vX".
+A plugin's span runs from its line to the next plugin line or phase marker,
+which is how long the server thread spent on it (plugins load and enable one
+at a time on that thread).
+
+Each finished boot is appended to servers/<name>/.boots.jsonl together with
+what it was booted with (jar, Java, JVM flags, plugin set), so history() can
+show trends and what changed between boots.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Any
+
+HISTORY_FILE = ".boots.jsonl"
+MAX_BOOTS = 50
+PLUGIN_DIRS = ("plugins", "mods")
+
+JVM_UP = "jvm_up"
+LIBRARIES_LOADED = "libraries_loaded"
+PREPARING_LEVEL = "preparing_level"
+SPAWN_PREPARED = "spawn_prepared"
+DONE = "done"
+PHASE_LABELS = {
+    JVM_UP: "JVM 启动",
+    LIBRARIES_LOADED: "加载依赖库",
+    PREPARING_LEVEL: "准备世界",
+    SPAWN_PREPARED: "生成出生点区域",
+    DONE: "启动完成",
+}
+
+_PHASE_PATTERNS = (
+    (LIBRARIES_LOADED, re.compile(r"Starting minecraft server version")),
+    (PREPARING_LEVEL, re.compile(r"Preparing level \"")),
+    (SPAWN_PREPARED, re.compile(r"Preparing (?:start region|spawn area)")),
+)
+_DONE = re.compile(r"Done \((\d+(?:\.\d+)?)s\)! For help")
+# "[LuckPerms] Loading server plugin LuckPerms v5.4" (Paper) or "[LuckPerms] Loading LuckPerms v5.4" (Spigot)
+_PLUGIN = re.compile(r"\]:? \[([^\]\s]+)\] (Loading|Enabling) (?:server plugin )?(\S+) v?\S+")
+
+
+@dataclass
+class PluginSpan:
+    name: str
+    stage: str  # "load" | "enable"
+    start: float
+    end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or self.start) - self.start
+
+
+@dataclass
+class Timeline:
+    started_at: float  # wall clock, for display
+    phases: dict[str, float] = field(default_factory=dict)  # phase -> seconds since spawn
+    plugins: list[PluginSpan] = field(default_factory=list)
+    reported_done_s: Optional[float] = None  # the server's own "Done (x.xxxs)!"
+    lines: int = 0
+    config: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def total_s(self) -> Optional[float]:
+        return self.phases.get(DONE)
+
+    def plugin_totals(self) -> dict[str, dict[str, float]]:
+        totals: dict[str, dict[str, float]] = {}
+        for span in self.plugins:
+            entry = totals.setdefault(span.name, {"load": 0.0, "enable": 0.0})
+            entry[span.stage] += span.duration
+        return totals
+
+    def phase_spans(self) -> list[tuple[str, float, float]]:
+        """(phase, start, duration): each phase runs from the previous marker (or spawn) up to its own."""
+        marks = sorted(self.phases.items(), key=lambda item: item[1])
+        spans = []
+        previous_t = 0.0
+        for name, t in marks:
+            spans.append((name, previous_t, t - previous_t))
+            previous_t = t
+        return spans
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["plugins"] = [[s.name, s.stage, round(s.start, 3), round(s.duration, 3)] for s in self.plugins]
+        data["phases"] = {k: round(v, 3) for k, v in self.phases.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Timeline":
+        timeline = cls(
+            started_at=data.get("started_at", 0.0),
+            phases=data.get("phases", {}),
+            reported_done_s=data.get("reported_done_s"),
+            lines=data.get("lines", 0),
+            config=data.get("config", {}),
+        )
+        timeline.plugins = [PluginSpan(name, stage, start, start + duration)
+                            for name, stage, start, duration in data.get("plugins", [])]
+        return timeline
+
+
+class BootRecorder:
+    """Fed every console line of one boot; stops recording once the server reports Done."""
+
+    def __init__(self, config: Optional[dict[str, Any]] = None, spawned_at: Optional[float] = None):
+        self._spawned_at = spawned_at if spawned_at is not None else time.monotonic()
+        self.timeline = Timeline(started_at=time.time(), config=config or {})
+        self._open_span: Optional[PluginSpan] = None
+
+    @property
+    def finished(self) -> bool:
+        return DONE in self.timeline.phases
+
+    def _close_span(self, t: float) -> None:
+        if self._open_span is not None:
+            self._open_span.end = t
+            self._open_span = None
+
+    def feed_line(self, line: str, now: Optional[float] = None) -> None:
+        if self.finished:
+            return
+        t = (now if now is not None else time.monotonic()) - self._spawned_at
+        timeline = self.timeline
+        timeline.lines += 1
+        timeline.phases.setdefault(JVM_UP, t)
+
+        match = _PLUGIN.search(line)
+        if match:
+            self._close_span(t)
+            stage = "load" if match.group(2) == "Loading" else "enable"
+            self._open_span = PluginSpan(match.group(1), stage, t)
+            timeline.plugins.append(self._open_span)
+            return
+        done = _DONE.search(line)
+        if done:
+            self._close_span(t)
+            timeline.phases[DONE] = t
+            timeline.reported_done_s = float(done.group(1))
+            return
+        for phase, pattern in _PHASE_PATTERNS:
+            if phase not in timeline.phases and pattern.search(line):
+                self._close_span(t)
+                timeline.phases[phase] = t
+                return
+
+
+def _file_signature(path: str) -> Optional[list[Any]]:
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    except OSError:
+        return None
+
+
+def boot_config(server_dir: str, jar: str, java_label: str, jvm_args: list[str]) -> dict[str, Any]:
+    """What a boot ran with, compared between boots to explain trend changes."""
+    plugins = []
+    for folder in PLUGIN_DIRS:
+        try:
+            plugins += sorted(n for n in os.listdir(os.path.join(server_dir, folder)) if n.endswith(".jar"))
+        except OSError:
+            continue
+    jar_signature = _file_signature(os.path.join(server_dir, jar))
+    return {
+        "jar": jar,
+        "jar_id": hashlib.sha1(json.dumps([jar, jar_signature]).encode()).hexdigest()[:12],
+        "java": java_label,
+        "jvm_args": " ".join(jvm_args),
+        "plugins": plugins,
+    }
+
+
+def describe_changes(previous: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    changes = []
+    if previous.get("jar_id") != current.get("jar_id"):
+        changes.append(f"核心: {current.get('jar')}")
+    if previous.get("java") != current.get("java"):
+        changes.append(f"Java: {current.get('java')}")
+    if previous.get("jvm_args") != current.get("jvm_args"):
+        changes.append("JVM 参数")
+    old_plugins, new_plugins = set(previous.get("plugins", [])), set(current.get("plugins", []))
+    if old_plugins != new_plugins:
+        added, removed = len(new_plugins - old_plugins), len(old_plugins - new_plugins)
+        changes.append(f"插件 +{added}/-{removed}")
+    return changes
+
+
+def save(server_dir: str, timeline: Timeline) -> None:
+    """Appends a boot to the instance's history, keeping the newest MAX_BOOTS."""
+    path = os.path.join(server_dir, HISTORY_FILE)
+    records = [t.to_dict() for t in history(server_dir)[-(MAX_BOOTS - 1):]] + [timeline.to_dict()]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def history(server_dir: str) -> list[Timeline]:
+    """Recorded boots, oldest first."""
+    timelines = []
+    try:
+        with open(os.path.join(server_dir, HISTORY_FILE), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    timelines.append(Timeline.from_dict(json.loads(line)))
+                except (ValueError, TypeError):
+                    continue
+    except OSError:
+        pass
+    return timelines
+
+
+def slowest_plugins(timelines: list[Timeline], limit: int = 10, recent: int = 5) -> list[tuple[str, float, float]]:
+    """(plugin, mean load seconds, mean enable seconds) over the last `recent` boots, slowest first."""
+    sums: dict[str, list[float]] = {}
+    for timeline in timelines[-recent:]:
+        for name, totals in timeline.plugin_totals().items():
+            entry = sums.setdefault(name, [0.0, 0.0, 0])
+            entry[0] += totals["load"]
+            entry[1] += totals["enable"]
+            entry[2] += 1
+    ranked = [(name, load / count, enable / count) for name, (load, enable, count) in sums.items()]
+    ranked.sort(key=lambda item: item[1] + item[2], reverse=True)
+    return ranked[:limit]
+
+
+def trend(timelines: list[Timeline]) -> list[tuple[Timeline, list[str]]]:
+    """Completed boots, newest first, each with what changed since the boot before it."""
+    result = []
+    previous = None
+    for timeline in timelines:
+        if timeline.total_s is None:
+            continue
+        changes = describe_changes(previous.config, timeline.config) if previous else []
+        result.append((timeline, changes))
+        previous = timeline
+    return result[::-1]
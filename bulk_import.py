@@ -0,0 +1,201 @@
+"""
+Bulk player import for whitelist/ops/ban lists.
+
+Names come from pasted text or a CSV/JSON file (including another server's
+whitelist.json). They are resolved through Mojang's multi-name profile
+endpoint, up to PROFILES_PER_REQUEST names per call, with a few requests in
+flight at once, a shared rate limiter and Retry-After aware backoff on 429.
+"""
+import csv
+import io
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Any
+
+import requests
+
+PROFILES_PER_REQUEST = 10  # Mojang rejects larger batches
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 5.0
+MAX_RETRIES = 5
+
+VALID_NAME = re.compile(r"^[A-Za-z0-9_]{1,16}$")
+
+# Result statuses
+ADDED = "added"
+ALREADY_LISTED = "already_listed"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+ERROR = "error"
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads; can be paused after a 429."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def parse_names(text: str) -> list[dict[str, Any]]:
+    """
+    Parses pasted text, CSV or JSON into [{"name": ..., "uuid": optional}], de-duplicated.
+    JSON may be a list of names or a list of objects with "name" (and optionally "uuid").
+    CSV uses a "name"/"username"/"player" column if there is a header, else the first column.
+    """
+    text = text.strip().lstrip("\ufeff")
+    items: list[dict[str, Any]] = []
+    if text.startswith("[") or text.startswith("{"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("players") or data.get("names") or []
+        for item in data:
+            if isinstance(item, str):
+                items.append({"name": item})
+            elif isinstance(item, dict) and item.get("name"):
+                items.append({"name": item["name"], "uuid": item.get("uuid") or item.get("id")})
+    elif "," in text or "\t" in text or ";" in text:
+        dialect = csv.Sniffer().sniff(text.splitlines()[0], delimiters=",;\t")
+        rows = list(csv.reader(io.StringIO(text), dialect))
+        column = 0
+        if rows and any(h.strip().lower() in ("name", "username", "player") for h in rows[0]):
+            header = [h.strip().lower() for h in rows[0]]
+            column = next(i for i, h in enumerate(header) if h in ("name", "username", "player"))
+            rows = rows[1:]
+        items = [{"name": row[column].strip()} for row in rows if len(row) > column and row[column].strip()]
+    else:
+        items = [{"name": token} for token in text.split()]
+
+    seen = set()
+    result = []
+    for item in items:
+        name = str(item["name"]).strip()
+        key = name.lower()
+        if key and key not in seen:
+            seen.add(key)
+            result.append({**item, "name": name})
+    return result
+
+
+def _post_batch(url: str, names: list[str], limiter: RateLimiter, headers: dict[str, str],
+                timeout: float) -> list[dict[str, Any]]:
+    delay = 1.0
+    for attempt in range(MAX_RETRIES):
+        limiter.wait()
+        try:
+            r = requests.post(url, json=names, timeout=timeout, headers=headers)
+        except requests.RequestException:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+            continue
+        if r.status_code == 429 or r.status_code >= 500:
+            retry_after = r.headers.get("Retry-After")
+            wait = float(retry_after) if retry_after and retry_after.isdigit() else delay
+            limiter.pause(wait)
+            delay *= 2
+            continue
+        if r.status_code == 204:
+            return []
+        r.raise_for_status()
+        data = r.json()
+        return data if isinstance(data, list) else []
+    raise requests.HTTPError(f"Gave up after {MAX_RETRIES} attempts (rate limited)")
+
+
+def resolve_names(names: list[str], base_url: str, headers: Optional[dict[str, str]] = None,
+                  timeout: float = 15, max_workers: int = MAX_WORKERS, rate: float = REQUESTS_PER_SECOND,
+                  progress: Optional[Callable[[int, int], None]] = None) -> tuple[dict[str, dict[str, str]], dict[str, str]]:
+    """
+    Resolves names to profiles. Returns ({lower name: {"name", "id"}}, {lower name: error message}).
+    Names missing from both dicts do not exist.
+    """
+    url = f"{base_url}/profiles/minecraft"
+    batches = [names[i:i + PROFILES_PER_REQUEST] for i in range(0, len(names), PROFILES_PER_REQUEST)]
+    limiter = RateLimiter(rate)
+    found: dict[str, dict[str, str]] = {}
+    errors: dict[str, str] = {}
+    done = 0
+    lock = threading.Lock()
+
+    def run(batch: list[str]) -> None:
+        nonlocal done
+        try:
+            profiles = _post_batch(url, batch, limiter, headers or {}, timeout)
+            with lock:
+                for profile in profiles:
+                    if profile.get("name") and profile.get("id"):
+                        found[profile["name"].lower()] = {"name": profile["name"], "id": profile["id"]}
+        except Exception as ex:
+            with lock:
+                for name in batch:
+                    errors[name.lower()] = f"{type(ex).__name__}: {ex}"
+        with lock:
+            done += len(batch)
+            if progress:
+                progress(done, len(names))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(run, batches))
+    return found, errors
+
+
+def import_players(items: list[dict[str, Any]], model, make_entry: Callable[[str, str], dict[str, Any]],
+                   base_url: str, headers: Optional[dict[str, str]] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> list[dict[str, Any]]:
+    """
+    Resolves and merges players into a PlayerListModel with a single write.
+    Returns one report row per input: {"input", "status", "name", "detail"}.
+    """
+    rows: dict[str, dict[str, Any]] = {}
+    to_resolve = []
+    resolved: dict[str, tuple[str, str]] = {}
+    for item in items:
+        name = item["name"]
+        if not VALID_NAME.match(name):
+            rows[name.lower()] = {"input": name, "status": INVALID, "name": None, "detail": ""}
+        elif item.get("uuid"):
+            # Already known (e.g. imported from another whitelist.json): no lookup needed
+            resolved[name.lower()] = (name, item["uuid"])
+        else:
+            to_resolve.append(name)
+
+    found, errors = resolve_names(to_resolve, base_url, headers=headers, progress=progress) if to_resolve else ({}, {})
+    for key, profile in found.items():
+        resolved[key] = (profile["name"], profile["id"])
+
+    pending = []
+    for item in items:
+        name = item["name"]
+        key = name.lower()
+        if key in rows:
+            continue
+        if key in errors:
+            rows[key] = {"input": name, "status": ERROR, "name": None, "detail": errors[key]}
+        elif key not in resolved:
+            rows[key] = {"input": name, "status": NOT_FOUND, "name": None, "detail": ""}
+        else:
+            pending.append((key, name, resolved[key]))
+
+    added = model.add_many([make_entry(*profile) for _, _, profile in pending])
+    model.flush()
+    for (key, name, profile), ok in zip(pending, added):
+        rows[key] = {"input": name, "status": ADDED if ok else ALREADY_LISTED, "name": profile[0], "detail": ""}
+    return [rows[item["name"].lower()] for item in items]
@@ -0,0 +1,163 @@
+"""
+Serialized command dispatcher for a server's console.
+
+Every writer (command box, player actions, list polling, stop) goes through
+one queue per server, so commands never interleave on stdin. Commands are
+ordered by priority (a stop jumps ahead of routine polls) and written one at
+a time at a bounded rate. Each submit() returns a Future that resolves with
+the console lines the server printed in response: lines are collected until
+the command's `expect` pattern matches, the console goes quiet, the timeout
+expires, or a stop is queued (a stop never waits behind another command's
+response, e.g. the watchdog's probe of a hung server).
+"""
+import itertools
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, Pattern, Union
+
+PRIORITY_STOP = 0
+PRIORITY_USER = 10
+PRIORITY_POLL = 20
+
+DEFAULT_TIMEOUT = 2.0  # max seconds to collect a response
+QUIET_PERIOD = 0.15  # a response is complete once the console is silent this long
+MIN_INTERVAL = 0.05  # at most ~20 commands per second reach the server
+
+
+class DispatcherClosed(Exception):
+    pass
+
+
+class _Command:
+    def __init__(self, text: str, expect: Optional[Pattern], timeout: float, wait_response: bool):
+        self.text = text
+        self.expect = expect
+        self.timeout = timeout
+        self.wait_response = wait_response
+        self.future: Future = Future()
+        self.lines: list[str] = []
+
+
+class CommandDispatcher:
+    def __init__(self, write: Callable[[str], None], min_interval: float = MIN_INTERVAL,
+                 quiet_period: float = QUIET_PERIOD):
+        """write(text) must send one command line to the server (without trailing newline)."""
+        self._write = write
+        self.min_interval = min_interval
+        self.quiet_period = quiet_period
+        self._queue: "queue.PriorityQueue[tuple[int, int, Optional[_Command]]]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._closed = False
+        self._closed_lock = threading.Lock()  # submit() and close() agree on whether a command got in
+        self._stops_queued = 0  # PRIORITY_STOP commands waiting; they cut the current collect short
+        self._current: Optional[_Command] = None
+        self._current_lock = threading.Lock()
+        self._line_event = threading.Event()
+        self._last_line_at = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_stdin(cls, stdin, **kwargs) -> "CommandDispatcher":
+        def write(text: str) -> None:
+            stdin.write(text + "\n")
+            stdin.flush()
+        return cls(write, **kwargs)
+
+    def submit(self, command: str, priority: int = PRIORITY_USER, expect: Union[str, Pattern, None] = None,
+               timeout: float = DEFAULT_TIMEOUT, wait_response: bool = True) -> Future:
+        """Queues a command. The returned Future resolves with the list of response lines."""
+        pattern = re.compile(expect) if isinstance(expect, str) else expect
+        cmd = _Command(command.rstrip("\r\n"), pattern, timeout, wait_response)
+        with self._closed_lock:
+            if self._closed:
+                cmd.future.set_exception(DispatcherClosed("Server is not running"))
+                return cmd.future
+            self._queue.put((priority, next(self._seq), cmd))
+            if priority <= PRIORITY_STOP:
+                self._stops_queued += 1
+        if priority <= PRIORITY_STOP:
+            self._line_event.set()
+        return cmd.future
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def feed_line(self, line: str) -> None:
+        """Called by the console reader for every line the server prints."""
+        with self._current_lock:
+            self._last_line_at = time.monotonic()
+            if self._current is not None:
+                self._current.lines.append(line)
+        self._line_event.set()
+
+    def close(self) -> None:
+        """Fails every queued command; called when the server process exits."""
+        with self._closed_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put((-1, next(self._seq), None))
+
+    def _collect(self, cmd: _Command) -> None:
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now - started >= cmd.timeout or self._closed or self._stops_queued:
+                return
+            with self._current_lock:
+                lines = list(cmd.lines)
+                last_line_at = self._last_line_at
+            if cmd.expect is not None:
+                if any(cmd.expect.search(line) for line in lines):
+                    return
+            elif lines and now - last_line_at >= self.quiet_period:
+                return
+            self._line_event.clear()
+            self._line_event.wait(self.quiet_period / 3)
+
+    def _run(self) -> None:
+        last_write = 0.0
+        while True:
+            priority, _, cmd = self._queue.get()
+            if cmd is None:
+                break
+            if priority <= PRIORITY_STOP:
+                with self._closed_lock:
+                    self._stops_queued -= 1
+            if self._closed:
+                if not cmd.future.done():
+                    cmd.future.set_exception(DispatcherClosed("Server stopped"))
+                break
+            if not cmd.future.set_running_or_notify_cancel():
+                continue
+            wait = self.min_interval - (time.monotonic() - last_write)
+            if wait > 0:
+                time.sleep(wait)
+            with self._current_lock:
+                self._current = cmd if cmd.wait_response else None
+            try:
+                self._write(cmd.text)
+            except Exception as ex:
+                with self._current_lock:
+                    self._current = None
+                cmd.future.set_exception(ex)
+                continue
+            last_write = time.monotonic()
+            if cmd.wait_response:
+                self._collect(cmd)
+            with self._current_lock:
+                self._current = None
+                lines = list(cmd.lines)
+            cmd.future.set_result(lines)
+        # Drain whatever is left so no caller waits forever
+        while True:
+            try:
+                _, _, cmd = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if cmd is not None and not cmd.future.done():
+                cmd.future.set_exception(DispatcherClosed("Server stopped"))
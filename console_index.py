@@ -0,0 +1,220 @@
+"""
+The live console's scrollback, tagged and indexed as lines arrive.
+
+Every line is classified once when it is appended: log level, thread and
+logger/plugin source are read from the server's log prefix (vanilla/Fabric/
+Forge "[12:00:00] [Server thread/WARN] [logger]: ", Paper/Spigot/proxies
+"[12:00:00 WARN]: [Plugin] "). Lines without a prefix (stack traces, wrapped
+output) take over the tags of the server line before them, so an ERROR's
+stack trace stays with it under a level filter.
+
+Alongside the lines the buffer keeps compact posting lists (arrays of line
+numbers): one per level, and one per word of three or more letters/digits
+(player names, plugin names, exception classes). Level postings are written on
+arrival; the word index is brought up to date by the first word query after
+new lines came in, so the console reader only pays for the prefix match and
+every line is still tokenized just once. A filter starts from the smallest
+matching posting list instead of scanning the whole scrollback, and only
+substring/regex search looks at the text, of those candidates only.
+
+Each line carries an opaque `item` (the console's Text control), so switching
+filters only changes which existing controls are shown.
+"""
+import bisect
+import re
+import sys
+import threading
+from array import array
+from dataclasses import dataclass, field
+from heapq import merge
+from typing import Any, Iterable, Optional
+
+SCROLLBACK = 50_000  # lines kept in the live console
+TRIM_CHUNK = 1_000  # evicted together, so trimming isn't a per-line cost
+
+TRACE, DEBUG, INFO, WARN, ERROR, FATAL = range(6)
+LEVEL_NAMES = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+LEVEL_ALIASES = {
+    "TRACE": TRACE, "FINEST": TRACE, "FINER": DEBUG, "FINE": DEBUG, "DEBUG": DEBUG, "CONFIG": DEBUG,
+    "INFO": INFO, "WARN": WARN, "WARNING": WARN, "ERROR": ERROR, "SEVERE": ERROR, "FATAL": FATAL,
+}
+PANEL = "panel"  # source of the panel's own messages
+
+# "[12:00:00] [Server thread/INFO]: ..." (vanilla), with " [logger]" before the colon on Fabric/Forge
+THREADED_PREFIX = re.compile(r"^\[[^\]]*\] \[([^\]]+)/([A-Za-z]+)\](?: \[([^\]]+)\])?: ")
+# "[12:00:00 INFO]: [LuckPerms] ..." (Paper/Spigot), "[12:00:00 INFO] [velocity]: ..." (proxies)
+LEVEL_PREFIX = re.compile(r"^\[\d{1,2}:\d{2}:\d{2}(?:\.\d+)? ([A-Za-z]+)\](?: \[([^\]]+)\])?: (?:\[([^\]\s]+)\] )?")
+TOKEN = re.compile(r"[0-9A-Za-z_]{3,32}")
+
+
+def classify(line: str) -> Optional[tuple[int, str, str]]:
+    """(level, thread, source) from a server log prefix, or None if the line has none."""
+    match = THREADED_PREFIX.match(line)
+    if match:
+        thread, level, logger = match.groups()
+        return LEVEL_ALIASES.get(level.upper(), INFO), thread, logger or ""
+    match = LEVEL_PREFIX.match(line)
+    if match:
+        level, logger, plugin = match.groups()
+        return LEVEL_ALIASES.get(level.upper(), INFO), "", plugin or logger or ""
+    return None
+
+
+class Entry:
+    __slots__ = ("seq", "level", "thread", "source", "text", "lower", "item")
+
+    def __init__(self, seq: int, level: int, thread: str, source: str, text: str, item: Any):
+        self.seq = seq
+        self.level = level
+        self.thread = thread
+        self.source = source
+        self.text = text
+        self.lower = text.lower()
+        self.item = item
+
+    def tokens(self) -> set[str]:
+        return set(TOKEN.findall(self.lower))
+
+
+@dataclass
+class ConsoleFilter:
+    min_level: int = TRACE
+    word: str = ""  # whole word, e.g. a player name; looked up in the token index
+    text: str = ""  # case-insensitive substring, or a regular expression
+    regex: bool = False
+    _pattern: Optional[re.Pattern] = field(default=None, init=False, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.min_level > TRACE or bool(self.word) or bool(self.text)
+
+    def compile(self) -> None:
+        """Prepares the search; raises re.error for an invalid regular expression."""
+        self.word = self.word.strip().lower()
+        self._pattern = re.compile(self.text, re.IGNORECASE) if self.regex and self.text else None
+
+    def matches(self, entry: Entry, check_word: bool = True) -> bool:
+        if entry.level < self.min_level:
+            return False
+        if check_word and self.word and self.word not in entry.tokens():
+            return False
+        if self.text:
+            if self._pattern is not None:
+                return self._pattern.search(entry.text) is not None
+            return self.text.lower() in entry.lower
+        return True
+
+
+class ConsoleBuffer:
+    def __init__(self, max_lines: int = SCROLLBACK, trim_chunk: int = TRIM_CHUNK):
+        self.max_lines = max_lines
+        self.trim_chunk = trim_chunk
+        self._lock = threading.Lock()
+        self._entries: list[Entry] = []
+        self._first_seq = 0
+        self._next_seq = 0
+        self._by_level = [array("q") for _ in LEVEL_NAMES]
+        self._by_token: dict[str, array] = {}
+        self._tokens_indexed = 0  # lines before this seq are in _by_token
+        self._last_server: tuple[int, str, str] = (INFO, "", "")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def first_seq(self) -> int:
+        """Line number of the oldest line still in the scrollback."""
+        return self._first_seq
+
+    def append(self, text: str, item: Any = None, level: Optional[int] = None, source: Optional[str] = None) -> Entry:
+        """
+        Adds a line. Server output is classified from its prefix; for the
+        panel's own messages pass `source` (and optionally `level`).
+        """
+        if source is None:
+            meta = classify(text)
+            if meta is None:
+                meta = self._last_server
+            else:
+                self._last_server = meta
+            line_level, thread, line_source = meta
+        else:
+            line_level, thread, line_source = INFO, "", source
+        if level is not None:
+            line_level = level
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            entry = Entry(seq, line_level, sys.intern(thread), sys.intern(line_source), text, item)
+            self._entries.append(entry)
+            self._by_level[line_level].append(seq)
+            if len(self._entries) > self.max_lines + self.trim_chunk:
+                self._evict(len(self._entries) - self.max_lines)
+        return entry
+
+    def _index_tokens(self) -> None:
+        by_token = self._by_token
+        for entry in self._entries[self._tokens_indexed - self._first_seq:]:
+            seq = entry.seq
+            for token in entry.tokens():
+                postings = by_token.get(token)
+                if postings is None:
+                    by_token[token] = array("q", (seq,))
+                else:
+                    postings.append(seq)
+        self._tokens_indexed = self._next_seq
+
+    def _evict(self, count: int) -> None:
+        evicted = self._entries[:count]
+        del self._entries[:count]
+        self._first_seq = self._entries[0].seq
+        for postings in self._by_level:
+            del postings[:bisect.bisect_left(postings, self._first_seq)]
+        stale = set()
+        for entry in evicted:
+            if entry.seq >= self._tokens_indexed:
+                break
+            stale.update(entry.tokens())
+        self._tokens_indexed = max(self._tokens_indexed, self._first_seq)
+        for token in stale:
+            postings = self._by_token.get(token)
+            if postings is None:
+                continue
+            del postings[:bisect.bisect_left(postings, self._first_seq)]
+            if not postings:
+                del self._by_token[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._first_seq = self._next_seq
+            for postings in self._by_level:
+                del postings[:]
+            self._by_token.clear()
+            self._tokens_indexed = self._next_seq
+            self._last_server = (INFO, "", "")
+
+    def level_counts(self) -> list[int]:
+        with self._lock:
+            return [len(postings) for postings in self._by_level]
+
+    def entries(self) -> list[Entry]:
+        with self._lock:
+            return list(self._entries)
+
+    def query(self, console_filter: ConsoleFilter) -> list[Entry]:
+        """Matching lines, oldest first. Call console_filter.compile() first."""
+        with self._lock:
+            entries = self._entries
+            first = self._first_seq
+            candidates: Iterable[int]
+            if console_filter.word:
+                if self._tokens_indexed < self._next_seq:
+                    self._index_tokens()
+                candidates = self._by_token.get(console_filter.word, ())
+            elif console_filter.min_level > TRACE:
+                candidates = list(merge(*(self._by_level[level] for level in range(console_filter.min_level, len(LEVEL_NAMES)))))
+            else:
+                return [entry for entry in entries if console_filter.matches(entry)]
+            # Candidates from the word index don't need the word checked again
+            return [entries[seq - first] for seq in candidates if console_filter.matches(entries[seq - first], check_word=False)]
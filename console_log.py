@@ -0,0 +1,300 @@
+"""
+On-disk console history: one log per server session, written off the reader thread.
+
+The console reader only calls ConsoleLog.append(), which stamps the line with
+time.monotonic_ns() and appends it to a deque. deque.append()/popleft() are
+atomic in CPython, so neither side ever takes a lock and a slow disk can't
+back up the server's stdout pipe. A background writer wakes every
+FLUSH_INTERVAL seconds, drains everything queued and writes it with a single
+write() through a large buffer.
+
+Layout, under the instance directory (excluded from templates):
+
+    .console/<session id>/console-0001.log.gz
+    .console/<session id>/console-0002.log      <- segment being written
+
+Each line is "<seconds since session start> <text>"; a '#' header line at the
+top of every segment records the wall-clock time it was opened. A segment is
+rotated once it reaches max_bytes or max_seconds (checked after each batch),
+and closed segments are gzipped in the background. Only the newest
+MAX_SESSIONS sessions are kept; older ones are handed to `discard` (the
+panel's trash collector) rather than deleted inline. Creating the session
+directory, pruning and opening the first segment also happen on the writer
+thread, so start() costs the reader nothing.
+"""
+import datetime
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+LOG_DIR = ".console"
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+SEGMENT_MAX_SECONDS = 3600
+FLUSH_INTERVAL = 0.5  # seconds between batches
+WRITE_BUFFER = 1024 * 1024
+MAX_SESSIONS = 50
+MAX_VIEW_LINES = 5000
+
+SESSION_ID_FORMAT = "%Y%m%d-%H%M%S"
+SEGMENT_NAME = re.compile(r"^console-(\d+)\.log(\.gz)?$")
+LINE = re.compile(r"^\s*(\d+\.\d+) (.*)$", re.DOTALL)
+
+
+def log_root(server_dir: str) -> str:
+    return os.path.join(server_dir, LOG_DIR)
+
+
+def _compress(path: str) -> None:
+    tmp = path + ".gz.tmp"
+    try:
+        with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, WRITE_BUFFER)
+        os.replace(tmp, path + ".gz")
+        os.remove(path)
+    except OSError as e:
+        print(f"Error compressing console log {path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+class ConsoleLog:
+    def __init__(self, server_dir: str, max_bytes: int = SEGMENT_MAX_BYTES,
+                 max_seconds: float = SEGMENT_MAX_SECONDS, flush_interval: float = FLUSH_INTERVAL,
+                 discard: Optional[Callable[[str], Any]] = None):
+        self.server_dir = server_dir
+        self.discard = discard
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.flush_interval = flush_interval
+        self.session_id = ""
+        self.directory = ""
+        self.lines_written = 0
+        self.bytes_written = 0
+        self.batches = 0
+        self.segments = 0
+        self.last_error: Optional[OSError] = None
+        self._t0 = time.monotonic_ns()
+        self._pending: deque = deque()
+        self._stop = threading.Event()
+        self._file = None
+        self._segment_path = ""
+        self._segment_bytes = 0
+        self._segment_opened = 0.0
+        self._compressors: list[threading.Thread] = []
+        self._thread = threading.Thread(target=self._run, name="console-log", daemon=True)
+
+    def start(self) -> "ConsoleLog":
+        """Starts the writer. Lines appended from now on are kept; disk errors end up in last_error."""
+        self._thread.start()
+        return self
+
+    def _open_session(self) -> None:
+        root = log_root(self.server_dir)
+        os.makedirs(root, exist_ok=True)
+        base = datetime.datetime.now().strftime(SESSION_ID_FORMAT)
+        for attempt in range(1, 100):
+            session_id = base if attempt == 1 else f"{base}-{attempt}"
+            try:
+                os.mkdir(os.path.join(root, session_id))
+                break
+            except FileExistsError:
+                continue
+        else:
+            raise FileExistsError(f"No free console session directory for {base}")
+        self.session_id = session_id
+        self.directory = os.path.join(root, session_id)
+        prune(self.server_dir, keep=MAX_SESSIONS, active=session_id, discard=self.discard)
+        self._open_segment()
+
+    def append(self, line: str) -> None:
+        """Queues one console line; called from the reader thread, never blocks on I/O."""
+        self._pending.append((time.monotonic_ns(), line))
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Writes what's queued, compresses the last segment and stops. Waits up to `timeout` seconds (None: don't wait)."""
+        self._stop.set()
+        if timeout is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _open_segment(self) -> None:
+        self.segments += 1
+        self._segment_path = os.path.join(self.directory, f"console-{self.segments:04d}.log")
+        self._file = open(self._segment_path, "w", encoding="utf-8", errors="replace", buffering=WRITE_BUFFER)
+        self._segment_opened = time.monotonic()
+        offset = (time.monotonic_ns() - self._t0) / 1e9
+        header = (f"# session {self.session_id} segment {self.segments} "
+                  f"opened {datetime.datetime.now().isoformat(timespec='milliseconds')} at {offset:.3f}\n")
+        self._file.write(header)
+        self._segment_bytes = len(header.encode("utf-8"))
+
+    def _close_segment(self, background: bool) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if background:
+            compressor = threading.Thread(target=_compress, args=(self._segment_path,), name="console-log-gzip", daemon=True)
+            compressor.start()
+            self._compressors = [t for t in self._compressors if t.is_alive()] + [compressor]
+        else:
+            _compress(self._segment_path)
+
+    def _drain(self) -> None:
+        batch = []
+        pop = self._pending.popleft
+        try:
+            while True:
+                batch.append(pop())
+        except IndexError:
+            pass
+        if batch:
+            t0 = self._t0
+            text = "".join([f"{(stamp - t0) / 1e9:12.3f} {line}\n" for stamp, line in batch])
+            self._file.write(text)
+            self._file.flush()  # one write() per batch; also keeps the live session readable
+            size = len(text.encode("utf-8"))
+            self._segment_bytes += size
+            self.bytes_written += size
+            self.lines_written += len(batch)
+            self.batches += 1
+        if self._segment_bytes >= self.max_bytes or time.monotonic() - self._segment_opened >= self.max_seconds:
+            self._close_segment(background=True)
+            self._open_segment()
+
+    def _run(self) -> None:
+        try:
+            self._open_session()
+            while not self._stop.wait(self.flush_interval):
+                self._drain()
+            self._drain()
+        except OSError as e:
+            # Disk full, directory removed, ...: give up on this session. A zero-length deque
+            # discards appends, so the reader keeps going without queueing lines forever.
+            self.last_error = e
+            print(f"Error writing console log: {e}")
+            self._pending = deque(maxlen=0)
+        finally:
+            try:
+                self._close_segment(background=False)
+            except OSError as e:
+                print(f"Error closing console log: {e}")
+            for compressor in self._compressors:
+                compressor.join()
+
+
+@dataclass
+class SessionInfo:
+    session_id: str
+    path: str
+    started: Optional[datetime.datetime]
+    size_bytes: int
+    segments: int
+    active: bool  # has an uncompressed segment: still being written, or the panel exited mid-session
+
+
+def _segments(path: str) -> list[tuple[int, str]]:
+    found = []
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return []
+    for name in names:
+        match = SEGMENT_NAME.match(name)
+        if match:
+            found.append((int(match.group(1)), name))
+    # A segment caught between compression and removal exists twice; read the plain one
+    seen, unique = set(), []
+    for number, name in sorted(found, key=lambda item: (item[0], item[1].endswith(".gz"))):
+        if number not in seen:
+            seen.add(number)
+            unique.append((number, name))
+    return unique
+
+
+def list_sessions(server_dir: str) -> list[SessionInfo]:
+    """Recorded sessions of an instance, newest first."""
+    root = log_root(server_dir)
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    sessions = []
+    for name in names:
+        path = os.path.join(root, name)
+        segments = _segments(path)
+        if not segments:
+            continue
+        try:
+            started = datetime.datetime.strptime(name[:15], SESSION_ID_FORMAT)
+        except ValueError:
+            started = None
+        size = 0
+        for _, segment in segments:
+            try:
+                size += os.path.getsize(os.path.join(path, segment))
+            except OSError:
+                pass
+        sessions.append(SessionInfo(name, path, started, size, len(segments),
+                                    any(not segment.endswith(".gz") for _, segment in segments)))
+    sessions.sort(key=lambda s: s.session_id, reverse=True)
+    return sessions
+
+
+def parse_line(text: str) -> tuple[Optional[float], str]:
+    """(seconds since session start, console text) for one stored line."""
+    match = LINE.match(text)
+    if not match:
+        return None, text
+    return float(match.group(1)), match.group(2)
+
+
+def read_session(path: str, tail: int = MAX_VIEW_LINES) -> list[tuple[Optional[float], str]]:
+    """The last `tail` lines of a session, across all of its segments."""
+    lines: deque = deque(maxlen=tail)
+    for _, segment in _segments(path):
+        segment_path = os.path.join(path, segment)
+        opener = gzip.open if segment.endswith(".gz") else open
+        try:
+            with opener(segment_path, "rt", encoding="utf-8", errors="replace") as f:
+                for raw in f:
+                    if raw.startswith("#"):
+                        continue
+                    lines.append(parse_line(raw.rstrip("\n")))
+        except (OSError, EOFError) as e:
+            # A truncated .gz from an interrupted compression still yields what it could
+            print(f"Error reading console log {segment_path}: {e}")
+    return list(lines)
+
+
+def prune(server_dir: str, keep: int = MAX_SESSIONS, active: str = "",
+          discard: Optional[Callable[[str], Any]] = None) -> int:
+    """
+    Removes all but the newest `keep` sessions; returns how many were removed.
+    discard(path) takes a session directory away (e.g. TrashCollector.delete);
+    without one, or if it fails, the directory is deleted here.
+    """
+    removed = 0
+    for session in list_sessions(server_dir)[keep:]:
+        if session.session_id == active:
+            continue
+        removed += 1
+        if discard is not None:
+            try:
+                discard(session.path)
+                continue
+            except OSError:
+                pass  # e.g. the instance is on another filesystem than the trash
+        shutil.rmtree(session.path, ignore_errors=True)
+    return removed
@@ -0,0 +1,126 @@
+"""
+Per-line processing of a server's console output, independent of the UI.
+
+ConsoleProcessor does everything the console reader does with a line before
+it reaches the screen: it feeds the taps that watch every line (command
+dispatcher, hang detector, boot profiler), keeps the online player list from
+`list` replies and join/leave messages, and decides whether the line is shown.
+handle_line() is the console reader's whole per-line step around it (player
+callbacks, showing the line, UI flushes); the panel calls it with its UI and
+benchmarks/console_bench.py with headless stand-ins against a fake server.
+"""
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+import tracing
+
+# Vanilla: "There are 1 of 20 players online: Player123"
+# Paper: "[15:12:48 INFO]: There are 1 of 20 players online: Player123"
+LIST_REPLY = re.compile(r"players online: (.*)")
+# Join: "Player123[/127.0.0.1:50168] logged in with entity id..." or "[INFO]: Player123 joined the game"
+JOIN = re.compile(r"(\w+)\[.*logged in|\]: (\w+) joined the game")
+# Leave: "[INFO]: Player123 left the game"
+LEAVE = re.compile(r"\]: (\w+) left the game")
+
+
+def parse_list_reply(line: str) -> Optional[list[str]]:
+    """Sorted player names from a `list` reply line, or None if the line isn't one."""
+    match = LIST_REPLY.search(line)
+    if not match:
+        return None
+    names = match.group(1).strip()
+    return sorted(name.strip() for name in names.split(",")) if names else []
+
+
+def parse_join(line: str) -> Optional[str]:
+    match = JOIN.search(line)
+    return (match.group(1) or match.group(2)) if match else None
+
+
+def parse_leave(line: str) -> Optional[str]:
+    match = LEAVE.search(line)
+    return match.group(1) if match else None
+
+
+@dataclass
+class LineResult:
+    line: str
+    hidden: bool = False  # not shown in the console (list replies, lag samples)
+    players_changed: bool = False
+    joined: Optional[str] = None
+    left: Optional[str] = None
+
+
+class ConsoleProcessor:
+    """
+    taps see every line; filters return True for lines that should be hidden;
+    observers see the lines that are shown.
+    """
+
+    def __init__(self, taps: Iterable[Callable[[str], None]] = (),
+                 filters: Iterable[Callable[[str], bool]] = (),
+                 observers: Iterable[Callable[[str], None]] = ()):
+        self.taps = list(taps)
+        self.filters = list(filters)
+        self.observers = list(observers)
+        self.online: list[str] = []
+
+    def process(self, line: str) -> LineResult:
+        for tap in self.taps:
+            tap(line)
+
+        names = parse_list_reply(line)
+        if names is not None:
+            # Don't show list replies in the console, the periodic poll makes them spammy
+            self.online = names
+            return LineResult(line, hidden=True, players_changed=True)
+        if any(hide(line) for hide in self.filters):
+            return LineResult(line, hidden=True)
+        for observer in self.observers:
+            observer(line)
+
+        result = LineResult(line)
+        joined = parse_join(line)
+        if joined and joined not in self.online:
+            self.online = sorted(self.online + [joined])
+            result.joined = joined
+            result.players_changed = True
+        left = parse_leave(line)
+        if left and left in self.online:
+            self.online = [name for name in self.online if name != left]
+            result.left = left
+            result.players_changed = True
+        return result
+
+
+def handle_line(processor: ConsoleProcessor, raw_line: str, show: Callable[[str], None], update: Callable[[], None],
+                on_players: Optional[Callable[[list[str]], None]] = None,
+                on_join: Optional[Callable[[str], None]] = None,
+                on_leave: Optional[Callable[[str], None]] = None) -> LineResult:
+    """
+    Processes one line read from the server: on_players gets the new online
+    list whenever it changes, on_join/on_leave the player names, show() the
+    line if it is visible, and update() is called for every UI change.
+    """
+    line = raw_line.strip()
+    tracing.count("console.lines")
+    with tracing.span("console.line", "console"):
+        result = processor.process(line)
+    if result.players_changed and on_players:
+        on_players(processor.online)
+    if result.hidden:
+        if result.players_changed:
+            update()
+        return result
+    if result.joined:
+        if on_join:
+            on_join(result.joined)
+        update()
+    if result.left:
+        if on_leave:
+            on_leave(result.left)
+        update()
+    show(line)
+    update()
+    return result
@@ -0,0 +1,273 @@
+"""
+GC log capture and pause-time analytics.
+
+With GC logging enabled an instance is launched with unified JVM logging
+(Java 9+) writing to logs/gc.log. GcLogTailer follows that file while the
+server runs, and GcLogParser turns it into time series:
+
+- pause durations (every stop-the-world pause, including ZGC/Shenandoah's
+  short phase pauses),
+- heap occupancy before and after each collection, and the heap capacity,
+- allocation rate (heap growth between the end of one collection and the
+  start of the next),
+- young / mixed / full / concurrent collection counts.
+
+heap_warnings() looks at those to tell when the configured heap is too small.
+"""
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from timeseries import SeriesStore
+
+LOG_FILE = os.path.join("logs", "gc.log")
+POLL_INTERVAL = 1.0
+MIN_JAVA = 9  # unified logging; Java 8 used -XX:+PrintGCDetails with a different format
+
+YOUNG = "young"
+MIXED = "mixed"
+FULL = "full"
+CONCURRENT = "concurrent"  # ZGC/Shenandoah cycles: the pauses are logged separately
+KINDS = (YOUNG, MIXED, FULL, CONCURRENT)
+
+# Thresholds for heap_warnings()
+LIVE_SET_WARN_FRACTION = 0.7  # heap still this full right after GC
+PAUSE_P99_WARN_MS = 200.0
+YOUNG_INTERVAL_WARN_S = 1.0
+
+_UPTIME = re.compile(r"\[(\d+(?:\.\d+)?)s\]")
+_SIZE = r"(\d+)([KMG])"
+# "GC(12) Pause Young (Normal) (G1 Evacuation Pause) 1024M->256M(4096M) 12.345ms"
+# "GC(3) Garbage Collection (Allocation Rate) 1024M(25%)->512M(12%)" (ZGC, no pause time)
+_COLLECTION = re.compile(
+    r"GC\((\d+)\) (?:[YO]: )?(Pause [A-Za-z ]+?|Garbage Collection|Concurrent [A-Za-z ]+?|Major Collection|Minor Collection)"
+    r"((?: \([^)]*\))*) " + _SIZE + r"(?:\(\d+%\))?->" + _SIZE + r"(?:\(\d+%\))?(?:\(" + _SIZE + r"\))?(?: (\d+(?:\.\d+)?)ms)?"
+)
+# ZGC "GC(3) Pause Mark Start 0.012ms" / Shenandoah "GC(3) Pause Init Mark 0.107ms": pauses without heap sizes
+_PHASE_PAUSE = re.compile(r"GC\((\d+)\) (?:[YO]: )?(Pause [A-Za-z ]+?)(?: \([^)]*\))* (\d+(?:\.\d+)?)ms\s*$")
+# "Heap Max Capacity: 4G" / "Heap Region Size: 2M" lines from the gc,init tag
+_MAX_CAPACITY = re.compile(r"Heap Max Capacity: " + _SIZE)
+
+
+def _to_mb(amount: str, unit: str) -> float:
+    return int(amount) * {"K": 1 / 1024, "M": 1, "G": 1024}[unit]
+
+
+def log_args(server_dir: str) -> list[str]:
+    """JVM arguments that write a rotating GC log to the instance's logs/gc.log."""
+    path = os.path.abspath(os.path.join(server_dir, LOG_FILE)).replace("\\", "/")
+    # Unified logging splits its option on ':', so a Windows drive letter has to be quoted
+    return [f"-Xlog:gc*:file=\"{path}\":time,uptime,level,tags:filecount=5,filesize=20M"]
+
+
+@dataclass
+class GcEvent:
+    gc_id: int
+    uptime: Optional[float]
+    kind: str
+    name: str  # "Pause Young (Normal) (G1 Evacuation Pause)"
+    pause_ms: Optional[float] = None
+    before_mb: Optional[float] = None
+    after_mb: Optional[float] = None
+    capacity_mb: Optional[float] = None
+
+
+def classify(name: str) -> str:
+    if "Full" in name:
+        return FULL
+    if "Mixed" in name:
+        return MIXED
+    if name.startswith("Pause Young") or "Minor" in name:
+        return YOUNG
+    return CONCURRENT
+
+
+class GcLogParser:
+    """Fed GC log lines in order; keeps the series and counters that the panel displays."""
+
+    def __init__(self):
+        self.series = SeriesStore()
+        self.counts = dict.fromkeys(KINDS, 0)
+        self.max_capacity_mb: Optional[float] = None
+        self._last_after: Optional[tuple[float, float]] = None  # (uptime, heap after GC)
+        self._last_young_uptime: Optional[float] = None
+        self._young_intervals = self.series.get("young_interval_s")
+
+    def feed_line(self, line: str, now: Optional[float] = None) -> Optional[GcEvent]:
+        now = time.time() if now is None else now
+        uptime_match = _UPTIME.search(line)
+        uptime = float(uptime_match.group(1)) if uptime_match else None
+
+        capacity = _MAX_CAPACITY.search(line)
+        if capacity:
+            self.max_capacity_mb = _to_mb(capacity.group(1), capacity.group(2))
+            return None
+
+        match = _COLLECTION.search(line)
+        if match:
+            name = (match.group(2) + match.group(3)).strip()
+            event = GcEvent(
+                gc_id=int(match.group(1)), uptime=uptime, kind=classify(name), name=name,
+                before_mb=_to_mb(match.group(4), match.group(5)),
+                after_mb=_to_mb(match.group(6), match.group(7)),
+                capacity_mb=_to_mb(match.group(8), match.group(9)) if match.group(8) else None,
+                pause_ms=float(match.group(10)) if match.group(10) and name.startswith("Pause") else None,
+            )
+            self._record(event, now)
+            return event
+
+        match = _PHASE_PAUSE.search(line)
+        if match:
+            event = GcEvent(int(match.group(1)), uptime, CONCURRENT, match.group(2), pause_ms=float(match.group(3)))
+            self.series.get("pause_ms").append(event.pause_ms, now)
+            return event
+        return None
+
+    def _record(self, event: GcEvent, now: float) -> None:
+        self.counts[event.kind] += 1
+        if event.pause_ms is not None:
+            self.series.get("pause_ms").append(event.pause_ms, now)
+        self.series.get("heap_before_mb").append(event.before_mb, now)
+        self.series.get("heap_after_mb").append(event.after_mb, now)
+        if event.capacity_mb is not None:
+            self.series.get("heap_capacity_mb").append(event.capacity_mb, now)
+        if event.uptime is not None:
+            if self._last_after is not None and event.uptime > self._last_after[0]:
+                allocated = max(0.0, event.before_mb - self._last_after[1])
+                self.series.get("alloc_rate_mb_s").append(allocated / (event.uptime - self._last_after[0]), now)
+            self._last_after = (event.uptime, event.after_mb)
+            if event.kind == YOUNG:
+                if self._last_young_uptime is not None:
+                    self._young_intervals.append(event.uptime - self._last_young_uptime, now)
+                self._last_young_uptime = event.uptime
+
+    def pause_percentile(self, p: float, since: Optional[float] = None) -> Optional[float]:
+        return self.series.get("pause_ms").percentile(p, since)
+
+    def alloc_rate(self) -> Optional[float]:
+        """Mean allocation rate over the last few collections, in MB/s."""
+        rates = self.series.get("alloc_rate_mb_s").values()[-5:]
+        return sum(rates) / len(rates) if rates else None
+
+
+def heap_warnings(parser: GcLogParser, xmx_mb: Optional[float] = None, since: Optional[float] = None) -> list[str]:
+    """Signs that the configured heap is too small for the workload."""
+    warnings = []
+    limit = xmx_mb or parser.max_capacity_mb
+    if parser.counts[FULL]:
+        warnings.append(f"已发生 {parser.counts[FULL]} 次 Full GC: 堆内存可能不足 (或有插件调用了 System.gc())。")
+    live = parser.series.get("heap_after_mb").percentile(50, since)
+    if live is not None and limit and live > LIVE_SET_WARN_FRACTION * limit:
+        warnings.append(f"GC 后堆内存仍占用 {live:.0f} MB (上限 {limit:.0f} MB 的 {live / limit:.0%})，建议增大 -Xmx。")
+    interval = parser.series.get("young_interval_s").percentile(50, since)
+    if interval is not None and interval < YOUNG_INTERVAL_WARN_S:
+        warnings.append(f"Young GC 过于频繁 (约每 {interval:.2f} 秒一次)，新生代可能过小。")
+    p99 = parser.pause_percentile(99, since)
+    if p99 is not None and p99 > PAUSE_P99_WARN_MS:
+        warnings.append(f"GC 停顿 p99 为 {p99:.0f} ms，超过 {PAUSE_P99_WARN_MS:.0f} ms 会造成明显卡顿。")
+    return warnings
+
+
+class GcLogTailer:
+    """
+    Follows a GC log across JVM restarts and size-based rotation, feeding each complete line to a parser.
+
+    The file is opened only for the duration of each read: on Windows an open
+    handle would stop the JVM from renaming gc.log when it rotates. When the
+    file is replaced, whatever the JVM wrote to the old one since the last poll
+    is read from the rotated copy first, so no pause is lost.
+    """
+
+    def __init__(self, path: str, parser: GcLogParser, on_event: Optional[Callable[[GcEvent], None]] = None,
+                 interval: float = POLL_INTERVAL):
+        self.path = path
+        self.parser = parser
+        self.on_event = on_event
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # A log left by the previous run is rotated away by the JVM at startup; never parse it
+        self._stale_inode = self._inode()
+        self._file_id: Optional[tuple[int, int]] = None
+        self._offset = 0
+        self._pending = b""
+
+    def _inode(self, path: Optional[str] = None) -> Optional[tuple[int, int]]:
+        try:
+            st = os.stat(path or self.path)
+            return st.st_dev, st.st_ino
+        except OSError:
+            return None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _rotated_copy(self, file_id: tuple[int, int]) -> Optional[str]:
+        """Where the JVM moved a rotated log (gc.log.0, gc.log.1, ...), found by its inode."""
+        directory, name = os.path.split(self.path)
+        try:
+            entries = os.listdir(directory or ".")
+        except OSError:
+            return None
+        for entry in entries:
+            if entry.startswith(name + "."):
+                candidate = os.path.join(directory, entry)
+                if self._inode(candidate) == file_id:
+                    return candidate
+        return None
+
+    def _read_new(self, path: str, file_id: tuple[int, int]) -> bool:
+        """Reads what was appended since the last poll; returns whether there was anything."""
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if (st.st_dev, st.st_ino) != file_id:
+                    return False  # rotated between stat() and open(); picked up on the next poll
+                f.seek(self._offset)
+                data = f.read()
+        except (FileNotFoundError, PermissionError):
+            return False  # mid-rotation
+        if not data:
+            return False
+        self._offset += len(data)
+        *lines, self._pending = (self._pending + data).split(b"\n")
+        for line in lines:
+            self._feed(line)
+        return True
+
+    def _feed(self, line: bytes) -> None:
+        event = self.parser.feed_line(line.decode("utf-8", errors="replace"))
+        if event and self.on_event:
+            self.on_event(event)
+
+    def poll(self) -> bool:
+        """One round: finishes a rotated file, switches to the new one and reads. Returns whether lines were read."""
+        current = self._inode()
+        if self._file_id is not None and current != self._file_id:
+            rotated = self._rotated_copy(self._file_id)
+            if rotated:
+                self._read_new(rotated, self._file_id)
+            if self._pending:
+                self._feed(self._pending)  # a rotated file is complete, its last line too
+            self._file_id, self._offset, self._pending = None, 0, b""
+        if self._file_id is None and current is not None and current != self._stale_inode:
+            # First open, or the JVM rotated gc.log to gc.log.0 and started over
+            self._file_id = current
+        if self._file_id is None:
+            return False
+        return self._read_new(self.path, self._file_id)
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                if not self.poll():
+                    self._stop.wait(self.interval)
+        except OSError as e:
+            print(f"GC log tailer stopped: {e}")
@@ -0,0 +1,238 @@
+"""
+Server instance registry.
+
+Keeps per-instance metadata (core type, game version, build, required Java
+version, last start time) in a single JSON file in a hidden folder of the
+servers root. Saving it never touches the root directory itself, so the
+instance list, cached by the root's mtime, isn't re-read after every save.
+Jar introspection is cached by the jar's mtime and size, so refreshing the
+instance list never reopens unchanged jars.
+"""
+import copy
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from typing import Optional, Any
+
+import tracing
+
+REGISTRY_DIR = ".panel"
+REGISTRY_FILE = "instances.json"
+
+# Record fields that describe the server jar; dropped together when the jar goes away
+JAR_FIELDS = ("core_type", "game_version", "build", "java_version", "jar", "jar_mtime", "jar_size")
+
+# Jar names we prefer over "first .jar in the folder", most specific first
+PREFERRED_JAR_NAMES = ("server.jar", "paper.jar", "purpur.jar", "spigot.jar")
+
+_MC_VERSION_IN_MANIFEST = re.compile(r"\(MC: ([0-9][0-9A-Za-z.\-]*)\)")
+_BUILD_IN_MANIFEST = re.compile(r"git-\w+-(\d+)")
+_VERSION_IN_NAME = re.compile(r"(\d{1,2}\.\d{1,2}(?:\.\d{1,2})?)")
+
+
+def _parse_manifest(text: str) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    last_key = None
+    for line in text.splitlines():
+        if line.startswith(" ") and last_key:
+            headers[last_key] += line[1:]  # continuation line
+        elif ":" in line:
+            key, value = line.split(":", 1)
+            last_key = key.strip()
+            headers[last_key] = value.strip()
+    return headers
+
+
+def required_java_version(game_version: Optional[str]) -> Optional[int]:
+    """Minimum Java major version for a Minecraft release, per Mojang's published requirements."""
+    if not game_version:
+        return None
+    match = re.match(r"1\.(\d+)(?:\.(\d+))?", game_version)
+    if not match:
+        return None
+    minor, patch = int(match.group(1)), int(match.group(2) or 0)
+    if (minor, patch) >= (20, 5):
+        return 21
+    if minor >= 18:
+        return 17
+    if minor == 17:
+        return 16
+    return 8
+
+
+def detect_jar_metadata(jar_path: str) -> dict[str, Any]:
+    """Opens a server jar and reads version.json and/or the Paper/Purpur/Spigot manifest."""
+    meta: dict[str, Any] = {"core_type": None, "game_version": None, "build": None, "java_version": None}
+    try:
+        with zipfile.ZipFile(jar_path) as jar:
+            names = set(jar.namelist())
+            if "version.json" in names:
+                version_info = json.loads(jar.read("version.json").decode("utf-8"))
+                meta["game_version"] = version_info.get("id") or version_info.get("name")
+                meta["java_version"] = version_info.get("java_version")
+            if "META-INF/versions.list" in names:
+                # Paperclip / Vanilla bundler: "<sha256>\t<id>\t<path>", e.g. id "purpur-1.20.4" or "1.20.4"
+                fields = jar.read("META-INF/versions.list").decode("utf-8", errors="replace").split("\n")[0].split("\t")
+                ident = fields[1] if len(fields) >= 2 else ""
+                for core in ("Purpur", "Paper"):
+                    if ident.lower().startswith(core.lower() + "-"):
+                        meta["core_type"] = core
+                        meta["game_version"] = meta["game_version"] or ident.split("-", 1)[1]
+            if "META-INF/MANIFEST.MF" in names:
+                manifest = _parse_manifest(jar.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace"))
+                title = manifest.get("Implementation-Title", "")
+                impl_version = manifest.get("Implementation-Version", "")
+                main_class = manifest.get("Main-Class", "")
+                for core in ("Purpur", "Paper", "Spigot", "CraftBukkit"):
+                    if meta["core_type"]:
+                        break
+                    if core.lower() in title.lower() or core.lower() in impl_version.lower() or core.lower() in main_class.lower():
+                        meta["core_type"] = core
+                mc_match = _MC_VERSION_IN_MANIFEST.search(impl_version)
+                if mc_match and not meta["game_version"]:
+                    meta["game_version"] = mc_match.group(1)
+                build_match = _BUILD_IN_MANIFEST.search(impl_version)
+                if build_match:
+                    meta["build"] = build_match.group(1)
+                elif meta["core_type"] in ("Paper", "Purpur") and "-" in impl_version:
+                    # Newer builds: "1.20.4-496-abcdef0"
+                    parts = impl_version.split("-")
+                    if len(parts) >= 2 and parts[1].isdigit():
+                        meta["build"] = parts[1]
+                        meta["game_version"] = meta["game_version"] or parts[0]
+                if not meta["core_type"] and main_class == "net.minecraft.server.Main":
+                    meta["core_type"] = "Vanilla"
+            if not meta["core_type"] and ("META-INF/versions.list" in names or "net/minecraft/server/Main.class" in names):
+                meta["core_type"] = "Vanilla"
+    except (zipfile.BadZipFile, OSError, ValueError, KeyError):
+        pass
+    if not meta["game_version"]:
+        match = _VERSION_IN_NAME.search(os.path.basename(jar_path))
+        if match:
+            meta["game_version"] = match.group(1)
+    if not meta["java_version"]:
+        meta["java_version"] = required_java_version(meta["game_version"])
+    return meta
+
+
+def find_server_jar(instance_dir: str) -> Optional[str]:
+    """Returns the file name of the instance's server jar, or None."""
+    try:
+        jar_files = sorted(f for f in os.listdir(instance_dir) if f.endswith(".jar"))
+    except OSError:
+        return None
+    for name in PREFERRED_JAR_NAMES:
+        if name in jar_files:
+            return name
+    return jar_files[0] if jar_files else None
+
+
+class InstanceRegistry:
+    """In-memory view of the instances under one servers root, persisted to REGISTRY_DIR/REGISTRY_FILE."""
+
+    def __init__(self, servers_root: str):
+        self.servers_root = servers_root
+        self.path = os.path.join(servers_root, REGISTRY_DIR, REGISTRY_FILE)
+        self._lock = threading.RLock()
+        self._records: dict[str, dict[str, Any]] = {}
+        self._names: list[str] = []
+        self._root_mtime: Optional[float] = None
+        self._load()
+
+    @tracing.traced("instances.load", "io")
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self._records = data
+
+    @tracing.traced("instances.save", "io")
+    def save(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._records, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error saving instance registry: {e}")
+
+    def list_names(self, hidden: tuple[str, ...] = ()) -> list[str]:
+        """
+        Instance directory names except `hidden`; the servers root is only re-listed
+        when its mtime changes. The cache holds every name, so records of hidden
+        instances are kept and each caller's `hidden` applies.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.servers_root).st_mtime
+            except OSError:
+                return []
+            if mtime != self._root_mtime:
+                self._names = sorted(
+                    d for d in os.listdir(self.servers_root)
+                    if not d.startswith(".") and os.path.isdir(os.path.join(self.servers_root, d))
+                )
+                self._root_mtime = mtime
+                stale = set(self._records) - set(self._names)
+                for name in stale:
+                    del self._records[name]
+                if stale:
+                    self.save()
+            return [name for name in self._names if name not in hidden]
+
+    def get(self, instance_dir: str) -> dict[str, Any]:
+        """
+        Returns a copy of the metadata record for an instance, re-reading the jar
+        only if it changed. Without a jar the record has no jar fields.
+        """
+        name = os.path.basename(os.path.normpath(instance_dir))
+        with self._lock:
+            record = self._records.get(name, {})
+            jar = find_server_jar(instance_dir)
+            st = None
+            if jar:
+                try:
+                    st = os.stat(os.path.join(instance_dir, jar))
+                except OSError:
+                    pass
+            if st is None:
+                if any(key in record for key in JAR_FIELDS):
+                    record = {key: value for key, value in record.items() if key not in JAR_FIELDS}
+                    self._records[name] = record
+                    self.save()
+            elif record.get("jar") != jar or record.get("jar_mtime") != st.st_mtime or record.get("jar_size") != st.st_size:
+                record = {**record, **detect_jar_metadata(os.path.join(instance_dir, jar)),
+                          "jar": jar, "jar_mtime": st.st_mtime, "jar_size": st.st_size}
+                self._records[name] = record
+                self.save()
+            return copy.deepcopy(record)
+
+    def update(self, instance_dir: str, **fields: Any) -> None:
+        name = os.path.basename(os.path.normpath(instance_dir))
+        with self._lock:
+            self._records.setdefault(name, {}).update(fields)
+            self.save()
+
+    def record_start(self, instance_dir: str) -> None:
+        self.update(instance_dir, last_start=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+_registries: dict[str, InstanceRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(servers_root: str) -> InstanceRegistry:
+    """Returns the shared registry for a servers root."""
+    key = os.path.abspath(servers_root)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = InstanceRegistry(servers_root)
+        return _registries[key]
@@ -0,0 +1,312 @@
+"""
+Cross-platform Java runtime discovery.
+
+Candidates come from the usual install locations (/usr/lib/jvm, SDKMAN!,
+macOS JavaVirtualMachines, ~/.jdks, Program Files and the Windows registry),
+JAVA_HOME and PATH. Each candidate is probed once with
+`java -XshowSettings:properties -version`, with several probes running in
+parallel, and the result is cached on disk keyed by the binary's real path,
+mtime and size, so a rescan only starts JVMs that are new or were updated.
+"""
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Optional, Any
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+CACHE_FILE = "java_runtimes.json"
+PROBE_TIMEOUT = 15
+MAX_PROBE_WORKERS = 8
+
+JAVA_BINARY = "java.exe" if os.name == "nt" else "java"
+
+_PROPERTY_LINE = re.compile(r"^\s+([\w.]+) = (.*)$")
+
+_WINDOWS_REGISTRY_KEYS = (
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\JavaSoft\Java Runtime Environment"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\JavaSoft\Java Development Kit"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\JavaSoft\JRE"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\JavaSoft\JDK"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\Eclipse Foundation\JDKs"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\Eclipse Adoptium\JDK"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\Eclipse Adoptium\JRE"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\Amazon\Corretto"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\BellSoft\Liberica"),
+    ("HKEY_LOCAL_MACHINE", r"SOFTWARE\Microsoft\JDK"),
+    ("HKEY_CURRENT_USER", r"SOFTWARE\JavaSoft\Java Runtime Environment"),
+    ("HKEY_CURRENT_USER", r"SOFTWARE\JavaSoft\Java Development Kit"),
+)
+_WINDOWS_VENDOR_DIRS = ("java", "jdk", "jre", "adopt", "adoptium", "eclipse", "corretto", "bellsoft", "microsoft",
+                        "oracle", "zulu", "semeru", "graalvm")
+
+
+@dataclass
+class JavaRuntime:
+    path: str  # real path of the java binary
+    version: str  # java.version, e.g. "21.0.2" or "1.8.0_392"
+    major: int
+    vendor: str = ""
+    arch: str = ""
+    home: str = ""
+
+    @property
+    def label(self) -> str:
+        return f"Java {self.major} ({self.version}{', ' + self.vendor if self.vendor else ''}{', ' + self.arch if self.arch else ''})"
+
+
+def parse_major(version: str) -> Optional[int]:
+    match = re.match(r"(\d+)(?:\.(\d+))?", version)
+    if not match:
+        return None
+    major = int(match.group(1))
+    return int(match.group(2) or 0) if major == 1 else major  # "1.8.0_392" -> 8
+
+
+def _registry_homes() -> list[str]:
+    homes = []
+    if winreg is None:
+        return homes
+    for hive_name, subkey_path in _WINDOWS_REGISTRY_KEYS:
+        try:
+            with winreg.OpenKey(getattr(winreg, hive_name), subkey_path) as subkey:
+                for i in range(winreg.QueryInfoKey(subkey)[0]):
+                    try:
+                        with winreg.OpenKey(subkey, winreg.EnumKey(subkey, i)) as version_key:
+                            for value_name in ("JavaHome", "Path"):
+                                try:
+                                    homes.append(winreg.QueryValueEx(version_key, value_name)[0])
+                                    break
+                                except FileNotFoundError:
+                                    continue
+                    except OSError:
+                        continue
+        except OSError:
+            pass  # Key doesn't exist, which is fine
+    return homes
+
+
+def _home_patterns() -> list[str]:
+    """Glob patterns matching JAVA_HOME-style directories on this platform."""
+    user = os.path.expanduser("~")
+    patterns = [
+        os.path.join(user, ".jdks", "*"),  # IntelliJ downloads
+        os.path.join(user, ".sdkman", "candidates", "java", "*"),
+        os.path.join(user, ".asdf", "installs", "java", "*"),
+        os.path.join(user, ".gradle", "jdks", "*"),
+    ]
+    if os.name == "nt":
+        for root in {os.environ.get("ProgramFiles", r"C:\Program Files"),
+                     os.environ.get("ProgramFiles(x86)", r"C:\Program Files (x86)"),
+                     os.environ.get("ProgramW6432", r"C:\Program Files")}:
+            for vendor in _WINDOWS_VENDOR_DIRS:
+                # <Program Files>\<Vendor>\<jdk-xx>, e.g. C:\Program Files\Eclipse Adoptium\jdk-21.0.2.13-hotspot
+                patterns.append(os.path.join(root, f"*{vendor}*", "*"))
+                patterns.append(os.path.join(root, f"*{vendor}*"))
+    else:
+        patterns += [
+            "/usr/lib/jvm/*",
+            "/usr/lib64/jvm/*",
+            "/usr/java/*",
+            "/opt/java/*",
+            "/opt/*jdk*",
+            "/opt/homebrew/opt/openjdk*/libexec/openjdk.jdk/Contents/Home",
+            "/usr/local/opt/openjdk*/libexec/openjdk.jdk/Contents/Home",
+            "/Library/Java/JavaVirtualMachines/*/Contents/Home",
+            os.path.join(user, "Library", "Java", "JavaVirtualMachines", "*", "Contents", "Home"),
+        ]
+    return patterns
+
+
+def candidate_executables() -> list[str]:
+    """Real paths of every java binary found, de-duplicated (symlinks like /usr/bin/java resolve to their JVM)."""
+    homes = _registry_homes()
+    if os.environ.get("JAVA_HOME"):
+        homes.append(os.environ["JAVA_HOME"])
+    for pattern in _home_patterns():
+        homes.extend(glob.glob(pattern))
+
+    binaries = [os.path.join(home, "bin", JAVA_BINARY) for home in homes]
+    binaries += [os.path.join(d, JAVA_BINARY) for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+
+    found: dict[str, None] = {}
+    for binary in binaries:
+        if os.path.isfile(binary):
+            found.setdefault(os.path.normpath(os.path.realpath(binary)), None)
+    return list(found)
+
+
+def probe(java_executable: str) -> Optional[JavaRuntime]:
+    """Starts the JVM once to read its system properties."""
+    try:
+        result = subprocess.run([java_executable, "-XshowSettings:properties", "-version"],
+                                capture_output=True, text=True, timeout=PROBE_TIMEOUT,
+                                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    props: dict[str, str] = {}
+    for line in (result.stderr + result.stdout).splitlines():
+        match = _PROPERTY_LINE.match(line)
+        if match:
+            props.setdefault(match.group(1), match.group(2).strip())
+    version = props.get("java.version")
+    if not version:
+        # Very old JVMs don't know -XshowSettings; fall back to the version banner
+        match = re.search(r'version "([^"]+)"', result.stderr + result.stdout)
+        version = match.group(1) if match else None
+    major = parse_major(version) if version else None
+    if major is None:
+        return None
+    return JavaRuntime(
+        path=java_executable,
+        version=version,
+        major=major,
+        vendor=props.get("java.vendor", ""),
+        arch=props.get("os.arch", ""),
+        home=props.get("java.home", ""),
+    )
+
+
+def match_runtime(runtimes: list[JavaRuntime], required_major: Optional[int]) -> Optional[JavaRuntime]:
+    """
+    The runtime to use for a server that needs Java `required_major`: exactly that
+    version if installed, else the oldest newer one (old servers and their plugins
+    are most likely to break on much newer JVMs), else None.
+    """
+    if not runtimes:
+        return None
+    if not required_major:
+        return max(runtimes, key=lambda r: r.major)
+    exact = [r for r in runtimes if r.major == required_major]
+    if exact:
+        return exact[0]
+    newer = sorted((r for r in runtimes if r.major > required_major), key=lambda r: r.major)
+    return newer[0] if newer else None
+
+
+class RuntimeCatalog:
+    def __init__(self, cache_path: str = CACHE_FILE):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._cache: dict[str, dict[str, Any]] = {}  # real path -> {"mtime", "size", "runtime"}
+        self._runtimes: Optional[list[JavaRuntime]] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._cache = data
+        except (OSError, ValueError):
+            self._cache = {}
+
+    def _save(self) -> None:
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error saving Java runtime cache: {e}")
+
+    @staticmethod
+    def _signature(path: str) -> Optional[tuple[int, int]]:
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _cached(self, path: str) -> tuple[bool, Optional[JavaRuntime]]:
+        """(hit, runtime); a hit with runtime None means the binary is known not to work."""
+        entry = self._cache.get(path)
+        signature = self._signature(path)
+        if entry is None or signature is None or [entry.get("mtime"), entry.get("size")] != list(signature):
+            return False, None
+        return True, JavaRuntime(**entry["runtime"]) if entry.get("runtime") else None
+
+    def _store(self, path: str, runtime: Optional[JavaRuntime]) -> None:
+        signature = self._signature(path)
+        if signature:
+            self._cache[path] = {"mtime": signature[0], "size": signature[1],
+                                 "runtime": asdict(runtime) if runtime else None}
+
+    def get(self, java_executable: str) -> Optional[JavaRuntime]:
+        """Probes a single binary (e.g. a user-entered path), through the cache."""
+        path = os.path.normpath(os.path.realpath(java_executable))
+        if not os.path.isfile(path):
+            resolved = shutil.which(java_executable)
+            if not resolved:
+                return None
+            path = os.path.normpath(os.path.realpath(resolved))
+        with self._lock:
+            hit, runtime = self._cached(path)
+        if hit:
+            return runtime
+        runtime = probe(path)
+        with self._lock:
+            self._store(path, runtime)
+            self._save()
+        return runtime
+
+    def discover(self, refresh: bool = False) -> list[JavaRuntime]:
+        """All working runtimes, newest first. Results are kept in memory until refresh=True."""
+        # A caller arriving during a scan (e.g. the background warm-up) waits for it and shares the result
+        with self._scan_lock:
+            with self._lock:
+                if self._runtimes is not None and not refresh:
+                    return list(self._runtimes)
+            return self._scan()
+
+    def _scan(self) -> list[JavaRuntime]:
+        candidates = candidate_executables()
+        results: dict[str, Optional[JavaRuntime]] = {}
+        to_probe = []
+        with self._lock:
+            for path in candidates:
+                hit, runtime = self._cached(path)
+                if hit:
+                    results[path] = runtime
+                else:
+                    to_probe.append(path)
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=min(MAX_PROBE_WORKERS, len(to_probe))) as pool:
+                for path, runtime in zip(to_probe, pool.map(probe, to_probe)):
+                    results[path] = runtime
+        runtimes = sorted((r for r in results.values() if r), key=lambda r: (r.major, r.version), reverse=True)
+        with self._lock:
+            for path in to_probe:
+                self._store(path, results[path])
+            # Forget binaries that no longer exist
+            for path in [p for p in self._cache if p not in results and not os.path.exists(p)]:
+                del self._cache[path]
+            self._save()
+            self._runtimes = runtimes
+        return list(runtimes)
+
+    def major_version(self, java_executable: str) -> Optional[int]:
+        runtime = self.get(java_executable)
+        return runtime.major if runtime else None
+
+
+_catalog: Optional[RuntimeCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(cache_path: str = CACHE_FILE) -> RuntimeCatalog:
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = RuntimeCatalog(cache_path)
+        return _catalog
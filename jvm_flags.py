@@ -0,0 +1,156 @@
+"""
+Per-instance JVM flag profiles.
+
+Heap size is derived from the host's RAM, how many instances are expected to
+run side by side and a reserve for the OS and each JVM's off-heap memory. GC
+flags follow Aikar's well-known G1 tuning for Minecraft, or generational ZGC
+on Java 21+ when the heap is large enough for its low pauses to pay off. GC
+thread counts are split across instances so several servers on one host don't
+all size their GC pools for every core.
+
+validate_heap() checks a final argument list against the host before launch.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import startup
+
+# Loaded when a heap size is first computed rather than at panel startup
+psutil = startup.lazy_import("psutil")
+
+PROFILE_DEFAULT = "default"  # the panel-wide JVM arguments from settings
+PROFILE_AUTO = "auto"  # G1 or ZGC, whichever fits heap size and Java version
+PROFILE_G1 = "g1"  # Aikar's flags
+PROFILE_ZGC = "zgc"
+PROFILE_CUSTOM = "custom"
+PROFILES = (PROFILE_DEFAULT, PROFILE_AUTO, PROFILE_G1, PROFILE_ZGC, PROFILE_CUSTOM)
+
+MIN_HEAP_MB = 1024
+ZGC_MIN_HEAP_MB = 16 * 1024
+AIKAR_LARGE_HEAP_MB = 12 * 1024  # Aikar's flags change above 12 GB
+COMPRESSED_OOPS_LIMIT_MB = 31 * 1024  # above ~32 GB the JVM loses compressed object pointers
+OS_RESERVE_MIN_MB = 2048
+OS_RESERVE_FRACTION = 0.15
+OFF_HEAP_FRACTION = 0.15  # metaspace, thread stacks, direct buffers, GC structures
+
+ERROR = "error"
+WARNING = "warning"
+
+AIKAR_FLAGS = [
+    "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200",
+    "-XX:+UnlockExperimentalVMOptions", "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch",
+    "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4", "-XX:G1MixedGCLiveThresholdPercent=90",
+    "-XX:G1RSetUpdatingPauseTimePercent=5", "-XX:SurvivorRatio=32", "-XX:+PerfDisableSharedMem",
+    "-XX:MaxTenuringThreshold=1", "-Dusing.aikars.flags=https://mcflags.emc.gs", "-Daikars.new.flags=true",
+]
+AIKAR_SMALL_HEAP = ["-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40", "-XX:G1HeapRegionSize=8M",
+                    "-XX:G1ReservePercent=20", "-XX:InitiatingHeapOccupancyPercent=15"]
+AIKAR_LARGE_HEAP = ["-XX:G1NewSizePercent=40", "-XX:G1MaxNewSizePercent=50", "-XX:G1HeapRegionSize=16M",
+                    "-XX:G1ReservePercent=15", "-XX:InitiatingHeapOccupancyPercent=20"]
+ZGC_FLAGS = ["-XX:+UseZGC", "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"]
+
+_HEAP_ARG = re.compile(r"^-Xm([sx])(\d+)([kKmMgGtT]?)$")
+
+
+@dataclass
+class HostInfo:
+    total_mb: int
+    available_mb: int
+    cores: int
+
+
+def host_info() -> HostInfo:
+    vm = psutil.virtual_memory()
+    return HostInfo(vm.total // (1024 * 1024), vm.available // (1024 * 1024), os.cpu_count() or 1)
+
+
+def recommend_heap_mb(host: HostInfo, instances: int = 1) -> int:
+    """Largest heap each of `instances` servers can use without starving the OS or each other."""
+    reserve = max(OS_RESERVE_MIN_MB, int(host.total_mb * OS_RESERVE_FRACTION))
+    per_instance = (host.total_mb - reserve) / max(1, instances)
+    heap = int(per_instance / (1 + OFF_HEAP_FRACTION))
+    heap = min(COMPRESSED_OOPS_LIMIT_MB, max(MIN_HEAP_MB, heap))
+    return heap - heap % 512 if heap >= 1024 else heap
+
+
+def choose_gc(heap_mb: int, java_version: Optional[int]) -> str:
+    if java_version and java_version >= 21 and heap_mb >= ZGC_MIN_HEAP_MB:
+        return PROFILE_ZGC
+    return PROFILE_G1
+
+
+def gc_thread_flags(cores: int, instances: int) -> list[str]:
+    """Caps GC worker pools at this instance's share of the cores when several instances share a host."""
+    if instances <= 1:
+        return []
+    share = max(2, cores // instances)
+    return [f"-XX:ParallelGCThreads={share}", f"-XX:ConcGCThreads={max(1, share // 4)}"]
+
+
+def build_flags(profile: str, host: HostInfo, heap_mb: Optional[int] = None, java_version: Optional[int] = None,
+                instances: int = 1, custom_args: str = "") -> list[str]:
+    """JVM arguments (everything before -jar) for a profile other than PROFILE_DEFAULT."""
+    if profile == PROFILE_CUSTOM:
+        return custom_args.split()
+    heap = heap_mb or recommend_heap_mb(host, instances)
+    if profile == PROFILE_AUTO:
+        profile = choose_gc(heap, java_version)
+    # Same -Xms and -Xmx: the heap is committed (and pre-touched) once at startup
+    args = [f"-Xms{heap}M", f"-Xmx{heap}M"]
+    if profile == PROFILE_ZGC:
+        args += ZGC_FLAGS
+        if java_version is not None and 21 <= java_version < 23:
+            args.append("-XX:+ZGenerational")  # default (and only mode) from Java 23
+    else:
+        args += AIKAR_FLAGS + (AIKAR_LARGE_HEAP if heap > AIKAR_LARGE_HEAP_MB else AIKAR_SMALL_HEAP)
+    return args + gc_thread_flags(host.cores, instances)
+
+
+def _to_mb(amount: str, unit: str) -> int:
+    factor = {"": 1 / (1024 * 1024), "k": 1 / 1024, "m": 1, "g": 1024, "t": 1024 * 1024}[unit.lower()]
+    return int(int(amount) * factor)
+
+
+def parse_heap(args: list[str]) -> tuple[Optional[int], Optional[int]]:
+    """(-Xms, -Xmx) in MB; the last occurrence wins, as in the JVM."""
+    xms = xmx = None
+    for arg in args:
+        match = _HEAP_ARG.match(arg)
+        if match:
+            value = _to_mb(match.group(2), match.group(3))
+            if match.group(1) == "s":
+                xms = value
+            else:
+                xmx = value
+    return xms, xmx
+
+
+def validate_heap(args: list[str], host: HostInfo, instances: int = 1,
+                  java_version: Optional[int] = None) -> list[tuple[str, str]]:
+    """Returns [(ERROR | WARNING, message)]; any ERROR means the server should not be launched."""
+    problems: list[tuple[str, str]] = []
+    xms, xmx = parse_heap(args)
+    if xmx is None:
+        problems.append((WARNING, f"未设置 -Xmx，JVM 将默认使用约 1/4 内存 ({host.total_mb // 4} MB)。"))
+    else:
+        if xmx > host.total_mb:
+            problems.append((ERROR, f"-Xmx ({xmx} MB) 超过了本机物理内存 ({host.total_mb} MB)。"))
+        elif xmx * max(1, instances) * (1 + OFF_HEAP_FRACTION) > host.total_mb - OS_RESERVE_MIN_MB:
+            problems.append((WARNING, f"{instances} 个实例各 {xmx} MB 堆内存加上堆外开销将超出本机内存，可能导致系统交换或被 OOM 结束。"))
+        elif xmx > host.available_mb:
+            problems.append((WARNING, f"-Xmx ({xmx} MB) 大于当前可用内存 ({host.available_mb} MB)。"))
+        if xmx < MIN_HEAP_MB:
+            problems.append((WARNING, f"-Xmx ({xmx} MB) 过小，服务器可能频繁 GC 或内存不足。"))
+        if COMPRESSED_OOPS_LIMIT_MB < xmx < 48 * 1024:
+            problems.append((WARNING, "堆内存在 32-48 GB 之间会失去压缩指针，实际可用内存反而更少，建议不超过 31 GB。"))
+        if xms is not None and xms > xmx:
+            problems.append((ERROR, f"-Xms ({xms} MB) 大于 -Xmx ({xmx} MB)，JVM 将拒绝启动。"))
+    if java_version is not None:
+        if "-XX:+UseZGC" in args and java_version < 15:
+            problems.append((ERROR, f"Java {java_version} 不支持 ZGC (需要 Java 15+)。"))
+        if "-XX:+ZGenerational" in args and java_version < 21:
+            problems.append((ERROR, f"Java {java_version} 不支持分代 ZGC (需要 Java 21+)。"))
+    return problems
+
@@ -0,0 +1,206 @@
+"""
+TPS/MSPT sampling and lag spike detection.
+
+Paper/Spigot-based servers answer `tps` ("TPS from last 1m, 5m, 15m: ...") and
+Paper answers `mspt` ("Server tick times (avg/min/max) from last 5s, 10s, 1m:"
+followed by the values). Vanilla 1.20.3+ has `tick query` instead. The first
+sample probes which of these the server understands and sticks to it.
+Independently, every "Can't keep up!" warning printed by the server is parsed
+from the console. All readings go into time series, and lag spikes are kept
+with their timestamps.
+"""
+import re
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from timeseries import SeriesStore
+
+TPS_THRESHOLD = 18.0  # 1m TPS below this is a spike
+MSPT_THRESHOLD = 50.0  # 5s average above one tick's budget is a spike
+MAX_SPIKES = 200
+SAMPLE_TIMEOUT = 3.0
+
+FORMATTING = re.compile(r"§.")
+UNKNOWN_COMMAND = re.compile(r"Unknown (or incomplete )?command")
+TPS_REPLY = re.compile(r"TPS from last 1m, 5m, 15m: (.+)")
+MSPT_HEADER = re.compile(r"Server tick times \(avg/min/max\)")
+MSPT_VALUES = re.compile(r"(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)")
+TICK_QUERY_AVG = re.compile(r"Average time per tick: (\d+(?:\.\d+)?)\s*ms")
+TICK_QUERY_TARGET = re.compile(r"Target tick rate: (\d+(?:\.\d+)?)")
+TICK_QUERY_LINE = re.compile(r"Target tick rate:|Average time per tick:|Percentiles:|P50:|The game is running")
+CANT_KEEP_UP = re.compile(r"Can't keep up!.*?Running (\d+)ms or (\d+) ticks behind")
+
+MODE_PAPER = "paper"  # tps + mspt
+MODE_SPIGOT = "spigot"  # tps only
+MODE_VANILLA = "vanilla"  # tick query
+MODE_UNSUPPORTED = "unsupported"
+
+
+@dataclass
+class LagSpike:
+    timestamp: float
+    kind: str  # "tps" | "mspt" | "behind"
+    value: float
+    detail: str = ""
+
+
+def _strip(line: str) -> str:
+    return FORMATTING.sub("", line)
+
+
+def parse_tps(lines: list[str]) -> Optional[tuple[float, ...]]:
+    """(1m, 5m, 15m) from a `tps` reply. Values above 20 are printed as "*20.0"."""
+    for line in lines:
+        match = TPS_REPLY.search(_strip(line))
+        if match:
+            values = re.findall(r"\d+(?:\.\d+)?", match.group(1))
+            if len(values) >= 3:
+                return tuple(float(v) for v in values[:3])
+    return None
+
+
+def parse_mspt(lines: list[str]) -> Optional[tuple[float, float, float]]:
+    """(avg, min, max) over the last 5 s from an `mspt` reply."""
+    seen_header = False
+    for line in lines:
+        line = _strip(line)
+        if MSPT_HEADER.search(line):
+            seen_header = True
+            continue
+        if seen_header:
+            match = MSPT_VALUES.search(line)
+            if match:
+                return tuple(float(v) for v in match.groups())
+    return None
+
+
+def parse_tick_query(lines: list[str]) -> Optional[tuple[float, float]]:
+    """(tps, mspt) from a vanilla `tick query` reply."""
+    mspt = target = None
+    for line in lines:
+        line = _strip(line)
+        avg_match = TICK_QUERY_AVG.search(line)
+        if avg_match and mspt is None:
+            mspt = float(avg_match.group(1))
+        target_match = TICK_QUERY_TARGET.search(line)
+        if target_match and target is None:
+            target = float(target_match.group(1))
+    if mspt is None:
+        return None
+    target = target or 20.0
+    return (min(target, 1000.0 / mspt) if mspt > 0 else target), mspt
+
+
+def is_sample_reply(line: str) -> bool:
+    """True for reply lines of the sampling commands, which are hidden from the console."""
+    line = _strip(line)
+    return bool(TPS_REPLY.search(line) or MSPT_HEADER.search(line) or TICK_QUERY_LINE.search(line) or "◴" in line)
+
+
+class LagMonitor:
+    def __init__(self, tps_threshold: float = TPS_THRESHOLD, mspt_threshold: float = MSPT_THRESHOLD,
+                 on_spike: Optional[Callable[[LagSpike], None]] = None):
+        self.tps_threshold = tps_threshold
+        self.mspt_threshold = mspt_threshold
+        self.on_spike = on_spike
+        self.series = SeriesStore()
+        self.spikes: deque[LagSpike] = deque(maxlen=MAX_SPIKES)
+        self.mode: Optional[str] = None
+        self.sampling = False  # while True, sampling replies are ours and can be hidden from the console
+        self.tps: Optional[float] = None
+        self.mspt: Optional[float] = None
+        self._lagging = {"tps": False, "mspt": False}
+
+    def reset(self) -> None:
+        """Called when a new server session starts; history is kept, capabilities are re-probed."""
+        self.mode = None
+        self.tps = self.mspt = None
+        self._lagging = {"tps": False, "mspt": False}
+
+    def _spike(self, kind: str, value: float, detail: str = "", timestamp: Optional[float] = None) -> LagSpike:
+        spike = LagSpike(time.time() if timestamp is None else timestamp, kind, value, detail)
+        self.spikes.append(spike)
+        if self.on_spike:
+            self.on_spike(spike)
+        return spike
+
+    def _check(self, kind: str, value: float, bad: bool, detail: str) -> None:
+        # Only the transition into a lagging state is a spike, not every sample while it lasts
+        if bad and not self._lagging[kind]:
+            self._spike(kind, value, detail)
+        self._lagging[kind] = bad
+
+    def record_tps(self, tps: float, timestamp: Optional[float] = None) -> None:
+        self.tps = tps
+        self.series.get("tps").append(tps, timestamp)
+        self._check("tps", tps, tps < self.tps_threshold, f"TPS {tps:.1f}")
+
+    def record_mspt(self, mspt: float, timestamp: Optional[float] = None) -> None:
+        self.mspt = mspt
+        self.series.get("mspt").append(mspt, timestamp)
+        self._check("mspt", mspt, mspt > self.mspt_threshold, f"MSPT {mspt:.1f} ms")
+
+    def feed_line(self, line: str) -> Optional[LagSpike]:
+        """Parses "Can't keep up! ... Running 2034ms or 40 ticks behind" from the console."""
+        match = CANT_KEEP_UP.search(line)
+        if not match:
+            return None
+        behind_ms, ticks = int(match.group(1)), int(match.group(2))
+        self.series.get("behind_ms").append(behind_ms)
+        return self._spike("behind", behind_ms, f"落后 {behind_ms} ms ({ticks} tick)")
+
+    @staticmethod
+    def _wait(future: Optional[Future]) -> Optional[list[str]]:
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=SAMPLE_TIMEOUT)
+        except Exception:  # timed out, dispatcher closed, RCON error
+            return None
+
+    def sample(self, submit: Callable[..., Optional[Future]]) -> bool:
+        """
+        Takes one TPS/MSPT reading. `submit(command, expect=pattern)` must queue a console
+        command and return a Future of its reply lines (or None). Returns False once the
+        server turned out to support none of the sampling commands.
+        """
+        if self.mode == MODE_UNSUPPORTED:
+            return False
+        self.sampling = True
+        try:
+            return self._sample(submit)
+        finally:
+            self.sampling = False
+
+    def _sample(self, submit: Callable[..., Optional[Future]]) -> bool:
+        if self.mode in (None, MODE_PAPER, MODE_SPIGOT):
+            lines = self._wait(submit("tps", expect=r"TPS from last|Unknown"))
+            tps = parse_tps(lines or [])
+            if tps is not None:
+                self.record_tps(tps[0])
+                if self.mode != MODE_SPIGOT:
+                    lines = self._wait(submit("mspt", expect=MSPT_VALUES.pattern + r"|Unknown"))
+                    mspt = parse_mspt(lines or [])
+                    if mspt is not None:
+                        self.mode = MODE_PAPER
+                        self.record_mspt(mspt[0])
+                    elif lines and any(UNKNOWN_COMMAND.search(l) for l in lines):
+                        self.mode = MODE_SPIGOT
+                elif self.mode is None:
+                    self.mode = MODE_SPIGOT
+                return True
+            if self.mode is not None or not lines or not any(UNKNOWN_COMMAND.search(l) for l in lines):
+                return True  # no answer this time; try again next round
+        lines = self._wait(submit("tick query", expect=r"Average time per tick|Unknown"))
+        reading = parse_tick_query(lines or [])
+        if reading is not None:
+            self.mode = MODE_VANILLA
+            self.record_tps(reading[0])
+            self.record_mspt(reading[1])
+        elif lines and any(UNKNOWN_COMMAND.search(l) for l in lines):
+            self.mode = MODE_UNSUPPORTED
+            return False
+        return True
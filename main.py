@@ -1,28 +1,49 @@
+import startup
 import flet as ft
-from flet_audio.audio import Audio
 import time
 import subprocess
 import threading
-import psutil
 import json
 import uuid
 import os
 import datetime
-import zipfile
-import requests
 import re
-import shutil
-from typing import Optional, List, Any
+import trash
+import instances
+import player_lists
+import player_index
+import command_dispatcher
+import rcon
+import slp
+import sessions
+import lag_monitor
+import server_watchdog
+import jvm_flags
+import java_runtimes
+import appcds
+import boot_timeline
+import resource_limits
+import gc_log
+import console_pipeline
+import console_log
+import console_index
+import tracing
+from typing import Optional, Any
+# Only needed for downloads and on-demand tools: loaded on first use so they don't delay the first frame
+requests = startup.lazy_import("requests")
+anvil = startup.lazy_import("anvil")
+templates = startup.lazy_import("templates")
+bulk_import = startup.lazy_import("bulk_import")
+# Only needed once a server runs
+psutil = startup.lazy_import("psutil")
 try:
-    import winreg
-except ImportError:
-    winreg = None # For non-Windows platforms, though this script is Windows-centric
-try:
-    import yaml
+    yaml = startup.lazy_import("yaml")
 except ImportError:
     yaml = None
 
 SETTINGS_FILE = "settings.json"
+# Overrides every upstream API, e.g. benchmarks/mock_upstream.py; takes precedence over the api_base_override setting
+API_BASE_ENV = "MSL_API_BASE"
 app_settings = {}
 
 def load_settings():
@@ -32,7 +53,10 @@ def load_settings():
         "primary_color": ft.Colors.BLUE_GREY,
         "java_path": "",
         "jvm_args": "-Xmx1024M -Xms1024M",
-        "download_source": "MCIM (China Mirror)"
+        "download_source": "MCIM (China Mirror)",
+        "auto_restart": True,
+        "java_auto_match": True,
+        "api_base_override": ""
     }
     try:
         if os.path.exists(SETTINGS_FILE):
@@ -48,6 +72,7 @@ def load_settings():
         print(f"Error loading settings: {e}")
         app_settings = defaults
 
+@tracing.traced("settings.save", "io")
 def save_settings():
     try:
         with open(SETTINGS_FILE, 'w') as f:
@@ -62,86 +87,16 @@ def str_to_theme_mode(s: str) -> ft.ThemeMode:
         return ft.ThemeMode.LIGHT
     return ft.ThemeMode.SYSTEM
 
-def find_all_java_executables():
-    """
-    Scans for all Java executables on a Windows system using multiple strategies.
-    """
-    found_paths = set()
-
-    # --- Strategy 1: Windows Registry (Most reliable) ---
-    if winreg:
-        def search_registry_key(key, subkey_path):
-            try:
-                with winreg.OpenKey(key, subkey_path) as subkey:
-                    for i in range(winreg.QueryInfoKey(subkey)[0]):
-                        try:
-                            version_name = winreg.EnumKey(subkey, i)
-                            with winreg.OpenKey(subkey, version_name) as version_key:
-                                java_home, _ = winreg.QueryValueEx(version_key, 'JavaHome')
-                                java_exe = os.path.join(java_home, 'bin', 'java.exe')
-                                if os.path.isfile(java_exe):
-                                    found_paths.add(os.path.normpath(java_exe))
-                        except FileNotFoundError:
-                            continue
-            except FileNotFoundError:
-                pass  # Key doesn't exist, which is fine
-
-        registry_paths_to_check = [
-            (winreg.HKEY_LOCAL_MACHINE, r'SOFTWARE\JavaSoft\Java Runtime Environment'),
-            (winreg.HKEY_LOCAL_MACHINE, r'SOFTWARE\JavaSoft\Java Development Kit'),
-            (winreg.HKEY_LOCAL_MACHINE, r'SOFTWARE\Eclipse Foundation\JDKs'),
-            (winreg.HKEY_LOCAL_MACHINE, r'SOFTWARE\Amazon\Corretto'),
-            (winreg.HKEY_LOCAL_MACHINE, r'SOFTWARE\BellSoft\Liberica'),
-            (winreg.HKEY_CURRENT_USER, r'SOFTWARE\JavaSoft\Java Runtime Environment'),
-            (winreg.HKEY_CURRENT_USER, r'SOFTWARE\JavaSoft\Java Development Kit'),
-        ]
-        for key, path in registry_paths_to_check:
-            search_registry_key(key, path)
-
-    # --- Strategy 2: JAVA_HOME environment variable ---
-    java_home = os.environ.get("JAVA_HOME")
-    if java_home:
-        path = os.path.join(java_home, "bin", "java.exe")
-        if os.path.isfile(path):
-            found_paths.add(os.path.normpath(path))
-
-    # --- Strategy 3: PATH environment variable ---
-    path_dirs = os.environ.get('PATH', '').split(os.pathsep)
-    for path_dir in path_dirs:
-        java_path = os.path.join(path_dir, 'java.exe')
-        if os.path.isfile(java_path):
-            try:
-                # Resolve symlinks and get the real path to avoid duplicates
-                real_path = os.path.realpath(java_path)
-                found_paths.add(os.path.normpath(real_path))
-            except Exception:
-                found_paths.add(os.path.normpath(java_path))
-
-    # --- Strategy 4: Manual Scan of common directories (Fallback) ---
-    search_dirs = [os.environ.get("ProgramFiles", "C:\\Program Files"), os.environ.get("ProgramFiles(x86)", "C:\\Program Files (x86)")]
-    for search_dir in search_dirs:
-        if not os.path.isdir(search_dir): continue
-        
-        for subdir_name in os.listdir(search_dir):
-            if any(keyword in subdir_name.lower() for keyword in ["java", "jdk", "jre", "adopt", "corretto", "bellsoft", "microsoft", "oracle"]):
-                potential_path = os.path.join(search_dir, subdir_name)
-                if os.path.isdir(potential_path):
-                    for root, _, files in os.walk(potential_path):
-                        if "java.exe" in files and "bin" in root.lower():
-                            found_paths.add(os.path.normpath(os.path.join(root, "java.exe")))
-
-    return sorted(list(found_paths), reverse=True)
-
-def find_java_executable():
-    paths = find_all_java_executables()
-    return paths[0] if paths else None
-
 REQUESTS_HEADERS = {
     'User-Agent': 'SCL/1.0.0'
 }
 
 def get_api_base_url(service: str) -> str:
     """Returns the base URL for a given service based on the download source setting."""
+    override = os.environ.get(API_BASE_ENV) or app_settings.get("api_base_override", "")
+    if override:
+        # A stand-in server (benchmarks/mock_upstream.py) serves each service under its own prefix
+        return f"{override.rstrip('/')}/{service}"
     
     official_sources = {
         "mojang_meta": "https://launchermeta.mojang.com",
@@ -183,28 +138,28 @@ def get_player_uuid(username: str) -> Optional[dict[str, Any]]:
         return None
 
 def get_server_game_version(server_path: Optional[str]) -> Optional[str]:
-    """Tries to extract the Minecraft game version from the server jar file name."""
+    """Returns the Minecraft game version of an instance, read from its jar via the instance registry."""
     if not server_path or not os.path.isdir(server_path):
         return None
     try:
-        jar_files = [f for f in os.listdir(server_path) if f.endswith('.jar')]
-        if not jar_files:
-            return None
-        
-        # Regex to find version numbers like 1.20.4 or 1.19. It's a best-effort guess.
-        match = re.search(r'(\d{1,2}\.\d{1,2}(\.\d{1,2})?)', jar_files[0])
-        if match:
-            return match.group(1)
+        registry = instances.get_registry(os.path.dirname(os.path.normpath(server_path)))
+        return registry.get(server_path).get("game_version")
     except Exception:
         return None
-    return None
 
 def main(page: ft.Page):
+    startup.mark("imports")
     load_settings()
-    if not app_settings.get("java_path"):
-        found_java = find_java_executable()
-        if found_java:
-            app_settings["java_path"] = found_java
+    # Every UI flush goes through here, so it is traced once instead of at each call site
+    untraced_update = page.update
+    page.update = tracing.traced("page.update", "ui")(page.update)
+    java_catalog = java_runtimes.get_catalog()
+
+    def warm_java_catalog():
+        # Probing JVMs takes seconds on a cold cache, so it runs after the first frame
+        found_runtimes = java_catalog.discover()
+        if found_runtimes and not app_settings.get("java_path"):
+            app_settings["java_path"] = found_runtimes[0].path
             save_settings()
     # --- Page and Window Styling (Fluent UI) ---
     page.title = "Minecraft Server Panel"
@@ -223,18 +178,45 @@ def main(page: ft.Page):
     page.theme = ft.Theme(color_scheme_seed=primary_color, font_family="Roboto")
     page.dark_theme = ft.Theme(color_scheme_seed=primary_color, font_family="Roboto")
 
-    completion_sound = Audio(src="https://www.soundjay.com/buttons/sounds/button-3.mp3", autoplay=False)
-    page.overlay.append(completion_sound)
+    completion_sound = None
+
+    def play_completion_sound():
+        # flet_audio is only imported (and the control mounted) the first time a download finishes
+        nonlocal completion_sound
+        if completion_sound is None:
+            from flet_audio.audio import Audio
+            completion_sound = Audio(src="https://www.soundjay.com/buttons/sounds/button-3.mp3", autoplay=False)
+            page.overlay.append(completion_sound)
+            page.update()
+        completion_sound.play()
 
     # --- Global State and Constants ---
     SERVERS_ROOT_DIR = "servers"
     if not os.path.exists(SERVERS_ROOT_DIR):
         os.makedirs(SERVERS_ROOT_DIR)
+    instance_registry = instances.get_registry(SERVERS_ROOT_DIR)
+    session_store = sessions.get_session_store(SERVERS_ROOT_DIR)
 
     server_process = None
+    console_dispatcher: Optional[command_dispatcher.CommandDispatcher] = None
     server_thread = None
     performance_thread = None
     player_list_thread = None
+    lag_thread = None
+    watchdog_thread = None
+    hang_detector: Optional[server_watchdog.HangDetector] = None
+    stop_requested = False
+    hang_detected = False
+    restart_policy = server_watchdog.RestartPolicy()
+    cds_training: Optional[tuple[str, appcds.CdsPlan]] = None
+    boot_recorder: Optional[boot_timeline.BootRecorder] = None
+    # (server_dir, cores, systemd scope) of the running server's resource policy
+    running_resources: Optional[tuple[str, Optional[list[int]], Optional[str]]] = None
+    gc_tailer: Optional[gc_log.GcLogTailer] = None
+    gc_parser: Optional[gc_log.GcLogParser] = None
+    gc_heap_mb: Optional[int] = None
+    WATCHDOG_INTERVAL = 10
+    WATCHDOG_PROBE_TIMEOUT = 3  # a live server answers "list" at once; don't hold the command queue longer
     online_players = ft.Ref[list[str]]()
     online_players.current = []
     selected_server_path = ft.Ref[Optional[str]]()
@@ -258,6 +240,11 @@ def main(page: ft.Page):
 
     # --- All Logic Functions ---
     console_output = ft.ListView(expand=True, spacing=5, auto_scroll=True)
+    # Every console line, tagged and indexed; console_output shows the ones matching console_filter
+    console_buffer = console_index.ConsoleBuffer()
+    console_filter = console_index.ConsoleFilter()
+    console_view_lock = threading.Lock()
+    PANEL_LEVELS = {ft.Colors.RED: console_index.ERROR, ft.Colors.ORANGE: console_index.WARN}
     command_input = ft.TextField(label="输入服务器命令...", expand=True, border_radius=ft.border_radius.all(8))
 
     server_status_text = ft.Text("服务器状态: 未运行", color=ft.Colors.RED, weight=ft.FontWeight.BOLD)
@@ -278,86 +265,212 @@ def main(page: ft.Page):
     cpu_text = ft.Text("CPU: 0%")
     ram_progress = ft.ProgressBar(width=400, value=0)
     ram_text = ft.Text("内存: 0 MB / 0 MB (0%)")
+    per_core_row = ft.Row(wrap=True, spacing=6, run_spacing=4)
+    gc_text = ft.Text("GC: 未启用 GC 日志")
+    gc_warnings_column = ft.Column(spacing=2)
+    tps_text = ft.Text("TPS: -")
+    mspt_text = ft.Text("MSPT: -")
+    lag_spikes_column = ft.Column(spacing=2)
+    LAG_SAMPLE_INTERVAL = 15
+    MAX_SHOWN_SPIKES = 5
+
+    def on_lag_spike(spike: lag_monitor.LagSpike):
+        label = datetime.datetime.fromtimestamp(spike.timestamp).strftime("%H:%M:%S")
+        lag_spikes_column.controls.insert(0, ft.Text(f"{label} 卡顿: {spike.detail}", size=12, color=ft.Colors.ORANGE))
+        del lag_spikes_column.controls[MAX_SHOWN_SPIKES:]
+        page.update()
+
+    lag = lag_monitor.LagMonitor(on_spike=on_lag_spike)
+
+    trash_status_text = ft.Text("", size=12, visible=False)
+    trash_progress = ft.ProgressBar(width=400, value=None, visible=False)
+
+    def on_trash_progress(name, done, total):
+        trash_status_text.visible = True
+        trash_progress.visible = True
+        if total:
+            trash_status_text.value = f"正在删除 '{name}': {done}/{total} 个文件"
+            trash_progress.value = done / total
+        else:
+            trash_status_text.value = f"正在统计 '{name}' 的文件..."
+            trash_progress.value = None
+        page.update()
+
+    def on_trash_done(name, error):
+        if error:
+            page.overlay.append(ft.SnackBar(ft.Text(f"后台删除 '{name}' 失败: {error}。将在下次启动时重试。"), open=True))
+        else:
+            page.overlay.append(ft.SnackBar(ft.Text(f"服务器 '{name}' 的文件已彻底删除。"), open=True))
+        if not trash_collector.busy:
+            trash_status_text.visible = False
+            trash_progress.visible = False
+        page.update()
+
+    trash_collector = trash.TrashCollector(SERVERS_ROOT_DIR, on_progress=on_trash_progress, on_done=on_trash_done)
+    # Old console sessions go through a trash of their own (servers/.panel/console/.trash), so
+    # leftovers are purged silently instead of being reported as deleted servers
+    console_trash = trash.TrashCollector(os.path.join(SERVERS_ROOT_DIR, instances.REGISTRY_DIR, "console"))
+
+    instance_status_column = ft.Column(spacing=4)
+
+    def format_status(name: str, status: slp.ServerStatus) -> str:
+        if not status.online:
+            return f"{name}: 离线"
+        parts = [f"{name}: 在线 {status.players_online}/{status.players_max}"]
+        if status.latency_ms is not None:
+            parts.append(f"{status.latency_ms:.0f} ms")
+        if status.version:
+            parts.append(status.version)
+        return " · ".join(parts)
+
+    def on_status_update(results: dict[str, slp.ServerStatus]):
+        instance_status_column.controls = [
+            ft.Text(
+                format_status(name, status),
+                size=12,
+                color=ft.Colors.GREEN if status.online else ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE),
+                tooltip=(status.motd + ("\n" + ", ".join(status.sample) if status.sample else "")) if status.online else status.error,
+            )
+            for name, status in sorted(results.items())
+        ]
+        selected = os.path.basename(selected_server_path.current) if selected_server_path.current else None
+        status = results.get(selected) if selected else None
+        if status and status.online:
+            player_count_text.value = f"玩家: {status.players_online}/{status.players_max}"
+            if status.latency_ms is not None:
+                player_count_text.value += f"  (延迟 {status.latency_ms:.0f} ms)"
+        else:
+            player_count_text.value = "玩家: 0/0" if selected else "玩家: -"
+        page.update()
+
+    # Server List Ping for every instance, including ones started outside the panel
+    status_prober = slp.StatusProber(
+        SERVERS_ROOT_DIR,
+        lambda: instance_registry.list_names(hidden=(trash.TRASH_DIR_NAME,)),
+        on_update=on_status_update,
+    )
 
     def create_console_text(text: str, **kwargs):
         return ft.Text(text, font_family="Roboto Mono", **kwargs)
 
+    def append_console(text: str, server: bool = False, **kwargs):
+        """Adds a console line. Server output is tagged from its log prefix, the panel's own messages by color."""
+        control = create_console_text(text, **kwargs)
+        with console_view_lock:
+            if server:
+                entry = console_buffer.append(text, control)
+            else:
+                entry = console_buffer.append(text, control, level=PANEL_LEVELS.get(kwargs.get("color"), console_index.INFO),
+                                              source=console_index.PANEL)
+            control.data = entry.seq
+            shown = console_output.controls
+            if not console_filter.active or console_filter.matches(entry):
+                shown.append(control)
+            # The buffer evicts old lines in chunks; drop the same ones from the view
+            if shown and shown[0].data < console_buffer.first_seq:
+                stale = 0
+                while stale < len(shown) and shown[stale].data < console_buffer.first_seq:
+                    stale += 1
+                del shown[:stale]
+
+    def clear_console():
+        with console_view_lock:
+            console_buffer.clear()
+            console_output.controls.clear()
+
+    def set_console_filter(new_filter: console_index.ConsoleFilter) -> int:
+        """Shows only the lines matching new_filter (call its compile() first); returns how many match."""
+        nonlocal console_filter
+        with console_view_lock:
+            console_filter = new_filter
+            entries = console_buffer.query(new_filter) if new_filter.active else console_buffer.entries()
+            console_output.controls = [entry.item for entry in entries]
+            return len(entries)
+
+    def apply_list_response(line: str) -> bool:
+        """Updates online_players from a `list` reply line; returns True if the line was one."""
+        names = console_pipeline.parse_list_reply(line)
+        if names is None:
+            return False
+        online_players.current = names
+        return True
+
     def update_console_output():
-        nonlocal server_process
+        nonlocal server_process, console_dispatcher, running_resources, gc_tailer
         if not server_process or not server_process.stdout: return
-        
+        process = server_process
+        server_dir = selected_server_path.current
+        session_instance = os.path.basename(server_dir) if server_dir else None
+
+        def feed_boot_recorder(line: str):
+            nonlocal boot_recorder
+            if boot_recorder:
+                boot_recorder.feed_line(line)
+                if boot_recorder.finished:
+                    finish_boot_timeline(boot_recorder, server_dir)
+                    boot_recorder = None
+
+        # Shown lines are also kept on disk; the reader only queues them, a background thread does all file work
+        session_log = console_log.ConsoleLog(server_dir, discard=console_trash.delete).start() if server_dir else None
+
+        processor = console_pipeline.ConsoleProcessor(
+            taps=[tap for tap in (console_dispatcher and console_dispatcher.feed_line,
+                                  hang_detector and hang_detector.feed_line, feed_boot_recorder) if tap],
+            filters=[lambda line: lag.sampling and lag_monitor.is_sample_reply(line)],
+            observers=[observer for observer in (lag.feed_line, session_log and session_log.append) if observer],
+        )
+
+        def set_online_players(names: list[str]):
+            online_players.current = names
+
+        def record_join(player_name: str):
+            if session_instance:
+                session_store.record_join(session_instance, player_name)
+            # 记录历史玩家 (only players the index doesn't know yet need a Mojang lookup)
+            if selected_server_path.current:
+                history_index = player_index.get_history_index(selected_server_path.current)
+                if not history_index.has_name(player_name):
+                    player_data = get_player_uuid(player_name)
+                    if player_data:
+                        history_index.record_join(player_data["name"] or player_name, player_data["id"])
+
+        def record_leave(player_name: str):
+            if session_instance:
+                session_store.record_leave(session_instance, player_name)
+
+        def show_line(text: str):
+            append_console(text, server=True)
+
         while server_process.poll() is None:
             try:
                 line = server_process.stdout.readline()
                 if not line: break
-                
-                cleaned_line = line.strip()
-
-                # --- Player List Parsing ---
-                # Vanilla: "There are 1 of 20 players online: Player123"
-                # Paper: "[15:12:48 INFO]: There are 1 of 20 players online: Player123"
-                list_match = re.search(r"players online: (.*)", cleaned_line)
-                if list_match:
-                    player_names_str = list_match.group(1).strip()
-                    if player_names_str:
-                        online_players.current = sorted([name.strip() for name in player_names_str.split(",")])
-                    else:
-                        online_players.current = []
-                    page.update()
-                    # Don't show this line in console, it's spammy
-                    continue
-
-                # Join: "Player123[/127.0.0.1:50168] logged in with entity id..." or "[INFO]: Player123 joined the game"
-                join_match = re.search(r"(\w+)\[.*logged in|\]: (\w+) joined the game", cleaned_line)
-                if join_match:
-                    player_name = join_match.group(1) or join_match.group(2)
-                    if player_name and player_name not in online_players.current:
-                        online_players.current.append(player_name)
-                        online_players.current.sort()
-                        # 记录历史玩家
-                        player_data = get_player_uuid(player_name)
-                        if player_data:
-                            player_uuid = player_data["id"]
-                            # 读写历史玩家json
-                            path = None
-                            if selected_server_path.current:
-                                path = os.path.join(selected_server_path.current, "history-players.json")
-                            history = []
-                            if path and os.path.exists(path):
-                                try:
-                                    with open(path, 'r', encoding='utf-8') as f:
-                                        history = json.load(f)
-                                except Exception:
-                                    history = []
-                            if path:
-                                if not any(p.get("uuid","") == player_uuid for p in history):
-                                    import datetime
-                                    history.append({
-                                        "name": player_name,
-                                        "uuid": player_uuid,
-                                        "first_join": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                    })
-                                    try:
-                                        with open(path, 'w', encoding='utf-8') as f:
-                                            json.dump(history, f, ensure_ascii=False, indent=2)
-                                    except Exception: pass
-                        page.update()
-
-                # Leave: "[INFO]: Player123 left the game"
-                leave_match = re.search(r"\]: (\w+) left the game", cleaned_line)
-                if leave_match:
-                    player_name = leave_match.group(1)
-                    if player_name and player_name in online_players.current:
-                        online_players.current.remove(player_name)
-                        page.update()
-
-                console_output.controls.append(create_console_text(cleaned_line))
-                page.update()
+                console_pipeline.handle_line(processor, line, show_line, page.update, on_players=set_online_players,
+                                             on_join=record_join, on_leave=record_leave)
             except (IOError, ValueError):
                 # This can happen if the process is terminated and the pipe closes unexpectedly.
                 break
+
+        try:
+            returncode = process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            returncode = process.poll()
+        exit_report = server_watchdog.classify_exit(
+            returncode, list(hang_detector.last_lines) if hang_detector else [], stop_requested, hang_detected)
+        finish_cds_training(exit_report)
         
         server_process = None
+        running_resources = None
+        if gc_tailer:
+            gc_tailer.stop()
+            gc_tailer = None
+        if session_log:
+            session_log.close()
+        if console_dispatcher:
+            console_dispatcher.close()
+            console_dispatcher = None
+        if session_instance:
+            session_store.close_instance(session_instance)
         online_players.current = []
         server_status_text.value = "服务器状态: 未运行"
         server_status_text.color = ft.Colors.RED
@@ -367,34 +480,165 @@ def main(page: ft.Page):
         restart_button.disabled = True
         configure_button.disabled = not is_server_selected
         delete_server_button.disabled = not is_server_selected
-        console_output.controls.append(create_console_text("服务器已停止。", color=ft.Colors.RED))
+        append_console("服务器已停止。", color=ft.Colors.RED)
         page.update()
+        handle_server_exit(exit_report, server_dir)
+
+    def finish_boot_timeline(recorder: boot_timeline.BootRecorder, server_dir: str):
+        timeline = recorder.timeline
+        try:
+            boot_timeline.save(server_dir, timeline)
+        except OSError as ex:
+            print(f"Error saving boot timeline: {ex}")
+        slowest = sorted(timeline.plugin_totals().items(), key=lambda item: item[1]["load"] + item[1]["enable"], reverse=True)[:3]
+        summary = f"启动耗时 {timeline.total_s:.1f} 秒 (自进程启动起)"
+        if slowest:
+            summary += "，最慢的插件: " + ", ".join(f"{name} {t['load'] + t['enable']:.1f}s" for name, t in slowest)
+        append_console(summary, color=ft.Colors.GREY)
+
+    def finish_cds_training(report: server_watchdog.ExitReport):
+        nonlocal cds_training
+        if cds_training is None:
+            return
+        training_dir, training_plan = cds_training
+        cds_training = None
+        # The JVM only writes a complete archive on a clean shutdown
+        if report.kind != server_watchdog.CLEAN:
+            appcds.invalidate(training_dir)
+            return
+        if appcds.finish_training(training_dir, training_plan):
+            append_console("快速启动: CDS 归档已生成，下次启动将使用它。", color=ft.Colors.GREEN)
+        else:
+            append_console("快速启动: JVM 未生成 CDS 归档。", color=ft.Colors.ORANGE)
+
+    def handle_server_exit(report: server_watchdog.ExitReport, server_dir: Optional[str]):
+        if report.kind == server_watchdog.CLEAN:
+            restart_policy.reset()
+            return
+        label = "无响应" if report.kind == server_watchdog.HANG else "崩溃"
+        append_console(f"检测到服务器{label}: {report.reason}", color=ft.Colors.RED)
+        if not app_settings.get("auto_restart", True) or not server_dir:
+            page.update()
+            return
+        delay = restart_policy.record_crash()
+        if delay is None:
+            append_console(
+                f"服务器在 {server_watchdog.CRASH_LOOP_WINDOW / 60:.0f} 分钟内崩溃了 {restart_policy.loop_limit} 次，已停止自动重启。请检查日志后手动启动。",
+                color=ft.Colors.RED)
+            page.update()
+            return
+        append_console(f"将在 {delay:.0f} 秒后自动重启...", color=ft.Colors.ORANGE)
+        page.update()
+
+        def auto_restart():
+            # Only if nothing else was started or selected in the meantime
+            if server_process is None and selected_server_path.current == server_dir:
+                start_server(None)
+        threading.Timer(delay, auto_restart).start()
+
+    def monitor_server_health(process, server_dir: str, java_executable: str):
+        nonlocal hang_detected
+        detector = hang_detector
+        started_at = time.monotonic()
+        stable = False
+
+        def probe() -> bool:
+            future = submit_command("list", command_dispatcher.PRIORITY_POLL, expect=LIST_RESPONSE, timeout=WATCHDOG_PROBE_TIMEOUT)
+            try:
+                return bool(future and future.result(timeout=WATCHDOG_INTERVAL + 5))
+            except Exception:
+                return False
+
+        while process.poll() is None:
+            time.sleep(WATCHDOG_INTERVAL)
+            if not stable and time.monotonic() - started_at > server_watchdog.CRASH_LOOP_WINDOW:
+                restart_policy.record_stable()
+                stable = True
+            if stop_requested or detector is None or process.poll() is not None:
+                continue
+            report = detector.check(probe)
+            # A stop preempts the probe, so an unanswered probe then means nothing
+            if report is None or stop_requested:
+                continue
+            state = "CPU 满载 (可能死循环)" if report.state == "busy" else "CPU 空闲 (可能死锁)"
+            append_console(
+                f"服务器已 {report.silent_for:.0f} 秒无响应，{state}，正在保存线程转储...", color=ft.Colors.RED)
+            page.update()
+            dump_path = server_watchdog.capture_thread_dump(process.pid, java_executable, server_dir)
+            append_console(
+                f"线程转储已保存到: {dump_path}" if dump_path else "无法获取线程转储 (未找到 jcmd)。", color=ft.Colors.GREY)
+            hang_detected = True
+            process.kill()
+            page.update()
+            break
+
+    LIST_RESPONSE = r"players online"
+
+    def get_command_transport():
+        """stdin of the process we started, else RCON to the selected server (e.g. one run by systemd/tmux)."""
+        if server_process and console_dispatcher:
+            return console_dispatcher
+        if selected_server_path.current:
+            return rcon.get_pool(selected_server_path.current)
+        return None
+
+    def submit_command(command: str, priority: int = command_dispatcher.PRIORITY_USER, **kwargs):
+        """Queues a console command; returns a Future with the response lines, or None if unreachable."""
+        transport = get_command_transport()
+        if transport is None:
+            return None
+        return transport.submit(command, priority, **kwargs)
+
+    def is_remote_transport() -> bool:
+        return isinstance(get_command_transport(), rcon.RconPool)
 
     def update_player_list_periodically():
         nonlocal server_process
+        poll = None
         while server_process and server_process.poll() is None:
-            if server_process and server_process.stdin:
-                try:
-                    server_process.stdin.write("list\n")
-                    server_process.stdin.flush()
-                except (IOError, AttributeError):
-                    break # Stop if pipe is broken
+            # Skip a round rather than pile up polls behind a busy queue
+            if poll is None or poll.done():
+                poll = submit_command("list", command_dispatcher.PRIORITY_POLL, expect=LIST_RESPONSE)
+                if poll is None:
+                    break
             time.sleep(10) # Send list command every 10 seconds
 
+    def update_lag_stats_periodically():
+        lag.reset()
+        tps_text.value = "TPS: -"
+        mspt_text.value = "MSPT: -"
+        while server_process and server_process.poll() is None:
+            supported = lag.sample(lambda command, expect=None: submit_command(command, command_dispatcher.PRIORITY_POLL, expect=expect))
+            if not supported:
+                tps_text.value = "TPS: 当前核心不支持查询 (仅记录 \"Can't keep up!\")"
+                page.update()
+                break
+            if lag.tps is not None:
+                tps_text.value = f"TPS: {lag.tps:.1f}"
+                tps_text.color = ft.Colors.ORANGE if lag.tps < lag.tps_threshold else None
+            if lag.mspt is not None:
+                mspt_text.value = f"MSPT: {lag.mspt:.1f} ms"
+                mspt_text.color = ft.Colors.ORANGE if lag.mspt > lag.mspt_threshold else None
+            page.update()
+            time.sleep(LAG_SAMPLE_INTERVAL)
+
     def update_performance_stats():
         nonlocal server_process
         while server_process and server_process.poll() is None:
             try:
                 p = psutil.Process(server_process.pid)
                 cpu_percent = p.cpu_percent(interval=1)
-                memory_info = p.memory_info()
-                memory_usage_mb = memory_info.rss / (1024 * 1024)
-                total_memory_mb = 1024
-                memory_percent = (memory_usage_mb / total_memory_mb)
-                cpu_progress.value = cpu_percent / 100
-                cpu_text.value = f"CPU: {cpu_percent:.1f}%"
-                ram_progress.value = memory_percent
-                ram_text.value = f"内存: {memory_usage_mb:.0f} MB / {total_memory_mb} MB ({memory_percent*100:.1f}%)"
+                with tracing.span("metrics.sample", "metrics"):
+                    memory_info = p.memory_info()
+                    memory_usage_mb = memory_info.rss / (1024 * 1024)
+                    total_memory_mb = 1024
+                    memory_percent = (memory_usage_mb / total_memory_mb)
+                    cpu_progress.value = cpu_percent / 100
+                    cpu_text.value = f"CPU: {cpu_percent:.1f}%"
+                    ram_progress.value = memory_percent
+                    ram_text.value = f"内存: {memory_usage_mb:.0f} MB / {total_memory_mb} MB ({memory_percent*100:.1f}%)"
+                    update_per_core_usage()
+                    update_gc_stats()
             except psutil.NoSuchProcess: break
             except Exception as e: print(f"Perf error: {e}")
             page.update()
@@ -403,50 +647,211 @@ def main(page: ft.Page):
         cpu_text.value = "CPU: 0%"
         ram_progress.value = 0
         ram_text.value = "内存: 0 MB / 0 MB (0%)"
+        per_core_row.controls.clear()
         page.update()
 
+    def update_gc_stats():
+        parser = gc_parser
+        if parser is None:
+            return
+        p50, p99 = parser.pause_percentile(50), parser.pause_percentile(99)
+        if p50 is None:
+            gc_text.value = "GC: 等待首次 GC..."
+        else:
+            rate = parser.alloc_rate()
+            live = parser.series.get("heap_after_mb").latest()
+            gc_text.value = (
+                f"GC 停顿: p50 {p50:.1f} ms / p99 {p99:.1f} ms | "
+                f"Young {parser.counts[gc_log.YOUNG]}, Mixed {parser.counts[gc_log.MIXED]}, Full {parser.counts[gc_log.FULL]}"
+                + (f" | GC 后堆 {live[1]:.0f} MB" if live else "")
+                + (f" | 分配速率 {rate:.0f} MB/s" if rate is not None else "")
+            )
+        # Judge the heap on the last 10 minutes so a bad start doesn't warn forever
+        gc_warnings_column.controls = [
+            ft.Text(warning, size=12, color=ft.Colors.ORANGE)
+            for warning in gc_log.heap_warnings(parser, gc_heap_mb, since=time.time() - 600)
+        ]
+
+    def update_running_resources(cores: Optional[list[int]]):
+        nonlocal running_resources
+        if running_resources:
+            running_resources = (running_resources[0], cores, running_resources[2])
+
+    def update_per_core_usage():
+        usage = resource_limits.per_core_usage()
+        assigned = running_resources[1] if running_resources else None
+        if len(per_core_row.controls) != len(usage):
+            per_core_row.controls = [
+                ft.Column([ft.ProgressBar(width=36, value=0), ft.Text(str(core), size=10)], spacing=1,
+                          horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+                for core in range(len(usage))
+            ]
+        for core, (column, percent) in enumerate(zip(per_core_row.controls, usage)):
+            bar, label = column.controls
+            bar.value = percent / 100
+            # Cores the server is pinned to stand out; the others show what the rest of the host is doing
+            in_policy = assigned is None or core in assigned
+            bar.color = ft.Colors.GREEN if in_policy else ft.Colors.GREY
+            label.weight = ft.FontWeight.BOLD if assigned is not None and in_policy else None
+            column.tooltip = f"核心 {core}: {percent:.0f}%" + (" (已分配给该服务器)" if assigned is not None and in_policy else "")
+
+    def get_java_executable(instance_info: Optional[dict[str, Any]] = None) -> str:
+        """The instance's pinned runtime, else the installed runtime matching its game version, else the global setting."""
+        if instance_info:
+            if instance_info.get("java_path"):
+                return instance_info["java_path"]
+            if app_settings.get("java_auto_match", True) and instance_info.get("java_version"):
+                runtime = java_runtimes.match_runtime(java_catalog.discover(), instance_info["java_version"])
+                if runtime:
+                    return runtime.path
+        # Explicitly check for a non-empty path to avoid falling back to "java" when an empty string is set
+        return app_settings.get("java_path") or "java"
+
+    def resolve_resource_policy(server_dir: str, instance_info: dict[str, Any]) -> tuple[resource_limits.ResourcePolicy, Optional[list[int]]]:
+        """The instance's resource policy and the cores it resolves to; raises ValueError for a bad manual core list."""
+        policy = resource_limits.ResourcePolicy.from_dict(instance_info.get("resources"))
+        auto_names = [
+            name for name in instance_registry.list_names()
+            if instance_registry.get(os.path.join(SERVERS_ROOT_DIR, name)).get("resources", {}).get("affinity") == resource_limits.AFFINITY_AUTO
+        ]
+        return policy, resource_limits.resolve_cores(policy, os.path.basename(server_dir), auto_names)
+
+    def resolve_jvm_args(instance_info: dict[str, Any], java_executable: str, profile: Optional[str] = None,
+                         heap_mb: Optional[int] = None, instances_count: Optional[int] = None,
+                         custom_args: Optional[str] = None) -> tuple[list[str], list[tuple[str, str]]]:
+        """JVM arguments for an instance's flag profile plus heap validation problems. Overrides are used by the editor preview."""
+        profile = profile or instance_info.get("jvm_profile") or jvm_flags.PROFILE_DEFAULT
+        instances_count = instances_count or instance_info.get("jvm_instances") or 1
+        host = jvm_flags.host_info()
+        java_version = java_catalog.major_version(java_executable) or instance_info.get("java_version")
+        if profile == jvm_flags.PROFILE_DEFAULT:
+            args = app_settings.get("jvm_args", "-Xmx1024M -Xms1024M").split()
+        else:
+            args = jvm_flags.build_flags(
+                profile, host,
+                heap_mb=heap_mb if heap_mb is not None else instance_info.get("jvm_heap_mb"),
+                java_version=java_version,
+                instances=instances_count,
+                custom_args=custom_args if custom_args is not None else instance_info.get("jvm_custom_args", ""),
+            )
+        return args, jvm_flags.validate_heap(args, host, instances_count, java_version)
+
     def start_server(e):
-        nonlocal server_process, server_thread, performance_thread, player_list_thread
+        nonlocal server_process, console_dispatcher, server_thread, performance_thread, player_list_thread, lag_thread
+        nonlocal watchdog_thread, hang_detector, stop_requested, hang_detected, cds_training, boot_recorder, running_resources
+        nonlocal gc_tailer, gc_parser, gc_heap_mb
         if not selected_server_path.current:
-            console_output.controls.append(create_console_text("错误: 请先选择一个服务器实例。", color=ft.Colors.RED))
+            append_console("错误: 请先选择一个服务器实例。", color=ft.Colors.RED)
             page.update()
             return
 
         if server_process is None:
+            if e is not None:
+                # A manual start clears the crash-loop history
+                restart_policy.reset()
             server_dir = selected_server_path.current
-            jar_files = [f for f in os.listdir(server_dir) if f.endswith('.jar')]
-            if not jar_files:
-                console_output.controls.append(create_console_text(f"错误: 在 '{os.path.basename(server_dir)}' 目录中未找到 .jar 文件。", color=ft.Colors.RED))
+            instance_info = instance_registry.get(server_dir)
+            server_jar = instance_info.get("jar")
+            if not server_jar:
+                append_console(f"错误: 在 '{os.path.basename(server_dir)}' 目录中未找到 .jar 文件。", color=ft.Colors.RED)
                 page.update()
                 return
             
-            server_jar = jar_files[0]
-            console_output.controls.clear()
-            console_output.controls.append(create_console_text(f"正在启动服务器 '{os.path.basename(server_dir)}'...", color=ft.Colors.BLUE))
+            clear_console()
+            append_console(f"正在启动服务器 '{os.path.basename(server_dir)}'...", color=ft.Colors.BLUE)
             page.update()
             try:
-                # Explicitly check for a non-empty path to avoid falling back to "java" when an empty string is set
-                java_executable = app_settings.get("java_path")
-                if not java_executable:
-                    java_executable = "java"
-                
-                jvm_args = app_settings.get("jvm_args", "-Xmx1024M -Xms1024M").split()
+                java_executable = get_java_executable(instance_info)
+                runtime = java_catalog.get(java_executable)
+                required_java = instance_info.get("java_version")
+                if runtime:
+                    append_console(f"使用 {runtime.label}: {runtime.path}", color=ft.Colors.GREY)
+                    if required_java and runtime.major < required_java:
+                        append_console(
+                            f"警告: 该服务器需要 Java {required_java}+，当前为 Java {runtime.major}，可能无法启动。", color=ft.Colors.ORANGE)
+                jvm_args, heap_problems = resolve_jvm_args(instance_info, java_executable)
+                for level, message in heap_problems:
+                    color = ft.Colors.RED if level == jvm_flags.ERROR else ft.Colors.ORANGE
+                    append_console(f"JVM 参数检查: {message}", color=color)
+                if any(level == jvm_flags.ERROR for level, _ in heap_problems):
+                    append_console("启动已取消，请调整该实例的 JVM 参数。", color=ft.Colors.RED)
+                    page.update()
+                    return
+                cds_training = None
+                if instance_info.get("fast_start"):
+                    cds_plan = appcds.plan(server_dir, server_jar, java_executable, runtime.version if runtime else None,
+                                           runtime.major if runtime else None, jvm_args)
+                    jvm_args = jvm_args + cds_plan.args
+                    if cds_plan.mode == appcds.USE:
+                        append_console("快速启动: 使用 CDS 归档。", color=ft.Colors.GREY)
+                    elif cds_plan.mode == appcds.TRAIN:
+                        cds_training = (server_dir, cds_plan)
+                        append_console(
+                            f"快速启动: {cds_plan.reason}，本次为训练启动，正常停止服务器后将生成 CDS 归档。", color=ft.Colors.ORANGE)
+                    else:
+                        append_console(f"快速启动不可用: {cds_plan.reason}", color=ft.Colors.ORANGE)
+                # Only handed to the running-server state once Popen succeeds, so a failed
+                # launch never leaves a tailer of its own log behind for the next start
+                new_gc_parser = new_gc_tailer = None
+                gc_heap_mb = jvm_flags.parse_heap(jvm_args)[1]
+                gc_text.value = "GC: 未启用 GC 日志"
+                gc_warnings_column.controls.clear()
+                if instance_info.get("gc_logging"):
+                    if runtime and runtime.major >= gc_log.MIN_JAVA:
+                        os.makedirs(os.path.join(server_dir, "logs"), exist_ok=True)
+                        jvm_args = jvm_args + gc_log.log_args(server_dir)
+                        new_gc_parser = gc_log.GcLogParser()
+                        # Created before launch: it has to see which gc.log is left over from the previous run
+                        new_gc_tailer = gc_log.GcLogTailer(os.path.join(server_dir, gc_log.LOG_FILE), new_gc_parser)
+                    else:
+                        append_console(
+                            f"GC 日志需要 Java {gc_log.MIN_JAVA}+，本次启动未启用。", color=ft.Colors.ORANGE)
                 
                 command = [java_executable] + jvm_args + ["-jar", server_jar, "nogui"]
-                console_output.controls.append(create_console_text(f"执行命令: {' '.join(command)}", color=ft.Colors.GREY))
+                try:
+                    resource_policy, cores = resolve_resource_policy(server_dir, instance_info)
+                except ValueError as ex:
+                    resource_policy, cores = resource_limits.ResourcePolicy(), None
+                    append_console(f"资源策略无效，已忽略: {ex}", color=ft.Colors.ORANGE)
+                command, scope_unit = resource_limits.wrap_command(command, os.path.basename(server_dir), resource_policy)
+                if resource_policy.needs_cgroup and scope_unit is None:
+                    append_console(
+                        f"CPU/内存限制未生效: {resource_limits.cgroup_support()}", color=ft.Colors.ORANGE)
+                append_console(f"执行命令: {' '.join(command)}", color=ft.Colors.GREY)
                 page.update()
                 
+                new_boot_recorder = boot_timeline.BootRecorder(boot_timeline.boot_config(
+                    server_dir, server_jar, runtime.label if runtime else java_executable, jvm_args))
                 server_process = subprocess.Popen(
                     command,
                     stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE,
-                    text=True, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW, cwd=server_dir
+                    text=True, encoding='utf-8', creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0), cwd=server_dir,
                 )
+                boot_recorder, gc_parser, gc_tailer = new_boot_recorder, new_gc_parser, new_gc_tailer
+                running_resources = (server_dir, cores, scope_unit)
+                if gc_tailer:
+                    gc_tailer.start()
+                if cores is not None or resource_policy.priority != resource_limits.PRIORITY_NORMAL:
+                    for problem in resource_limits.apply(server_process.pid, cores, resource_policy.priority):
+                        append_console(problem, color=ft.Colors.ORANGE)
+                    append_console(
+                        f"资源策略: 核心 {resource_limits.format_cores(cores) if cores is not None else '全部'}，优先级 {resource_policy.priority}",
+                        color=ft.Colors.GREY)
+                console_dispatcher = command_dispatcher.CommandDispatcher.for_stdin(server_process.stdin)
+                hang_detector = server_watchdog.HangDetector(server_process.pid)
+                stop_requested = False
+                hang_detected = False
+                instance_registry.record_start(server_dir)
                 server_thread = threading.Thread(target=update_console_output, daemon=True)
                 server_thread.start()
                 performance_thread = threading.Thread(target=update_performance_stats, daemon=True)
                 performance_thread.start()
                 player_list_thread = threading.Thread(target=update_player_list_periodically, daemon=True)
                 player_list_thread.start()
+                lag_thread = threading.Thread(target=update_lag_stats_periodically, daemon=True)
+                lag_thread.start()
+                watchdog_thread = threading.Thread(target=monitor_server_health, args=(server_process, server_dir, java_executable), daemon=True)
+                watchdog_thread.start()
                 server_status_text.value = f"服务器状态: 运行中 ({os.path.basename(server_dir)})"
                 server_status_text.color = ft.Colors.GREEN
                 start_button.disabled = True
@@ -455,36 +860,58 @@ def main(page: ft.Page):
                 configure_button.disabled = True
                 delete_server_button.disabled = True
             except FileNotFoundError:
-                console_output.controls.append(create_console_text("错误: 'java' 命令未找到。请确保已安装 Java 并将其添加至系统 PATH。", color=ft.Colors.RED))
+                append_console("错误: 'java' 命令未找到。请确保已安装 Java 并将其添加至系统 PATH。", color=ft.Colors.RED)
             except Exception as ex:
-                console_output.controls.append(create_console_text(f"启动失败: {ex}", color=ft.Colors.RED))
+                append_console(f"启动失败: {ex}", color=ft.Colors.RED)
             page.update()
 
     def send_command(e):
-        if server_process and server_process.stdin and command_input.value:
-            try:
-                command = command_input.value + "\n"
-                server_process.stdin.write(command)
-                server_process.stdin.flush()
-                console_output.controls.append(create_console_text(f"> {command_input.value}", color=ft.Colors.CYAN))
-                command_input.value = ""
-            except Exception as ex:
-                console_output.controls.append(create_console_text(f"命令发送失败: {ex}", color=ft.Colors.RED))
+        if command_input.value:
+            command = command_input.value
+            remote = is_remote_transport()
+            # Over RCON there is no stdout to watch, so wait for the reply and print it here
+            future = submit_command(command, wait_response=remote)
+            if future is None:
+                append_console("服务器未运行，且未在 server.properties 中启用 RCON。", color=ft.Colors.RED)
+                page.update()
+                return
+            def on_sent(f):
+                if f.cancelled():
+                    append_console("命令已取消。", color=ft.Colors.ORANGE)
+                elif f.exception():
+                    append_console(f"命令发送失败: {f.exception()}", color=ft.Colors.RED)
+                elif remote:
+                    for reply_line in f.result():
+                        append_console(reply_line)
+                page.update()
+            future.add_done_callback(on_sent)
+            append_console(f"> {command}", color=ft.Colors.CYAN)
+            command_input.value = ""
             page.update()
 
     def stop_server_action():
-        if server_process and server_process.stdin:
-            console_output.controls.append(create_console_text("正在停止服务器...", color=ft.Colors.ORANGE))
+        nonlocal stop_requested
+        if not server_process and is_remote_transport():
+            append_console("正在通过 RCON 停止服务器...", color=ft.Colors.ORANGE)
             page.update()
-            try:
-                server_process.stdin.write("stop\n")
-                server_process.stdin.flush()
-            except (IOError, AttributeError):
-                if server_process:
-                    server_process.terminate()
+            submit_command("stop", command_dispatcher.PRIORITY_STOP)
+            return
+        if server_process:
+            stop_requested = True
+            append_console("正在停止服务器...", color=ft.Colors.ORANGE)
+            page.update()
+            process = server_process
+            future = submit_command("stop", command_dispatcher.PRIORITY_STOP, wait_response=False)
+            def on_stop_sent(f):
+                if (f is None or f.cancelled() or f.exception()) and process.poll() is None:
+                    process.terminate()
+            if future is None:
+                on_stop_sent(None)
+            else:
+                future.add_done_callback(on_stop_sent)
 
     def restart_server(e):
-        console_output.controls.append(create_console_text("正在重启服务器...", color=ft.Colors.BLUE))
+        append_console("正在重启服务器...", color=ft.Colors.BLUE)
         page.update()
         stop_server_action()
         def wait_and_restart():
@@ -500,6 +927,56 @@ def main(page: ft.Page):
 
     # --- View Creation Functions ---
     def create_home_view():
+        console_level_dropdown = ft.Dropdown(
+            label="级别",
+            value=str(console_index.TRACE),
+            options=[ft.dropdown.Option(str(console_index.TRACE), "全部")] + [
+                ft.dropdown.Option(str(level), f"{console_index.LEVEL_NAMES[level]} 及以上")
+                for level in (console_index.DEBUG, console_index.INFO, console_index.WARN, console_index.ERROR)
+            ],
+            width=150,
+            dense=True,
+        )
+        console_word_field = ft.TextField(label="玩家/关键词 (整词)", width=170, dense=True)
+        console_search_field = ft.TextField(label="搜索控制台", expand=True, dense=True)
+        console_regex_checkbox = ft.Checkbox(label="正则", value=False)
+        console_filter_status = ft.Text("", size=12, color=ft.Colors.GREY)
+        console_filter_timer = ft.Ref[threading.Timer]()
+
+        def apply_console_filter():
+            new_filter = console_index.ConsoleFilter(
+                min_level=int(console_level_dropdown.value or console_index.TRACE),
+                word=console_word_field.value or "",
+                text=console_search_field.value or "",
+                regex=bool(console_regex_checkbox.value),
+            )
+            try:
+                new_filter.compile()
+            except re.error as ex:
+                console_search_field.error_text = f"正则无效: {ex}"
+                page.update()
+                return
+            console_search_field.error_text = None
+            with tracing.span("console.filter", "console"):
+                shown = set_console_filter(new_filter)
+            counts = console_buffer.level_counts()
+            problems = f"WARN {counts[console_index.WARN]} · ERROR {counts[console_index.ERROR] + counts[console_index.FATAL]}"
+            console_filter_status.value = (f"显示 {shown} / {len(console_buffer)} 行 · {problems}" if new_filter.active
+                                           else f"共 {len(console_buffer)} 行 · {problems}")
+            page.update()
+
+        def on_console_filter_typed(e):
+            if console_filter_timer.current:
+                console_filter_timer.current.cancel()
+            console_filter_timer.current = threading.Timer(0.25, apply_console_filter)
+            console_filter_timer.current.daemon = True
+            console_filter_timer.current.start()
+
+        console_level_dropdown.on_change = lambda e: apply_console_filter()
+        console_regex_checkbox.on_change = lambda e: apply_console_filter()
+        console_word_field.on_change = on_console_filter_typed
+        console_search_field.on_change = on_console_filter_typed
+
         def copy_console_output(e):
             console_texts = [c.value for c in console_output.controls if isinstance(c, ft.Text) and c.value is not None]
             all_text = "\n".join(console_texts)
@@ -594,8 +1071,9 @@ def main(page: ft.Page):
                 return
             
             try:
-                shutil.rmtree(path_to_delete)
-                page.overlay.append(ft.SnackBar(ft.Text(f"服务器 '{os.path.basename(path_to_delete)}' 已被删除。"), open=True))
+                # Rename into the trash first so the instance vanishes at once; the files are removed in the background
+                trash_collector.delete(path_to_delete)
+                page.overlay.append(ft.SnackBar(ft.Text(f"服务器 '{os.path.basename(path_to_delete)}' 已被删除，正在后台清理文件。"), open=True))
                 update_server_list() # This will refresh the list and deselect
             except Exception as ex:
                 page.overlay.append(ft.SnackBar(ft.Text(f"删除失败: {ex}"), open=True))
@@ -633,6 +1111,381 @@ def main(page: ft.Page):
 
         delete_server_button.on_click = confirm_delete_server
 
+        def open_save_template_dialog(e):
+            if not selected_server_path.current:
+                page.overlay.append(ft.SnackBar(ft.Text("请先选择一个服务器!"), open=True))
+                page.update()
+                return
+            source_dir = selected_server_path.current
+            template_name_field = ft.TextField(label="模板名称", value=os.path.basename(source_dir), autofocus=True)
+            include_world_checkbox = ft.Checkbox(label="包含已生成的世界", value=False)
+            template_dialog = ft.AlertDialog(modal=True)
+
+            def create_template_thread(name, include_world):
+                try:
+                    meta = templates.create_template(source_dir, SERVERS_ROOT_DIR, name, include_world)
+                    page.overlay.append(ft.SnackBar(ft.Text(f"模板 '{name}' 已创建 ({meta['files']} 个文件)。"), open=True))
+                except Exception as ex:
+                    page.overlay.append(ft.SnackBar(ft.Text(f"创建模板失败: {ex}"), open=True))
+                page.update()
+
+            def on_confirm(e_confirm):
+                name = (template_name_field.value or "").strip()
+                if not name or name.startswith('.') or any(c in name for c in r'<>:"/\|?*'):
+                    template_name_field.error_text = "名称无效"
+                    page.update()
+                    return
+                if include_world_checkbox.value and server_process is not None:
+                    template_name_field.error_text = "服务器运行中，无法对世界做快照。请先停止服务器。"
+                    page.update()
+                    return
+                template_dialog.open = False
+                page.overlay.append(ft.SnackBar(ft.Text(f"正在创建模板 '{name}'..."), open=True))
+                page.update()
+                page.run_thread(create_template_thread, name, include_world_checkbox.value)
+
+            template_dialog.title = ft.Text(f"将 '{os.path.basename(source_dir)}' 保存为模板")
+            template_dialog.content = ft.Column([
+                template_name_field,
+                include_world_checkbox,
+                ft.Text("模板包含核心、插件与配置文件；日志与缓存不会被保存。", size=12, color=ft.Colors.GREY),
+            ], tight=True)
+            template_dialog.actions = [
+                ft.TextButton("取消", on_click=lambda _: (setattr(template_dialog, 'open', False), page.update())),
+                ft.FilledButton("保存模板", on_click=on_confirm),
+            ]
+            template_dialog.actions_alignment = ft.MainAxisAlignment.END
+            page.overlay.append(template_dialog)
+            template_dialog.open = True
+            page.update()
+
+        def open_jvm_profile_dialog(e):
+            if not selected_server_path.current:
+                page.overlay.append(ft.SnackBar(ft.Text("请先选择一个服务器!"), open=True))
+                page.update()
+                return
+            server_dir = selected_server_path.current
+            instance_info = instance_registry.get(server_dir)
+            matched = java_runtimes.match_runtime(java_catalog.discover(), instance_info.get("java_version"))
+            java_dropdown = ft.Dropdown(
+                label="Java 运行时",
+                value=instance_info.get("java_path") or "",
+                options=[ft.dropdown.Option(key="", text=f"自动匹配 ({matched.label})" if matched else "自动 (使用全局设置)")]
+                        + [ft.dropdown.Option(key=r.path, text=f"{r.label} — {r.path}") for r in java_catalog.discover()],
+            )
+            profile_labels = {
+                jvm_flags.PROFILE_DEFAULT: "使用全局默认 JVM 参数",
+                jvm_flags.PROFILE_AUTO: "自动 (按内存与 Java 版本选择 G1 或 ZGC)",
+                jvm_flags.PROFILE_G1: "G1 (Aikar 参数)",
+                jvm_flags.PROFILE_ZGC: "ZGC (Java 21+ 推荐分代模式)",
+                jvm_flags.PROFILE_CUSTOM: "自定义",
+            }
+            profile_dropdown = ft.Dropdown(
+                label="参数方案",
+                value=instance_info.get("jvm_profile", jvm_flags.PROFILE_DEFAULT),
+                options=[ft.dropdown.Option(key=k, text=v) for k, v in profile_labels.items()],
+            )
+            heap_field = ft.TextField(label="堆内存 (MB)", hint_text="留空则自动计算", width=180,
+                                      value=str(instance_info["jvm_heap_mb"]) if instance_info.get("jvm_heap_mb") else "")
+            instances_field = ft.TextField(label="同时运行的实例数", width=180, value=str(instance_info.get("jvm_instances") or 1))
+            custom_field = ft.TextField(label="自定义 JVM 参数", multiline=True, value=instance_info.get("jvm_custom_args") or app_settings.get("jvm_args", ""))
+            fast_start_switch = ft.Switch(label="快速启动 (AppCDS 类数据共享归档，需要 Java 13+)", value=bool(instance_info.get("fast_start")))
+            gc_logging_switch = ft.Switch(label="记录 GC 日志并分析停顿 (logs/gc.log，需要 Java 9+)", value=bool(instance_info.get("gc_logging")))
+            cds_status_text = ft.Text(appcds.describe(server_dir), size=12, color=ft.Colors.GREY)
+
+            def rebuild_cds(e_rebuild):
+                appcds.invalidate(server_dir)
+                cds_status_text.value = appcds.describe(server_dir)
+                page.update()
+            host = jvm_flags.host_info()
+            host_text = ft.Text(f"本机: {host.total_mb} MB 内存 (可用 {host.available_mb} MB), {host.cores} 核", size=12, color=ft.Colors.GREY)
+            preview_text = ft.Text("", selectable=True, font_family="Roboto Mono", size=12)
+            problems_column = ft.Column(spacing=2)
+            jvm_dialog = ft.AlertDialog(modal=True)
+
+            def read_int(field) -> Optional[int]:
+                try:
+                    value = int((field.value or "").strip())
+                    return value if value > 0 else None
+                except ValueError:
+                    return None
+
+            def refresh_preview(e=None):
+                java_executable = get_java_executable({**instance_info, "java_path": java_dropdown.value or ""})
+                profile = profile_dropdown.value or jvm_flags.PROFILE_DEFAULT
+                custom_field.visible = profile == jvm_flags.PROFILE_CUSTOM
+                heap_field.disabled = profile in (jvm_flags.PROFILE_DEFAULT, jvm_flags.PROFILE_CUSTOM)
+                args, problems = resolve_jvm_args(instance_info, java_executable, profile=profile,
+                                                  heap_mb=read_int(heap_field), instances_count=read_int(instances_field),
+                                                  custom_args=custom_field.value or "")
+                preview_text.value = " ".join(args)
+                problems_column.controls = [
+                    ft.Text(message, size=12, color=ft.Colors.RED if level == jvm_flags.ERROR else ft.Colors.ORANGE)
+                    for level, message in problems
+                ] or [ft.Text("堆内存检查通过。", size=12, color=ft.Colors.GREEN)]
+                page.update()
+
+            def on_save(e_save):
+                instance_registry.update(
+                    server_dir,
+                    jvm_profile=profile_dropdown.value or jvm_flags.PROFILE_DEFAULT,
+                    jvm_heap_mb=read_int(heap_field),
+                    jvm_instances=read_int(instances_field) or 1,
+                    jvm_custom_args=custom_field.value or "",
+                    java_path=java_dropdown.value or "",
+                    fast_start=fast_start_switch.value,
+                    gc_logging=gc_logging_switch.value,
+                )
+                jvm_dialog.open = False
+                page.overlay.append(ft.SnackBar(ft.Text("JVM 参数方案已保存，将在下次启动时生效。"), open=True))
+                page.update()
+
+            for control in (java_dropdown, profile_dropdown, heap_field, instances_field, custom_field):
+                control.on_change = refresh_preview
+            jvm_dialog.title = ft.Text(f"'{os.path.basename(server_dir)}' 的 JVM 参数")
+            jvm_dialog.content = ft.Container(ft.Column([
+                host_text,
+                java_dropdown,
+                profile_dropdown,
+                ft.Row([heap_field, instances_field]),
+                custom_field,
+                fast_start_switch,
+                ft.Row([cds_status_text, ft.TextButton("重新生成", icon=ft.Icons.REFRESH, on_click=rebuild_cds)], wrap=True),
+                gc_logging_switch,
+                ft.Text("生成的参数:", weight=ft.FontWeight.W_500),
+                preview_text,
+                problems_column,
+            ], tight=True, scroll=ft.ScrollMode.ADAPTIVE), width=640)
+            jvm_dialog.actions = [
+                ft.TextButton("取消", on_click=lambda _: (setattr(jvm_dialog, 'open', False), page.update())),
+                ft.FilledButton("保存", on_click=on_save),
+            ]
+            jvm_dialog.actions_alignment = ft.MainAxisAlignment.END
+            page.overlay.append(jvm_dialog)
+            jvm_dialog.open = True
+            refresh_preview()
+
+        def open_resource_dialog(e):
+            if not selected_server_path.current:
+                page.overlay.append(ft.SnackBar(ft.Text("请先选择一个服务器!"), open=True))
+                page.update()
+                return
+            server_dir = selected_server_path.current
+            instance_info = instance_registry.get(server_dir)
+            policy = resource_limits.ResourcePolicy.from_dict(instance_info.get("resources"))
+            core_count = os.cpu_count() or 1
+            affinity_dropdown = ft.Dropdown(
+                label="CPU 亲和性",
+                value=policy.affinity,
+                options=[
+                    ft.dropdown.Option(key=resource_limits.AFFINITY_ALL, text="不限制 (所有核心)"),
+                    ft.dropdown.Option(key=resource_limits.AFFINITY_AUTO, text="自动平分 (与其他\"自动\"实例平分核心)"),
+                    ft.dropdown.Option(key=resource_limits.AFFINITY_MANUAL, text="手动指定"),
+                ],
+            )
+            cores_field = ft.TextField(label=f"核心 (0-{core_count - 1}，如 0-3,6)", value=policy.cores, width=260)
+            priority_labels = {
+                resource_limits.PRIORITY_LOW: "低", resource_limits.PRIORITY_BELOW_NORMAL: "低于正常",
+                resource_limits.PRIORITY_NORMAL: "正常", resource_limits.PRIORITY_ABOVE_NORMAL: "高于正常 (需要管理员权限)",
+                resource_limits.PRIORITY_HIGH: "高 (需要管理员权限)",
+            }
+            priority_dropdown = ft.Dropdown(label="进程优先级", value=policy.priority,
+                                            options=[ft.dropdown.Option(key=k, text=v) for k, v in priority_labels.items()])
+            cpu_quota_field = ft.TextField(label="CPU 上限 (%，100 = 1 核)", width=200,
+                                           value=str(policy.cpu_quota_percent) if policy.cpu_quota_percent else "")
+            memory_max_field = ft.TextField(label="内存上限 (MB)", width=200,
+                                            value=str(policy.memory_max_mb) if policy.memory_max_mb else "")
+            cgroup_problem = resource_limits.cgroup_support()
+            for field in (cpu_quota_field, memory_max_field):
+                field.disabled = cgroup_problem is not None
+            preview_text = ft.Text("", size=12, color=ft.Colors.GREY)
+            resource_dialog = ft.AlertDialog(modal=True)
+
+            def read_int(field) -> Optional[int]:
+                try:
+                    value = int((field.value or "").strip())
+                    return value if value > 0 else None
+                except ValueError:
+                    return None
+
+            def current_policy() -> resource_limits.ResourcePolicy:
+                return resource_limits.ResourcePolicy(
+                    affinity=affinity_dropdown.value or resource_limits.AFFINITY_ALL,
+                    cores=cores_field.value or "",
+                    priority=priority_dropdown.value or resource_limits.PRIORITY_NORMAL,
+                    cpu_quota_percent=read_int(cpu_quota_field),
+                    memory_max_mb=read_int(memory_max_field),
+                )
+
+            def refresh_preview(e=None):
+                cores_field.visible = affinity_dropdown.value == resource_limits.AFFINITY_MANUAL
+                try:
+                    _, cores = resolve_resource_policy(server_dir, {**instance_info, "resources": current_policy().to_dict()})
+                    preview_text.value = f"将使用核心: {resource_limits.format_cores(cores) if cores is not None else '全部'} (共 {core_count} 核)"
+                    preview_text.color = ft.Colors.GREY
+                except ValueError as ex:
+                    preview_text.value = str(ex)
+                    preview_text.color = ft.Colors.RED
+                page.update()
+
+            def on_save(e_save):
+                new_policy = current_policy()
+                try:
+                    _, cores = resolve_resource_policy(server_dir, {**instance_info, "resources": new_policy.to_dict()})
+                except ValueError as ex:
+                    page.overlay.append(ft.SnackBar(ft.Text(str(ex)), open=True))
+                    page.update()
+                    return
+                instance_registry.update(server_dir, resources=new_policy.to_dict())
+                message = "资源策略已保存，将在下次启动时生效。"
+                if server_process and running_resources and running_resources[0] == server_dir:
+                    problems = resource_limits.apply(server_process.pid, cores, new_policy.priority)
+                    unit = running_resources[2]
+                    if unit:
+                        error = resource_limits.set_limits(unit, new_policy)
+                        if error:
+                            problems.append(f"更新 CPU/内存限制失败: {error}")
+                    elif new_policy.needs_cgroup:
+                        problems.append("CPU/内存限制需重启服务器后生效。")
+                    update_running_resources(cores)
+                    message = "资源策略已应用到运行中的服务器。" + (" " + " ".join(problems) if problems else "")
+                resource_dialog.open = False
+                page.overlay.append(ft.SnackBar(ft.Text(message), open=True))
+                page.update()
+
+            for control in (affinity_dropdown, cores_field):
+                control.on_change = refresh_preview
+            resource_dialog.title = ft.Text(f"'{os.path.basename(server_dir)}' 的资源限制")
+            resource_dialog.content = ft.Container(ft.Column([
+                affinity_dropdown,
+                cores_field,
+                preview_text,
+                priority_dropdown,
+                ft.Row([cpu_quota_field, memory_max_field]),
+                ft.Text(cgroup_problem or "CPU/内存限制通过 systemd 的 cgroup v2 作用域实现，留空表示不限制。", size=12, color=ft.Colors.GREY),
+            ], tight=True), width=520)
+            resource_dialog.actions = [
+                ft.TextButton("取消", on_click=lambda _: (setattr(resource_dialog, 'open', False), page.update())),
+                ft.FilledButton("保存", on_click=on_save),
+            ]
+            resource_dialog.actions_alignment = ft.MainAxisAlignment.END
+            page.overlay.append(resource_dialog)
+            resource_dialog.open = True
+            refresh_preview()
+
+        def open_boot_timeline_dialog(e):
+            if not selected_server_path.current:
+                page.overlay.append(ft.SnackBar(ft.Text("请先选择一个服务器!"), open=True))
+                page.update()
+                return
+            server_dir = selected_server_path.current
+            boots = boot_timeline.history(server_dir)
+            completed = boot_timeline.trend(boots)
+            timeline_dialog = ft.AlertDialog(modal=True)
+            timeline_dialog.title = ft.Text(f"'{os.path.basename(server_dir)}' 的启动分析")
+
+            def bar_row(label: str, seconds: float, total: float, color):
+                return ft.Row([
+                    ft.Text(label, width=160, size=12, no_wrap=True, tooltip=label),
+                    ft.ProgressBar(value=seconds / total if total else 0, width=260, color=color),
+                    ft.Text(f"{seconds:.2f} s", size=12),
+                ])
+
+            if not completed:
+                content = [ft.Text("尚无完整的启动记录。启动服务器并等待 \"Done\" 后将自动记录。", color=ft.Colors.GREY)]
+            else:
+                latest, _ = completed[0]
+                total = latest.total_s or 0
+                reported = f" (服务器报告 {latest.reported_done_s:.1f} 秒)" if latest.reported_done_s is not None else ""
+                content = [
+                    ft.Text(f"最近一次启动: {datetime.datetime.fromtimestamp(latest.started_at):%Y-%m-%d %H:%M}，共 {total:.1f} 秒{reported}",
+                            weight=ft.FontWeight.W_500),
+                    ft.Text("启动阶段", weight=ft.FontWeight.W_500),
+                ]
+                content += [bar_row(boot_timeline.PHASE_LABELS.get(name, name), duration, total, ft.Colors.BLUE)
+                            for name, _, duration in latest.phase_spans()]
+                slowest = boot_timeline.slowest_plugins(boots)
+                if slowest:
+                    content.append(ft.Text("最慢的插件 (最近 5 次启动平均，加载 + 启用)", weight=ft.FontWeight.W_500))
+                    content += [bar_row(name, load + enable, total, ft.Colors.ORANGE) for name, load, enable in slowest]
+                content.append(ft.Text("启动耗时趋势", weight=ft.FontWeight.W_500))
+                slowest_boot = max(t.total_s for t, _ in completed)
+                for timeline, changes in completed[:15]:
+                    label = f"{datetime.datetime.fromtimestamp(timeline.started_at):%m-%d %H:%M}"
+                    content.append(ft.Row([
+                        bar_row(label, timeline.total_s, slowest_boot, ft.Colors.GREEN),
+                        ft.Text("; ".join(changes), size=12, color=ft.Colors.GREY),
+                    ]))
+            timeline_dialog.content = ft.Container(ft.Column(content, tight=True, scroll=ft.ScrollMode.ADAPTIVE), width=720, height=520)
+            timeline_dialog.actions = [ft.TextButton("关闭", on_click=lambda _: (setattr(timeline_dialog, 'open', False), page.update()))]
+            timeline_dialog.actions_alignment = ft.MainAxisAlignment.END
+            page.overlay.append(timeline_dialog)
+            timeline_dialog.open = True
+            page.update()
+
+        def open_console_history_dialog(e):
+            if not selected_server_path.current:
+                page.overlay.append(ft.SnackBar(ft.Text("请先选择一个服务器!"), open=True))
+                page.update()
+                return
+            server_dir = selected_server_path.current
+            recorded_sessions = console_log.list_sessions(server_dir)
+            history_dialog = ft.AlertDialog(modal=True)
+            history_dialog.title = ft.Text(f"'{os.path.basename(server_dir)}' 的历史控制台")
+            history_status = ft.Text("", size=12, color=ft.Colors.GREY)
+            history_lines = ft.ListView(expand=True, spacing=2)
+            loaded_text: list[str] = []
+
+            def format_offset(seconds: Optional[float]) -> str:
+                if seconds is None:
+                    return ""
+                return f"[{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}] "
+
+            def load_session(session_id: str):
+                session = next((s for s in recorded_sessions if s.session_id == session_id), None)
+                if session is None:
+                    return
+                history_status.value = "正在读取..."
+                history_lines.controls.clear()
+                page.update()
+                lines = console_log.read_session(session.path)
+                loaded_text[:] = [format_offset(offset) + text for offset, text in lines]
+                history_lines.controls = [create_console_text(text, size=12) for text in loaded_text]
+                history_status.value = (f"显示最后 {len(lines)} 行 (最多 {console_log.MAX_VIEW_LINES} 行)，时间为距会话开始的时长。"
+                                        + (" 该会话仍在写入或未正常结束。" if session.active else ""))
+                page.update()
+
+            def copy_history(e):
+                page.set_clipboard("\n".join(loaded_text))
+                page.overlay.append(ft.SnackBar(ft.Text("历史控制台内容已复制到剪贴板。"), open=True))
+                page.update()
+
+            def session_label(session: console_log.SessionInfo) -> str:
+                started = f"{session.started:%Y-%m-%d %H:%M:%S}" if session.started else session.session_id
+                return f"{started} · {session.size_bytes / (1024 * 1024):.1f} MB · {session.segments} 段" + (" · 进行中" if session.active else "")
+
+            session_dropdown = ft.Dropdown(
+                label="会话",
+                options=[ft.dropdown.Option(key=s.session_id, text=session_label(s)) for s in recorded_sessions],
+                value=recorded_sessions[0].session_id if recorded_sessions else None,
+                on_change=lambda e: page.run_thread(load_session, e.control.value),
+            )
+            if recorded_sessions:
+                content = [session_dropdown, history_status, ft.Container(history_lines, expand=True)]
+            else:
+                content = [ft.Text("尚无历史控制台记录。服务器运行时的控制台输出会自动保存。", color=ft.Colors.GREY)]
+            history_dialog.content = ft.Container(ft.Column(content), width=900, height=560)
+            history_dialog.actions = [
+                ft.TextButton("复制", icon=ft.Icons.COPY_ROUNDED, on_click=copy_history, disabled=not recorded_sessions),
+                ft.TextButton("关闭", on_click=lambda _: (setattr(history_dialog, 'open', False), page.update())),
+            ]
+            history_dialog.actions_alignment = ft.MainAxisAlignment.END
+            page.overlay.append(history_dialog)
+            history_dialog.open = True
+            page.update()
+            if recorded_sessions:
+                page.run_thread(load_session, recorded_sessions[0].session_id)
+
         def on_server_selected(e):
             server_name = e.control.value
             if server_name:
@@ -641,7 +1494,8 @@ def main(page: ft.Page):
                 start_button.disabled = is_running
                 configure_button.disabled = is_running
                 delete_server_button.disabled = is_running
-                console_output.controls.append(create_console_text(f"已选择服务器: {server_name}", color=ft.Colors.BLUE))
+                append_console(f"已选择服务器: {server_name}", color=ft.Colors.BLUE)
+                status_prober.probe_now()
             else:
                 selected_server_path.current = None
                 start_button.disabled = True
@@ -659,8 +1513,13 @@ def main(page: ft.Page):
 
         def update_server_list(e=None):
             try:
-                server_dirs = [d for d in os.listdir(SERVERS_ROOT_DIR) if os.path.isdir(os.path.join(SERVERS_ROOT_DIR, d))]
-                server_selector_dropdown.options = [ft.dropdown.Option(d) for d in server_dirs]
+                server_dirs = instance_registry.list_names(hidden=(trash.TRASH_DIR_NAME,))
+                options = []
+                for d in server_dirs:
+                    info = instance_registry.get(os.path.join(SERVERS_ROOT_DIR, d))
+                    label = " ".join(str(v) for v in (info.get("core_type"), info.get("game_version")) if v)
+                    options.append(ft.dropdown.Option(key=d, text=f"{d} ({label})" if label else d))
+                server_selector_dropdown.options = options
                 
                 current_selection = os.path.basename(selected_server_path.current) if selected_server_path.current else None
                 if current_selection and current_selection in server_dirs:
@@ -688,6 +1547,9 @@ def main(page: ft.Page):
                     [
                         ft.Column(
                             [
+                                ft.Row([console_level_dropdown, console_word_field, console_search_field, console_regex_checkbox],
+                                       spacing=10),
+                                console_filter_status,
                                 ft.Stack([
                                     ft.Container(
                                         content=console_output,
@@ -698,7 +1560,7 @@ def main(page: ft.Page):
                                     ),
                                     ft.IconButton(
                                         icon=ft.Icons.COPY_ALL_ROUNDED,
-                                        tooltip="复制全部输出",
+                                        tooltip="复制显示的输出",
                                         on_click=copy_console_output,
                                         right=10,
                                         top=10,
@@ -714,16 +1576,30 @@ def main(page: ft.Page):
                                     ft.Row([
                                         server_selector_dropdown,
                                         ft.IconButton(icon=ft.Icons.REFRESH_ROUNDED, on_click=update_server_list, tooltip="刷新列表"),
+                                        ft.IconButton(icon=ft.Icons.BOOKMARK_ADD_ROUNDED, on_click=open_save_template_dialog, tooltip="保存为模板"),
+                                        ft.IconButton(icon=ft.Icons.TUNE_ROUNDED, on_click=open_jvm_profile_dialog, tooltip="JVM 参数方案"),
+                                        ft.IconButton(icon=ft.Icons.TIMER_OUTLINED, on_click=open_boot_timeline_dialog, tooltip="启动分析"),
+                                        ft.IconButton(icon=ft.Icons.HISTORY_ROUNDED, on_click=open_console_history_dialog, tooltip="历史控制台"),
+                                        ft.IconButton(icon=ft.Icons.MEMORY_ROUNDED, on_click=open_resource_dialog, tooltip="资源限制"),
                                         delete_server_button,
                                     ]),
                                     server_status_text,
                                     player_count_text,
                                     ft.Row([start_button, stop_button, restart_button, configure_button], spacing=10),
+                                    trash_status_text,
+                                    trash_progress,
                                 ]),
                                 SettingsCard("性能监控", [
                                     cpu_text, cpu_progress,
                                     ram_text, ram_progress,
+                                    ft.Text("各核心占用", size=12),
+                                    per_core_row,
+                                    gc_text,
+                                    gc_warnings_column,
+                                    ft.Row([tps_text, mspt_text], spacing=20),
+                                    lag_spikes_column,
                                 ]),
+                                SettingsCard("实例状态", [instance_status_column]),
                             ],
                             expand=2,
                             spacing=10
@@ -758,6 +1634,12 @@ def main(page: ft.Page):
             ],
             expand=True
         )
+        api_base_override_field = ft.TextField(
+            label="API 覆盖地址 (测试用，如 http://127.0.0.1:8765)",
+            value=app_settings.get("api_base_override", ""),
+            hint_text="留空使用上方下载源",
+            expand=True,
+        )
         java_selection_dialog = ft.AlertDialog(modal=True)
 
         def color_option_clicked(e):
@@ -788,6 +1670,10 @@ def main(page: ft.Page):
             label="默认 JVM 参数",
             value=app_settings.get("jvm_args", "-Xmx1024M -Xms1024M")
         )
+        auto_restart_switch = ft.Switch(
+            label="服务器崩溃或无响应时自动重启",
+            value=app_settings.get("auto_restart", True),
+        )
         save_button = ft.FilledButton("保存设置", icon=ft.Icons.SAVE_ROUNDED)
         # --- Controls ---
         theme_dropdown = ft.Dropdown(
@@ -800,10 +1686,50 @@ def main(page: ft.Page):
             ]
         )
 
+        java_auto_match_switch = ft.Switch(
+            label="按服务器的游戏版本自动选择 Java",
+            value=app_settings.get("java_auto_match", True),
+        )
+        java_runtime_list = ft.ListView(spacing=2, height=300)
+        java_scan_status = ft.Text("", size=12, color=ft.Colors.GREY)
+
         # --- Handlers ---
+        def choose_java_runtime(e):
+            java_path_field.value = e.control.data
+            java_selection_dialog.open = False
+            page.update()
+
+        def scan_java_runtimes(refresh: bool):
+            java_scan_status.value = "正在扫描 Java 运行时..."
+            java_runtime_list.controls.clear()
+            page.update()
+            runtimes = java_catalog.discover(refresh=refresh)
+            java_runtime_list.controls = [
+                ft.ListTile(
+                    leading=ft.Icon(ft.Icons.COFFEE_ROUNDED),
+                    title=ft.Text(runtime.label),
+                    subtitle=ft.Text(runtime.path, size=12),
+                    data=runtime.path,
+                    on_click=choose_java_runtime,
+                )
+                for runtime in runtimes
+            ]
+            java_scan_status.value = f"找到 {len(runtimes)} 个 Java 运行时。" if runtimes else "未找到 Java 运行时，请手动填写路径。"
+            page.update()
+
+        java_selection_dialog.title = ft.Text("选择 Java 运行时")
+        java_selection_dialog.content = ft.Container(ft.Column([java_scan_status, java_runtime_list], tight=True), width=640)
+        java_selection_dialog.actions = [
+            ft.TextButton("重新扫描", icon=ft.Icons.REFRESH, on_click=lambda _: page.run_thread(scan_java_runtimes, True)),
+            ft.TextButton("关闭", on_click=lambda _: (setattr(java_selection_dialog, 'open', False), page.update())),
+        ]
+        java_selection_dialog.actions_alignment = ft.MainAxisAlignment.END
+        page.overlay.append(java_selection_dialog)
+
         def auto_detect_java(e):
             java_selection_dialog.open = True
             page.update()
+            page.run_thread(scan_java_runtimes, False)
 
         def save_app_settings(e):
             app_settings["theme"] = theme_dropdown.value or "system"
@@ -811,6 +1737,9 @@ def main(page: ft.Page):
             app_settings["java_path"] = java_path_field.value or ""
             app_settings["jvm_args"] = jvm_args_field.value or "-Xmx1024M -Xms1024M"
             app_settings["download_source"] = download_source_dropdown.value or "Official"
+            app_settings["auto_restart"] = bool(auto_restart_switch.value)
+            app_settings["java_auto_match"] = bool(java_auto_match_switch.value)
+            app_settings["api_base_override"] = (api_base_override_field.value or "").strip()
             save_settings()
             page.theme_mode = str_to_theme_mode(app_settings.get("theme", "system"))
             primary_color = app_settings.get("primary_color", ft.Colors.BLUE_GREY)
@@ -862,6 +1791,7 @@ def main(page: ft.Page):
                 except Exception as ex:
                     page.overlay.append(ft.SnackBar(ft.Text(f"重置失败: {ex}"), open=True))
                     page.update()
+        save_button.on_click = save_app_settings
         # 清理多余布局表达式，保留唯一 return
         # 修正结尾表达式，补全 return
         return ft.Column([
@@ -876,58 +1806,56 @@ def main(page: ft.Page):
                     java_path_field,
                     ft.FilledButton("自动检测", icon=ft.Icons.SEARCH, on_click=auto_detect_java)
                 ], alignment=ft.MainAxisAlignment.START),
+                java_auto_match_switch,
                 jvm_args_field
             ]),
             SettingsCard("网络设置", [
-                download_source_dropdown
+                download_source_dropdown,
+                api_base_override_field,
+            ]),
+            SettingsCard("守护", [
+                auto_restart_switch,
+                ft.Text(f"无输出 {server_watchdog.HANG_SILENCE_SECONDS:.0f} 秒且不响应命令时视为无响应；"
+                        f"{server_watchdog.CRASH_LOOP_WINDOW / 60:.0f} 分钟内崩溃 {server_watchdog.CRASH_LOOP_LIMIT} 次后停止自动重启。",
+                        size=12, color=ft.Colors.GREY),
             ]),
             save_button
         ], spacing=10, expand=True)
 
     def create_player_management_view():
-        # --- Helper for history players ---
-        def get_history_players_path():
-            if not selected_server_path.current: return None
-            return os.path.join(selected_server_path.current, "history-players.json")
-
-        def load_history_players():
-            path = get_history_players_path()
-            if not path or not os.path.exists(path): return []
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data if isinstance(data, list) else []
-            except Exception:
-                return []
-
-        def save_history_players(data):
-            path = get_history_players_path()
-            if not path: return
-            try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-            except Exception: pass
+        HISTORY_PAGE_SIZE = 50
+        SEARCH_DEBOUNCE_SECONDS = 0.25
 
         def create_history_players_tab():
-            search_field = ft.TextField(label="搜索玩家名/UUID", expand=True, on_change=None)
+            search_field = ft.TextField(label="搜索玩家名/UUID (前缀匹配)", expand=True, on_change=None)
             list_view = ft.ListView(expand=True, spacing=5)
+            page_text = ft.Text("", size=12, color=ft.Colors.GREY)
+            prev_page_button = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, tooltip="上一页", disabled=True)
+            next_page_button = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, tooltip="下一页", disabled=True)
+            page_offset = ft.Ref[int]()
+            page_offset.current = 0
+            debounce_timer = ft.Ref[Optional[threading.Timer]]()
 
             def build_list(filter_text=""):
                 list_view.controls.clear()
+                prev_page_button.disabled = True
+                next_page_button.disabled = True
+                page_text.value = ""
                 if not selected_server_path.current:
                     list_view.controls.append(ft.Text("请先在主页选择一个服务器实例。"))
                 else:
-                    data = load_history_players()
-                    if not data:
-                        list_view.controls.append(ft.Text("暂无历史玩家记录。"))
-                    # 搜索过滤
-                    filter_text = filter_text.strip().lower()
-                    for item in data:
+                    history_index = player_index.get_history_index(selected_server_path.current)
+                    total, results = history_index.search(filter_text or "", page_offset.current, HISTORY_PAGE_SIZE)
+                    if not total:
+                        list_view.controls.append(ft.Text("暂无历史玩家记录。" if not filter_text else "没有匹配的玩家。"))
+                    else:
+                        page_text.value = f"共 {total} 名玩家，显示第 {page_offset.current + 1}-{page_offset.current + len(results)} 名"
+                        prev_page_button.disabled = page_offset.current == 0
+                        next_page_button.disabled = page_offset.current + HISTORY_PAGE_SIZE >= total
+                    for item in results:
                         player_name = item.get("name", "未知玩家")
                         player_uuid = item.get("uuid", "未知UUID")
                         first_join = item.get("first_join", "-")
-                        if filter_text and filter_text not in player_name.lower() and filter_text not in player_uuid.lower():
-                            continue
                         avatar_url = f"https://api.mcim.me/avatar/{player_uuid}?size=32"
                         list_view.controls.append(
                             ft.ListTile(
@@ -940,47 +1868,37 @@ def main(page: ft.Page):
                 page.update()
 
             def on_search_change(e):
-                build_list(search_field.value)
+                # Only rebuild once typing pauses, instead of on every keystroke
+                if debounce_timer.current:
+                    debounce_timer.current.cancel()
+                def run_search():
+                    page_offset.current = 0
+                    build_list(search_field.value)
+                debounce_timer.current = threading.Timer(SEARCH_DEBOUNCE_SECONDS, run_search)
+                debounce_timer.current.daemon = True
+                debounce_timer.current.start()
             search_field.on_change = on_search_change
 
+            def change_page(delta):
+                page_offset.current = max(0, page_offset.current + delta * HISTORY_PAGE_SIZE)
+                build_list(search_field.value)
+            prev_page_button.on_click = lambda _: change_page(-1)
+            next_page_button.on_click = lambda _: change_page(1)
+
             tab_content = ft.Column([
                 ft.Text("历史玩家（所有进入过服务器的玩家）", style=ft.TextThemeStyle.TITLE_MEDIUM),
                 ft.Divider(),
                 search_field,
-                list_view
+                list_view,
+                ft.Row([page_text, prev_page_button, next_page_button], alignment=ft.MainAxisAlignment.END),
             ], expand=True)
             tab_content.data = lambda: build_list(search_field.value)
             return tab_content
         
-        # --- Helper Functions for JSON file-based lists (Banned, OP, Whitelist) ---
-        def get_json_list_path(list_type: str) -> Optional[str]:
+        # --- Helper for JSON file-based lists (Banned, OP, Whitelist) ---
+        def get_list_model(list_type: str) -> Optional[player_lists.PlayerListModel]:
             if not selected_server_path.current: return None
-            filename_map = {
-                "banned": "banned-players.json",
-                "ops": "ops.json",
-                "whitelist": "whitelist.json"
-            }
-            return os.path.join(selected_server_path.current, filename_map.get(list_type, ""))
-
-        def load_json_list(list_type: str) -> List[dict[str, Any]]:
-            path = get_json_list_path(list_type)
-            if not path or not os.path.exists(path): return []
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data if isinstance(data, list) else []
-            except (json.JSONDecodeError, IOError):
-                return []
-
-        def save_json_list(list_type: str, data: List[dict[str, Any]]):
-            path = get_json_list_path(list_type)
-            if not path: return
-            try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=4)
-            except IOError as e:
-                page.overlay.append(ft.SnackBar(ft.Text(f"保存文件失败: {e}"), open=True))
-                page.update()
+            return player_lists.get_list_model(selected_server_path.current, list_type)
 
         # --- Online Player Tab Content ---
         def create_online_players_tab():
@@ -988,21 +1906,29 @@ def main(page: ft.Page):
 
             def execute_player_command(command: str, player: str):
                 full_command = f"{command} {player}"
-                if server_process and server_process.stdin:
-                    try:
-                        server_process.stdin.write(full_command + "\n")
-                        server_process.stdin.flush()
-                        console_output.controls.append(create_console_text(f"> {full_command}", color=ft.Colors.CYAN))
-                        page.overlay.append(ft.SnackBar(ft.Text(f"命令 '{full_command}' 已发送。"), open=True))
-                    except Exception as ex:
-                        page.overlay.append(ft.SnackBar(ft.Text(f"命令发送失败: {ex}"), open=True))
-                else:
+                future = submit_command(full_command)
+                if future is None:
                     page.overlay.append(ft.SnackBar(ft.Text("服务器未运行或无法发送命令。"), open=True))
+                    page.update()
+                    return
+                append_console(f"> {full_command}", color=ft.Colors.CYAN)
                 page.update()
 
+                def on_response(f):
+                    if f.cancelled():
+                        page.overlay.append(ft.SnackBar(ft.Text(f"{full_command}: 命令已取消"), open=True))
+                    elif f.exception():
+                        page.overlay.append(ft.SnackBar(ft.Text(f"命令发送失败: {f.exception()}"), open=True))
+                    else:
+                        # Show what the server answered instead of assuming success
+                        response = " / ".join(line.split("]: ", 1)[-1] for line in f.result()[-2:])
+                        page.overlay.append(ft.SnackBar(ft.Text(f"{full_command}: {response or '已发送'}"), open=True))
+                    page.update()
+                future.add_done_callback(on_response)
+
             def build_online_player_list():
                 player_list_view.controls.clear()
-                if not server_process or server_process.poll() is not None:
+                if (not server_process or server_process.poll() is not None) and not is_remote_transport():
                     player_list_view.controls.append(ft.Text("服务器未运行。"))
                 elif not online_players.current:
                     player_list_view.controls.append(ft.Text("当前没有玩家在线。"))
@@ -1022,11 +1948,15 @@ def main(page: ft.Page):
                 page.update()
 
             def refresh_online_list(e=None):
-                if server_process and server_process.stdin:
-                    try:
-                        server_process.stdin.write("list\n")
-                        server_process.stdin.flush()
-                    except (IOError, AttributeError): pass
+                future = submit_command("list", command_dispatcher.PRIORITY_USER, expect=LIST_RESPONSE)
+                if future is not None:
+                    # Rebuild once the server has actually answered
+                    def on_list(f):
+                        if not f.cancelled() and not f.exception():
+                            for reply_line in f.result():
+                                apply_list_response(reply_line)
+                        build_online_player_list()
+                    future.add_done_callback(on_list)
                 build_online_player_list()
 
             online_tab_content = ft.Column([
@@ -1047,7 +1977,10 @@ def main(page: ft.Page):
                 if not selected_server_path.current:
                     list_view.controls.append(ft.Text("请先在主页选择一个服务器实例。"))
                 else:
-                    data = load_json_list(list_type)
+                    model = get_list_model(list_type)
+                    data = model.entries() if model else []
+                    if model and model.last_error:
+                        list_view.controls.append(ft.Text(f"保存文件失败: {model.last_error}", color=ft.Colors.RED))
                     if not data:
                         list_view.controls.append(ft.Text("列表为空。"))
                     for item in data:
@@ -1061,6 +1994,12 @@ def main(page: ft.Page):
                         )
                 page.update()
 
+            def make_entry(name: str, player_uuid: str) -> dict[str, Any]:
+                new_entry = {"uuid": player_uuid, "name": name}
+                if list_type == "banned":
+                    new_entry.update({"created": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S %z"), "source": "Server Panel", "expires": "forever", "reason": "Banned via Panel"})
+                return new_entry
+
             def add_player_thread(name: str):
                 page.overlay.append(ft.SnackBar(ft.Text(f"正在查找玩家 '{name}'..."), open=True, duration=4000))
                 page.update()
@@ -1076,19 +2015,18 @@ def main(page: ft.Page):
                 corrected_name = player_data["name"]
                 player_uuid = player_data["id"]
 
-                data = load_json_list(list_type)
-                if any(p.get("uuid", "").replace("-", "") == player_uuid for p in data):
+                model = get_list_model(list_type)
+                if model is None:
+                    add_player_button.disabled = False
+                    page.update()
+                    return
+                if model.contains(player_uuid):
                     page.overlay.append(ft.SnackBar(ft.Text(f"玩家 '{corrected_name}' 已在列表中。"), open=True))
                     add_player_button.disabled = False
                     page.update()
                     return
 
-                new_entry = {"uuid": player_uuid, "name": corrected_name}
-                if list_type == "banned":
-                    new_entry.update({"created": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S %z"), "source": "Server Panel", "expires": "forever", "reason": "Banned via Panel"})
-                
-                data.append(new_entry)
-                save_json_list(list_type, data)
+                model.add(make_entry(corrected_name, player_uuid))
                 add_player_textfield.value = ""
                 build_list()
                 page.overlay.append(ft.SnackBar(ft.Text(f"玩家 '{corrected_name}' 已添加。服务器可能需要重载才能生效。"), open=True))
@@ -1104,32 +2042,206 @@ def main(page: ft.Page):
             
             add_player_button.on_click = add_player_handler
 
+            # --- Bulk import ---
+            BULK_STATUS_LABELS = {
+                bulk_import.ADDED: ("已添加", ft.Colors.GREEN),
+                bulk_import.ALREADY_LISTED: ("已在列表中", ft.Colors.GREY),
+                bulk_import.NOT_FOUND: ("未找到", ft.Colors.ORANGE),
+                bulk_import.INVALID: ("名称无效", ft.Colors.ORANGE),
+                bulk_import.ERROR: ("出错", ft.Colors.RED),
+            }
+            bulk_dialog = ft.AlertDialog(modal=True)
+            bulk_textfield = ft.TextField(multiline=True, min_lines=8, max_lines=8, hint_text="每行一个玩家名，或粘贴 CSV / JSON (如其他服务器的 whitelist.json)")
+            bulk_progress = ft.ProgressBar(value=0, visible=False)
+            bulk_summary_text = ft.Text("")
+            bulk_report_view = ft.ListView(height=200, spacing=2)
+            bulk_start_button = ft.FilledButton("开始导入", icon=ft.Icons.UPLOAD_ROUNDED)
+
+            def on_bulk_file_picked(e: ft.FilePickerResultEvent):
+                if not e.files:
+                    return
+                try:
+                    with open(e.files[0].path, 'r', encoding='utf-8-sig') as f:
+                        bulk_textfield.value = f.read()
+                except Exception as ex:
+                    bulk_summary_text.value = f"读取文件失败: {ex}"
+                page.update()
+
+            bulk_file_picker = ft.FilePicker(on_result=on_bulk_file_picked)
+            page.overlay.append(bulk_file_picker)
+
+            def bulk_import_thread(text: str):
+                model = get_list_model(list_type)
+                try:
+                    items = bulk_import.parse_names(text)
+                except Exception as ex:
+                    bulk_summary_text.value = f"无法解析输入: {ex}"
+                    bulk_start_button.disabled = False
+                    page.update()
+                    return
+                if model is None or not items:
+                    bulk_summary_text.value = "没有可导入的玩家。" if model else "请先在主页选择一个服务器实例。"
+                    bulk_start_button.disabled = False
+                    page.update()
+                    return
+
+                def on_progress(done, total):
+                    bulk_progress.value = done / total if total else 1
+                    bulk_summary_text.value = f"正在解析 UUID... {done}/{total}"
+                    page.update()
+
+                bulk_progress.visible = True
+                bulk_summary_text.value = f"共 {len(items)} 个名称，正在解析 UUID..."
+                page.update()
+                report = bulk_import.import_players(items, model, make_entry, get_api_base_url('mojang_api'), headers=REQUESTS_HEADERS, progress=on_progress)
+
+                counts = {}
+                bulk_report_view.controls.clear()
+                for row in report:
+                    counts[row["status"]] = counts.get(row["status"], 0) + 1
+                    label, color = BULK_STATUS_LABELS[row["status"]]
+                    shown_name = row["name"] if row["name"] and row["name"] != row["input"] else ""
+                    detail = f" ({row['detail']})" if row["detail"] else ""
+                    bulk_report_view.controls.append(ft.Text(f"{row['input']} {('→ ' + shown_name) if shown_name else ''} — {label}{detail}", color=color, size=12))
+                bulk_summary_text.value = "导入完成: " + ", ".join(f"{BULK_STATUS_LABELS[k][0]} {v}" for k, v in counts.items())
+                bulk_progress.visible = False
+                bulk_start_button.disabled = False
+                build_list()
+
+            def on_bulk_start(e):
+                if not bulk_textfield.value:
+                    return
+                bulk_start_button.disabled = True
+                bulk_report_view.controls.clear()
+                page.update()
+                page.run_thread(bulk_import_thread, bulk_textfield.value)
+
+            def open_bulk_dialog(e):
+                bulk_summary_text.value = ""
+                bulk_report_view.controls.clear()
+                bulk_dialog.open = True
+                page.update()
+
+            bulk_start_button.on_click = on_bulk_start
+            bulk_dialog.title = ft.Text(f"批量导入到 {title}")
+            bulk_dialog.content = ft.Container(ft.Column([
+                bulk_textfield,
+                ft.TextButton("从 CSV/JSON 文件读取...", icon=ft.Icons.FILE_OPEN_ROUNDED, on_click=lambda _: bulk_file_picker.pick_files(allowed_extensions=["csv", "json", "txt"])),
+                bulk_progress,
+                bulk_summary_text,
+                bulk_report_view,
+            ], tight=True), width=600)
+            bulk_dialog.actions = [ft.TextButton("关闭", on_click=lambda _: (setattr(bulk_dialog, 'open', False), page.update())), bulk_start_button]
+            bulk_dialog.actions_alignment = ft.MainAxisAlignment.END
+            page.overlay.append(bulk_dialog)
+
             def remove_player(e):
                 player_uuid = e.control.data
-                data = load_json_list(list_type)
-                data = [p for p in data if p.get("uuid") != player_uuid]
-                save_json_list(list_type, data)
+                model = get_list_model(list_type)
+                if model:
+                    model.remove(player_uuid)
                 build_list()
                 page.overlay.append(ft.SnackBar(ft.Text("玩家已移除。服务器可能需要重载才能生效。"), open=True))
                 page.update()
 
             json_tab_content = ft.Column([
                 ft.Row([ft.Text(title, style=ft.TextThemeStyle.TITLE_MEDIUM), ft.IconButton(icon=ft.Icons.REFRESH, on_click=lambda e: build_list(), tooltip="从文件重新加载")]),
-                ft.Row([add_player_textfield, add_player_button]),
+                ft.Row([add_player_textfield, add_player_button, ft.IconButton(icon=ft.Icons.PLAYLIST_ADD_ROUNDED, tooltip="批量导入", on_click=open_bulk_dialog)]),
                 ft.Divider(),
                 list_view
             ], expand=True)
             json_tab_content.data = build_list
             return json_tab_content
 
+        def create_analytics_tab():
+            range_dropdown = ft.Dropdown(
+                label="时间范围",
+                value="14",
+                width=160,
+                options=[ft.dropdown.Option(key="7", text="最近 7 天"), ft.dropdown.Option(key="14", text="最近 14 天"), ft.dropdown.Option(key="30", text="最近 30 天")],
+            )
+            summary_text = ft.Text("")
+            retention_text = ft.Text("")
+            daily_peak_view = ft.Column(spacing=2)
+            hourly_profile_view = ft.Column(spacing=2)
+            playtime_view = ft.Column(spacing=2)
+
+            def format_duration(seconds: float) -> str:
+                hours, rem = divmod(int(seconds), 3600)
+                return f"{hours} 小时 {rem // 60} 分" if hours else f"{rem // 60} 分"
+
+            def bar_row(label: str, value: float, maximum: float, suffix: str):
+                return ft.Row([
+                    ft.Text(label, size=12, width=90),
+                    ft.ProgressBar(value=value / maximum if maximum else 0, expand=True),
+                    ft.Text(suffix, size=12, width=70),
+                ])
+
+            def build_analytics(e=None):
+                for column in (daily_peak_view, hourly_profile_view, playtime_view):
+                    column.controls.clear()
+                if not selected_server_path.current:
+                    summary_text.value = "请先在主页选择一个服务器实例。"
+                    retention_text.value = ""
+                    page.update()
+                    return
+                instance = os.path.basename(selected_server_path.current)
+                since = time.time() - int(range_dropdown.value) * 86400
+
+                summary = session_store.summary(instance)
+                summary_text.value = (f"玩家 {summary['players']} 人 · 会话 {summary['sessions']} 次 · "
+                                      f"总游戏时长 {format_duration(summary['playtime'])} · 历史最高同时在线 {summary['peak']}")
+                retention = session_store.retention(instance)
+                retention_text.value = "留存率: " + " · ".join(
+                    f"次{n}日 {retained / cohort:.0%} ({retained}/{cohort})" if cohort else f"次{n}日 -"
+                    for n, (retained, cohort) in retention.items()
+                )
+
+                daily = session_store.peak_by_day(instance, since)
+                daily_max = max((peak for _, peak in daily), default=0)
+                for day, peak in daily:
+                    daily_peak_view.controls.append(bar_row(day, peak, daily_max, f"{peak} 人"))
+                if not daily:
+                    daily_peak_view.controls.append(ft.Text("暂无数据", size=12))
+
+                profile = session_store.peak_by_hour_of_day(instance)
+                profile_max = max(profile)
+                for hour, avg in enumerate(profile):
+                    hourly_profile_view.controls.append(bar_row(f"{hour:02d}:00", avg, profile_max, f"{avg:.1f}"))
+
+                for player, seconds, count, _ in session_store.top_playtime(instance):
+                    playtime_view.controls.append(ft.Row([
+                        ft.Text(player, weight=ft.FontWeight.BOLD, expand=True),
+                        ft.Text(f"{format_duration(seconds)} · {count} 次", size=12),
+                    ]))
+                if not playtime_view.controls:
+                    playtime_view.controls.append(ft.Text("暂无数据", size=12))
+                page.update()
+
+            range_dropdown.on_change = build_analytics
+            analytics_tab = ft.Column([
+                ft.Row([ft.Text("玩家统计", style=ft.TextThemeStyle.TITLE_MEDIUM), range_dropdown, ft.IconButton(icon=ft.Icons.REFRESH, on_click=build_analytics, tooltip="刷新")]),
+                summary_text,
+                retention_text,
+                ft.Divider(),
+                ft.Row([
+                    ft.Column([ft.Text("每日最高同时在线", weight=ft.FontWeight.W_500), daily_peak_view], expand=1),
+                    ft.Column([ft.Text("各时段平均峰值", weight=ft.FontWeight.W_500), hourly_profile_view], expand=1),
+                    ft.Column([ft.Text("游戏时长排行", weight=ft.FontWeight.W_500), playtime_view], expand=1),
+                ], vertical_alignment=ft.CrossAxisAlignment.START),
+            ], expand=True, scroll=ft.ScrollMode.ADAPTIVE)
+            analytics_tab.data = build_analytics
+            return analytics_tab
+
         # --- Main View Construction ---
         online_tab = create_online_players_tab()
         banned_tab = create_json_list_tab("banned", "封禁列表 (banned-players.json)")
         ops_tab = create_json_list_tab("ops", "管理员 (ops.json)")
         whitelist_tab = create_json_list_tab("whitelist", "白名单 (whitelist.json)")
         history_tab = create_history_players_tab()
+        analytics_tab = create_analytics_tab()
 
-        all_tabs = [online_tab, banned_tab, ops_tab, whitelist_tab, history_tab]
+        all_tabs = [online_tab, banned_tab, ops_tab, whitelist_tab, history_tab, analytics_tab]
 
         def on_tab_change(e):
             selected_tab_content = all_tabs[e.control.selected_index]
@@ -1145,6 +2257,7 @@ def main(page: ft.Page):
                 ft.Tab(text="OP列表", content=ops_tab),
                 ft.Tab(text="白名单", content=whitelist_tab),
                 ft.Tab(text="历史玩家", content=history_tab),
+                ft.Tab(text="统计", content=analytics_tab),
             ],
             expand=True,
         )
@@ -1221,6 +2334,166 @@ def main(page: ft.Page):
                 page.overlay.append(ft.SnackBar(ft.Text(f"无法打开或读取文件: {e}"), open=True))
                 page.update()
 
+        world_dialog = ft.AlertDialog(modal=True)
+
+        def open_world_tools(server_dir):
+            report_column = ft.Column(spacing=5, scroll=ft.ScrollMode.ADAPTIVE, height=300)
+            status_text = ft.Text("正在分析区域文件...", italic=True)
+            rare_minutes_field = ft.TextField(label="常驻时间阈值 (分钟)", value="1", width=160, dense=True)
+            radius_field = ft.TextField(label="保留半径 (方块, 留空不限)", width=200, dense=True)
+            prune_progress = ft.ProgressBar(value=0, visible=False)
+            prune_button = ft.FilledButton("修剪区块", icon=ft.Icons.CONTENT_CUT_ROUNDED, style=ft.ButtonStyle(bgcolor=ft.Colors.RED_400))
+
+            def parse_threshold_ticks():
+                minutes = float(rare_minutes_field.value) if rare_minutes_field.value else 0
+                return int(minutes * 60 * anvil.TICKS_PER_SECOND)
+
+            def analyze_thread():
+                report_column.controls.clear()
+                try:
+                    reports = anvil.analyze_world(server_dir, rare_threshold=parse_threshold_ticks())
+                except Exception as ex:
+                    status_text.value = f"分析失败: {ex}"
+                    page.update()
+                    return
+                if not reports:
+                    status_text.value = "未找到任何世界 (level.dat)。"
+                    page.update()
+                    return
+                for r in reports:
+                    report_column.controls.append(ft.ListTile(
+                        leading=ft.Icon(ft.Icons.PUBLIC),
+                        title=ft.Text(r.name, weight=ft.FontWeight.BOLD),
+                        subtitle=ft.Text(
+                            f"区域文件: {len(r.files)}  区块: {r.total('chunks')}  占用扇区: {r.total('used_sectors')}/{r.total('file_sectors')}\n"
+                            f"碎片率: {r.fragmentation * 100:.1f}%  大小: {r.total('file_size') / (1024 * 1024):.1f} MB  "
+                            f"少访问区块: {r.total('rarely_visited')}" + (f"  无法解析: {r.total('unreadable')}" if r.total('unreadable') else ""),
+                            size=12
+                        )
+                    ))
+                status_text.value = "分析完成。"
+                page.update()
+
+            def prune_thread(min_inhabited, radius):
+                prune_button.disabled = True
+                # The server may have been started while the confirmation was open
+                reason = server_still_running()
+                if reason:
+                    prune_button.disabled = False
+                    status_text.value = reason
+                    page.update()
+                    return
+                prune_progress.visible = True
+                prune_progress.value = 0
+                status_text.value = "正在修剪区块..."
+                page.update()
+
+                def on_progress(done, total):
+                    prune_progress.value = done / total if total else 1
+                    page.update()
+
+                try:
+                    summary = anvil.prune_world(server_dir, min_inhabited=min_inhabited, radius=radius, progress=on_progress)
+                    page.overlay.append(ft.SnackBar(ft.Text(
+                        f"已移除 {summary['chunks_removed']} 个区块，释放 {summary['bytes_saved'] / (1024 * 1024):.1f} MB。"), open=True))
+                except Exception as ex:
+                    page.overlay.append(ft.SnackBar(ft.Text(f"修剪失败: {ex}"), open=True))
+                prune_button.disabled = False
+                prune_progress.visible = False
+                analyze_thread()
+
+            def server_still_running() -> Optional[str]:
+                """Why the world can't be pruned right now, or None if the server is stopped."""
+                if server_process is not None:
+                    return "服务器运行中，无法修剪世界。请先停止服务器。"
+                blocker = anvil.prune_blocker(server_dir, SERVERS_ROOT_DIR)
+                if blocker == anvil.WORLD_LOCKED:
+                    return "世界正被其他进程使用 (session.lock 被占用)，无法修剪。请先停止服务器。"
+                if blocker == anvil.SERVER_ONLINE:
+                    return "服务器在线 (可能由面板外部启动)，无法修剪世界。请先停止服务器。"
+                return None
+
+            def confirm_prune_thread(min_inhabited, radius):
+                prune_button.disabled = True
+                status_text.value = "正在检查服务器状态并估算修剪结果..."
+                page.update()
+                try:
+                    reason = server_still_running()
+                    estimate = None if reason else anvil.prune_world(server_dir, min_inhabited=min_inhabited, radius=radius, dry_run=True)
+                except Exception as ex:
+                    reason = f"估算失败: {ex}"
+                prune_button.disabled = False
+                if reason:
+                    status_text.value = reason
+                    page.overlay.append(ft.SnackBar(ft.Text(reason, bgcolor=ft.Colors.RED), open=True))
+                    page.update()
+                    return
+                if not estimate["chunks_removed"]:
+                    status_text.value = "没有符合条件的区块需要修剪。"
+                    page.update()
+                    return
+                status_text.value = "等待确认..."
+                confirm_dialog = ft.AlertDialog(modal=True)
+
+                def on_confirm(e_confirm):
+                    confirm_dialog.open = False
+                    page.update()
+                    page.run_thread(prune_thread, min_inhabited, radius)
+
+                def on_cancel(e_cancel):
+                    confirm_dialog.open = False
+                    status_text.value = "已取消修剪。"
+                    page.update()
+
+                confirm_dialog.title = ft.Text("确认修剪区块")
+                confirm_dialog.content = ft.Text(
+                    f"将从 {estimate['files']} 个区域文件中移除 {estimate['chunks_removed']} 个区块，"
+                    f"释放约 {estimate['bytes_saved'] / (1024 * 1024):.1f} MB。\n被移除的区块会在下次加载时重新生成，此操作无法撤销，建议先备份世界。")
+                confirm_dialog.actions = [
+                    ft.TextButton("取消", on_click=on_cancel),
+                    ft.FilledButton("确认修剪", on_click=on_confirm, style=ft.ButtonStyle(bgcolor=ft.Colors.RED)),
+                ]
+                confirm_dialog.actions_alignment = ft.MainAxisAlignment.END
+                page.overlay.append(confirm_dialog)
+                confirm_dialog.open = True
+                page.update()
+
+            def on_prune_click(e):
+                try:
+                    min_inhabited = parse_threshold_ticks() or None
+                    radius = int(radius_field.value) if radius_field.value else None
+                except ValueError:
+                    page.overlay.append(ft.SnackBar(ft.Text("请输入有效的数字。"), open=True))
+                    page.update()
+                    return
+                if min_inhabited is None and radius is None:
+                    page.overlay.append(ft.SnackBar(ft.Text("请至少设置一个修剪条件。"), open=True))
+                    page.update()
+                    return
+                page.run_thread(confirm_prune_thread, min_inhabited, radius)
+
+            def close_world_dialog(e):
+                world_dialog.open = False
+                page.update()
+
+            prune_button.on_click = on_prune_click
+            world_dialog.title = ft.Text(f"世界区域分析: {os.path.basename(server_dir)}")
+            world_dialog.content = ft.Container(ft.Column([
+                status_text,
+                report_column,
+                ft.Divider(),
+                ft.Text("修剪: 删除常驻时间低于阈值或超出半径的区块 (仅在服务器停止时可用)。", size=12, color=ft.Colors.GREY),
+                ft.Row([rare_minutes_field, radius_field, ft.IconButton(icon=ft.Icons.REFRESH, tooltip="重新分析", on_click=lambda _: page.run_thread(analyze_thread))]),
+                prune_progress,
+            ], tight=True), width=700)
+            world_dialog.actions = [ft.TextButton("关闭", on_click=close_world_dialog), prune_button]
+            world_dialog.actions_alignment = ft.MainAxisAlignment.END
+            if world_dialog not in page.overlay:
+                page.overlay.append(world_dialog)
+            world_dialog.open = True
+            page.update()
+            page.run_thread(analyze_thread)
+
         def show_item_details(item_path):
             file_details_view.controls.clear()
             is_dir = os.path.isdir(item_path)
@@ -1243,6 +2516,12 @@ def main(page: ft.Page):
                             tooltip="在本地文件浏览器中打开此文件夹"
                         ), margin=ft.margin.only(top=10)
                     ))
+                    if os.path.dirname(os.path.abspath(item_path)) == base_path:
+                        details_controls_list.append(ft.FilledButton(
+                            "世界区域分析", icon=ft.Icons.TERRAIN_ROUNDED,
+                            on_click=lambda _, p=item_path: open_world_tools(p),
+                            tooltip="分析 region/*.mca 文件并修剪无用区块"
+                        ))
                     details_controls_list.append(ft.Divider(height=20))
                     details_controls_list.append(ft.Text("内容预览:", weight=ft.FontWeight.BOLD))
                     try:
@@ -1315,6 +2594,8 @@ def main(page: ft.Page):
             try:
                 dirs, files = [], []
                 for item in os.listdir(path):
+                    if item.startswith('.') and os.path.abspath(path) == base_path:
+                        continue
                     (dirs if os.path.isdir(os.path.join(path, item)) else files).append(item)
                 
                 for item in sorted(dirs):
@@ -1411,20 +2692,24 @@ def main(page: ft.Page):
                 download_progress.value = None
                 page.update()
 
-                with requests.get(download_url, stream=True, timeout=300, headers=REQUESTS_HEADERS) as r:
+                with tracing.span("download.plugin", "net", file=filename), \
+                        requests.get(download_url, stream=True, timeout=300, headers=REQUESTS_HEADERS) as r:
                     r.raise_for_status()
                     total_size = int(r.headers.get('content-length', 0))
                     bytes_downloaded = 0
-                    with open(final_path, 'wb') as f:
+                    # Download beside the target and rename over it, so a jar hardlinked from a template is never modified in place
+                    with open(final_path + ".part", 'wb') as f:
                         for chunk in r.iter_content(chunk_size=8192):
                             f.write(chunk)
                             bytes_downloaded += len(chunk)
+                            tracing.count("download.bytes", len(chunk))
                             if total_size > 0:
                                 download_progress.value = bytes_downloaded / total_size
                                 page.update()
+                    os.replace(final_path + ".part", final_path)
                 
                 page.overlay.append(ft.SnackBar(ft.Text(f"插件 '{filename}' 下载成功!"), open=True))
-                completion_sound.play()
+                play_completion_sound()
                 update_installed_plugins_list()
             except Exception as ex:
                 page.overlay.append(ft.SnackBar(ft.Text(f"下载失败: {ex}"), open=True))
@@ -1702,7 +2987,7 @@ def main(page: ft.Page):
                 server_name_input.error_text = "名称不能为空"
                 page.update()
                 return
-            if any(c in s_name for c in r'<>:"/\|?*'):
+            if any(c in s_name for c in r'<>:"/\|?*') or s_name.startswith('.'):
                 server_name_input.error_text = "名称包含无效字符"
                 page.update()
                 return
@@ -1854,18 +3139,21 @@ def main(page: ft.Page):
                 download_progress.value = 0
                 update_status(f"开始下载 {jar_name}...", ft.Colors.BLUE, True)
                 try:
-                    with requests.get(url, stream=True, timeout=300, headers=REQUESTS_HEADERS) as r:
+                    with tracing.span("download.core", "net", file=jar_name), \
+                            requests.get(url, stream=True, timeout=300, headers=REQUESTS_HEADERS) as r:
                         r.raise_for_status()
                         total_size = int(r.headers.get('content-length', 0))
                         bytes_downloaded = 0
-                        with open(final_path, 'wb') as f:
+                        with open(final_path + ".part", 'wb') as f:
                             for chunk in r.iter_content(chunk_size=8192):
                                 f.write(chunk)
                                 bytes_downloaded += len(chunk)
+                                tracing.count("download.bytes", len(chunk))
                                 if total_size > 0:
                                     progress = bytes_downloaded / total_size
                                     download_progress.value = progress
                                     update_status(f"下载中... {bytes_downloaded // 1024} KB / {total_size // 1024} KB", ft.Colors.BLUE, True)
+                        os.replace(final_path + ".part", final_path)
                 except Exception as e:
                     update_status(f"下载失败: {type(e).__name__}: {e}", ft.Colors.RED)
                     download_button.disabled = False
@@ -1880,8 +3168,7 @@ def main(page: ft.Page):
                 except Exception as eula_e:
                     update_status(f"下载完成，但自动同意 EULA 失败: {eula_e}", ft.Colors.ORANGE)
                 try:
-                    if 'completion_sound' in globals():
-                        completion_sound.play()
+                    play_completion_sound()
                 except Exception:
                     pass
             except Exception as e:
@@ -1914,6 +3201,56 @@ def main(page: ft.Page):
         create_server_button.on_click = do_create_server
         download_button.on_click = start_download
 
+        template_dropdown = ft.Dropdown(label="选择模板", expand=True, options=[])
+        clone_name_input = ft.TextField(label="新服务器名称", expand=True)
+        clone_count_input = ft.TextField(label="数量", value="1", width=90)
+        clone_button = ft.FilledButton("从模板克隆", icon=ft.Icons.COPY_ALL_ROUNDED)
+        clone_status_text = ft.Text("", visible=False)
+
+        def refresh_templates(e=None):
+            template_dropdown.options = [
+                ft.dropdown.Option(key=t["path"], text=f"{t['name']} (来自 {t.get('source', '?')}{', 含世界' if t.get('include_world') else ''})")
+                for t in templates.list_templates(SERVERS_ROOT_DIR)
+            ]
+            page.update()
+
+        def clone_thread(template_dir, base_name, count):
+            def on_progress(done, total, name):
+                clone_status_text.value = f"正在克隆... {done}/{total} ({name})"
+                page.update()
+            try:
+                created = templates.clone_many(template_dir, SERVERS_ROOT_DIR, base_name, count, progress=on_progress)
+                clone_status_text.value = "已创建: " + ", ".join(f"{name} (端口 {port})" for name, port in created)
+                clone_status_text.color = ft.Colors.GREEN
+            except Exception as ex:
+                clone_status_text.value = f"克隆失败: {ex}"
+                clone_status_text.color = ft.Colors.RED
+            clone_button.disabled = False
+            page.update()
+
+        def on_clone_click(e):
+            base_name = (clone_name_input.value or "").strip()
+            clone_name_input.error_text = None
+            if not template_dropdown.value:
+                clone_name_input.error_text = "请先选择模板"
+            elif not base_name or base_name.startswith('.') or any(c in base_name for c in r'<>:"/\|?*'):
+                clone_name_input.error_text = "名称无效"
+            if clone_name_input.error_text:
+                page.update()
+                return
+            try:
+                count = max(1, int(clone_count_input.value or "1"))
+            except ValueError:
+                count = 1
+            clone_button.disabled = True
+            clone_status_text.value = "正在克隆..."
+            clone_status_text.color = ft.Colors.BLUE
+            clone_status_text.visible = True
+            page.update()
+            page.run_thread(clone_thread, template_dropdown.value, base_name, count)
+
+        clone_button.on_click = on_clone_click
+
         view = ft.Column([
             ft.Text("服务器核心下载", style=ft.TextThemeStyle.HEADLINE_SMALL),
             SettingsCard("1. 创建新服务器", [ft.Row([server_name_input, create_server_button], spacing=10), ft.Text("服务器文件将保存在 'servers/您输入的名字/' 文件夹中。")]),
@@ -1921,12 +3258,118 @@ def main(page: ft.Page):
             SettingsCard("3. 选择版本", [version_list_view]),
             SettingsCard("4. 选择构建号（如有）", [build_list_view]),
             SettingsCard("5. 下载", [download_button, download_status_text, download_progress]),
-        ], expand=True, spacing=10)
+            SettingsCard("或: 从模板快速克隆", [
+                ft.Row([template_dropdown, ft.IconButton(icon=ft.Icons.REFRESH, on_click=refresh_templates, tooltip="刷新模板列表")]),
+                ft.Row([clone_name_input, clone_count_input, clone_button], spacing=10),
+                clone_status_text,
+            ]),
+        ], expand=True, spacing=10, scroll=ft.ScrollMode.ADAPTIVE)
+        view.data = refresh_templates
+        return view
+
+    # The view on screen; set by init_navigation
+    current_view = ft.Ref[ft.Control]()
+
+    def create_tracing_view():
+        TOP_SPANS = 25
+        REFRESH_SECONDS = 1.0
+        TRACES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+
+        tracing_switch = ft.Switch(label="启用性能追踪", value=tracing.is_enabled())
+        tracing_status = ft.Text("", size=12, color=ft.Colors.GREY)
+        span_rows = ft.Column(spacing=6)
+        counter_rows = ft.Column(spacing=4)
+        refresher_running = False
+        refresher_lock = threading.Lock()
+
+        def refresh_summary(flush=None):
+            rows = tracing.summary(TOP_SPANS)
+            slowest = rows[0]["total_ms"] if rows else 0
+            span_rows.controls = [
+                ft.Row([
+                    ft.Text(row["name"], width=200, size=12, no_wrap=True, tooltip=f"{row['name']} ({row['category']})"),
+                    ft.ProgressBar(value=row["total_ms"] / slowest if slowest else 0, width=220),
+                    ft.Text(f"总计 {row['total_ms']:.1f} ms · {row['count']} 次 · 平均 {row['mean_ms']:.2f} ms · 最大 {row['max_ms']:.1f} ms",
+                            size=12),
+                ])
+                for row in rows
+            ] or [ft.Text("尚无记录。启用追踪后操作面板即可看到各操作的耗时。", color=ft.Colors.GREY)]
+            counter_rows.controls = [
+                ft.Text(f"{name}: {value:,.0f}", size=12, font_family="Roboto Mono")
+                for name, value in sorted(tracing.counters().items())
+            ]
+            total, buffered = tracing.recorded()
+            tracing_status.value = (f"{'追踪中' if tracing.is_enabled() else '已停止'} · 已记录 {total} 个事件，缓冲区保留最近 {buffered} 个"
+                                    f" (上限 {tracing.MAX_EVENTS})")
+            (flush or page.update)()
+
+        def refresh_while_enabled():
+            nonlocal refresher_running
+            while True:
+                with refresher_lock:
+                    if not tracing.is_enabled():
+                        refresher_running = False
+                        return
+                # Only while the page is on screen, and without showing up in the "page.update" span it reports
+                if current_view.current is view:
+                    refresh_summary(untraced_update)
+                time.sleep(REFRESH_SECONDS)
+
+        def start_refresher():
+            nonlocal refresher_running
+            # Claimed before the thread starts, so two callers can't both start one
+            with refresher_lock:
+                if refresher_running:
+                    return
+                refresher_running = True
+            page.run_thread(refresh_while_enabled)
+
+        def toggle_tracing(e):
+            if tracing_switch.value:
+                tracing.instrument_requests()
+                tracing.enable()
+                start_refresher()
+            else:
+                tracing.disable()
+                refresh_summary()
+
+        def export_trace(e):
+            path = os.path.join(TRACES_DIR, f"trace-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+            try:
+                written = tracing.export_chrome_trace(path)
+                message = f"已导出 {written} 个事件到: {path} (可在 ui.perfetto.dev 或 chrome://tracing 中打开)"
+            except (OSError, ValueError) as ex:
+                message = f"导出失败: {ex}"
+            page.overlay.append(ft.SnackBar(ft.Text(message), open=True))
+            page.update()
+
+        def reset_trace(e):
+            tracing.reset()
+            refresh_summary()
+
+        tracing_switch.on_change = toggle_tracing
+        view = ft.Column([
+            ft.Text("性能追踪", style=ft.TextThemeStyle.HEADLINE_SMALL),
+            SettingsCard("追踪", [
+                tracing_switch,
+                ft.Text(f"记录控制台处理、界面刷新、HTTP 请求、文件读写和下载的耗时。关闭时几乎没有开销；"
+                        f"也可以用环境变量 {tracing.TRACE_ENV} 在启动时开启。", size=12, color=ft.Colors.GREY),
+                tracing_status,
+                ft.Row([
+                    ft.FilledButton("导出 Chrome Trace", icon=ft.Icons.SAVE_ALT_ROUNDED, on_click=export_trace),
+                    ft.OutlinedButton("清空", icon=ft.Icons.DELETE_SWEEP_ROUNDED, on_click=reset_trace),
+                ], spacing=10),
+            ]),
+            SettingsCard("耗时最多的操作 (按总耗时)", [span_rows]),
+            SettingsCard("计数器", [counter_rows]),
+        ], expand=True, spacing=10, scroll=ft.ScrollMode.ADAPTIVE)
+        view.data = refresh_summary
+        if tracing.is_enabled():
+            start_refresher()
         return view
 
     # --- Page Navigation ---
     def init_navigation():
-        current_view = ft.Ref[ft.Control]()
         rail = ft.NavigationRail(
             selected_index=0,
             label_type=ft.NavigationRailLabelType.ALL,
@@ -1966,23 +3409,37 @@ def main(page: ft.Page):
                     selected_icon=ft.Icons.SETTINGS,
                     label="设置",
                 ),
+                ft.NavigationRailDestination(
+                    icon=ft.Icons.SPEED_ROUNDED,
+                    selected_icon=ft.Icons.SPEED,
+                    label="性能追踪",
+                ),
             ],
             on_change=lambda e: switch_view(e.control.selected_index)
         )
 
-        views = [
-            create_home_view(),
-            create_core_download_view(),
-            create_player_management_view(),
-            create_plugin_manager_view(),
-            create_file_manager_view(),
-            create_settings_view()
+        # Views are built the first time they are shown; only the home view is needed for the first frame
+        view_builders = [
+            create_home_view,
+            create_core_download_view,
+            create_player_management_view,
+            create_plugin_manager_view,
+            create_file_manager_view,
+            create_settings_view,
+            create_tracing_view,
         ]
-        current_view.current = views[0]
+        views: list[Optional[ft.Control]] = [None] * len(view_builders)
+
+        def get_view(index):
+            if views[index] is None:
+                views[index] = view_builders[index]()
+            return views[index]
+
+        current_view.current = get_view(0)
 
         def switch_view(index):
-            content.content = views[index]
-            current_view.current = views[index]
+            content.content = get_view(index)
+            current_view.current = content.content
             # If the view has a refresh method stored in its data property, call it
             if hasattr(current_view.current, 'data') and callable(current_view.current.data):
                 current_view.current.data()
@@ -2001,6 +3458,15 @@ def main(page: ft.Page):
         )
 
     init_navigation()
+    startup.first_frame()
+    # Finish deletions interrupted by a previous shutdown
+    trash_collector.resume()
+    console_trash.resume()
+    status_prober.start()
+    page.run_thread(warm_java_catalog)
+    if tracing.is_enabled():
+        # Started with MSL_TRACE: requests is only imported now, after the first frame
+        tracing.instrument_requests()
 
 if __name__ == "__main__":
     ft.app(target=main)
@@ -0,0 +1,146 @@
+"""
+In-memory search index over a server's history-players.json.
+
+Names and UUIDs are kept in sorted arrays so prefix lookups are a bisect plus
+a slice instead of a scan of every entry. The file is only re-read when it
+changes on disk, and players recorded on join are inserted incrementally.
+"""
+import bisect
+import datetime
+import json
+import os
+import threading
+from typing import Optional, Any
+
+import tracing
+
+HISTORY_FILE = "history-players.json"
+
+
+def _uuid_key(value: str) -> str:
+    return value.replace("-", "").lower()
+
+
+class HistoryPlayerIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._entries: list[dict[str, Any]] = []
+        self._by_uuid: dict[str, int] = {}
+        self._by_name: dict[str, int] = {}
+        self._names: list[tuple[str, int]] = []  # (lower name, entry index), sorted
+        self._uuids: list[tuple[str, int]] = []  # (uuid without dashes, entry index), sorted
+        self._signature: Optional[tuple[int, int]] = None
+
+    def _disk_signature(self) -> Optional[tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _rebuild(self, entries: list[dict[str, Any]]) -> None:
+        self._entries = []
+        self._by_uuid.clear()
+        self._by_name.clear()
+        for item in entries:
+            if isinstance(item, dict) and _uuid_key(item.get("uuid", "")) not in self._by_uuid:
+                self._index_entry(item, sort=False)
+        self._names.sort()
+        self._uuids.sort()
+
+    def _index_entry(self, item: dict[str, Any], sort: bool = True) -> None:
+        idx = len(self._entries)
+        self._entries.append(item)
+        name_key = item.get("name", "").lower()
+        uuid_key = _uuid_key(item.get("uuid", ""))
+        self._by_uuid[uuid_key] = idx
+        self._by_name[name_key] = idx
+        if sort:
+            bisect.insort(self._names, (name_key, idx))
+            bisect.insort(self._uuids, (uuid_key, idx))
+        else:
+            self._names.append((name_key, idx))
+            self._uuids.append((uuid_key, idx))
+
+    def refresh(self) -> None:
+        with self._lock:
+            signature = self._disk_signature()
+            if signature == self._signature:
+                return
+            with tracing.span("player_index.load", "io"):
+                data: list = []
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        loaded = json.load(f)
+                    data = loaded if isinstance(loaded, list) else []
+                except (OSError, ValueError):
+                    pass
+                self._names, self._uuids = [], []
+                self._rebuild(data)
+                self._signature = signature
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh()
+            return len(self._entries)
+
+    def has_name(self, name: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return name.lower() in self._by_name
+
+    @staticmethod
+    def _prefix_range(array: list[tuple[str, int]], prefix: str) -> list[int]:
+        start = bisect.bisect_left(array, (prefix,))
+        end = bisect.bisect_left(array, (prefix + "\uffff",))
+        return [idx for _, idx in array[start:end]]
+
+    def search(self, query: str, offset: int = 0, limit: int = 50) -> tuple[int, list[dict[str, Any]]]:
+        """Prefix search over names and UUIDs. Returns (total matches, one page of entries)."""
+        with self._lock:
+            self.refresh()
+            query = query.strip().lower()
+            if not query:
+                matches = list(range(len(self._entries)))
+            else:
+                found = self._prefix_range(self._names, query)
+                uuid_query = _uuid_key(query)
+                if uuid_query and all(c in "0123456789abcdef" for c in uuid_query):
+                    seen = set(found)
+                    found += [idx for idx in self._prefix_range(self._uuids, uuid_query) if idx not in seen]
+                matches = found
+            return len(matches), [self._entries[i] for i in matches[offset:offset + limit]]
+
+    def record_join(self, name: str, player_uuid: str) -> bool:
+        """Adds a player on first join and persists the file. Returns False if already known."""
+        with self._lock:
+            self.refresh()
+            if _uuid_key(player_uuid) in self._by_uuid:
+                return False
+            self._index_entry({
+                "name": name,
+                "uuid": player_uuid,
+                "first_join": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            })
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+                self._signature = self._disk_signature()
+            except OSError as e:
+                print(f"Error saving {self.path}: {e}")
+            return True
+
+
+_indexes: dict[str, HistoryPlayerIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_history_index(server_dir: str) -> HistoryPlayerIndex:
+    path = os.path.abspath(os.path.join(server_dir, HISTORY_FILE))
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = HistoryPlayerIndex(path)
+        return _indexes[path]
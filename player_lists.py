@@ -0,0 +1,202 @@
+"""
+Cached models for the server's JSON player lists (ops.json, whitelist.json, banned-players.json).
+
+Entries are held in memory indexed by UUID and the file is only re-read when its
+mtime/size change on disk. Edits are queued and flushed together shortly after
+the last change, using a temp file + rename so the server never sees a partial
+file. If the server rewrote the file in the meantime, pending edits are replayed
+on top of the fresh contents instead of clobbering them. A file that can't be
+parsed (typically caught mid-write) keeps the last good contents and is read
+again on the next refresh; only a missing file counts as an empty list.
+"""
+import atexit
+import json
+import os
+import threading
+from typing import Optional, Any
+
+import tracing
+
+LIST_FILES = {
+    "banned": "banned-players.json",
+    "ops": "ops.json",
+    "whitelist": "whitelist.json",
+}
+
+FLUSH_DELAY = 0.5  # seconds to wait for further edits before writing
+
+
+def normalize_uuid(value: Optional[str]) -> str:
+    """Lower-case UUID without dashes, used as the index key."""
+    return (value or "").replace("-", "").lower()
+
+
+def dashed_uuid(value: str) -> str:
+    """Formats a UUID the way the server stores it (8-4-4-4-12)."""
+    raw = normalize_uuid(value)
+    if len(raw) != 32:
+        return value
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+
+class PlayerListModel:
+    def __init__(self, path: str, flush_delay: float = FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._signature: Optional[tuple[int, int]] = None
+        self._pending: list[tuple[str, Any]] = []
+        self._timer: Optional[threading.Timer] = None
+        self.last_error: Optional[Exception] = None
+        self._read_error: Optional[Exception] = None
+
+    def _disk_signature(self) -> Optional[tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    @tracing.traced("player_lists.load", "io")
+    def _read_disk(self) -> Optional[dict[str, dict[str, Any]]]:
+        """The file's entries; {} if it doesn't exist, None if it can't be read or parsed right now."""
+        entries: dict[str, dict[str, Any]] = {}
+        self._read_error = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return entries
+        except (OSError, ValueError) as e:
+            self._read_error = e
+            return None
+        if isinstance(data, list):
+            for item in data:
+                if isinstance(item, dict):
+                    entries[normalize_uuid(item.get("uuid")) or item.get("name", "")] = item
+        return entries
+
+    def _apply(self, op: str, value: Any) -> None:
+        if op == "add":
+            self._entries[normalize_uuid(value.get("uuid"))] = value
+        elif op == "remove":
+            self._entries.pop(value, None)
+
+    def refresh(self) -> bool:
+        """Reloads from disk if the file changed since it was last read. Returns True if reloaded."""
+        with self._lock:
+            signature = self._disk_signature()
+            if signature == self._signature:
+                return False
+            entries = self._read_disk()
+            if entries is None:
+                # Keep the last good contents; the unchanged signature makes the next call retry
+                return False
+            self._entries = entries
+            for op, value in self._pending:
+                self._apply(op, value)
+            self._signature = signature
+            return True
+
+    def entries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            return list(self._entries.values())
+
+    def contains(self, player_uuid: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return normalize_uuid(player_uuid) in self._entries
+
+    def add(self, entry: dict[str, Any]) -> bool:
+        """Adds an entry unless its UUID is already listed. Returns False for duplicates."""
+        with self._lock:
+            self.refresh()
+            key = normalize_uuid(entry.get("uuid"))
+            if not key or key in self._entries:
+                return False
+            entry = {**entry, "uuid": dashed_uuid(entry["uuid"])}
+            self._pending.append(("add", entry))
+            self._apply("add", entry)
+            self._schedule_flush()
+            return True
+
+    def add_many(self, entries: list[dict[str, Any]]) -> list[bool]:
+        """Adds several entries under one lock and one write; returns per-entry success."""
+        with self._lock:
+            results = []
+            for entry in entries:
+                results.append(self.add(entry))
+            return results
+
+    def remove(self, player_uuid: str) -> bool:
+        with self._lock:
+            self.refresh()
+            key = normalize_uuid(player_uuid)
+            if key not in self._entries:
+                return False
+            self._pending.append(("remove", key))
+            self._apply("remove", key)
+            self._schedule_flush()
+            return True
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    @tracing.traced("player_lists.save", "io")
+    def flush(self) -> None:
+        """Writes pending edits now (atomically). Safe to call when nothing is pending."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            # Pick up anything the server wrote since our last read; pending ops are replayed on top
+            self.refresh()
+            if self._read_error is not None:
+                # Writing now would replace whatever the server is writing with our stale copy
+                self.last_error = self._read_error
+                print(f"Error reading {self.path}, saving later: {self._read_error}")
+                self._schedule_flush()
+                return
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(list(self._entries.values()), f, indent=4)
+                os.replace(tmp_path, self.path)
+                self._pending.clear()
+                self._signature = self._disk_signature()
+                self.last_error = None
+            except OSError as e:
+                self.last_error = e
+                print(f"Error saving {self.path}: {e}")
+
+
+_models: dict[str, PlayerListModel] = {}
+_models_lock = threading.Lock()
+
+
+def get_list_model(server_dir: str, list_type: str) -> PlayerListModel:
+    """Returns the shared model for one of a server's list files."""
+    path = os.path.abspath(os.path.join(server_dir, LIST_FILES[list_type]))
+    with _models_lock:
+        if path not in _models:
+            _models[path] = PlayerListModel(path)
+        return _models[path]
+
+
+def flush_all() -> None:
+    with _models_lock:
+        models = list(_models.values())
+    for model in models:
+        model.flush()
+
+
+# Don't lose edits still waiting for their debounce timer when the panel exits
+atexit.register(flush_all)
@@ -0,0 +1,259 @@
+"""
+Source RCON client with connection pooling, as an alternative to the stdin pipe.
+
+Works with any server that has enable-rcon=true in server.properties, including
+ones started outside the panel (systemd, tmux, a previous panel session).
+
+Packets are <int32 length><int32 id><int32 type><body>\\0\\0, little-endian.
+Minecraft splits long replies into several packets and handles requests on a
+connection strictly in order, so once the first packet of a command's reply
+has arrived we send a cheap marker packet of an unknown type: its "Unknown
+request" reply tells us the command's reply is complete. Requests are never
+pipelined: vanilla's RCON thread drops the connection when a packet arrives
+while it is still answering the previous one.
+"""
+import itertools
+import queue
+import socket
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, NamedTuple, Pattern, Union
+
+import server_properties
+
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_AUTH = 3
+TYPE_MARKER = 100  # any type the server doesn't know; it answers "Unknown request"
+
+MAX_PACKET_BODY = 1446  # Minecraft's limit for client -> server payloads
+DEFAULT_TIMEOUT = 5.0
+POOL_SIZE = 2
+
+
+class RconError(Exception):
+    pass
+
+
+class RconAuthError(RconError):
+    pass
+
+
+class RconConfig(NamedTuple):
+    host: str
+    port: int
+    password: str
+
+    @classmethod
+    def from_server_dir(cls, server_dir: str, host: str = "127.0.0.1") -> Optional["RconConfig"]:
+        """Reads enable-rcon / rcon.port / rcon.password; None if RCON is disabled or has no password."""
+        props = server_properties.read_properties(server_dir)
+        if props.get("enable-rcon", "false").lower() != "true" or not props.get("rcon.password"):
+            return None
+        try:
+            port = int(props.get("rcon.port") or server_properties.DEFAULT_RCON_PORT)
+        except ValueError:
+            return None
+        return cls(host, port, props["rcon.password"])
+
+
+class RconConnection:
+    def __init__(self, config: RconConfig, timeout: float = DEFAULT_TIMEOUT):
+        self.config = config
+        self._ids = itertools.count(1)
+        self._sock = socket.create_connection((config.host, config.port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._buffer = b""
+        self.broken = False
+        self._authenticate()
+
+    def close(self) -> None:
+        self.broken = True
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _encode(request_id: int, packet_type: int, body: str) -> bytes:
+        payload = struct.pack("<ii", request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+        return struct.pack("<i", len(payload)) + payload
+
+    def _recv_exact(self, n: int) -> bytes:
+        while len(self._buffer) < n:
+            chunk = self._sock.recv(max(4096, n - len(self._buffer)))
+            if not chunk:
+                raise RconError("Connection closed by server")
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+    def _read_packet(self) -> tuple[int, int, str]:
+        (length,) = struct.unpack("<i", self._recv_exact(4))
+        if length < 10 or length > 1 << 20:
+            raise RconError(f"Malformed packet length {length}")
+        data = self._recv_exact(length)
+        request_id, packet_type = struct.unpack_from("<ii", data)
+        return request_id, packet_type, data[8:-2].decode("utf-8", errors="replace")
+
+    def _authenticate(self) -> None:
+        auth_id = next(self._ids)
+        self._sock.sendall(self._encode(auth_id, TYPE_AUTH, self.config.password))
+        while True:
+            request_id, packet_type, _ = self._read_packet()
+            if request_id == -1:
+                self.close()
+                raise RconAuthError("RCON authentication failed (wrong rcon.password?)")
+            if request_id == auth_id and packet_type == TYPE_COMMAND:
+                return
+
+    def _read_reply(self, request_id: int) -> str:
+        while True:
+            reply_id, _, body = self._read_packet()
+            if reply_id == request_id:
+                return body
+
+    def _command(self, command: str) -> str:
+        command_id = next(self._ids)
+        self._sock.sendall(self._encode(command_id, TYPE_COMMAND, command))
+        parts = [self._read_reply(command_id)]
+        # The server has started answering, so the marker is only read once the reply is out
+        marker_id = next(self._ids)
+        self._sock.sendall(self._encode(marker_id, TYPE_MARKER, ""))
+        while True:
+            reply_id, _, body = self._read_packet()
+            if reply_id == marker_id:
+                return "".join(parts)
+            if reply_id == command_id:
+                parts.append(body)
+
+    def execute_many(self, commands: list[str], timeout: Optional[float] = None) -> list[str]:
+        """
+        Runs commands one after another and returns their replies in order.
+        `timeout` bounds each socket read (default: the connection's timeout);
+        on any error the connection is closed.
+        """
+        if self.broken:
+            raise RconError("Connection is closed")
+        for command in commands:
+            if len(command.encode("utf-8")) > MAX_PACKET_BODY:
+                raise RconError("Command too long for RCON")
+        previous = self._sock.gettimeout()
+        try:
+            if timeout is not None:
+                self._sock.settimeout(timeout)
+            replies = [self._command(command) for command in commands]
+            self._sock.settimeout(previous)
+            return replies
+        except (OSError, RconError, struct.error):
+            self.close()
+            raise
+
+    def execute(self, command: str, timeout: Optional[float] = None) -> str:
+        return self.execute_many([command], timeout)[0]
+
+
+class RconPool:
+    """A small pool of authenticated connections to one server."""
+
+    def __init__(self, config: RconConfig, size: int = POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        self.config = config
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[RconConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="rcon")
+        self._jobs: "queue.PriorityQueue[tuple[int, int, Future, str, float, bool]]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+
+    def _acquire(self) -> tuple[RconConnection, bool]:
+        """Returns (connection, reused_from_pool)."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RconError("Timed out waiting for a free RCON connection")
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not conn.broken:
+                return conn, True
+        try:
+            return RconConnection(self.config, self.timeout), False
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: RconConnection) -> None:
+        if not conn.broken:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def execute_many(self, commands: list[str], timeout: Optional[float] = None) -> list[str]:
+        while True:
+            conn, reused = self._acquire()
+            try:
+                return conn.execute_many(commands, timeout)
+            except (ConnectionError, RconError) as ex:
+                # An idle pooled connection may have been dropped by a server restart: retry on a fresh one
+                if not reused or isinstance(ex, RconAuthError):
+                    raise
+            finally:
+                self._release(conn)
+
+    def execute(self, command: str, timeout: Optional[float] = None) -> str:
+        return self.execute_many([command], timeout)[0]
+
+    def submit(self, command: str, priority: int = 0, expect: Union[str, Pattern, None] = None,
+               timeout: float = DEFAULT_TIMEOUT, wait_response: bool = True) -> Future:
+        """
+        Same contract as CommandDispatcher.submit: a Future resolving to the reply lines.
+
+        Queued commands run in priority order as connections free up. An RCON
+        reply is complete when it arrives, so there is nothing to wait for on
+        `expect`: the reply is returned whether or not it matches, as the
+        dispatcher does once its timeout runs out. `timeout` bounds the wait
+        for the reply (the Future fails with a socket timeout), and with
+        wait_response=False the reply is still read, to keep the connection
+        in step, but discarded.
+        """
+        future: Future = Future()
+        self._jobs.put((priority, next(self._seq), future, command, timeout, wait_response))
+        # Each worker task runs whichever queued command has the highest priority at that point
+        self._executor.submit(self._run_next)
+        return future
+
+    def _run_next(self) -> None:
+        _, _, future, command, timeout, wait_response = self._jobs.get_nowait()
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            lines = self.execute(command, timeout).splitlines()
+        except Exception as ex:
+            future.set_exception(ex)
+            return
+        future.set_result(lines if wait_response else [])
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools: dict[RconConfig, RconPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(server_dir: str) -> Optional[RconPool]:
+    """Returns the shared pool for a server directory, or None if RCON isn't enabled there."""
+    config = RconConfig.from_server_dir(server_dir)
+    if config is None:
+        return None
+    with _pools_lock:
+        if config not in _pools:
+            # rcon.password / rcon.port changed: drop pools for the old settings
+            for old in [c for c in _pools if (c.host, c.port) == (config.host, config.port)]:
+                _pools.pop(old).close()
+            _pools[config] = RconPool(config)
+        return _pools[config]
@@ -0,0 +1,233 @@
+"""
+Per-instance CPU affinity, priority and cgroup v2 limits.
+
+A ResourcePolicy is stored in the instance registry under "resources" and is
+applied when the server starts and again whenever it is edited while the
+server runs.
+
+Affinity and priority go through psutil. On Linux both are per thread, so they
+are applied to every thread of the JVM; threads it creates later inherit them
+from their parent thread. The policy is applied right after launch rather than
+in a preexec_fn, which isn't safe with the panel's other threads running; the
+JVM has only a handful of threads by then and apply() covers all of them.
+
+CPU and memory limits need cgroup v2. The panel doesn't assume it may write to
+/sys/fs/cgroup: the server is launched in its own transient systemd scope
+(systemd-run --scope, which execs in place, so the PID and pipes are the
+server's), and limits are changed at runtime with systemctl set-property.
+Unprivileged users get the user manager's delegated subtree.
+"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional, Any
+
+import startup
+
+# Only needed once a server is launched
+psutil = startup.lazy_import("psutil")
+
+AFFINITY_ALL = "all"
+AFFINITY_AUTO = "auto"  # an even share of the host's cores, split between all "auto" instances
+AFFINITY_MANUAL = "manual"
+
+PRIORITY_LOW = "low"
+PRIORITY_BELOW_NORMAL = "below_normal"
+PRIORITY_NORMAL = "normal"
+PRIORITY_ABOVE_NORMAL = "above_normal"
+PRIORITY_HIGH = "high"
+PRIORITIES = (PRIORITY_LOW, PRIORITY_BELOW_NORMAL, PRIORITY_NORMAL, PRIORITY_ABOVE_NORMAL, PRIORITY_HIGH)
+# Raising priority above normal needs root (POSIX) or administrator rights (Windows)
+_NICE = {PRIORITY_LOW: 15, PRIORITY_BELOW_NORMAL: 5, PRIORITY_NORMAL: 0, PRIORITY_ABOVE_NORMAL: -5, PRIORITY_HIGH: -10}
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+UNIT_PREFIX = "msl-"
+
+
+@dataclass
+class ResourcePolicy:
+    affinity: str = AFFINITY_ALL
+    cores: str = ""  # manual core list, e.g. "0-3,6"
+    priority: str = PRIORITY_NORMAL
+    cpu_quota_percent: Optional[int] = None  # 100 = one full core
+    memory_max_mb: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict[str, Any]]) -> "ResourcePolicy":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def needs_cgroup(self) -> bool:
+        return bool(self.cpu_quota_percent or self.memory_max_mb)
+
+
+def parse_cores(text: str, core_count: int) -> list[int]:
+    """"0-3,6" -> [0, 1, 2, 3, 6]; raises ValueError for malformed or out-of-range entries."""
+    cores: set[int] = set()
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        match = re.fullmatch(r"(\d+)(?:-(\d+))?", part)
+        if not match:
+            raise ValueError(f"无效的核心编号: {part}")
+        first, last = int(match.group(1)), int(match.group(2) or match.group(1))
+        if first > last or last >= core_count:
+            raise ValueError(f"核心范围超出本机 (0-{core_count - 1}): {part}")
+        cores.update(range(first, last + 1))
+    return sorted(cores)
+
+
+def format_cores(cores: list[int]) -> str:
+    ranges = []
+    for core in sorted(cores):
+        if ranges and core == ranges[-1][1] + 1:
+            ranges[-1][1] = core
+        else:
+            ranges.append([core, core])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def split_cores(core_count: int, index: int, count: int) -> list[int]:
+    """The index-th of `count` contiguous, near-equal blocks of cores (neighbouring cores tend to share caches)."""
+    count = max(1, min(count, core_count))
+    index = index % count
+    size, extra = divmod(core_count, count)
+    start = index * size + min(index, extra)
+    return list(range(start, start + size + (1 if index < extra else 0)))
+
+
+def resolve_cores(policy: ResourcePolicy, name: str, auto_names: list[str],
+                  core_count: Optional[int] = None) -> Optional[list[int]]:
+    """Cores this instance may run on, or None for no restriction."""
+    core_count = core_count or os.cpu_count() or 1
+    if policy.affinity == AFFINITY_MANUAL and policy.cores.strip():
+        return parse_cores(policy.cores, core_count)
+    if policy.affinity == AFFINITY_AUTO:
+        names = sorted(set(auto_names) | {name})
+        return split_cores(core_count, names.index(name), len(names))
+    return None
+
+
+def _thread_ids(process: "psutil.Process") -> list[int]:
+    if sys.platform.startswith("linux"):
+        try:
+            return [t.id for t in process.threads()]
+        except psutil.Error:
+            pass
+    return [process.pid]
+
+
+def apply(pid: int, cores: Optional[list[int]], priority: str) -> list[str]:
+    """Applies affinity and priority to a running server; returns human-readable problems."""
+    problems = []
+    try:
+        process = psutil.Process(pid)
+    except psutil.Error as e:
+        return [f"无法访问服务器进程: {e}"]
+    target = cores if cores is not None else list(range(os.cpu_count() or 1))
+    if hasattr(os, "sched_setaffinity"):
+        for tid in _thread_ids(process):
+            try:
+                os.sched_setaffinity(tid, target)
+            except ProcessLookupError:
+                continue  # thread exited meanwhile
+            except OSError as e:
+                problems.append(f"设置 CPU 亲和性失败: {e}")
+                break
+    elif hasattr(process, "cpu_affinity"):
+        try:
+            process.cpu_affinity(target)
+        except psutil.Error as e:
+            problems.append(f"设置 CPU 亲和性失败: {e}")
+    elif cores is not None:
+        problems.append("当前系统不支持设置 CPU 亲和性。")
+
+    try:
+        if sys.platform == "win32":
+            classes = {
+                PRIORITY_LOW: psutil.IDLE_PRIORITY_CLASS,
+                PRIORITY_BELOW_NORMAL: psutil.BELOW_NORMAL_PRIORITY_CLASS,
+                PRIORITY_NORMAL: psutil.NORMAL_PRIORITY_CLASS,
+                PRIORITY_ABOVE_NORMAL: psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+                PRIORITY_HIGH: psutil.HIGH_PRIORITY_CLASS,
+            }
+            process.nice(classes[priority])
+        else:
+            for tid in _thread_ids(process):
+                try:
+                    os.setpriority(os.PRIO_PROCESS, tid, _NICE[priority])
+                except ProcessLookupError:
+                    continue
+    except (OSError, psutil.Error):
+        problems.append("设置进程优先级失败 (提高优先级需要管理员/root 权限)。")
+    return problems
+
+
+def cgroup_support() -> Optional[str]:
+    """None if limits can be applied here, else why not."""
+    if not sys.platform.startswith("linux"):
+        return "CPU/内存限制仅支持 Linux (cgroup v2)。"
+    if not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+        return "系统未启用 cgroup v2。"
+    if not shutil.which("systemd-run") or not shutil.which("systemctl"):
+        return "未找到 systemd-run/systemctl。"
+    # A panel run from a service or a headless login may have no user manager to talk to
+    # (no XDG_RUNTIME_DIR / DBus session); systemd-run would then fail the whole launch
+    try:
+        result = subprocess.run(["systemctl", *_systemd_scope_args(), "show-environment"],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return "无法连接 systemd 服务管理器。"
+    if result.returncode != 0:
+        return "无法连接 systemd 服务管理器" + (" (用户会话)" if _systemd_scope_args() else "") + "。"
+    return None
+
+
+def _systemd_scope_args() -> list[str]:
+    return [] if os.geteuid() == 0 else ["--user"]
+
+
+def _properties(policy: ResourcePolicy) -> list[str]:
+    return [
+        f"CPUQuota={policy.cpu_quota_percent}%" if policy.cpu_quota_percent else "CPUQuota=",
+        f"MemoryMax={policy.memory_max_mb}M" if policy.memory_max_mb else "MemoryMax=infinity",
+    ]
+
+
+def unit_name(instance_name: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", instance_name)
+    return f"{UNIT_PREFIX}{safe}-{int(time.time())}.scope"
+
+
+def wrap_command(command: list[str], instance_name: str, policy: ResourcePolicy) -> tuple[list[str], Optional[str]]:
+    """Launches `command` in its own systemd scope when the policy has limits; returns (command, unit)."""
+    if not policy.needs_cgroup or cgroup_support():
+        return command, None
+    unit = unit_name(instance_name)
+    wrapper = ["systemd-run", *_systemd_scope_args(), "--scope", "--quiet", f"--unit={unit}"]
+    for prop in _properties(policy):
+        wrapper += ["-p", prop]
+    return wrapper + command, unit
+
+
+def set_limits(unit: str, policy: ResourcePolicy) -> Optional[str]:
+    """Changes a running scope's CPU/memory limits; returns an error message on failure."""
+    command = ["systemctl", *_systemd_scope_args(), "set-property", "--runtime", unit, *_properties(policy)]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return str(e)
+    if result.returncode != 0:
+        return result.stderr.strip() or f"systemctl 退出码 {result.returncode}"
+    return None
+
+
+def per_core_usage() -> list[float]:
+    """Host CPU usage per core since the previous call, in percent."""
+    return psutil.cpu_percent(percpu=True)
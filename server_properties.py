@@ -0,0 +1,57 @@
+"""
+Minimal reader/writer for server.properties that preserves comments and ordering.
+"""
+import os
+from typing import Optional
+
+PROPERTIES_FILE = "server.properties"
+DEFAULT_PORT = 25565
+DEFAULT_RCON_PORT = 25575
+
+
+def read_properties(server_dir: str) -> dict[str, str]:
+    properties: dict[str, str] = {}
+    path = os.path.join(server_dir, PROPERTIES_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and "=" in line:
+                    key, value = line.split("=", 1)
+                    properties[key.strip()] = value.strip()
+    except OSError:
+        pass
+    return properties
+
+
+def get_port(server_dir: str, key: str = "server-port", default: Optional[int] = DEFAULT_PORT) -> Optional[int]:
+    value = read_properties(server_dir).get(key)
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+def write_properties(server_dir: str, updates: dict[str, str]) -> None:
+    """Rewrites the given keys in place (appending missing ones) via a temp file + rename."""
+    path = os.path.join(server_dir, PROPERTIES_FILE)
+    lines: list[str] = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    remaining = dict(updates)
+    new_lines = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#") and "=" in stripped:
+            key = stripped.split("=", 1)[0].strip()
+            if key in remaining:
+                new_lines.append(f"{key}={remaining.pop(key)}\n")
+                continue
+        new_lines.append(line)
+    for key, value in remaining.items():
+        new_lines.append(f"{key}={value}\n")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(new_lines)
+    os.replace(tmp_path, path)
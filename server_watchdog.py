@@ -0,0 +1,195 @@
+"""
+Crash and hang watchdog for a server process.
+
+- classify_exit() tells a crash from a clean stop using the exit code, whether
+  the panel asked the server to stop, and the last lines it printed.
+- HangDetector flags a server that has gone silent and no longer answers a
+  liveness command, and records whether it was spinning (busy CPU) or stuck
+  (idle CPU, typically a deadlock).
+- capture_thread_dump() saves a `jcmd <pid> Thread.print` dump before a hung
+  server is killed.
+- RestartPolicy spaces automatic restarts with exponential backoff and gives up
+  when the server crashes too often within a window (a crash loop).
+"""
+import datetime
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import startup
+
+# Loaded by the first hang check
+psutil = startup.lazy_import("psutil")
+
+CLEAN = "clean"
+CRASH = "crash"
+HANG = "hang"
+
+HANG_SILENCE_SECONDS = 60.0  # only check liveness after this much console silence
+BUSY_CPU_PERCENT = 90.0  # per-core percent; above this a hung server is spinning
+THREAD_DUMP_TIMEOUT = 30
+LAST_LINES = 50
+
+BACKOFF_BASE_SECONDS = 5.0
+BACKOFF_MAX_SECONDS = 300.0
+CRASH_LOOP_LIMIT = 3  # crashes within CRASH_LOOP_WINDOW => stop restarting
+CRASH_LOOP_WINDOW = 600.0
+
+CRASH_MARKERS = (
+    "Exception in server tick loop",
+    "Encountered an unexpected exception",
+    "This crash report has been saved to",
+    "java.lang.OutOfMemoryError",
+    "Failed to start the minecraft server",
+    "A fatal error has been detected by the Java Runtime Environment",
+)
+CLEAN_MARKERS = (
+    "Stopping server",
+    "All dimensions are saved",
+    "Saving worlds",
+)
+# Paper/Spigot's own watchdog output
+HANG_MARKERS = (
+    "The server has stopped responding!",
+    "Server has not responded for",
+)
+
+
+@dataclass
+class ExitReport:
+    kind: str  # CLEAN | CRASH | HANG
+    returncode: Optional[int]
+    reason: str
+    last_lines: list[str] = field(default_factory=list)
+
+
+def classify_exit(returncode: Optional[int], last_lines: list[str], stop_requested: bool,
+                  hang_detected: bool = False) -> ExitReport:
+    lines = list(last_lines)
+    if hang_detected:
+        return ExitReport(HANG, returncode, "服务器无响应，已被强制结束", lines)
+    crash_line = next((l for l in reversed(lines) if any(m in l for m in CRASH_MARKERS + HANG_MARKERS)), None)
+    saw_shutdown = any(any(m in l for m in CLEAN_MARKERS) for l in lines)
+    if crash_line and not stop_requested:
+        return ExitReport(CRASH, returncode, crash_line, lines)
+    if returncode == 0 and (stop_requested or saw_shutdown):
+        return ExitReport(CLEAN, returncode, "正常停止", lines)
+    if stop_requested:
+        # terminate() after a failed "stop" exits with SIGTERM (-15 / 143); that was our doing
+        return ExitReport(CLEAN, returncode, f"已停止 (退出码 {returncode})", lines)
+    if returncode == 0:
+        return ExitReport(CRASH, returncode, "进程意外退出 (退出码 0，但未见正常关服日志)", lines)
+    return ExitReport(CRASH, returncode, crash_line or f"进程异常退出 (退出码 {returncode})", lines)
+
+
+@dataclass
+class HangReport:
+    silent_for: float
+    cpu_percent: float
+    state: str  # "busy" (spinning) | "idle" (deadlocked / blocked)
+
+
+class HangDetector:
+    def __init__(self, pid: int, silence_threshold: float = HANG_SILENCE_SECONDS):
+        self.pid = pid
+        self.silence_threshold = silence_threshold
+        self.last_output = time.monotonic()
+        self.last_lines: deque[str] = deque(maxlen=LAST_LINES)
+        self.reported_by_server = False
+        self.started = False  # commands aren't processed before "Done (...)! For help, type ..."
+
+    def feed_line(self, line: str) -> None:
+        self.last_output = time.monotonic()
+        self.last_lines.append(line)
+        if not self.started and "Done (" in line and "For help" in line:
+            self.started = True
+        if any(m in line for m in HANG_MARKERS):
+            self.reported_by_server = True
+
+    def check(self, probe: Callable[[], bool]) -> Optional[HangReport]:
+        """
+        Returns a HangReport if the server is hung. Silence alone is normal for an
+        idle server, so after `silence_threshold` seconds `probe()` is asked whether
+        the server still answers a command; only an unanswered probe counts as a
+        hang. Paper's own watchdog warning skips the wait and probes straight away,
+        since its thread dump keeps the console busy; a server that answers has
+        recovered and the warning is forgotten.
+        """
+        silent_for = time.monotonic() - self.last_output
+        if not self.started:
+            return None
+        if not self.reported_by_server and silent_for < self.silence_threshold:
+            return None
+        if probe():
+            self.reported_by_server = False
+            return None
+        try:
+            cpu = psutil.Process(self.pid).cpu_percent(interval=1.0)
+        except psutil.Error:
+            return None
+        return HangReport(silent_for, cpu, "busy" if cpu >= BUSY_CPU_PERCENT else "idle")
+
+
+def find_jcmd(java_executable: Optional[str]) -> Optional[str]:
+    """jcmd next to the java binary the server runs on, else from PATH."""
+    if java_executable:
+        java_path = shutil.which(java_executable) or java_executable
+        candidate = os.path.join(os.path.dirname(os.path.realpath(java_path)), "jcmd" + (".exe" if os.name == "nt" else ""))
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which("jcmd")
+
+
+def capture_thread_dump(pid: int, java_executable: Optional[str], server_dir: str) -> Optional[str]:
+    """Writes a thread dump to <server>/crash-reports/panel-threaddump-<time>.txt; returns its path."""
+    jcmd = find_jcmd(java_executable)
+    if not jcmd:
+        return None
+    try:
+        result = subprocess.run([jcmd, str(pid), "Thread.print", "-l"], capture_output=True, text=True,
+                                timeout=THREAD_DUMP_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+    out_dir = os.path.join(server_dir, "crash-reports")
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"panel-threaddump-{datetime.datetime.now().strftime('%Y-%m-%d_%H.%M.%S')}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(result.stdout)
+    return path
+
+
+class RestartPolicy:
+    def __init__(self, base_delay: float = BACKOFF_BASE_SECONDS, max_delay: float = BACKOFF_MAX_SECONDS,
+                 loop_limit: int = CRASH_LOOP_LIMIT, loop_window: float = CRASH_LOOP_WINDOW):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.loop_limit = loop_limit
+        self.loop_window = loop_window
+        self._crashes: deque[float] = deque()
+        self._consecutive = 0
+
+    def record_crash(self, now: Optional[float] = None) -> Optional[float]:
+        """Returns the delay before restarting, or None if this is a crash loop and restarts should stop."""
+        now = time.monotonic() if now is None else now
+        self._crashes.append(now)
+        while self._crashes and now - self._crashes[0] > self.loop_window:
+            self._crashes.popleft()
+        if len(self._crashes) >= self.loop_limit:
+            return None
+        delay = min(self.max_delay, self.base_delay * (2 ** self._consecutive))
+        self._consecutive += 1
+        return delay
+
+    def record_stable(self) -> None:
+        """Called once a restarted server has stayed up; the next crash starts from the base delay again."""
+        self._consecutive = 0
+
+    def reset(self) -> None:
+        self._crashes.clear()
+        self._consecutive = 0
@@ -0,0 +1,264 @@
+"""
+Player session analytics backed by SQLite.
+
+Every join/leave seen on a server console becomes a row in `sessions`. Queries
+never scan raw sessions: they read small rollup tables that are maintained as
+events arrive:
+
+- player_stats: first/last seen, total playtime and session count per player
+- active_days:  one row per (player, local date) the player was online
+- hourly_peak:  peak concurrent players per instance and hour
+
+so total playtime, peak concurrency by hour/day and day-N retention stay cheap
+however long the panel has been collecting.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import instances
+
+DB_FILE = "sessions.sqlite3"  # in the panel's state folder, with the instance registry
+HOUR = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    instance TEXT NOT NULL,
+    player TEXT NOT NULL,
+    joined_at REAL NOT NULL,
+    left_at REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_open ON sessions (instance, left_at);
+CREATE TABLE IF NOT EXISTS player_stats (
+    instance TEXT NOT NULL,
+    player TEXT NOT NULL,
+    first_day TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    playtime REAL NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (instance, player)
+);
+CREATE TABLE IF NOT EXISTS active_days (
+    instance TEXT NOT NULL,
+    player TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (instance, player, day)
+);
+CREATE TABLE IF NOT EXISTS hourly_peak (
+    instance TEXT NOT NULL,
+    hour REAL NOT NULL,
+    peak INTEGER NOT NULL,
+    PRIMARY KEY (instance, hour)
+);
+"""
+
+
+def _day(ts: float) -> str:
+    return datetime.date.fromtimestamp(ts).isoformat()
+
+
+def _hour(ts: float) -> float:
+    return ts - ts % HOUR
+
+
+class SessionStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        # Live concurrency per instance and the hour of its last change, for hourly_peak
+        self._online: dict[str, set[str]] = {}
+        self._last_hour: dict[str, float] = {}
+        self._recover()
+
+    def _recover(self) -> None:
+        """
+        Sessions still open from a previous run (panel or server crashed) have no
+        reliable end time; close them at their join time so they don't count as
+        online forever. Their join still counts for retention.
+        """
+        with self._lock, self._db:
+            self._db.execute("UPDATE sessions SET left_at = joined_at WHERE left_at IS NULL")
+
+    def _bump_peak(self, instance: str, ts: float, count: int) -> None:
+        hour = _hour(ts)
+        # Players stay online across hour boundaries without generating events
+        previous = self._last_hour.get(instance)
+        carried = len(self._online.get(instance, ()))
+        if previous is not None and carried:
+            h = previous + HOUR
+            while h < hour:
+                self._upsert_peak(instance, h, carried)
+                h += HOUR
+        self._last_hour[instance] = hour
+        self._upsert_peak(instance, hour, max(count, carried))
+
+    def _upsert_peak(self, instance: str, hour: float, count: int) -> None:
+        self._db.execute(
+            "INSERT INTO hourly_peak (instance, hour, peak) VALUES (?, ?, ?) "
+            "ON CONFLICT (instance, hour) DO UPDATE SET peak = MAX(peak, excluded.peak)",
+            (instance, hour, count),
+        )
+
+    def _mark_active(self, instance: str, player: str, start: float, end: float) -> None:
+        day = datetime.date.fromtimestamp(start)
+        last = datetime.date.fromtimestamp(end)
+        while day <= last:
+            self._db.execute("INSERT OR IGNORE INTO active_days VALUES (?, ?, ?)", (instance, player, day.isoformat()))
+            day += datetime.timedelta(days=1)
+
+    def record_join(self, instance: str, player: str, ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        with self._lock, self._db:
+            online = self._online.setdefault(instance, set())
+            if player in online:
+                return
+            self._bump_peak(instance, ts, len(online) + 1)
+            online.add(player)
+            self._db.execute("INSERT INTO sessions (instance, player, joined_at) VALUES (?, ?, ?)", (instance, player, ts))
+            self._db.execute(
+                "INSERT INTO player_stats (instance, player, first_day, first_seen, last_seen, sessions) "
+                "VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (instance, player) DO UPDATE SET last_seen = excluded.last_seen, sessions = sessions + 1",
+                (instance, player, _day(ts), ts, ts),
+            )
+            self._mark_active(instance, player, ts, ts)
+
+    def record_leave(self, instance: str, player: str, ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        with self._lock, self._db:
+            self._close(instance, player, ts)
+
+    def close_instance(self, instance: str, ts: Optional[float] = None) -> None:
+        """Ends every open session of an instance, e.g. when its server stops."""
+        ts = time.time() if ts is None else ts
+        with self._lock, self._db:
+            for player in list(self._online.get(instance, ())):
+                self._close(instance, player, ts)
+
+    def _close(self, instance: str, player: str, ts: float) -> None:
+        online = self._online.get(instance, set())
+        if player not in online:
+            return
+        self._bump_peak(instance, ts, len(online))
+        online.discard(player)
+        row = self._db.execute(
+            "SELECT id, joined_at FROM sessions WHERE instance = ? AND player = ? AND left_at IS NULL "
+            "ORDER BY joined_at DESC LIMIT 1",
+            (instance, player),
+        ).fetchone()
+        if row is None:
+            return
+        session_id, joined_at = row
+        duration = max(0.0, ts - joined_at)
+        self._db.execute("UPDATE sessions SET left_at = ? WHERE id = ?", (ts, session_id))
+        self._db.execute(
+            "UPDATE player_stats SET playtime = playtime + ?, last_seen = ? WHERE instance = ? AND player = ?",
+            (duration, ts, instance, player),
+        )
+        self._mark_active(instance, player, joined_at, ts)
+
+    # --- Queries (rollups only) ---
+
+    def online(self, instance: str) -> list[str]:
+        with self._lock:
+            return sorted(self._online.get(instance, ()))
+
+    def summary(self, instance: str) -> dict[str, float]:
+        with self._lock:
+            players, playtime, sessions = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(playtime), 0), COALESCE(SUM(sessions), 0) FROM player_stats WHERE instance = ?",
+                (instance,),
+            ).fetchone()
+            peak = self._db.execute("SELECT COALESCE(MAX(peak), 0) FROM hourly_peak WHERE instance = ?", (instance,)).fetchone()[0]
+        return {"players": players, "playtime": playtime, "sessions": sessions, "peak": peak}
+
+    def top_playtime(self, instance: str, limit: int = 20) -> list[tuple[str, float, int, float]]:
+        """[(player, seconds, sessions, last_seen)], including the running time of open sessions."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT player, playtime, sessions, last_seen FROM player_stats WHERE instance = ?", (instance,)
+            ).fetchall()
+            open_since = dict(self._db.execute(
+                "SELECT player, MAX(joined_at) FROM sessions WHERE instance = ? AND left_at IS NULL GROUP BY player",
+                (instance,),
+            ).fetchall())
+        result = [(p, t + (now - open_since[p] if p in open_since else 0), s, now if p in open_since else last)
+                  for p, t, s, last in rows]
+        result.sort(key=lambda r: r[1], reverse=True)
+        return result[:limit]
+
+    def peak_by_hour(self, instance: str, since: float) -> list[tuple[float, int]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT hour, peak FROM hourly_peak WHERE instance = ? AND hour >= ? ORDER BY hour",
+                (instance, _hour(since)),
+            ).fetchall()
+
+    def peak_by_day(self, instance: str, since: float) -> list[tuple[str, int]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT date(hour, 'unixepoch', 'localtime') AS day, MAX(peak) FROM hourly_peak "
+                "WHERE instance = ? AND hour >= ? GROUP BY day ORDER BY day",
+                (instance, _hour(since)),
+            ).fetchall()
+
+    def peak_by_hour_of_day(self, instance: str) -> list[float]:
+        """Average hourly peak for each hour of the day (0-23, local time), over hours with activity."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT CAST(strftime('%H', hour, 'unixepoch', 'localtime') AS INTEGER) AS h, AVG(peak) "
+                "FROM hourly_peak WHERE instance = ? GROUP BY h",
+                (instance,),
+            ).fetchall()
+        profile = [0.0] * 24
+        for h, avg in rows:
+            profile[h] = avg
+        return profile
+
+    def retention(self, instance: str, days: tuple[int, ...] = (1, 7, 30)) -> dict[int, tuple[int, int]]:
+        """
+        Classic day-N retention: of the players first seen on day D (for every D at
+        least N days ago), how many were online again on day D+N.
+        Returns {N: (retained, cohort size)}.
+        """
+        today = datetime.date.today().isoformat()
+        result = {}
+        with self._lock:
+            for n in days:
+                offset = f"+{int(n)} days"
+                cohort, retained = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(EXISTS (SELECT 1 FROM active_days a WHERE a.instance = s.instance "
+                    "AND a.player = s.player AND a.day = date(s.first_day, ?))), 0) "
+                    "FROM player_stats s WHERE s.instance = ? AND date(s.first_day, ?) <= ?",
+                    (offset, instance, offset, today),
+                ).fetchone()
+                result[n] = (retained, cohort)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_stores: dict[str, SessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_store(servers_root: str) -> SessionStore:
+    """One shared store per servers root, kept in <root>/.panel/sessions.sqlite3 (and its -wal/-shm files)."""
+    path = os.path.abspath(os.path.join(servers_root, instances.REGISTRY_DIR, DB_FILE))
+    with _stores_lock:
+        if path not in _stores:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _stores[path] = SessionStore(path)
+        return _stores[path]
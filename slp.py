@@ -0,0 +1,251 @@
+"""
+Asynchronous Server List Ping (SLP) prober.
+
+Queries every instance's server-port concurrently with the same handshake a
+Minecraft client uses on the multiplayer screen, which works even for servers
+whose console the panel doesn't own. Each probe records online/max players,
+the player sample, MOTD, protocol version and round-trip latency.
+"""
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Any
+
+import server_properties
+from timeseries import SeriesStore
+
+HANDSHAKE_PROTOCOL = -1  # "any": servers answer status requests regardless
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_INTERVAL = 15.0
+
+
+@dataclass
+class ServerStatus:
+    online: bool
+    timestamp: float = field(default_factory=time.time)
+    players_online: int = 0
+    players_max: int = 0
+    sample: list[str] = field(default_factory=list)
+    motd: str = ""
+    version: str = ""
+    protocol: Optional[int] = None
+    latency_ms: Optional[float] = None
+    error: str = ""
+
+
+def _encode_varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+async def _read_varint(reader: asyncio.StreamReader) -> int:
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result - (1 << 32) if result & (1 << 31) else result
+    raise ValueError("VarInt too long")
+
+
+def _packet(packet_id: int, payload: bytes = b"") -> bytes:
+    body = _encode_varint(packet_id) + payload
+    return _encode_varint(len(body)) + body
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return _encode_varint(len(data)) + data
+
+
+def flatten_motd(description: Any) -> str:
+    """Turns a chat component (string, dict with text/extra, or list) into plain text."""
+    if isinstance(description, str):
+        text = description
+    elif isinstance(description, list):
+        text = "".join(flatten_motd(part) for part in description)
+    elif isinstance(description, dict):
+        extra = description.get("extra")
+        text = flatten_motd(description.get("text")) + (flatten_motd(extra) if isinstance(extra, list) else "")
+    else:
+        text = ""
+    # Strip legacy § formatting codes
+    out, skip = [], False
+    for ch in text:
+        if skip:
+            skip = False
+        elif ch == "§":
+            skip = True
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _as_int(value: Any, default: Optional[int] = 0) -> Optional[int]:
+    """Status JSON is written by every kind of server and proxy plugin: null, "12" or 1.5 all happen."""
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+async def ping(host: str, port: int, timeout: float = DEFAULT_TIMEOUT) -> ServerStatus:
+    """Performs one status handshake + ping/pong against host:port."""
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        handshake = _encode_varint(HANDSHAKE_PROTOCOL) + _string(host) + struct.pack(">H", port) + _encode_varint(1)
+        writer.write(_packet(0x00, handshake) + _packet(0x00))
+        await writer.drain()
+
+        async def read_status() -> dict:
+            await _read_varint(reader)  # packet length
+            if await _read_varint(reader) != 0x00:
+                raise ValueError("Unexpected status packet")
+            length = await _read_varint(reader)
+            status = json.loads((await reader.readexactly(length)).decode("utf-8"))
+            if not isinstance(status, dict):
+                raise ValueError("Status is not a JSON object")
+            return status
+
+        data = await asyncio.wait_for(read_status(), timeout)
+
+        sent_at = time.perf_counter()
+        writer.write(_packet(0x01, struct.pack(">q", int(sent_at * 1000))))
+        await writer.drain()
+
+        async def read_pong() -> None:
+            await _read_varint(reader)
+            await _read_varint(reader)
+            await reader.readexactly(8)
+
+        latency = None
+        try:
+            await asyncio.wait_for(read_pong(), timeout)
+            latency = (time.perf_counter() - sent_at) * 1000
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass  # some proxies close right after the status reply
+
+        players = data.get("players")
+        players = players if isinstance(players, dict) else {}
+        version = data.get("version")
+        version = version if isinstance(version, dict) else {}
+        sample = players.get("sample")
+        return ServerStatus(
+            online=True,
+            players_online=_as_int(players.get("online")),
+            players_max=_as_int(players.get("max")),
+            sample=[str(p.get("name") or "") for p in sample if isinstance(p, dict)] if isinstance(sample, list) else [],
+            motd=flatten_motd(data.get("description")),
+            version=str(version.get("name") or ""),
+            protocol=_as_int(version.get("protocol"), None),
+            latency_ms=latency,
+        )
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as ex:
+        return ServerStatus(online=False, error=f"{type(ex).__name__}: {ex}" if str(ex) else type(ex).__name__)
+    finally:
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+
+
+async def probe_all(targets: dict[str, tuple[str, int]], timeout: float = DEFAULT_TIMEOUT) -> dict[str, ServerStatus]:
+    names = list(targets)
+    results = await asyncio.gather(*(ping(*targets[name], timeout=timeout) for name in names), return_exceptions=True)
+    # One misbehaving server must not cost the whole round
+    return {name: ServerStatus(online=False, error=f"{type(result).__name__}: {result}") if isinstance(result, BaseException) else result
+            for name, result in zip(names, results)}
+
+
+def instance_targets(servers_root: str, names: list[str]) -> dict[str, tuple[str, int]]:
+    targets = {}
+    for name in names:
+        server_dir = os.path.join(servers_root, name)
+        props = server_properties.read_properties(server_dir)
+        host = props.get("server-ip") or "127.0.0.1"
+        port = server_properties.get_port(server_dir)
+        if port:
+            targets[name] = (host, port)
+    return targets
+
+
+def probe_instance(servers_root: str, name: str, timeout: float = DEFAULT_TIMEOUT) -> Optional[ServerStatus]:
+    """Pings one instance right away (blocking); None if it has no server-port to ping."""
+    targets = instance_targets(servers_root, [name])
+    if not targets:
+        return None
+    return asyncio.run(probe_all(targets, timeout))[name]
+
+
+class StatusProber:
+    """Background thread that pings all instances every `interval` seconds and records time series."""
+
+    def __init__(self, servers_root: str, list_names: Callable[[], list[str]],
+                 on_update: Optional[Callable[[dict[str, ServerStatus]], None]] = None,
+                 interval: float = DEFAULT_INTERVAL, timeout: float = DEFAULT_TIMEOUT):
+        self.servers_root = servers_root
+        self.list_names = list_names
+        self.on_update = on_update
+        self.interval = interval
+        self.timeout = timeout
+        self.series = SeriesStore()
+        self.latest: dict[str, ServerStatus] = {}
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+
+    def probe_now(self) -> None:
+        self._wake.set()
+
+    def _record(self, results: dict[str, ServerStatus]) -> None:
+        for name, status in results.items():
+            self.latest[name] = status
+            self.series.get(name, "online").append(1 if status.online else 0, status.timestamp)
+            if status.online:
+                self.series.get(name, "players").append(status.players_online, status.timestamp)
+                self.series.get(name, "players_max").append(status.players_max, status.timestamp)
+                self.series.get(name, "sample").append(list(status.sample), status.timestamp)
+                self.series.get(name, "motd").append(status.motd, status.timestamp)
+                self.series.get(name, "protocol").append(status.protocol, status.timestamp)
+                self.series.get(name, "latency_ms").append(status.latency_ms, status.timestamp)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            while not self._stopped:
+                try:
+                    targets = instance_targets(self.servers_root, self.list_names())
+                    results = loop.run_until_complete(probe_all(targets, self.timeout))
+                    self._record(results)
+                    if self.on_update:
+                        self.on_update(results)
+                except Exception as e:
+                    print(f"Status probe error: {e}")
+                self._wake.wait(self.interval)
+                self._wake.clear()
+        finally:
+            loop.close()
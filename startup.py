@@ -0,0 +1,59 @@
+"""
+Startup-time helpers: lazy imports and a tiny phase timer.
+
+lazy_import() returns a module object whose code only runs on first attribute
+access (importlib's LazyLoader), so heavy dependencies that are only needed
+for downloads or rarely used tools don't delay the first frame.
+
+mark() records named startup phases relative to process start. When the
+MSL_STARTUP_BENCH environment variable is set, first_frame() prints the
+phases as one JSON line and exits; benchmarks/startup_bench.py drives that.
+"""
+import importlib.util
+import json
+import os
+import sys
+import time
+from types import ModuleType
+
+BENCH_ENV = "MSL_STARTUP_BENCH"
+BENCH_PREFIX = "STARTUP_BENCH "
+
+_t0 = time.perf_counter()
+_marks: list[tuple[str, float]] = []
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Imports `name` lazily. Raises ImportError right away if the module isn't installed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def mark(label: str) -> float:
+    """Records a startup phase; returns seconds since this module was first imported."""
+    elapsed = time.perf_counter() - _t0
+    _marks.append((label, elapsed))
+    return elapsed
+
+
+def marks() -> list[tuple[str, float]]:
+    return list(_marks)
+
+
+def first_frame() -> float:
+    """Called once the first view is on screen."""
+    elapsed = mark("first_frame")
+    if os.environ.get(BENCH_ENV):
+        sys.stdout.write(BENCH_PREFIX + json.dumps({"marks": _marks}) + "\n")
+        sys.stdout.flush()
+        os._exit(0)
+    return elapsed
@@ -0,0 +1,237 @@
+"""
+Server templates: snapshot an instance once, then clone it into new instances quickly.
+
+Snapshots are real copies (or reflinks where the filesystem supports them) so the
+template never changes when the source server keeps running. Clones share data
+with the template as cheaply as is safe:
+
+* files the server never rewrites in place (jars, libraries/, versions/) are hardlinked;
+* everything else is reflinked (copy-on-write on btrfs/XFS) or, failing that, copied.
+
+Hardlinking mutable files such as region files or plugin configs would let one
+clone's writes leak into the template and every sibling, so that is never done.
+"""
+import json
+import os
+import shutil
+import socket
+import time
+from typing import Callable, Optional
+
+import server_properties
+
+TEMPLATES_DIR_NAME = ".templates"
+TEMPLATE_META_FILE = "template.json"
+
+# Never worth snapshotting: runtime state and logs
+EXCLUDED_NAMES = {"logs", "crash-reports", "session.lock", "history-players.json", "cache", ".console", "debug", ".cds", ".boots.jsonl"}
+IMMUTABLE_DIRS = {"libraries", "versions", "bundler"}
+
+_FICLONE = 0x40049409  # Linux ioctl: clone an entire file (btrfs, XFS, bcachefs)
+
+
+def templates_root(servers_root: str) -> str:
+    return os.path.join(servers_root, TEMPLATES_DIR_NAME)
+
+
+def list_templates(servers_root: str) -> list[dict]:
+    root = templates_root(servers_root)
+    result = []
+    if not os.path.isdir(root):
+        return result
+    for name in sorted(os.listdir(root)):
+        if name.startswith("."):
+            continue  # a snapshot still being written
+        meta_path = os.path.join(root, name, TEMPLATE_META_FILE)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta["name"] = name
+        meta["path"] = os.path.join(root, name)
+        result.append(meta)
+    return result
+
+
+def _staging_path(target: str) -> str:
+    """Hidden sibling a copy is built in: listings skip dot-names, so a half-written one never shows up."""
+    parent, name = os.path.split(os.path.normpath(target))
+    return os.path.join(parent, f".{name}.partial")
+
+
+def _is_world_dir(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, "level.dat"))
+
+
+def _is_immutable(rel_path: str) -> bool:
+    parts = rel_path.replace(os.sep, "/").split("/")
+    return parts[-1].endswith(".jar") or parts[0] in IMMUTABLE_DIRS
+
+
+def _reflink(src: str, dst: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def _copy_file(src: str, dst: str, allow_hardlink: bool) -> str:
+    """Places src at dst as cheaply as allowed; returns 'link', 'reflink' or 'copy'."""
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return "link"
+        except OSError:
+            pass
+    if _reflink(src, dst):
+        return "reflink"
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def _walk_files(root: str, skip_top: Callable[[str], bool]):
+    for dirpath, dirs, files in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        if rel_dir == ".":
+            dirs[:] = [d for d in dirs if not skip_top(d)]
+            files = [f for f in files if not skip_top(f)]
+        yield dirpath, rel_dir, dirs, files
+
+
+def create_template(instance_dir: str, servers_root: str, name: str, include_world: bool = False) -> dict:
+    """Snapshots an instance into servers/.templates/<name>. Returns the template metadata."""
+    target = os.path.join(templates_root(servers_root), name)
+    if os.path.exists(target):
+        raise FileExistsError(f"Template '{name}' already exists")
+
+    def skip_top(entry: str) -> bool:
+        if entry in EXCLUDED_NAMES:
+            return True
+        return not include_world and _is_world_dir(os.path.join(instance_dir, entry))
+
+    staging = _staging_path(target)
+    shutil.rmtree(staging, ignore_errors=True)
+    file_count = 0
+    try:
+        for dirpath, rel_dir, _, files in _walk_files(instance_dir, skip_top):
+            out_dir = os.path.normpath(os.path.join(staging, rel_dir))
+            os.makedirs(out_dir, exist_ok=True)
+            for f in files:
+                # The template must not follow later changes of the source, so never hardlink here
+                _copy_file(os.path.join(dirpath, f), os.path.join(out_dir, f), allow_hardlink=False)
+                file_count += 1
+        meta = {
+            "source": os.path.basename(os.path.normpath(instance_dir)),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "include_world": include_world,
+            "files": file_count,
+        }
+        with open(os.path.join(staging, TEMPLATE_META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return meta
+
+
+def used_ports(servers_root: str) -> set[int]:
+    """Every server, RCON and query port configured by an instance under servers_root."""
+    ports = set()
+    for entry in os.listdir(servers_root):
+        path = os.path.join(servers_root, entry)
+        if not entry.startswith(".") and os.path.isdir(path):
+            ports.add(server_properties.get_port(path))
+            for key in ("rcon.port", "query.port"):
+                port = server_properties.get_port(path, key, default=None)
+                if port:
+                    ports.add(port)
+    return ports
+
+
+def _port_is_free(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("0.0.0.0", port))
+            return True
+        except OSError:
+            return False
+
+
+def allocate_port(servers_root: str, start: int = server_properties.DEFAULT_PORT, taken: Optional[set[int]] = None) -> int:
+    """Lowest port >= start not used by another instance nor bound on this host."""
+    taken = used_ports(servers_root) | (taken or set())
+    port = start
+    while port in taken or not _port_is_free(port):
+        port += 1
+    return port
+
+
+def clone_template(template_dir: str, target_dir: str, port: int, rcon_port: Optional[int] = None) -> dict[str, int]:
+    """
+    Materializes a template into a new instance and gives it its own server-port,
+    and rcon.port when given. query.port follows the server port (vanilla's default),
+    so clones never share the template's query or RCON listener; RCON pools are keyed
+    by port, so a shared rcon.port would send one instance's commands to another.
+    """
+    if os.path.exists(target_dir):
+        raise FileExistsError(f"'{target_dir}' already exists")
+    staging = _staging_path(target_dir)
+    shutil.rmtree(staging, ignore_errors=True)
+    counts = {"link": 0, "reflink": 0, "copy": 0}
+    try:
+        for dirpath, rel_dir, _, files in _walk_files(template_dir, lambda e: e == TEMPLATE_META_FILE):
+            out_dir = os.path.normpath(os.path.join(staging, rel_dir))
+            os.makedirs(out_dir, exist_ok=True)
+            for f in files:
+                rel = os.path.normpath(os.path.join(rel_dir, f))
+                # server.properties is rewritten below, so it must be a private copy
+                mode = _copy_file(os.path.join(dirpath, f), os.path.join(out_dir, f),
+                                  allow_hardlink=_is_immutable(rel) and f != server_properties.PROPERTIES_FILE)
+                counts[mode] += 1
+        updates = {"server-port": str(port)}
+        if rcon_port is not None:
+            updates["rcon.port"] = str(rcon_port)
+        if server_properties.read_properties(staging).get("enable-query", "false").lower() == "true":
+            updates["query.port"] = str(port)
+        server_properties.write_properties(staging, updates)
+        os.rename(staging, target_dir)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return counts
+
+
+def clone_many(template_dir: str, servers_root: str, base_name: str, count: int,
+               progress: Optional[Callable[[int, int, str], None]] = None) -> list[tuple[str, int]]:
+    """Creates base_name-1..N (skipping existing names), each on its own free server and RCON port."""
+    created = []
+    taken: set[int] = set()
+    index = 1
+    while len(created) < count:
+        name = base_name if count == 1 else f"{base_name}-{index}"
+        index += 1
+        target = os.path.join(servers_root, name)
+        if os.path.exists(target):
+            if count == 1:
+                raise FileExistsError(f"'{name}' already exists")
+            continue
+        port = allocate_port(servers_root, taken=taken)
+        taken.add(port)
+        rcon_port = allocate_port(servers_root, server_properties.DEFAULT_RCON_PORT, taken=taken)
+        taken.add(rcon_port)
+        clone_template(template_dir, target, port, rcon_port)
+        created.append((name, port))
+        if progress:
+            progress(len(created), count, name)
+    return created
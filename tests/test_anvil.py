@@ -0,0 +1,182 @@
+"""anvil header analysis, pruning and the running-server guard on synthetic region files."""
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+
+import pytest
+
+import anvil
+
+SECTOR = anvil.SECTOR_SIZE
+
+
+def chunk_nbt(inhabited: int) -> bytes:
+    """Root compound holding DataVersion and InhabitedTime, like a 1.18+ chunk."""
+    def named(tag: int, name: str) -> bytes:
+        raw = name.encode("utf-8")
+        return bytes([tag]) + struct.pack(">H", len(raw)) + raw
+    return (named(anvil._TAG_COMPOUND, "")
+            + named(anvil._TAG_INT, "DataVersion") + struct.pack(">i", 3700)
+            + named(anvil._TAG_STRING, "Status") + struct.pack(">H", 4) + b"full"
+            + named(anvil._TAG_LONG, "InhabitedTime") + struct.pack(">q", inhabited)
+            + bytes([anvil._TAG_END]))
+
+
+def write_region(path, chunks: dict[int, tuple[int, int]], gap_sectors: int = 0) -> None:
+    """chunks maps slot -> (inhabited ticks, sector count); gap_sectors of free space precede each chunk."""
+    header = bytearray(anvil.HEADER_SIZE)
+    body = bytearray()
+    sector = 2
+    for index, (inhabited, sectors) in sorted(chunks.items()):
+        body += bytes(gap_sectors * SECTOR)
+        sector += gap_sectors
+        payload = zlib.compress(chunk_nbt(inhabited))
+        blob = struct.pack(">I", len(payload) + 1) + bytes([anvil._COMPRESSION_ZLIB]) + payload
+        assert len(blob) <= sectors * SECTOR
+        header[index * 4:index * 4 + 4] = bytes([(sector >> 16) & 0xFF, (sector >> 8) & 0xFF, sector & 0xFF, sectors])
+        struct.pack_into(">I", header, SECTOR + index * 4, 1_700_000_000 + index)
+        body += blob + bytes(sectors * SECTOR - len(blob))
+        sector += sectors
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(header + body)
+
+
+CHUNKS = {0: (100, 1), 1: (50_000, 2), 33: (10, 1), 1023: (90_000, 1)}
+
+
+@pytest.fixture
+def server_dir(tmp_path):
+    world = tmp_path / "servers" / "survival" / "world"
+    world.mkdir(parents=True)
+    (world / "level.dat").write_bytes(b"")
+    write_region(str(world / "region" / "r.0.0.mca"), CHUNKS, gap_sectors=1)
+    write_region(str(world / "entities" / "r.0.0.mca"), CHUNKS)
+    return str(tmp_path / "servers" / "survival")
+
+
+def region_path(server_dir: str, folder: str = "region") -> str:
+    return os.path.join(server_dir, "world", folder, "r.0.0.mca")
+
+
+def test_analysis_counts_used_and_free_sectors(server_dir):
+    stats = anvil.analyze_region_file(region_path(server_dir), rare_threshold=1000)
+    assert stats.chunks == 4
+    assert stats.used_sectors == 2 + 5
+    assert stats.file_sectors == 2 + 5 + 4  # one free sector before every chunk
+    assert stats.free_sectors == 4
+    assert stats.rarely_visited == 2
+    assert stats.unreadable == 0
+
+
+def test_inhabited_times_are_read_per_slot(server_dir):
+    times = anvil.chunk_inhabited_times(region_path(server_dir))
+    assert times == {index: inhabited for index, (inhabited, _) in CHUNKS.items()}
+
+
+def test_prune_keeps_visited_chunks_and_compacts(server_dir):
+    summary = anvil.prune_world(server_dir, min_inhabited=1000)
+    assert summary["files"] == 1
+    assert summary["chunks_removed"] == 2
+    for folder in ("region", "entities"):
+        path = region_path(server_dir, folder)
+        assert anvil.chunk_inhabited_times(path) == {1: 50_000, 1023: 90_000}
+        stats = anvil.analyze_region_file(path, rare_threshold=None)
+        assert (stats.chunks, stats.free_sectors) == (2, 0)
+    with open(region_path(server_dir), "rb") as f:
+        header = anvil.read_header(f.read(anvil.HEADER_SIZE))
+    assert header[1][2] == 1_700_000_001  # timestamps survive the rewrite
+
+
+def test_prune_by_radius(server_dir):
+    # Slot 1023 is chunk (31, 31), centred ~500 blocks from the origin
+    anvil.prune_world(server_dir, radius=100)
+    assert sorted(anvil.chunk_inhabited_times(region_path(server_dir))) == [0, 1, 33]
+
+
+def test_region_left_empty_is_deleted(server_dir):
+    anvil.prune_world(server_dir, min_inhabited=10**9)
+    assert not os.path.exists(region_path(server_dir))
+    assert not os.path.exists(region_path(server_dir, "entities"))
+
+
+def test_dry_run_changes_nothing_and_predicts_the_real_run(server_dir):
+    paths = [region_path(server_dir), region_path(server_dir, "entities")]
+    before = [open(p, "rb").read() for p in paths]
+    estimate = anvil.prune_world(server_dir, min_inhabited=1000, dry_run=True)
+    assert [open(p, "rb").read() for p in paths] == before
+    assert anvil.prune_world(server_dir, min_inhabited=1000) == estimate
+
+
+def test_nothing_to_prune_is_rejected(server_dir):
+    with pytest.raises(ValueError):
+        anvil.prune_world(server_dir)
+
+
+def closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def set_port(server_dir: str, port: int) -> None:
+    with open(os.path.join(server_dir, "server.properties"), "w", encoding="utf-8") as f:
+        f.write(f"server-port={port}\n")
+
+
+def test_stopped_server_may_be_pruned(server_dir):
+    set_port(server_dir, closed_port())
+    assert anvil.prune_blocker(server_dir, os.path.dirname(server_dir)) is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the holder below uses POSIX record locks, like the JVM on Linux")
+def test_held_session_lock_blocks_pruning(server_dir):
+    set_port(server_dir, closed_port())
+    lock = os.path.join(server_dir, "world", "session.lock")
+    open(lock, "wb").close()
+    # Record locks belong to a process, so the holder has to be another one
+    holder = subprocess.Popen(
+        [sys.executable, "-c", "import fcntl, sys; f = open(sys.argv[1], 'r+b'); fcntl.lockf(f, fcntl.LOCK_EX); "
+                               "print('locked', flush=True); sys.stdin.read()", lock],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        assert anvil.world_in_use(server_dir)
+        assert anvil.prune_blocker(server_dir, os.path.dirname(server_dir)) == anvil.WORLD_LOCKED
+    finally:
+        holder.stdin.close()
+        holder.wait(5)
+    assert not anvil.world_in_use(server_dir)
+
+
+def answer_one_status_ping(listener: socket.socket) -> None:
+    conn, _ = listener.accept()
+    with conn:
+        conn.recv(1024)  # handshake + status request
+        payload = json.dumps({"version": {"name": "Paper", "protocol": 765}, "players": {"online": 0, "max": 20},
+                              "description": ""}).encode("utf-8")
+        body = anvil.slp._encode_varint(0) + anvil.slp._encode_varint(len(payload)) + payload
+        conn.sendall(anvil.slp._encode_varint(len(body)) + body)
+        ping = conn.recv(1024)
+        if ping:
+            conn.sendall(ping)
+
+
+def test_server_answering_status_pings_blocks_pruning(server_dir):
+    # A server started outside the panel that has no world lock the check could see
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    set_port(server_dir, listener.getsockname()[1])
+    responder = threading.Thread(target=answer_one_status_ping, args=(listener,), daemon=True)
+    responder.start()
+    try:
+        assert anvil.prune_blocker(server_dir, os.path.dirname(server_dir), timeout=2.0) == anvil.SERVER_ONLINE
+    finally:
+        responder.join(5)
+        listener.close()
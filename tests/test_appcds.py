@@ -0,0 +1,82 @@
+"""appcds planning: train, reuse and invalidate the per-instance CDS archive."""
+import os
+
+import pytest
+
+import appcds
+
+ARGS = ["-Xmx4G", "-XX:+UseG1GC"]
+
+
+@pytest.fixture
+def server(tmp_path):
+    server_dir = tmp_path / "survival"
+    (server_dir / "plugins").mkdir(parents=True)
+    (server_dir / "plugins" / "LuckPerms.jar").write_bytes(b"lp")
+    (server_dir / "paper.jar").write_bytes(b"paper")
+    java = tmp_path / "jdk" / "bin" / "java"
+    java.parent.mkdir(parents=True)
+    java.write_bytes(b"java")
+    return str(server_dir), str(java)
+
+
+def plan(server, args=ARGS, major=21):
+    server_dir, java = server
+    return appcds.plan(server_dir, "paper.jar", java, "21.0.2", major, args)
+
+
+def train(server) -> appcds.CdsPlan:
+    """A training boot whose JVM wrote the archive on a clean exit."""
+    training = plan(server)
+    assert training.mode == appcds.TRAIN
+    archive = training.args[0].split("=", 1)[1]
+    with open(archive, "wb") as f:
+        f.write(b"\0" * 1024)
+    assert appcds.finish_training(server[0], training)
+    return training
+
+
+def test_first_boot_trains(server):
+    training = plan(server)
+    archive, _ = appcds.archive_paths(server[0])
+    assert (training.mode, training.args) == (appcds.TRAIN, [f"-XX:ArchiveClassesAtExit={archive}"])
+    assert os.path.isdir(os.path.dirname(archive))
+    # No archive written (e.g. the server crashed): nothing is kept
+    assert not appcds.finish_training(server[0], training)
+
+
+def test_trained_archive_is_used(server):
+    train(server)
+    archive, _ = appcds.archive_paths(server[0])
+    assert plan(server).mode == appcds.USE
+    assert plan(server).args == [f"-XX:SharedArchiveFile={archive}"]
+
+
+def append(path: str, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+@pytest.mark.parametrize("changed, reason", [
+    (("survival", "paper.jar"), "服务器核心已更改"),
+    (("jdk", "bin", "java"), "Java 运行时已更改"),
+    (("survival", "plugins", "WorldEdit.jar"), "插件/模组已更改"),
+])
+def test_changes_invalidate_the_archive(server, changed, reason):
+    train(server)
+    append(os.path.join(os.path.dirname(server[0]), *changed), b"-changed")
+    retrain = plan(server)
+    assert (retrain.mode, retrain.reason) == (appcds.TRAIN, reason)
+    assert not os.path.exists(appcds.archive_paths(server[0])[0])
+
+
+def test_gc_change_invalidates_but_heap_size_does_not(server):
+    train(server)
+    assert plan(server, ["-Xmx8G", "-XX:+UseG1GC"]).mode == appcds.USE
+    assert plan(server, ["-Xmx8G", "-XX:+UseZGC"]).reason == "GC 设置已更改"
+
+
+def test_unsupported_runtimes_and_manual_cds(server):
+    assert plan(server, major=11).mode == appcds.UNSUPPORTED
+    assert plan(server, major=None).mode == appcds.UNSUPPORTED
+    assert plan(server, ARGS + ["-Xshare:off"]).mode == appcds.UNSUPPORTED
@@ -0,0 +1,82 @@
+"""boot_timeline phase extraction, plugin spans and the boot history file."""
+import pytest
+
+import boot_timeline
+from boot_timeline import BootRecorder, DONE, JVM_UP, LIBRARIES_LOADED, PREPARING_LEVEL, SPAWN_PREPARED
+
+PAPER_BOOT = [
+    (0.8, "[12:00:00 INFO]: Environment: Environment[sessionHost=https://sessionserver.mojang.com]"),
+    (2.0, "[12:00:01 INFO]: Starting minecraft server version 1.20.4"),
+    (2.5, "[12:00:01 INFO]: [LuckPerms] Loading server plugin LuckPerms v5.4.102"),
+    (3.0, "[12:00:02 INFO]: [WorldEdit] Loading server plugin WorldEdit v7.2.18"),
+    (3.2, "[12:00:02 INFO]: Server permissions file permissions.yml is empty, ignoring it"),
+    (4.0, "[12:00:03 INFO]: Preparing level \"world\""),
+    (4.5, "[12:00:03 INFO]: Preparing start region for dimension minecraft:overworld"),
+    (7.0, "[12:00:06 INFO]: [LuckPerms] Enabling LuckPerms v5.4.102"),
+    (9.0, "[12:00:08 INFO]: [WorldEdit] Enabling WorldEdit v7.2.18"),
+    (9.5, "[12:00:08 INFO]: Done (8.712s)! For help, type \"help\""),
+    (12.0, "[12:00:11 INFO]: [LuckPerms] Enabling LuckPerms v5.4.102"),
+]
+
+
+def record(lines=PAPER_BOOT, config=None) -> boot_timeline.Timeline:
+    recorder = BootRecorder(config, spawned_at=100.0)
+    for t, line in lines:
+        recorder.feed_line(line, now=100.0 + t)
+    return recorder.timeline
+
+
+def test_phases_are_taken_from_marker_lines():
+    timeline = record()
+    assert timeline.phases == pytest.approx(
+        {JVM_UP: 0.8, LIBRARIES_LOADED: 2.0, PREPARING_LEVEL: 4.0, SPAWN_PREPARED: 4.5, DONE: 9.5})
+    assert timeline.total_s == 9.5
+    assert timeline.reported_done_s == 8.712
+    assert timeline.lines == 10  # nothing after Done is recorded
+    assert [name for name, _, _ in timeline.phase_spans()] == [JVM_UP, LIBRARIES_LOADED, PREPARING_LEVEL, SPAWN_PREPARED, DONE]
+    assert timeline.phase_spans()[1][1:] == pytest.approx((0.8, 1.2))
+
+
+def test_plugin_spans_run_to_the_next_plugin_or_phase_line():
+    totals = record().plugin_totals()
+    assert totals["LuckPerms"] == pytest.approx({"load": 0.5, "enable": 2.0})
+    # WorldEdit's load ends at "Preparing level", not at the unrelated line before it
+    assert totals["WorldEdit"] == pytest.approx({"load": 1.0, "enable": 0.5})
+
+
+def test_spigot_and_vanilla_lines():
+    spigot = record([(1.0, "[12:00:00 INFO]: [Vault] Loading Vault v1.7.3-b131"),
+                     (1.5, "[12:00:00] [Server thread/INFO]: Preparing spawn area: 0%")])
+    assert [(s.name, s.stage) for s in spigot.plugins] == [("Vault", "load")]
+    assert spigot.plugins[0].duration == pytest.approx(0.5)
+    assert spigot.phases[SPAWN_PREPARED] == pytest.approx(1.5)
+    assert record([(3.0, "[12:00:03] [Server thread/INFO]: Done (2.5s)! For help, type \"help\"")]).total_s == pytest.approx(3.0)
+
+
+def test_history_round_trip_and_trend(tmp_path):
+    server_dir = tmp_path / "survival"
+    (server_dir / "plugins").mkdir(parents=True)
+    (server_dir / "plugins" / "LuckPerms.jar").write_bytes(b"")
+    (server_dir / "paper.jar").write_bytes(b"v1")
+    first_config = boot_timeline.boot_config(str(server_dir), "paper.jar", "Java 21", ["-Xmx4G"])
+    boot_timeline.save(str(server_dir), record(config=first_config))
+    boot_timeline.save(str(server_dir), record(PAPER_BOOT[:3], config=first_config))  # crashed during boot
+
+    (server_dir / "plugins" / "WorldEdit.jar").write_bytes(b"")
+    second_config = boot_timeline.boot_config(str(server_dir), "paper.jar", "Java 21", ["-Xmx6G"])
+    boot_timeline.save(str(server_dir), record(config=second_config))
+
+    timelines = boot_timeline.history(str(server_dir))
+    assert len(timelines) == 3
+    assert timelines[0].plugin_totals()["LuckPerms"] == pytest.approx({"load": 0.5, "enable": 2.0})
+    newest, changes = boot_timeline.trend(timelines)[0]
+    assert newest.config["plugins"] == ["LuckPerms.jar", "WorldEdit.jar"]
+    assert changes == ["JVM 参数", "插件 +1/-0"]
+    assert [name for name, _, _ in boot_timeline.slowest_plugins(timelines)] == ["LuckPerms", "WorldEdit"]
+
+
+def test_history_keeps_the_newest_boots(tmp_path, monkeypatch):
+    monkeypatch.setattr(boot_timeline, "MAX_BOOTS", 3)
+    for i in range(5):
+        boot_timeline.save(str(tmp_path), record(config={"jar": f"boot{i}"}))
+    assert [t.config["jar"] for t in boot_timeline.history(str(tmp_path))] == ["boot2", "boot3", "boot4"]
@@ -0,0 +1,95 @@
+"""bulk_import.import_players against benchmarks/mock_upstream.py's Mojang profile endpoint."""
+import json
+import os
+
+import pytest
+
+pytest.importorskip("requests")
+
+import bulk_import  # noqa: E402
+import player_lists  # noqa: E402
+from mock_upstream import MockConfig, MockUpstream, _profile  # noqa: E402
+
+
+@pytest.fixture
+def mock():
+    upstream = MockUpstream(config=MockConfig(retry_after=0)).start()
+    yield upstream
+    upstream.stop()
+
+
+@pytest.fixture
+def whitelist(tmp_path):
+    return player_lists.PlayerListModel(str(tmp_path / "whitelist.json"))
+
+
+def make_entry(name: str, player_uuid: str) -> dict:
+    return {"uuid": player_uuid, "name": name}
+
+
+def run_import(mock, model, names):
+    return bulk_import.import_players([{"name": name} for name in names], model, make_entry, f"{mock.url}/mojang_api")
+
+
+def read_list(model) -> list:
+    with open(model.path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_names_are_looked_up_in_batches_of_ten(mock, whitelist):
+    names = [f"Player{i:02d}" for i in range(23)]
+    report = run_import(mock, whitelist, names)
+
+    assert [row["status"] for row in report] == [bulk_import.ADDED] * 23
+    assert mock.stats["profile_batch_10"] == 2
+    assert mock.stats["profile_batch_3"] == 1
+    assert sorted(entry["name"] for entry in read_list(whitelist)) == names
+
+
+def test_rate_limited_batches_are_retried(mock, whitelist):
+    mock.config.fail_next = 2
+    report = run_import(mock, whitelist, ["Alice", "Bob"])
+
+    assert mock.stats["injected_429"] == 2
+    assert [row["status"] for row in report] == [bulk_import.ADDED, bulk_import.ADDED]
+
+
+def test_batches_that_keep_failing_are_reported_as_errors(mock, whitelist):
+    mock.config.fail_next = bulk_import.MAX_RETRIES
+    report = run_import(mock, whitelist, ["Alice"])
+
+    assert report[0]["status"] == bulk_import.ERROR
+    assert not os.path.exists(whitelist.path)
+
+
+def test_unknown_and_invalid_names(mock, whitelist):
+    mock.config.unknown_players = ("Ghost",)
+    report = run_import(mock, whitelist, ["Alice", "ghost", "not a name!"])
+
+    assert [row["status"] for row in report] == [bulk_import.ADDED, bulk_import.NOT_FOUND, bulk_import.INVALID]
+    # Invalid names never reach the API
+    assert mock.stats["profile_batch_2"] == 1
+    assert [entry["name"] for entry in read_list(whitelist)] == ["Alice"]
+
+
+def test_results_are_merged_into_the_list_with_one_write(mock, whitelist, monkeypatch):
+    existing = _profile("Steve")
+    with open(whitelist.path, "w", encoding="utf-8") as f:
+        json.dump([{"uuid": player_lists.dashed_uuid(existing["id"]), "name": "Steve"}], f)
+
+    writes = []
+    real_replace = os.replace
+
+    def counting_replace(src, dst):
+        if os.path.abspath(dst) == os.path.abspath(whitelist.path):
+            writes.append(dst)
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(player_lists.os, "replace", counting_replace)
+    names = ["Steve"] + [f"New{i}" for i in range(12)]
+    report = run_import(mock, whitelist, names)
+
+    assert len(writes) == 1
+    assert report[0]["status"] == bulk_import.ALREADY_LISTED
+    assert all(row["status"] == bulk_import.ADDED for row in report[1:])
+    assert len(read_list(whitelist)) == 13
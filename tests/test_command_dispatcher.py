@@ -0,0 +1,90 @@
+"""command_dispatcher.CommandDispatcher ordering and shutdown."""
+import threading
+import time
+
+import pytest
+
+import command_dispatcher
+from command_dispatcher import CommandDispatcher, DispatcherClosed
+
+
+def make_dispatcher(written: list, gate: threading.Event = None, writing: threading.Event = None) -> CommandDispatcher:
+    def write(text: str) -> None:
+        if writing is not None:
+            writing.set()
+        if gate is not None:
+            gate.wait(5)
+        written.append(text)
+    return CommandDispatcher(write, min_interval=0, quiet_period=0.02)
+
+
+def test_commands_run_by_priority():
+    written, gate, writing = [], threading.Event(), threading.Event()
+    dispatcher = make_dispatcher(written, gate, writing)
+    first = dispatcher.submit("list", wait_response=False)
+    assert writing.wait(5)
+    polls = [dispatcher.submit(f"poll {i}", command_dispatcher.PRIORITY_POLL, wait_response=False) for i in range(2)]
+    stop = dispatcher.submit("stop", command_dispatcher.PRIORITY_STOP, wait_response=False)
+    gate.set()
+    for future in [first, stop, *polls]:
+        future.result(5)
+    assert written == ["list", "stop", "poll 0", "poll 1"]
+    dispatcher.close()
+
+
+def test_response_lines_are_collected():
+    written, writing = [], threading.Event()
+    dispatcher = make_dispatcher(written, writing=writing)
+    future = dispatcher.submit("list", expect=r"players online", timeout=2)
+    assert writing.wait(5)
+    dispatcher.feed_line("There are 0 of a max of 20 players online:")
+    assert future.result(5) == ["There are 0 of a max of 20 players online:"]
+    dispatcher.close()
+
+
+def test_close_fails_queued_and_later_commands():
+    written, gate, writing = [], threading.Event(), threading.Event()
+    dispatcher = make_dispatcher(written, gate, writing)
+    running = dispatcher.submit("save-all", wait_response=False)
+    assert writing.wait(5)
+    queued = [dispatcher.submit(f"say {i}", wait_response=False) for i in range(3)]
+    dispatcher.close()
+    gate.set()
+    running.result(5)
+    for future in queued:
+        with pytest.raises(DispatcherClosed):
+            future.result(5)
+    with pytest.raises(DispatcherClosed):
+        dispatcher.submit("list").result(5)
+    assert written == ["save-all"]
+
+
+def test_concurrent_submit_and_close_never_strand_a_command():
+    for _ in range(50):
+        dispatcher = make_dispatcher([])
+        futures = []
+        submitter = threading.Thread(target=lambda: futures.extend(dispatcher.submit("list", wait_response=False) for _ in range(20)))
+        submitter.start()
+        dispatcher.close()
+        submitter.join()
+        for future in futures:
+            # Either written before the close or failed by it, but always resolved
+            assert future.exception(5) is None or isinstance(future.exception(5), DispatcherClosed)
+
+
+def test_stop_does_not_wait_for_a_pending_response():
+    written, writing = [], threading.Event()
+    dispatcher = make_dispatcher(written, writing=writing)
+    # A hung server never answers the watchdog's probe
+    probe = dispatcher.submit("list", command_dispatcher.PRIORITY_POLL, expect=r"players online", timeout=30)
+    assert writing.wait(5)
+    started = time.monotonic()
+    stop = dispatcher.submit("stop", command_dispatcher.PRIORITY_STOP, wait_response=False)
+    assert stop.result(5) == []
+    assert time.monotonic() - started < 2
+    assert probe.result(0) == []
+    assert written == ["list", "stop"]
+    # Later commands collect their full response again
+    user = dispatcher.submit("list", expect=r"players online", timeout=0.3)
+    assert user.result(5) == [] and time.monotonic() - started >= 0.3
+    dispatcher.close()
@@ -0,0 +1,96 @@
+"""console_index classification and the ConsoleBuffer posting lists."""
+import console_index
+from console_index import ConsoleBuffer, ConsoleFilter, DEBUG, ERROR, INFO, WARN
+
+
+def query(buffer: ConsoleBuffer, **kwargs) -> list[str]:
+    console_filter = ConsoleFilter(**kwargs)
+    console_filter.compile()
+    return [entry.text for entry in buffer.query(console_filter)]
+
+
+def test_classify_log_prefixes():
+    assert console_index.classify("[12:00:00] [Server thread/INFO]: Done (3.2s)!") == (INFO, "Server thread", "")
+    assert console_index.classify("[12:00:00] [Worker-Main-2/WARN] [minecraft/Util]: slow") == (WARN, "Worker-Main-2", "minecraft/Util")
+    assert console_index.classify("[12:00:00 ERROR]: [LuckPerms] Could not connect") == (ERROR, "", "LuckPerms")
+    assert console_index.classify("[12:00:00 INFO] [velocity]: Listening on /0.0.0.0:25577") == (INFO, "", "velocity")
+    assert console_index.classify("[12:00:00.123 SEVERE]: Exception in thread") == (ERROR, "", "")
+    assert console_index.classify("[12:00:00 FINE]: noise")[0] == DEBUG
+    assert console_index.classify("\tat net.minecraft.server.Main.main(Main.java:1)") is None
+    assert console_index.classify("plain output") is None
+
+
+def test_stack_trace_lines_inherit_the_previous_server_line():
+    buffer = ConsoleBuffer()
+    buffer.append("[12:00:00 ERROR]: [Essentials] Could not pass event")
+    trace = buffer.append("java.lang.NullPointerException: null")
+    frame = buffer.append("\tat com.earth2me.essentials.Essentials.onJoin(Essentials.java:42)")
+    after = buffer.append("[12:00:01 INFO]: Steve joined the game")
+    assert (trace.level, trace.source) == (ERROR, "Essentials")
+    assert (frame.level, frame.source) == (ERROR, "Essentials")
+    assert (after.level, after.source) == (INFO, "")
+    # The panel's own messages neither take nor leave server tags
+    panel = buffer.append("正在停止服务器...", source=console_index.PANEL, level=WARN)
+    assert (panel.level, panel.source) == (WARN, console_index.PANEL)
+    assert buffer.append("continued output").level == INFO
+
+
+def test_level_and_word_queries():
+    buffer = ConsoleBuffer()
+    buffer.append("[12:00:00 INFO]: Steve joined the game")
+    buffer.append("[12:00:01 WARN]: Can't keep up! Is the server overloaded?")
+    buffer.append("[12:00:02 ERROR]: Steve was kicked: Timed out")
+    buffer.append("\tat io.netty.Channel.read(Channel.java:1)")
+    buffer.append("[12:00:03 INFO]: Alex joined the game")
+
+    assert query(buffer, min_level=WARN) == [
+        "[12:00:01 WARN]: Can't keep up! Is the server overloaded?",
+        "[12:00:02 ERROR]: Steve was kicked: Timed out",
+        "\tat io.netty.Channel.read(Channel.java:1)",
+    ]
+    assert query(buffer, word="STEVE ") == ["[12:00:00 INFO]: Steve joined the game",
+                                            "[12:00:02 ERROR]: Steve was kicked: Timed out"]
+    assert query(buffer, word="steve", min_level=ERROR) == ["[12:00:02 ERROR]: Steve was kicked: Timed out"]
+    # Whole words only: "ste" is not a token of any line
+    assert query(buffer, word="ste") == []
+    assert query(buffer, text="JOINED") == ["[12:00:00 INFO]: Steve joined the game",
+                                            "[12:00:03 INFO]: Alex joined the game"]
+    assert query(buffer, text=r"(steve|alex) joined", regex=True, min_level=INFO) == query(buffer, text="joined")
+    assert buffer.level_counts()[INFO] == 2 and buffer.level_counts()[ERROR] == 2
+
+
+def test_word_index_catches_up_with_lines_added_after_a_query():
+    buffer = ConsoleBuffer()
+    buffer.append("[12:00:00 INFO]: Steve joined the game")
+    assert len(query(buffer, word="steve")) == 1
+    buffer.append("[12:00:05 INFO]: Steve left the game")
+    assert len(query(buffer, word="steve")) == 2
+
+
+def test_eviction_trims_lines_and_postings():
+    buffer = ConsoleBuffer(max_lines=10, trim_chunk=5)
+    for i in range(12):
+        buffer.append(f"[12:00:00 {'WARN' if i % 2 else 'INFO'}]: line{i} player{i % 3}")
+    assert len(query(buffer, word="player0")) == 4  # indexes the words of all 12 lines
+    for i in range(12, 16):
+        buffer.append(f"[12:00:00 INFO]: line{i} player{i % 3}")
+
+    # 16 lines > max_lines + trim_chunk: evicted back down to max_lines in one go
+    assert len(buffer) == 10
+    assert buffer.first_seq == 6
+    assert [e.text for e in buffer.entries()][0] == "[12:00:00 INFO]: line6 player0"
+    assert sum(buffer.level_counts()) == 10
+    assert buffer.level_counts()[WARN] == 3  # lines 7, 9 and 11
+    assert [e.seq for e in buffer.query(ConsoleFilter(word="player0"))] == [6, 9, 12, 15]
+    # Words that only appeared in evicted lines are gone from the index
+    assert "line0" not in buffer._by_token
+    assert all(seq >= buffer.first_seq for postings in buffer._by_token.values() for seq in postings)
+
+
+def test_clear_forgets_lines_and_tags():
+    buffer = ConsoleBuffer()
+    buffer.append("[12:00:00 ERROR]: boom")
+    buffer.clear()
+    assert len(buffer) == 0 and sum(buffer.level_counts()) == 0
+    assert query(buffer, word="boom") == []
+    assert buffer.append("untagged").level == INFO
@@ -0,0 +1,55 @@
+"""console_log.ConsoleLog writing, reading back and pruning sessions."""
+import os
+
+import console_log
+
+
+def test_lines_are_written_and_read_back(tmp_path):
+    log = console_log.ConsoleLog(str(tmp_path), flush_interval=0.01).start()
+    for i in range(100):
+        log.append(f"[12:00:00 INFO]: line {i}")
+    log.close(timeout=5)
+    assert log.last_error is None
+    sessions = console_log.list_sessions(str(tmp_path))
+    assert [s.session_id for s in sessions] == [log.session_id]
+    assert not sessions[0].active  # last segment compressed on close
+    lines = console_log.read_session(sessions[0].path)
+    assert [text for _, text in lines] == [f"[12:00:00 INFO]: line {i}" for i in range(100)]
+
+
+def test_start_never_raises_on_the_reader_thread(tmp_path):
+    blocker = tmp_path / "server"
+    blocker.write_text("not a directory")
+    log = console_log.ConsoleLog(str(blocker), flush_interval=0.01).start()
+    log.append("lost")
+    log.close(timeout=5)
+    assert isinstance(log.last_error, OSError)
+
+
+def make_sessions(root, count: int) -> list[str]:
+    ids = [f"20240101-{i:06d}" for i in range(count)]
+    for session_id in ids:
+        path = os.path.join(console_log.log_root(root), session_id)
+        os.makedirs(path)
+        with open(os.path.join(path, "console-0001.log"), "w", encoding="utf-8") as f:
+            f.write("     0.000 hello\n")
+    return ids
+
+
+def test_prune_hands_old_sessions_to_discard(tmp_path):
+    root = str(tmp_path)
+    ids = make_sessions(root, 5)
+    discarded = []
+    assert console_log.prune(root, keep=2, active=ids[0], discard=discarded.append) == 2
+    assert [os.path.basename(p) for p in discarded] == [ids[2], ids[1]]
+
+
+def test_prune_falls_back_to_deleting(tmp_path):
+    root = str(tmp_path)
+    ids = make_sessions(root, 3)
+
+    def refuse(path):
+        raise OSError("cross-device link")
+
+    assert console_log.prune(root, keep=1, discard=refuse) == 2
+    assert [s.session_id for s in console_log.list_sessions(root)] == [ids[2]]
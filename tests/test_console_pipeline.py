@@ -0,0 +1,37 @@
+"""console_pipeline.handle_line, the console reader's per-line step."""
+import console_pipeline
+
+
+def run(lines):
+    processor = console_pipeline.ConsoleProcessor()
+    calls = {"shown": [], "updates": 0, "players": [], "joins": [], "leaves": []}
+
+    def update():
+        calls["updates"] += 1
+
+    for line in lines:
+        console_pipeline.handle_line(processor, line + "\n", calls["shown"].append, update,
+                                     on_players=calls["players"].append, on_join=calls["joins"].append,
+                                     on_leave=calls["leaves"].append)
+    return calls
+
+
+def test_shown_line_is_stripped_and_flushed_once():
+    calls = run(["[12:00:00 INFO]: Done (3.2s)!  "])
+    assert calls["shown"] == ["[12:00:00 INFO]: Done (3.2s)!"]
+    assert calls["updates"] == 1
+
+
+def test_list_reply_is_hidden_but_updates_players():
+    calls = run(["[12:00:00 INFO]: There are 2 of a max of 20 players online: Steve, Alex"])
+    assert calls["shown"] == []
+    assert calls["players"] == [["Alex", "Steve"]]
+    assert calls["updates"] == 1
+
+
+def test_join_and_leave():
+    calls = run(["[12:00:00 INFO]: Steve joined the game", "[12:00:05 INFO]: Steve left the game"])
+    assert calls["joins"] == ["Steve"] and calls["leaves"] == ["Steve"]
+    assert calls["players"] == [["Steve"], []]
+    assert len(calls["shown"]) == 2
+    assert calls["updates"] == 4
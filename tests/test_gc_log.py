@@ -0,0 +1,56 @@
+"""gc_log.GcLogTailer following logs/gc.log through JVM-style rotation."""
+import os
+
+import gc_log
+
+
+def pause_line(gc_id: int, uptime: float) -> str:
+    return (f"[2024-05-01T12:00:00.000+0000][{uptime:.3f}s][info][gc] GC({gc_id}) "
+            f"Pause Young (Normal) (G1 Evacuation Pause) 120M->40M(512M) 3.500ms\n")
+
+
+def append(path, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def make_tailer(tmp_path):
+    events = []
+    tailer = gc_log.GcLogTailer(str(tmp_path / "gc.log"), gc_log.GcLogParser(), on_event=events.append)
+    return tailer, events
+
+
+def test_reads_only_complete_lines(tmp_path):
+    path = tmp_path / "gc.log"
+    tailer, events = make_tailer(tmp_path)
+    append(path, pause_line(0, 1.0) + pause_line(1, 2.0)[:30])
+    assert tailer.poll()
+    assert [e.gc_id for e in events] == [0]
+    append(path, pause_line(1, 2.0)[30:])
+    tailer.poll()
+    assert [e.gc_id for e in events] == [0, 1]
+    assert events[1].pause_ms == 3.5
+
+
+def test_rotation_drains_the_old_file_first(tmp_path):
+    path = tmp_path / "gc.log"
+    tailer, events = make_tailer(tmp_path)
+    append(path, pause_line(0, 1.0))
+    tailer.poll()
+    # Written after the last poll, then the JVM rotates and starts a new gc.log
+    append(path, pause_line(1, 2.0) + pause_line(2, 3.0))
+    os.rename(path, tmp_path / "gc.log.0")
+    append(path, pause_line(3, 4.0))
+    tailer.poll()
+    assert [e.gc_id for e in events] == [0, 1, 2, 3]
+
+
+def test_log_from_the_previous_run_is_skipped(tmp_path):
+    path = tmp_path / "gc.log"
+    append(path, pause_line(7, 100.0))
+    tailer, events = make_tailer(tmp_path)
+    assert not tailer.poll()
+    os.rename(path, tmp_path / "gc.log.4")
+    append(path, pause_line(0, 0.5))
+    tailer.poll()
+    assert [e.gc_id for e in events] == [0]
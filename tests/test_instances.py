@@ -0,0 +1,67 @@
+"""instances.InstanceRegistry records and the servers-root listing cache."""
+import json
+import os
+import zipfile
+
+import instances
+
+
+def make_instance(root, name: str, jar: str = "server.jar") -> str:
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    with zipfile.ZipFile(os.path.join(path, jar), "w") as z:
+        z.writestr("version.json", json.dumps({"id": "1.20.4", "java_version": 17}))
+        z.writestr("net/minecraft/server/Main.class", b"")
+    return path
+
+
+def test_get_returns_a_copy(tmp_path):
+    server = make_instance(str(tmp_path), "survival")
+    registry = instances.InstanceRegistry(str(tmp_path))
+    record = registry.get(server)
+    assert record["game_version"] == "1.20.4"
+    record["game_version"] = "changed"
+    record.setdefault("resources", {})["affinity"] = "all"
+    assert registry.get(server)["game_version"] == "1.20.4"
+    assert "resources" not in registry.get(server)
+
+
+def test_jar_fields_dropped_when_jar_is_removed(tmp_path):
+    server = make_instance(str(tmp_path), "survival")
+    registry = instances.InstanceRegistry(str(tmp_path))
+    registry.update(server, jvm_profile="auto")
+    assert registry.get(server)["jar"] == "server.jar"
+
+    os.remove(os.path.join(server, "server.jar"))
+    record = registry.get(server)
+    assert not any(key in record for key in instances.JAR_FIELDS)
+    assert record["jvm_profile"] == "auto"
+    # And it stays gone on disk
+    assert "jar" not in instances.InstanceRegistry(str(tmp_path)).get(server)
+
+
+def test_saving_does_not_touch_the_servers_root(tmp_path):
+    root = str(tmp_path)
+    server = make_instance(root, "survival")
+    registry = instances.InstanceRegistry(root)
+    assert registry.list_names() == ["survival"]
+    registry.record_start(server)  # first save creates the registry folder
+    registry.list_names()
+    before = os.stat(root).st_mtime_ns
+    registry.record_start(server)
+    registry.update(server, jvm_profile="g1")
+    assert os.stat(root).st_mtime_ns == before
+
+
+def test_hidden_names_apply_to_cached_listings(tmp_path):
+    root = str(tmp_path)
+    survival = make_instance(root, "survival")
+    make_instance(root, "lobby")
+    registry = instances.InstanceRegistry(root)
+    registry.update(survival, jvm_profile="g1")
+    assert registry.list_names() == ["lobby", "survival"]
+    # Served from the cache (root unchanged), yet filtered for this caller
+    assert registry.list_names(hidden=("survival",)) == ["lobby"]
+    assert registry.list_names() == ["lobby", "survival"]
+    # Hiding an instance from one listing doesn't drop its record
+    assert registry.get(survival)["jvm_profile"] == "g1"
@@ -0,0 +1,83 @@
+"""java_runtimes version parsing, probing, matching and the on-disk probe cache."""
+import os
+import sys
+
+import pytest
+
+import java_runtimes
+from java_runtimes import JavaRuntime
+
+SETTINGS = """Property settings:
+    file.encoding = UTF-8
+    java.home = /opt/jdk-21
+    java.vendor = Eclipse Adoptium
+    java.version = 21.0.2
+    os.arch = amd64
+
+openjdk version "21.0.2" 2024-01-16
+"""
+
+
+def fake_java(tmp_path, stderr: str, name: str = "java") -> str:
+    """An executable that prints like `java -XshowSettings:properties -version` (to stderr)."""
+    path = tmp_path / name
+    path.write_text(f"#!{sys.executable}\nimport sys\nsys.stderr.write({stderr!r})\n", encoding="utf-8")
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_parse_major():
+    assert java_runtimes.parse_major("21.0.2") == 21
+    assert java_runtimes.parse_major("17") == 17
+    assert java_runtimes.parse_major("1.8.0_392") == 8
+    assert java_runtimes.parse_major("22-ea") == 22
+    assert java_runtimes.parse_major("internal") is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the fake java is a script run through its shebang")
+def test_probe_reads_system_properties(tmp_path):
+    runtime = java_runtimes.probe(fake_java(tmp_path, SETTINGS))
+    assert (runtime.version, runtime.major, runtime.vendor, runtime.arch, runtime.home) == (
+        "21.0.2", 21, "Eclipse Adoptium", "amd64", "/opt/jdk-21")
+    assert runtime.label == "Java 21 (21.0.2, Eclipse Adoptium, amd64)"
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the fake java is a script run through its shebang")
+def test_probe_falls_back_to_the_version_banner(tmp_path):
+    old = fake_java(tmp_path, 'Unrecognized option: -XshowSettings\njava version "1.6.0_45"\n')
+    assert java_runtimes.probe(old).major == 6
+    assert java_runtimes.probe(fake_java(tmp_path, "not a jvm\n", "broken")) is None
+    assert java_runtimes.probe(str(tmp_path / "missing")) is None
+
+
+def runtime(major: int, version: str = "") -> JavaRuntime:
+    return JavaRuntime(path=f"/jdk{major}/bin/java", version=version or f"{major}.0.1", major=major)
+
+
+def test_match_prefers_exact_then_oldest_newer():
+    installed = [runtime(8, "1.8.0_392"), runtime(17), runtime(21)]
+    assert java_runtimes.match_runtime(installed, 17).major == 17
+    assert java_runtimes.match_runtime(installed, 16).major == 17
+    assert java_runtimes.match_runtime(installed, 11).major == 17
+    assert java_runtimes.match_runtime(installed, 25) is None
+    assert java_runtimes.match_runtime(installed, None).major == 21
+    assert java_runtimes.match_runtime([], 17) is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the fake java is a script run through its shebang")
+def test_catalog_caches_probes_by_mtime_and_size(tmp_path, monkeypatch):
+    java = fake_java(tmp_path, SETTINGS)
+    cache_path = str(tmp_path / "java_runtimes.json")
+    probes = []
+    real_probe = java_runtimes.probe
+    monkeypatch.setattr(java_runtimes, "probe", lambda path: probes.append(path) or real_probe(path))
+
+    assert java_runtimes.RuntimeCatalog(cache_path).get(java).major == 21
+    # A new catalog (next panel start) reads the cache instead of starting the JVM again
+    assert java_runtimes.RuntimeCatalog(cache_path).major_version(java) == 21
+    assert len(probes) == 1
+
+    # An updated binary (new mtime and size) is probed again
+    fake_java(tmp_path, SETTINGS.replace("21.0.2", "22.0.1+8"))
+    assert java_runtimes.RuntimeCatalog(cache_path).get(java).version == "22.0.1+8"
+    assert len(probes) == 2
@@ -0,0 +1,73 @@
+"""jvm_flags heap sizing, profile flag assembly and heap validation."""
+import jvm_flags
+from jvm_flags import ERROR, WARNING, HostInfo
+
+HOST_16G = HostInfo(total_mb=16 * 1024, available_mb=12 * 1024, cores=8)
+HOST_64G = HostInfo(total_mb=64 * 1024, available_mb=60 * 1024, cores=16)
+
+
+def test_recommended_heap_leaves_room_for_os_and_off_heap():
+    heap = jvm_flags.recommend_heap_mb(HOST_16G)
+    assert heap % 512 == 0
+    assert heap * (1 + jvm_flags.OFF_HEAP_FRACTION) <= HOST_16G.total_mb - jvm_flags.OS_RESERVE_MIN_MB
+    assert jvm_flags.recommend_heap_mb(HOST_16G, instances=2) < heap
+    # Never below the minimum, never past the compressed-oops limit
+    assert jvm_flags.recommend_heap_mb(HostInfo(2048, 1024, 2)) == jvm_flags.MIN_HEAP_MB
+    assert jvm_flags.recommend_heap_mb(HostInfo(256 * 1024, 200 * 1024, 64)) <= jvm_flags.COMPRESSED_OOPS_LIMIT_MB
+
+
+def test_g1_profile_uses_aikars_flags_sized_by_heap():
+    args = jvm_flags.build_flags(jvm_flags.PROFILE_G1, HOST_16G, heap_mb=8192)
+    assert args[:2] == ["-Xms8192M", "-Xmx8192M"]
+    assert "-XX:+UseG1GC" in args and "-XX:G1HeapRegionSize=8M" in args
+    large = jvm_flags.build_flags(jvm_flags.PROFILE_G1, HOST_64G, heap_mb=16384)
+    assert "-XX:G1HeapRegionSize=16M" in large and "-XX:G1HeapRegionSize=8M" not in large
+
+
+def test_auto_profile_picks_zgc_only_for_large_heaps_on_java_21():
+    def gc(heap_mb, java):
+        args = jvm_flags.build_flags(jvm_flags.PROFILE_AUTO, HOST_64G, heap_mb=heap_mb, java_version=java)
+        return "zgc" if "-XX:+UseZGC" in args else "g1"
+    assert gc(16384, 21) == "zgc"
+    assert gc(8192, 21) == "g1"
+    assert gc(16384, 17) == "g1"
+    assert gc(16384, None) == "g1"
+    # Generational ZGC must be asked for on 21-22 and is the only mode from 23
+    assert "-XX:+ZGenerational" in jvm_flags.build_flags(jvm_flags.PROFILE_ZGC, HOST_64G, 16384, java_version=21)
+    assert "-XX:+ZGenerational" not in jvm_flags.build_flags(jvm_flags.PROFILE_ZGC, HOST_64G, 16384, java_version=23)
+
+
+def test_gc_threads_are_split_between_instances():
+    assert jvm_flags.gc_thread_flags(16, 1) == []
+    assert jvm_flags.gc_thread_flags(16, 4) == ["-XX:ParallelGCThreads=4", "-XX:ConcGCThreads=1"]
+    assert jvm_flags.gc_thread_flags(2, 4) == ["-XX:ParallelGCThreads=2", "-XX:ConcGCThreads=1"]
+    args = jvm_flags.build_flags(jvm_flags.PROFILE_G1, HOST_16G, heap_mb=4096, instances=2)
+    assert args[-2:] == ["-XX:ParallelGCThreads=4", "-XX:ConcGCThreads=1"]
+
+
+def test_custom_profile_is_taken_verbatim():
+    assert jvm_flags.build_flags(jvm_flags.PROFILE_CUSTOM, HOST_16G, custom_args=" -Xmx2G  -XX:+UseSerialGC ") == [
+        "-Xmx2G", "-XX:+UseSerialGC"]
+
+
+def test_parse_heap_units_and_last_occurrence():
+    assert jvm_flags.parse_heap(["-Xms512m", "-Xmx4G", "-Xmx6g"]) == (512, 6144)
+    assert jvm_flags.parse_heap(["-Xmx2097152k", "-Xms1073741824"]) == (1024, 2048)
+    assert jvm_flags.parse_heap(["-XX:+UseG1GC", "-Xmx"]) == (None, None)
+
+
+def levels(problems) -> list[str]:
+    return [level for level, _ in problems]
+
+
+def test_validate_heap():
+    assert jvm_flags.validate_heap(["-Xms4G", "-Xmx4G"], HOST_16G) == []
+    assert levels(jvm_flags.validate_heap(["-Xmx20G"], HOST_16G)) == [ERROR]
+    assert levels(jvm_flags.validate_heap(["-Xms8G", "-Xmx4G"], HOST_16G)) == [ERROR]
+    assert levels(jvm_flags.validate_heap(["-Xmx6G"], HOST_16G, instances=3)) == [WARNING]
+    assert levels(jvm_flags.validate_heap(["-Xmx512M"], HOST_16G)) == [WARNING]
+    assert levels(jvm_flags.validate_heap(["-XX:+UseG1GC"], HOST_16G)) == [WARNING]
+    assert levels(jvm_flags.validate_heap(["-Xmx40G"], HOST_64G)) == [WARNING]
+    assert levels(jvm_flags.validate_heap(["-Xmx4G", "-XX:+UseZGC"], HOST_16G, java_version=11)) == [ERROR]
+    assert levels(jvm_flags.validate_heap(["-Xmx4G", "-XX:+UseZGC", "-XX:+ZGenerational"], HOST_16G,
+                                          java_version=17)) == [ERROR]
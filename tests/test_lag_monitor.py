@@ -0,0 +1,104 @@
+"""lag_monitor reply parsing, spike detection and command capability probing."""
+from concurrent.futures import Future
+
+import lag_monitor
+from lag_monitor import LagMonitor
+
+PAPER_TPS = "[12:00:00 INFO]: §6TPS from last 1m, 5m, 15m: §a*20.0, §a19.87, §e17.5"
+PAPER_MSPT = [
+    "[12:00:00 INFO]: §6Server tick times §e(§7avg§e/§7min§e/§7max§e)§6 from last 5s§7,§6 10s§7,§6 1m§e:",
+    "[12:00:00 INFO]: §6◴ §a12.3§7/§a8.1§7/§c61.0§7, §a11.9§7/§a7.5§7/§a40.2§7, §a12.0§7/§a7.2§7/§c75.4",
+]
+TICK_QUERY = [
+    "[12:00:00] [Server thread/INFO]: The game is running normally",
+    "[12:00:00] [Server thread/INFO]: Target tick rate: 20.0 per second.",
+    "[12:00:00] [Server thread/INFO]: Average time per tick: 80.0ms (Target: 50.0ms)",
+]
+UNKNOWN = ["[12:00:00] [Server thread/INFO]: Unknown or incomplete command, see below for error"]
+
+
+def test_parse_tps():
+    assert lag_monitor.parse_tps(["noise", PAPER_TPS]) == (20.0, 19.87, 17.5)
+    assert lag_monitor.parse_tps(UNKNOWN) is None
+
+
+def test_parse_mspt_reads_the_line_after_the_header():
+    assert lag_monitor.parse_mspt(PAPER_MSPT) == (12.3, 8.1, 61.0)
+    assert lag_monitor.parse_mspt(PAPER_MSPT[1:]) is None
+
+
+def test_parse_tick_query_derives_tps_from_mspt():
+    assert lag_monitor.parse_tick_query(TICK_QUERY) == (12.5, 80.0)
+    fast = [TICK_QUERY[1], "Average time per tick: 10.0ms (Target: 50.0ms)"]
+    assert lag_monitor.parse_tick_query(fast) == (20.0, 10.0)  # capped at the target rate
+    assert lag_monitor.parse_tick_query(UNKNOWN) is None
+
+
+def test_sample_replies_are_recognised_for_hiding():
+    assert all(lag_monitor.is_sample_reply(line) for line in [PAPER_TPS, *PAPER_MSPT, *TICK_QUERY])
+    assert not lag_monitor.is_sample_reply("[12:00:00 INFO]: Steve joined the game")
+
+
+def test_cant_keep_up_is_a_spike():
+    monitor = LagMonitor()
+    spike = monitor.feed_line("[12:00:00 WARN]: Can't keep up! Is the server overloaded? "
+                              "Running 2034ms or 40 ticks behind")
+    assert (spike.kind, spike.value) == ("behind", 2034)
+    assert monitor.feed_line("[12:00:00 INFO]: Done") is None
+
+
+def test_only_the_start_of_a_lagging_stretch_is_a_spike():
+    spikes = []
+    monitor = LagMonitor(on_spike=spikes.append)
+    for tps in (20.0, 15.0, 14.0, 19.5, 12.0):
+        monitor.record_tps(tps)
+    assert [s.value for s in spikes] == [15.0, 12.0]
+
+
+def replies(mapping):
+    sent = []
+
+    def submit(command, expect=None):
+        sent.append(command)
+        future = Future()
+        future.set_result(mapping.get(command, UNKNOWN))
+        return future
+    return submit, sent
+
+
+def test_paper_server_is_sampled_with_tps_and_mspt():
+    monitor = LagMonitor()
+    submit, sent = replies({"tps": [PAPER_TPS], "mspt": PAPER_MSPT})
+    assert monitor.sample(submit)
+    assert monitor.mode == lag_monitor.MODE_PAPER
+    assert (monitor.tps, monitor.mspt) == (20.0, 12.3)
+    assert sent == ["tps", "mspt"]
+
+
+def test_spigot_server_stops_asking_for_mspt():
+    monitor = LagMonitor()
+    submit, sent = replies({"tps": [PAPER_TPS]})
+    monitor.sample(submit)
+    monitor.sample(submit)
+    assert monitor.mode == lag_monitor.MODE_SPIGOT
+    assert sent == ["tps", "mspt", "tps"]
+
+
+def test_vanilla_falls_back_to_tick_query_then_gives_up_when_unsupported():
+    monitor = LagMonitor()
+    submit, sent = replies({"tick query": TICK_QUERY})
+    assert monitor.sample(submit)
+    assert (monitor.mode, monitor.tps, monitor.mspt) == (lag_monitor.MODE_VANILLA, 12.5, 80.0)
+    assert sent == ["tps", "tick query"]
+
+    old = LagMonitor()
+    submit, _ = replies({})
+    assert not old.sample(submit)
+    assert old.mode == lag_monitor.MODE_UNSUPPORTED
+    assert not old.sample(submit)
+
+
+def test_unanswered_probe_is_retried():
+    monitor = LagMonitor()
+    assert monitor.sample(lambda command, expect=None: None)
+    assert monitor.mode is None
@@ -0,0 +1,67 @@
+"""player_index.HistoryPlayerIndex prefix search, paging and incremental joins."""
+import json
+import os
+
+from player_index import HistoryPlayerIndex
+
+PLAYERS = [
+    {"name": "Steve", "uuid": "8667ba71-b85a-4004-af54-457a9734eed7"},
+    {"name": "stevie_wonder", "uuid": "069a79f4-44e9-4726-a5be-fca90e38aaf5"},
+    {"name": "Alex", "uuid": "ec561538-f3fd-461d-aff5-086b22154bce"},
+    {"name": "Notch", "uuid": "069a79f4-44e9-4726-a5be-fca90e38aaf6"},
+    {"name": "SteveDuplicate", "uuid": "8667BA71B85A4004AF54457A9734EED7"},  # same UUID as Steve
+]
+
+
+def make_index(tmp_path, players=PLAYERS) -> HistoryPlayerIndex:
+    path = tmp_path / "history-players.json"
+    path.write_text(json.dumps(players), encoding="utf-8")
+    return HistoryPlayerIndex(str(path))
+
+
+def names(result) -> list[str]:
+    return [entry["name"] for entry in result[1]]
+
+
+def test_name_prefix_is_case_insensitive(tmp_path):
+    index = make_index(tmp_path)
+    assert len(index) == 4  # the duplicate UUID is dropped
+    assert names(index.search("STEV")) == ["Steve", "stevie_wonder"]
+    assert names(index.search("  alex ")) == ["Alex"]
+    assert index.search("zed") == (0, [])
+    assert index.has_name("notch") and not index.has_name("SteveDuplicate")
+
+
+def test_uuid_prefix_with_or_without_dashes(tmp_path):
+    index = make_index(tmp_path)
+    assert names(index.search("069a79f4-44e9")) == ["stevie_wonder", "Notch"]
+    assert names(index.search("8667BA71B85A")) == ["Steve"]
+    # A prefix that is both a name and hex matches each player once
+    both = make_index(tmp_path, [{"name": "abc", "uuid": "abcdef00-0000-0000-0000-000000000000"}])
+    assert both.search("abc")[0] == 1
+
+
+def test_empty_query_pages_through_everything(tmp_path):
+    index = make_index(tmp_path)
+    total, page = index.search("", offset=1, limit=2)
+    assert total == 4
+    assert [entry["name"] for entry in page] == ["stevie_wonder", "Alex"]
+
+
+def test_record_join_updates_index_and_file(tmp_path):
+    index = make_index(tmp_path)
+    assert index.record_join("Stephanie", "11111111-2222-3333-4444-555555555555")
+    assert not index.record_join("Steve", "8667ba71-b85a-4004-af54-457a9734eed7")
+    assert names(index.search("step")) == ["Stephanie"]
+    with open(index.path, encoding="utf-8") as f:
+        assert [p["name"] for p in json.load(f)][-1] == "Stephanie"
+
+
+def test_file_changed_on_disk_is_reread(tmp_path):
+    index = make_index(tmp_path)
+    assert len(index) == 4
+    with open(index.path, "w", encoding="utf-8") as f:
+        json.dump(PLAYERS[:1] + [{"name": "Herobrine", "uuid": "f84c6a79-0a4e-45e0-879b-cd49ebd4c4e2"}], f)
+    os.utime(index.path, ns=(1, 1))  # a distinct mtime even on coarse filesystem clocks
+    assert names(index.search("h")) == ["Herobrine"]
+    assert len(index) == 2
@@ -0,0 +1,53 @@
+"""player_lists.PlayerListModel reloading and saving against a real file."""
+import json
+import os
+
+import player_lists
+
+STEVE = {"uuid": "8667ba71-b85a-4004-af54-457a9734eed7", "name": "Steve"}
+ALEX = {"uuid": "ec561538-f3fd-461d-aff5-086b22154bce", "name": "Alex"}
+
+
+def write(path, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    # Make sure the signature changes even on filesystems with coarse mtimes
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_missing_file_is_an_empty_list(tmp_path):
+    model = player_lists.PlayerListModel(str(tmp_path / "ops.json"))
+    assert model.entries() == []
+
+
+def test_unparseable_file_keeps_previous_entries_and_retries(tmp_path):
+    path = tmp_path / "whitelist.json"
+    write(path, json.dumps([STEVE]))
+    model = player_lists.PlayerListModel(str(path))
+    assert model.contains(STEVE["uuid"])
+
+    write(path, '[{"uuid": "8667ba71-b85a')  # caught in the middle of the server's write
+    assert not model.refresh()
+    assert [e["name"] for e in model.entries()] == ["Steve"]
+
+    write(path, json.dumps([STEVE, ALEX]))
+    assert model.refresh()
+    assert model.contains(ALEX["uuid"])
+
+
+def test_flush_waits_for_a_readable_file(tmp_path):
+    path = tmp_path / "whitelist.json"
+    write(path, json.dumps([STEVE]))
+    model = player_lists.PlayerListModel(str(path), flush_delay=60)
+    assert model.add(ALEX)
+
+    write(path, "[")
+    model.flush()
+    assert path.read_text(encoding="utf-8") == "["
+    assert model.last_error is not None
+
+    write(path, json.dumps([STEVE]))
+    model.flush()
+    assert {e["name"] for e in json.loads(path.read_text(encoding="utf-8"))} == {"Steve", "Alex"}
+    assert model.last_error is None
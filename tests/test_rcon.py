@@ -0,0 +1,108 @@
+"""rcon.RconConnection / RconPool against benchmarks/fake_rcon.py."""
+import socket
+
+import pytest
+
+import rcon
+from fake_rcon import FakeRcon
+
+
+@pytest.fixture
+def server():
+    fake = FakeRcon(password="secret").start()
+    yield fake
+    fake.stop()
+
+
+def config_for(fake: FakeRcon, password: str = "secret") -> rcon.RconConfig:
+    host, port = fake.address
+    return rcon.RconConfig(host, port, password)
+
+
+def test_wrong_password_raises_auth_error(server):
+    with pytest.raises(rcon.RconAuthError):
+        rcon.RconConnection(config_for(server, "wrong"))
+    assert server.stats["auth_failures"] == 1
+
+
+def test_pool_does_not_retry_auth_failures(server):
+    pool = rcon.RconPool(config_for(server, "wrong"))
+    with pytest.raises(rcon.RconAuthError):
+        pool.execute("list")
+    assert server.stats["connections"] == 1
+
+
+def test_replies_split_over_packets_and_reads_are_reassembled(server):
+    server.reply_chunk = 100
+    server.write_chunk = 7
+    conn = rcon.RconConnection(config_for(server))
+    try:
+        assert conn.execute("repeat 1000") == "x" * 1000
+        assert conn.execute("echo done") == "done"
+    finally:
+        conn.close()
+
+
+def test_commands_are_not_pipelined(server):
+    conn = rcon.RconConnection(config_for(server))
+    try:
+        replies = conn.execute_many([f"echo {i}" for i in range(5)] + ["repeat 9000"])
+    finally:
+        conn.close()
+    assert replies == [str(i) for i in range(5)] + ["x" * 9000]
+    # One marker per command, and the strict stand-in never saw a request arrive early
+    assert server.stats["markers"] == 6
+    assert server.stats["dropped_pipelined"] == 0
+
+
+def test_empty_reply_is_completed_by_its_marker(server):
+    server.replies["say hi"] = ""
+    conn = rcon.RconConnection(config_for(server))
+    try:
+        assert conn.execute("say hi") == ""
+        assert not conn.broken
+    finally:
+        conn.close()
+
+
+def test_too_long_command_is_rejected_before_sending(server):
+    conn = rcon.RconConnection(config_for(server))
+    try:
+        with pytest.raises(rcon.RconError):
+            conn.execute("say " + "a" * rcon.MAX_PACKET_BODY)
+        assert server.stats["commands"] == 0
+    finally:
+        conn.close()
+
+
+def test_submit_resolves_to_reply_lines(server):
+    server.replies["multi"] = "first\nsecond"
+    pool = rcon.RconPool(config_for(server))
+    try:
+        assert pool.submit("multi").result(5) == ["first", "second"]
+        assert pool.submit("multi", wait_response=False).result(5) == []
+    finally:
+        pool.close()
+
+
+def test_submit_runs_queued_commands_by_priority(server):
+    server.reply_delay = 0.2
+    pool = rcon.RconPool(config_for(server), size=1)
+    try:
+        busy = pool.submit("echo busy")
+        low = pool.submit("echo low", priority=20)
+        high = pool.submit("echo high", priority=0)
+        assert [f.result(5) for f in (busy, low, high)] == [["busy"], ["low"], ["high"]]
+    finally:
+        pool.close()
+    assert server.commands == ["echo busy", "echo high", "echo low"]
+
+
+def test_submit_timeout_fails_the_future(server):
+    server.reply_delay = 1.0
+    pool = rcon.RconPool(config_for(server))
+    try:
+        future = pool.submit("echo slow", timeout=0.1)
+        assert isinstance(future.exception(5), socket.timeout)
+    finally:
+        pool.close()
@@ -0,0 +1,58 @@
+"""resource_limits systemd handling: set_limits results and the user-manager probe."""
+import subprocess
+import sys
+
+import pytest
+
+import resource_limits
+
+LIMITED = resource_limits.ResourcePolicy(cpu_quota_percent=200, memory_max_mb=4096)
+
+
+def fake_run(returncode: int, stderr: str = ""):
+    calls = []
+
+    def run(command, **kwargs):
+        calls.append(command)
+        return subprocess.CompletedProcess(command, returncode, "", stderr)
+    return run, calls
+
+
+def test_set_limits_ignores_warnings_on_success(monkeypatch):
+    run, _ = fake_run(0, "Warning: unit file changed on disk")
+    monkeypatch.setattr(resource_limits.subprocess, "run", run)
+    assert resource_limits.set_limits("msl-a.scope", LIMITED) is None
+
+
+def test_set_limits_reports_failures(monkeypatch):
+    run, _ = fake_run(1, "Failed to set unit properties: Access denied\n")
+    monkeypatch.setattr(resource_limits.subprocess, "run", run)
+    assert resource_limits.set_limits("msl-a.scope", LIMITED) == "Failed to set unit properties: Access denied"
+    run, _ = fake_run(4)
+    monkeypatch.setattr(resource_limits.subprocess, "run", run)
+    assert resource_limits.set_limits("msl-a.scope", LIMITED) == "systemctl 退出码 4"
+
+
+@pytest.fixture
+def systemd_host(monkeypatch):
+    if not sys.platform.startswith("linux"):
+        pytest.skip("cgroup limits are Linux-only")
+    monkeypatch.setattr(resource_limits.os.path, "exists", lambda path: True)
+    monkeypatch.setattr(resource_limits.shutil, "which", lambda name: f"/usr/bin/{name}")
+
+
+def test_unreachable_manager_falls_back_to_unwrapped_launch(monkeypatch, systemd_host):
+    run, calls = fake_run(1, "Failed to connect to bus: No medium found")
+    monkeypatch.setattr(resource_limits.subprocess, "run", run)
+    assert resource_limits.cgroup_support() is not None
+    assert calls[0][0] == "systemctl" and calls[0][-1] == "show-environment"
+    command = ["java", "-jar", "server.jar", "nogui"]
+    assert resource_limits.wrap_command(command, "survival", LIMITED) == (command, None)
+
+
+def test_reachable_manager_wraps_in_a_scope(monkeypatch, systemd_host):
+    run, _ = fake_run(0, "")
+    monkeypatch.setattr(resource_limits.subprocess, "run", run)
+    command, unit = resource_limits.wrap_command(["java"], "survival", LIMITED)
+    assert command[0] == "systemd-run" and command[-1] == "java"
+    assert unit and unit.startswith(resource_limits.UNIT_PREFIX + "survival-")
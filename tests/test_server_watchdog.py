@@ -0,0 +1,54 @@
+"""server_watchdog.HangDetector deciding when a silent or warned-about server is hung."""
+import os
+
+import server_watchdog
+
+DONE = "[12:00:00 INFO]: Done (12.345s)! For help, type \"help\""
+WARNING = "[12:01:00 ERROR]: The server has stopped responding! This is (probably) not a Paper bug."
+
+
+def make_detector() -> server_watchdog.HangDetector:
+    # Our own pid, so the CPU sample in a HangReport has a real process to read
+    detector = server_watchdog.HangDetector(os.getpid(), silence_threshold=60.0)
+    detector.feed_line(DONE)
+    return detector
+
+
+def test_chatty_server_is_not_probed():
+    detector = make_detector()
+    probes = []
+    assert detector.check(lambda: probes.append(1) or False) is None
+    assert probes == []
+
+
+def test_silent_server_that_does_not_answer_is_hung():
+    detector = make_detector()
+    detector.last_output -= 120
+    report = detector.check(lambda: False)
+    assert report is not None and report.silent_for >= 120
+
+
+def test_not_started_server_is_never_hung():
+    detector = server_watchdog.HangDetector(os.getpid())
+    detector.last_output -= 120
+    detector.feed_line(WARNING)
+    assert detector.check(lambda: False) is None
+
+
+def test_watchdog_warning_probes_without_waiting_for_silence():
+    detector = make_detector()
+    detector.feed_line(WARNING)
+    detector.feed_line("[12:01:00 ERROR]: ------------------------------")
+    assert detector.check(lambda: False) is not None
+
+
+def test_warning_then_recovery_is_not_killed():
+    detector = make_detector()
+    detector.feed_line(WARNING)
+    assert detector.check(lambda: True) is None
+    detector.feed_line("[12:01:05 INFO]: Player joined the game")
+    # Later ticks: the server answers and talks again, so nothing is reported
+    probes = []
+    assert detector.check(lambda: probes.append(1) or False) is None
+    assert probes == []
+    assert not detector.reported_by_server
@@ -0,0 +1,108 @@
+"""sessions.SessionStore rollups: playtime, hourly peaks, retention and crash recovery."""
+import datetime
+import os
+
+import pytest
+
+import sessions
+
+HOUR = sessions.HOUR
+
+
+def local_noon(days_ago: int) -> float:
+    day = datetime.date.today() - datetime.timedelta(days=days_ago)
+    return datetime.datetime.combine(day, datetime.time(12)).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = sessions.SessionStore(str(tmp_path / "sessions.sqlite3"))
+    yield s
+    s.close()
+
+
+def test_join_and_leave_add_up_playtime(store):
+    t0 = local_noon(3)
+    store.record_join("survival", "Steve", t0)
+    store.record_join("survival", "Steve", t0 + 60)  # duplicate join while online is ignored
+    store.record_leave("survival", "Steve", t0 + 600)
+    store.record_join("survival", "Steve", t0 + 1000)
+    store.record_leave("survival", "Steve", t0 + 1300)
+    store.record_leave("survival", "Alex", t0 + 1400)  # never joined: nothing to close
+
+    summary = store.summary("survival")
+    assert (summary["players"], summary["playtime"], summary["sessions"]) == (1, 900, 2)
+    assert store.top_playtime("survival") == [("Steve", 900, 2, t0 + 1300)]
+    assert store.online("survival") == []
+    assert store.summary("creative")["players"] == 0
+
+
+def test_close_instance_ends_every_open_session(store):
+    t0 = local_noon(1)
+    for player in ("Steve", "Alex"):
+        store.record_join("survival", player, t0)
+    store.close_instance("survival", t0 + 120)
+    assert store.online("survival") == []
+    assert store.summary("survival")["playtime"] == 240
+
+
+def test_hourly_peak_is_carried_across_quiet_hours(store):
+    start = local_noon(2) - local_noon(2) % HOUR
+    store.record_join("survival", "Steve", start + 600)
+    store.record_join("survival", "Alex", start + 1200)
+    store.record_leave("survival", "Steve", start + 3 * HOUR + 300)
+    store.record_leave("survival", "Alex", start + 4 * HOUR + 300)
+    # Nobody joined or left in hours 1 and 2, but both players were online throughout
+    assert store.peak_by_hour("survival", start) == [
+        (start, 2), (start + HOUR, 2), (start + 2 * HOUR, 2), (start + 3 * HOUR, 2), (start + 4 * HOUR, 1),
+    ]
+    assert store.summary("survival")["peak"] == 2
+    day = datetime.date.fromtimestamp(start).isoformat()
+    assert store.peak_by_day("survival", start) == [(day, 2)]
+
+
+def test_day_n_retention(store):
+    # Steve came back the next day, Alex never did; Zoe is too new for the 7-day cohort
+    store.record_join("survival", "Steve", local_noon(10))
+    store.record_leave("survival", "Steve", local_noon(10) + 600)
+    store.record_join("survival", "Steve", local_noon(9))
+    store.record_leave("survival", "Steve", local_noon(9) + 600)
+    store.record_join("survival", "Alex", local_noon(10))
+    store.record_leave("survival", "Alex", local_noon(10) + 600)
+    store.record_join("survival", "Zoe", local_noon(2))
+    store.record_leave("survival", "Zoe", local_noon(2) + 600)
+
+    assert store.retention("survival", days=(1, 7, 30)) == {1: (1, 3), 7: (0, 2), 30: (0, 0)}
+
+
+def test_session_spanning_midnight_counts_for_both_days(store):
+    late = local_noon(5) + 11.5 * HOUR  # 23:30
+    store.record_join("survival", "Steve", late)
+    store.record_leave("survival", "Steve", late + HOUR)
+    assert store.retention("survival", days=(1,)) == {1: (1, 1)}
+
+
+def test_sessions_left_open_are_closed_on_restart(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    crashed = sessions.SessionStore(path)
+    crashed.record_join("survival", "Steve", local_noon(1))
+    crashed.close()  # the panel died without a leave
+
+    store = sessions.SessionStore(path)
+    try:
+        open_rows = store._db.execute("SELECT COUNT(*) FROM sessions WHERE left_at IS NULL").fetchone()[0]
+        assert open_rows == 0
+        # No running time is added for a session of unknown length, but the join still counts
+        assert store.top_playtime("survival") == [("Steve", 0, 1, local_noon(1))]
+        assert store.summary("survival")["players"] == 1
+    finally:
+        store.close()
+
+
+def test_store_lives_in_the_panel_folder(tmp_path):
+    store = sessions.get_session_store(str(tmp_path))
+    try:
+        assert os.path.dirname(store.path) == os.path.join(str(tmp_path), ".panel")
+        assert [e for e in os.listdir(tmp_path) if e != ".panel"] == []
+    finally:
+        sessions._stores.pop(store.path).close()
@@ -0,0 +1,85 @@
+"""slp.ping / probe_all / StatusProber against a minimal status responder."""
+import asyncio
+import json
+import socket
+import threading
+
+import pytest
+
+import slp
+
+
+def _varint(value: int) -> bytes:
+    return slp._encode_varint(value)
+
+
+def _serve_once(listener: socket.socket, payload: bytes) -> None:
+    conn, _ = listener.accept()
+    with conn:
+        conn.recv(1024)  # handshake + status request
+        body = _varint(0) + _varint(len(payload)) + payload
+        conn.sendall(_varint(len(body)) + body)
+        ping = conn.recv(1024)
+        if ping:
+            conn.sendall(ping)  # pong echoes the ping packet
+
+
+@pytest.fixture
+def status_server():
+    listeners = []
+
+    def start(status) -> int:
+        payload = (status if isinstance(status, bytes) else json.dumps(status).encode("utf-8"))
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        listeners.append(listener)
+        threading.Thread(target=_serve_once, args=(listener, payload), daemon=True).start()
+        return listener.getsockname()[1]
+
+    yield start
+    for listener in listeners:
+        listener.close()
+
+
+def test_status_fields_are_parsed(status_server):
+    port = status_server({
+        "version": {"name": "Paper 1.20.4", "protocol": 765},
+        "players": {"online": 2, "max": 20, "sample": [{"name": "Steve", "id": "x"}, {"name": "Alex", "id": "y"}]},
+        "description": {"text": "§aHello", "extra": [{"text": " world"}]},
+    })
+    status = asyncio.run(slp.ping("127.0.0.1", port, timeout=2))
+    assert status.online
+    assert (status.players_online, status.players_max, status.protocol) == (2, 20, 765)
+    assert status.sample == ["Steve", "Alex"]
+    assert status.motd == "Hello world"
+
+
+def test_null_and_odd_fields_are_coerced(status_server):
+    port = status_server({
+        "version": {"name": None, "protocol": "765"},
+        "players": {"online": None, "max": "20", "sample": None},
+        "description": {"text": None},
+    })
+    status = asyncio.run(slp.ping("127.0.0.1", port, timeout=2))
+    assert status.online
+    assert (status.players_online, status.players_max, status.protocol) == (0, 20, 765)
+    assert status.sample == [] and status.motd == "" and status.version == ""
+
+
+def test_one_bad_server_does_not_abort_the_round(status_server):
+    good = status_server({"players": {"online": 1, "max": 10}})
+    bad = status_server(b"[1, 2, 3]")
+    results = asyncio.run(slp.probe_all({"good": ("127.0.0.1", good), "bad": ("127.0.0.1", bad)}, timeout=2))
+    assert results["good"].online and results["good"].players_online == 1
+    assert not results["bad"].online
+
+
+def test_prober_records_every_field(tmp_path):
+    prober = slp.StatusProber(str(tmp_path), lambda: [])
+    status = slp.ServerStatus(online=True, timestamp=100.0, players_online=3, players_max=20, sample=["Steve"],
+                              motd="Hi", version="1.20.4", protocol=765, latency_ms=1.5)
+    prober._record({"lobby": status})
+    for key, value in {"online": 1, "players": 3, "players_max": 20, "sample": ["Steve"], "motd": "Hi",
+                       "protocol": 765, "latency_ms": 1.5}.items():
+        assert prober.series.get("lobby", key).latest() == (100.0, value)
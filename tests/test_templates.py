@@ -0,0 +1,72 @@
+"""templates.create_template / clone_template staging."""
+import os
+
+import pytest
+
+import server_properties
+import templates
+
+
+@pytest.fixture
+def servers_root(tmp_path):
+    source = tmp_path / "survival"
+    (source / "libraries").mkdir(parents=True)
+    (source / "libraries" / "lib.jar").write_bytes(b"jar")
+    (source / "logs").mkdir()
+    (source / "logs" / "latest.log").write_text("log")
+    (source / "server.properties").write_text("server-port=25565\n")
+    return str(tmp_path)
+
+
+def visible_entries(path: str) -> list[str]:
+    return sorted(e for e in os.listdir(path) if not e.startswith("."))
+
+
+def test_clone_gets_its_own_port(servers_root):
+    templates.create_template(os.path.join(servers_root, "survival"), servers_root, "base")
+    assert [t["name"] for t in templates.list_templates(servers_root)] == ["base"]
+    template_dir = os.path.join(templates.templates_root(servers_root), "base")
+    assert not os.path.exists(os.path.join(template_dir, "logs"))
+
+    templates.clone_template(template_dir, os.path.join(servers_root, "copy"), 25570)
+    assert server_properties.get_port(os.path.join(servers_root, "copy")) == 25570
+    assert visible_entries(servers_root) == ["copy", "survival"]
+
+
+def test_failed_clone_leaves_nothing_behind(servers_root, monkeypatch):
+    templates.create_template(os.path.join(servers_root, "survival"), servers_root, "base")
+    template_dir = os.path.join(templates.templates_root(servers_root), "base")
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(templates.server_properties, "write_properties", fail)
+    with pytest.raises(OSError):
+        templates.clone_template(template_dir, os.path.join(servers_root, "copy"), 25570)
+    assert sorted(os.listdir(servers_root)) == [templates.TEMPLATES_DIR_NAME, "survival"]
+
+
+def test_staging_is_hidden_from_listings(servers_root):
+    staging = templates._staging_path(os.path.join(servers_root, "copy"))
+    assert os.path.dirname(staging) == servers_root
+    assert os.path.basename(staging).startswith(".")
+
+
+def test_clones_get_distinct_rcon_and_query_ports(servers_root):
+    server_properties.write_properties(os.path.join(servers_root, "survival"), {
+        "enable-rcon": "true", "rcon.port": "25575", "rcon.password": "secret",
+        "enable-query": "true", "query.port": "25565",
+    })
+    templates.create_template(os.path.join(servers_root, "survival"), servers_root, "base")
+    template_dir = os.path.join(templates.templates_root(servers_root), "base")
+
+    created = templates.clone_many(template_dir, servers_root, "lobby", 2)
+    props = [server_properties.read_properties(os.path.join(servers_root, name)) for name, _ in created]
+    rcon_ports = [p["rcon.port"] for p in props]
+    query_ports = [p["query.port"] for p in props]
+    assert len(set(rcon_ports)) == 2 and "25575" not in rcon_ports
+    assert len(set(query_ports)) == 2 and "25565" not in query_ports
+    assert query_ports == [str(port) for _, port in created]
+    # No clone's RCON port is another instance's server port, or vice versa
+    server_ports = {p["server-port"] for p in props} | {"25565"}
+    assert not server_ports & set(rcon_ports)
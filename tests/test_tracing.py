@@ -0,0 +1,108 @@
+"""tracing: the no-op path while off, summaries, patching and the Chrome trace export."""
+import json
+import threading
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def traced_session():
+    was_enabled = tracing.is_enabled()
+    tracing.reset()
+    tracing.enable()
+    yield
+    tracing.reset()
+    if not was_enabled:
+        tracing.disable()
+
+
+@pytest.fixture
+def untraced():
+    was_enabled = tracing.is_enabled()
+    tracing.reset()
+    tracing.disable()
+    yield
+    if was_enabled:
+        tracing.enable()
+
+
+def test_nothing_is_recorded_while_off(untraced):
+    assert tracing.span("a", x=1) is tracing.span("b")  # the shared no-op span
+
+    @tracing.traced("decorated")
+    def work(value):
+        return value * 2
+
+    with tracing.span("block"):
+        assert work(21) == 42
+    tracing.count("lines", 5)
+    assert tracing.recorded() == (0, 0)
+    assert tracing.summary() == [] and tracing.counters() == {}
+
+
+def test_spans_update_the_summary(traced_session):
+    @tracing.traced("io.save", "io")
+    def save():
+        pass
+
+    for _ in range(3):
+        save()
+    with pytest.raises(ValueError):
+        with tracing.span("broken"):
+            raise ValueError("x")
+    rows = {row["name"]: row for row in tracing.summary()}
+    assert rows["io.save"]["count"] == 3 and rows["io.save"]["category"] == "io"
+    assert rows["io.save"]["max_ms"] <= rows["io.save"]["total_ms"]
+    assert rows["broken"]["count"] == 1
+    assert tracing.recorded() == (4, 4)
+
+
+def test_patch_wraps_once_and_records_described_args(traced_session):
+    class Client:
+        def get(self, url):
+            return url.upper()
+
+    assert tracing.patch(Client, "get", "http.get", "http", lambda self, url: {"url": url})
+    assert not tracing.patch(Client, "get", "http.get", "http")
+    assert Client().get("a") == "A"
+    event = [e for e in tracing.chrome_trace()["traceEvents"] if e["name"] == "http.get"]
+    assert event[0]["args"] == {"url": "a"}
+
+
+def test_chrome_trace_export(traced_session, tmp_path):
+    def worker():
+        with tracing.span("console.read", "io", lines=10):
+            pass
+    thread = threading.Thread(target=worker, name="console-reader")
+    thread.start()
+    thread.join()
+    tracing.count("console.lines", 10)
+    tracing.count("console.lines", 5)
+    with pytest.raises(KeyError):
+        with tracing.span("lookup"):
+            raise KeyError("x")
+
+    path = tmp_path / "out" / "trace.json"
+    assert tracing.export_chrome_trace(str(path)) == 4
+    trace = json.loads(path.read_text(encoding="utf-8"))
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    metadata = [e for e in events if e["ph"] == "M"]
+    assert {"name": "console-reader"} in [e["args"] for e in metadata if e["name"] == "thread_name"]
+
+    read = next(e for e in events if e["name"] == "console.read")
+    assert (read["ph"], read["cat"], read["args"]) == ("X", "io", {"lines": 10})
+    assert read["dur"] >= 0 and read["ts"] >= 0
+    assert next(e for e in events if e["name"] == "lookup")["args"] == {"error": "KeyError"}
+    assert [e["args"] for e in events if e["ph"] == "C"] == [{"console.lines": 10}, {"console.lines": 15}]
+    assert tracing.counters() == {"console.lines": 15}
+
+
+def test_reset_keeps_the_enabled_state(traced_session):
+    with tracing.span("x"):
+        pass
+    tracing.reset()
+    assert tracing.recorded() == (0, 0)
+    assert tracing.is_enabled()
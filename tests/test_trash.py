@@ -0,0 +1,72 @@
+"""trash.TrashCollector staging and background removal."""
+import os
+import threading
+import time
+
+import trash
+
+
+def make_server(root, name: str) -> str:
+    path = os.path.join(root, name)
+    os.makedirs(os.path.join(path, "world", "region"))
+    for i in range(3):
+        with open(os.path.join(path, "world", "region", f"r.{i}.0.mca"), "wb") as f:
+            f.write(b"\0" * 16)
+    return path
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_delete_moves_out_of_the_list_and_purges(tmp_path):
+    root = str(tmp_path)
+    done = threading.Event()
+    collector = trash.TrashCollector(root, on_done=lambda name, error: done.set())
+    trashed = collector.delete(make_server(root, "survival"))
+    assert not os.path.exists(os.path.join(root, "survival"))
+    assert trash.display_name(trashed) == "survival"
+    assert done.wait(5)
+    assert not os.path.exists(trashed)
+
+
+def test_entry_queued_after_the_worker_exited_is_still_removed(tmp_path):
+    root = str(tmp_path)
+    finished = []
+    collector = trash.TrashCollector(root, on_done=lambda name, error: finished.append((name, error)))
+    collector.delete(make_server(root, "first"))
+    assert wait_for(lambda: collector._thread is None)
+
+    trashed = collector.delete(make_server(root, "second"))
+    assert wait_for(lambda: len(finished) == 2)
+    assert finished == [("first", None), ("second", None)]
+    assert not os.path.exists(trashed)
+    assert not collector.busy
+
+
+def test_resume_picks_up_leftovers(tmp_path):
+    root = str(tmp_path)
+    leftover = trash.move_to_trash(make_server(root, "old"), root)
+    collector = trash.TrashCollector(root)
+    assert collector.resume() == 1
+    assert wait_for(lambda: not os.path.exists(leftover))
+
+
+def test_collectors_with_separate_roots_only_resume_their_own_entries(tmp_path):
+    # main keeps console sessions out of servers/.trash, so their leftovers aren't reported as servers
+    servers_root = str(tmp_path)
+    console_root = os.path.join(servers_root, ".panel", "console")
+    leftover = trash.move_to_trash(make_server(servers_root, "20240501-120000"), console_root)
+    assert not os.path.exists(trash.trash_root_for(servers_root))
+
+    reported = []
+    servers = trash.TrashCollector(servers_root, on_done=lambda name, error: reported.append(name))
+    assert servers.resume() == 0
+    assert trash.TrashCollector(console_root).resume() == 1
+    assert wait_for(lambda: not os.path.exists(leftover))
+    assert reported == []
@@ -0,0 +1,67 @@
+"""
+Bounded in-memory time series shared by the panel's telemetry (status pings, lag, GC, ...).
+"""
+import threading
+import time
+from collections import deque
+from typing import Optional, Any, Iterable
+
+DEFAULT_MAXLEN = 2880  # e.g. 24 h at one sample every 30 s
+
+
+def percentile(values: Iterable[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile (p in 0..100); None for no data."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = max(0, min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+class TimeSeries:
+    def __init__(self, maxlen: int = DEFAULT_MAXLEN):
+        self._lock = threading.Lock()
+        self._points: deque = deque(maxlen=maxlen)
+
+    def append(self, value: Any, timestamp: Optional[float] = None) -> None:
+        with self._lock:
+            self._points.append((time.time() if timestamp is None else timestamp, value))
+
+    def points(self, since: Optional[float] = None) -> list[tuple[float, Any]]:
+        with self._lock:
+            if since is None:
+                return list(self._points)
+            return [p for p in self._points if p[0] >= since]
+
+    def values(self, since: Optional[float] = None) -> list[Any]:
+        return [v for _, v in self.points(since)]
+
+    def latest(self) -> Optional[tuple[float, Any]]:
+        with self._lock:
+            return self._points[-1] if self._points else None
+
+    def percentile(self, p: float, since: Optional[float] = None) -> Optional[float]:
+        return percentile((v for v in self.values(since) if v is not None), p)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._points)
+
+
+class SeriesStore:
+    """Named series, created on first use: store.get("lobby", "players").append(3)."""
+
+    def __init__(self, maxlen: int = DEFAULT_MAXLEN):
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, ...], TimeSeries] = {}
+
+    def get(self, *key: str) -> TimeSeries:
+        with self._lock:
+            if key not in self._series:
+                self._series[key] = TimeSeries(self.maxlen)
+            return self._series[key]
+
+    def keys(self) -> list[tuple[str, ...]]:
+        with self._lock:
+            return list(self._series)
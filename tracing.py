@@ -0,0 +1,265 @@
+"""
+Opt-in tracing for the panel's hot paths: spans, timers and counters.
+
+    with tracing.span("plugin.download", "net", file=name):
+        ...
+
+    @tracing.traced("instances.save", "io")
+    def save(self): ...
+
+    tracing.count("console.lines")
+
+While tracing is off (the default) span() returns a shared no-op context
+manager and traced()/count() return after a single flag check, so the hooks
+can stay in the console reader and UI paths permanently. Once enabled, every
+finished span updates a per-name summary (count, total, max) and is kept in a
+bounded event buffer that export_chrome_trace() writes as Chrome trace-event
+JSON (chrome://tracing, ui.perfetto.dev). Counter changes are exported as
+counter tracks.
+
+Tracing is switched on from the panel's 性能追踪 page, or at startup with the
+MSL_TRACE environment variable: MSL_TRACE=1 just enables it, any other value
+is a file the trace is exported to when the process exits.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+TRACE_ENV = "MSL_TRACE"
+MAX_EVENTS = 200_000  # ~30 MB of trace JSON; older events are dropped, summaries keep counting
+
+_enabled = False
+_t0 = time.perf_counter_ns()
+_lock = threading.Lock()
+_events: deque = deque(maxlen=MAX_EVENTS)
+_stats: dict[str, list] = {}  # name -> [category, count, total_ns, max_ns]
+_counters: dict[str, float] = {}
+_threads: dict[int, str] = {}
+_recorded = 0
+_patched: set[tuple[int, str]] = set()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name: str, category: str, args: Optional[dict]):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        _record(self.name, self.category, self.start, end - self.start, self.args)
+        return False
+
+
+def _record(name: str, category: str, start_ns: int, duration_ns: int, args: Optional[dict]) -> None:
+    global _recorded
+    thread = threading.current_thread()
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            _stats[name] = [category, 1, duration_ns, duration_ns]
+        else:
+            stat[1] += 1
+            stat[2] += duration_ns
+            if duration_ns > stat[3]:
+                stat[3] = duration_ns
+        _threads[thread.ident] = thread.name
+        _events.append(("X", name, category, start_ns, duration_ns, thread.ident, args))
+        _recorded += 1
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def reset() -> None:
+    """Drops all recorded spans and counters; the enabled state is kept."""
+    global _recorded
+    with _lock:
+        _events.clear()
+        _stats.clear()
+        _counters.clear()
+        _recorded = 0
+
+
+def span(name: str, category: str = "panel", **args: Any):
+    """Context manager timing the enclosed block. Keyword arguments end up in the trace event's args."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args or None)
+
+
+def traced(name: Optional[str] = None, category: str = "panel") -> Callable:
+    """Decorator form of span(); the span is named after the function unless `name` is given."""
+    def decorator(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label, category, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, amount: float = 1) -> None:
+    """Adds to a named counter (lines read, bytes downloaded, ...)."""
+    global _recorded
+    if not _enabled:
+        return
+    now = time.perf_counter_ns()
+    thread = threading.current_thread()
+    with _lock:
+        value = _counters.get(name, 0) + amount
+        _counters[name] = value
+        _threads[thread.ident] = thread.name
+        _events.append(("C", name, "counter", now, 0, thread.ident, value))
+        _recorded += 1
+
+
+def patch(owner: Any, attribute: str, name: str, category: str = "panel",
+          describe: Optional[Callable[..., dict]] = None) -> bool:
+    """
+    Wraps owner.attribute (a function or method defined elsewhere) in a span.
+    describe(*args, **kwargs) may return the span's args. Patching the same
+    attribute twice is a no-op; returns whether a wrapper was installed.
+    """
+    key = (id(owner), attribute)
+    if key in _patched:
+        return False
+    original = getattr(owner, attribute)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return original(*args, **kwargs)
+        try:
+            details = describe(*args, **kwargs) if describe else None
+        except Exception:
+            details = None
+        with _Span(name, category, details):
+            return original(*args, **kwargs)
+
+    setattr(owner, attribute, wrapper)
+    _patched.add(key)
+    return True
+
+
+def instrument_requests() -> bool:
+    """Times every HTTP request made through requests (module-level helpers included)."""
+    try:
+        import requests
+    except ImportError:
+        return False
+    return patch(requests.Session, "request", "http.request", "http",
+                 lambda session, method, url, *args, **kwargs: {"method": method, "url": str(url).split("?", 1)[0]})
+
+
+def summary(limit: int = 20) -> list[dict[str, Any]]:
+    """Span names by total time, largest first."""
+    with _lock:
+        rows = [(name, *stat) for name, stat in _stats.items()]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return [{
+        "name": name,
+        "category": category,
+        "count": calls,
+        "total_ms": total_ns / 1e6,
+        "mean_ms": total_ns / calls / 1e6,
+        "max_ms": max_ns / 1e6,
+    } for name, category, calls, total_ns, max_ns in rows[:limit]]
+
+
+def counters() -> dict[str, float]:
+    with _lock:
+        return dict(_counters)
+
+
+def recorded() -> tuple[int, int]:
+    """(events recorded since the last reset, events still in the buffer)."""
+    with _lock:
+        return _recorded, len(_events)
+
+
+def chrome_trace() -> dict[str, Any]:
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    trace_events: list[dict[str, Any]] = [
+        {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "MC Server Panel"}},
+    ]
+    for tid, thread_name in threads.items():
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+    for phase, name, category, start_ns, duration_ns, tid, extra in events:
+        event = {"name": name, "cat": category, "ph": phase, "ts": (start_ns - _t0) / 1000, "pid": pid, "tid": tid}
+        if phase == "X":
+            event["dur"] = duration_ns / 1000
+            if extra:
+                event["args"] = extra
+        else:
+            event["args"] = {name: extra}
+        trace_events.append(event)
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path: str) -> int:
+    """Writes the buffered events to `path`; returns how many were written."""
+    trace = chrome_trace()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(trace, f, separators=(",", ":"), default=str)
+    os.replace(tmp, path)
+    return sum(1 for event in trace["traceEvents"] if event["ph"] != "M")
+
+
+def _configure_from_env() -> None:
+    value = os.environ.get(TRACE_ENV, "").strip()
+    if not value or value.lower() in ("0", "false", "no"):
+        return
+    enable()
+    if value.lower() not in ("1", "true", "yes"):
+        atexit.register(export_chrome_trace, value)
+
+
+_configure_from_env()
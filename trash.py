@@ -0,0 +1,156 @@
+"""
+Staged deletion of server instances.
+
+A server directory is first renamed into a ".trash" folder next to it (an atomic
+operation on the same filesystem), so it disappears from the server list at once.
+The slow recursive removal then runs on a background thread, reporting progress.
+Anything left in the trash after a crash or restart is picked up again on startup.
+"""
+import os
+import queue
+import stat
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+TRASH_DIR_NAME = ".trash"
+
+# progress(name, files_removed, files_total); files_total is 0 while still counting
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def trash_root_for(servers_root: str) -> str:
+    return os.path.join(servers_root, TRASH_DIR_NAME)
+
+
+def move_to_trash(path: str, servers_root: str) -> str:
+    """Atomically moves a server directory into the trash folder and returns its new location."""
+    trash_root = trash_root_for(servers_root)
+    os.makedirs(trash_root, exist_ok=True)
+    name = os.path.basename(os.path.normpath(path))
+    target = os.path.join(trash_root, f"{name}.{int(time.time())}.{uuid.uuid4().hex[:8]}")
+    os.rename(path, target)
+    return target
+
+
+def display_name(trashed_path: str) -> str:
+    """Recovers the original server name from a trash entry name."""
+    parts = os.path.basename(trashed_path).rsplit(".", 2)
+    return parts[0] if len(parts) == 3 else os.path.basename(trashed_path)
+
+
+def _count_files(path: str) -> int:
+    total = 0
+    for _, dirs, files in os.walk(path):
+        total += len(files) + len(dirs)
+    return total
+
+
+def _force_remove(func, path):
+    # Read-only files (common for git checkouts / Windows) must be made writable first
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+def purge(path: str, progress: Optional[Callable[[int, int], None]] = None, report_every: int = 500) -> None:
+    """Removes a directory tree bottom-up, calling progress(done, total) periodically."""
+    total = _count_files(path)
+    done = 0
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            full = os.path.join(root, name)
+            try:
+                os.remove(full)
+            except PermissionError:
+                _force_remove(os.remove, full)
+            done += 1
+            if progress and done % report_every == 0:
+                progress(done, total)
+        for name in dirs:
+            full = os.path.join(root, name)
+            if os.path.islink(full):
+                os.remove(full)
+            else:
+                try:
+                    os.rmdir(full)
+                except PermissionError:
+                    _force_remove(os.rmdir, full)
+            done += 1
+    os.rmdir(path)
+    if progress:
+        progress(total, total)
+
+
+class TrashCollector:
+    """Background worker that empties the trash folder one entry at a time."""
+
+    def __init__(self, servers_root: str, on_progress: Optional[ProgressCallback] = None,
+                 on_done: Optional[Callable[[str, Optional[Exception]], None]] = None):
+        self.servers_root = servers_root
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return bool(self._pending)
+
+    def delete(self, path: str) -> str:
+        """Stages a server directory for deletion and schedules its removal. Returns the trash path."""
+        trashed = move_to_trash(path, self.servers_root)
+        self._enqueue(trashed)
+        return trashed
+
+    def resume(self) -> int:
+        """Schedules any entries left in the trash by a previous session. Returns how many were found."""
+        trash_root = trash_root_for(self.servers_root)
+        if not os.path.isdir(trash_root):
+            return 0
+        entries = [os.path.join(trash_root, e) for e in sorted(os.listdir(trash_root))]
+        for entry in entries:
+            self._enqueue(entry)
+        return len(entries)
+
+    def _enqueue(self, trashed: str) -> None:
+        # Starting the worker and the worker deciding to exit happen under the same lock,
+        # so an entry is never queued just after the worker has given up
+        with self._lock:
+            if trashed in self._pending:
+                return
+            self._pending.add(trashed)
+            self._queue.put(trashed)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                trashed = self._queue.get(timeout=1)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            name = display_name(trashed)
+            error = None
+            try:
+                if self.on_progress:
+                    self.on_progress(name, 0, 0)
+                if os.path.isdir(trashed) and not os.path.islink(trashed):
+                    purge(trashed, lambda done, total: self.on_progress and self.on_progress(name, done, total))
+                elif os.path.lexists(trashed):
+                    os.remove(trashed)
+            except Exception as ex:
+                error = ex
+            finally:
+                with self._lock:
+                    self._pending.discard(trashed)
+            if self.on_done:
+                self.on_done(name, error)